@@ -0,0 +1,98 @@
+"""
+InfraWatch Nexus — Live Feed Fan-out
+======================================
+Single-serialization fan-out of snapshot versions to every live client
+(WebSocket and Server-Sent Events).
+
+  - One pump task per worker watches the snapshot bus version.
+  - On a new version it swaps an asyncio.Event; every listener is just a
+    coroutine parked on that event, so idle listeners cost nothing.
+  - Frames (full or per-ward) are built once per version and shared by
+    all listeners.
+"""
+import asyncio
+import json
+
+# Snapshot lists that carry a ward_id and can be filtered per ward
+WARD_SCOPED_KEYS = ("dustbin_states", "ward_risks", "road_ward_risks", "road_issues", "priority_queue",
+                    "van_routes", "segment_risks")
+
+
+def filter_snapshot_by_ward(state: dict, ward_id: str) -> dict:
+    """Copy of the snapshot with ward-scoped lists reduced to one ward."""
+    out = dict(state)
+    for key in WARD_SCOPED_KEYS:
+        if isinstance(state.get(key), list):
+            out[key] = [item for item in state[key] if item.get("ward_id") == ward_id]
+    return out
+
+
+class SnapshotFanout:
+    """Wakes every listener once per published snapshot version."""
+
+    def __init__(self, bus):
+        self.bus = bus
+        self._view = bus.current()
+        self.version = self._view.version
+        self._changed = asyncio.Event()
+        self._frames = {}   # (kind, ward_id) → frame for self.version
+        self.listeners = 0
+
+    # ── pump ────────────────────────────────────────────────────────────
+    def tick(self) -> bool:
+        """Check the bus; wake listeners if the version moved."""
+        view = self.bus.current()
+        if view.version == self.version:
+            return False
+        self._view = view
+        self.version = view.version
+        self._frames = {}
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        return True
+
+    async def run(self, interval: float):
+        while True:
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"[Fanout] Error: {e}")
+            await asyncio.sleep(interval)
+
+    async def wait_for_change(self, after_version: int, timeout: float) -> bool:
+        """Block until version > after_version. False on timeout (heartbeat)."""
+        if self.version > after_version:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    @property
+    def state(self) -> dict:
+        """Parsed snapshot of the current version."""
+        return self._view.state
+
+    # ── frames (built once per version) ─────────────────────────────────
+    def _payload(self, ward_id: str = None) -> bytes:
+        view = self._view
+        if not ward_id:
+            return view.raw
+        return json.dumps(filter_snapshot_by_ward(view.state, ward_id)).encode()
+
+    def sse_frame(self, ward_id: str = None) -> bytes:
+        key = ("sse", ward_id)
+        frame = self._frames.get(key)
+        if frame is None:
+            frame = b"id: %d\nevent: snapshot\ndata: %s\n\n" % (self.version, self._payload(ward_id))
+            self._frames[key] = frame
+        return frame
+
+    def ws_text(self, ward_id: str = None) -> str:
+        key = ("ws", ward_id)
+        text = self._frames.get(key)
+        if text is None:
+            text = self._payload(ward_id).decode()
+            self._frames[key] = text
+        return text
@@ -0,0 +1,179 @@
+"""
+InfraWatch Nexus — Forecast Cache (API side)
+==============================================
+/api/forecast used to call WeatherAPI synchronously on every request.
+Now a per-worker ForecastCache owns the upstream call:
+
+  - Background refresh task fetches the FORECAST_DAYS forecast on the upstream
+    cadence (Cache-Control max-age if sent, else FORECAST_TTL_SEC).
+  - Stale-while-revalidate: a stale entry (< FORECAST_STALE_SEC old) is
+    served immediately while one refresh runs in the background.
+  - Single-flight: concurrent misses share one upstream call.
+  - The ward × step risk matrix (stream_engine/forecast_model.py) is
+    rebuilt only when the forecast or the snapshot version changes;
+    every request in between is a dict lookup.
+
+The blocking HTTP call runs in a worker thread, never on the event loop.
+"""
+import asyncio
+import re
+import time
+
+import numpy as np
+import requests
+
+from stream_engine.forecast_model import extract_features, build_risk_tensor, risk_levels
+
+
+def fetch_forecast_days(url: str, api_key: str, city: str, days: int, timeout: float,
+                        session: requests.Session = None):
+    """Blocking upstream call. Returns (forecastday list, max_age_sec or None)."""
+    http = session or requests
+    resp = http.get(url, params={"key": api_key, "q": city, "days": days, "aqi": "no"},
+                    timeout=timeout)
+    resp.raise_for_status()
+    max_age = None
+    m = re.search(r"max-age=(\d+)", resp.headers.get("Cache-Control", ""))
+    if m:
+        max_age = int(m.group(1))
+    return resp.json().get("forecast", {}).get("forecastday", []), max_age
+
+
+def build_forecast(days: list, ward_report_counts: dict, wards: dict, model, levels: dict,
+                   resolution: str = "daily") -> dict:
+    """
+    Ward × step predictive risk from forecast features + current report counts.
+    The tensor is one vectorized pass; this only shapes it for JSON.
+    """
+    features = extract_features(days, resolution)
+    ward_ids = list(wards.keys())
+    tensor = build_risk_tensor(model, features, ward_ids, ward_report_counts, resolution)
+    risk, severity, reports = tensor["risk"], tensor["severity"], tensor["reports"]
+    labels = risk_levels(risk, levels)
+
+    forecast_data = []
+    for t, label in enumerate(features["labels"]):
+        # Sort by predicted risk descending (stable → registry order on ties)
+        order = np.argsort(-risk[:, t], kind="stable")
+        forecast_data.append({
+            "date": label,
+            "condition": features["conditions"][t],
+            "total_precip_mm": float(features["precip_mm"][t]),
+            "max_wind_kph": float(features["wind_kph"][t]),
+            "weather_severity": float(severity[t]),
+            "wards": [{
+                "ward_id": ward_ids[w],
+                "ward_name": wards[ward_ids[w]]["name"],
+                "current_reports": int(reports[w]),
+                "predicted_risk": float(risk[w, t]),
+                "risk_level": str(labels[w, t]),
+            } for w in order],
+        })
+    return {
+        "forecast": forecast_data,
+        "matrix": {
+            "wards": ward_ids,
+            "steps": features["labels"],
+            "risk": risk.tolist(),
+        },
+        "model": model.name,
+        "resolution": resolution,
+        "compute_ms": tensor["compute_ms"],
+    }
+
+
+class ForecastCache:
+    """Stale-while-revalidate cache around the upstream forecast."""
+
+    def __init__(self, fetch, model, levels: dict, ttl_sec: float, stale_sec: float,
+                 retry_sec: float, min_ttl_sec: float = 60.0):
+        self._fetch = fetch          # () -> (days, max_age_sec | None); blocking
+        self.model = model
+        self.levels = levels
+        self.ttl_sec = ttl_sec
+        self.stale_sec = stale_sec
+        self.retry_sec = retry_sec
+        self.min_ttl_sec = min_ttl_sec
+        self.days = None
+        self.generation = 0          # bumps on every successful fetch
+        self.fetched_at = 0.0
+        self.expires_at = 0.0
+        self.current_ttl = ttl_sec
+        self.last_error = None
+        self.upstream_calls = 0
+        self._inflight = None
+        self._matrices = {}          # resolution → (key, built forecast)
+        self.last_compute_ms = None
+
+    # ── upstream ────────────────────────────────────────────────────────
+    async def _do_refresh(self):
+        self.upstream_calls += 1
+        try:
+            days, max_age = await asyncio.to_thread(self._fetch)
+        except Exception as e:
+            self.last_error = str(e)
+            # Keep serving what we have; try again after retry_sec
+            self.expires_at = time.time() + self.retry_sec
+            return
+        now = time.time()
+        ttl = max(self.min_ttl_sec, max_age) if max_age else self.ttl_sec
+        self.days = days
+        self.generation += 1
+        self.fetched_at = now
+        self.current_ttl = ttl
+        self.expires_at = now + ttl
+        self.last_error = None
+
+    def refresh(self) -> asyncio.Task:
+        """Start a refresh unless one is already running (single-flight)."""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._do_refresh())
+        return self._inflight
+
+    async def run(self):
+        """Background task: refresh whenever the entry expires."""
+        while True:
+            if time.time() >= self.expires_at:
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    print(f"[Forecast] Refresh error: {e}")
+            await asyncio.sleep(max(1.0, min(60.0, self.expires_at - time.time())))
+
+    async def get_days(self):
+        """Forecast days, honouring TTL and stale-while-revalidate."""
+        now = time.time()
+        if now < self.expires_at:
+            # Fresh — or backing off after a failed fetch with nothing cached
+            return self.days or []
+        if self.days is not None and now - self.fetched_at < self.current_ttl + self.stale_sec:
+            self.refresh()           # revalidate in background, serve stale now
+            return self.days
+        await self.refresh()
+        return self.days or []
+
+    # ── derived matrix ──────────────────────────────────────────────────
+    async def get_forecast(self, snapshot_version: int, report_counts, wards: dict,
+                           resolution: str = "daily") -> dict:
+        """Ward × step matrix, recomputed only on new forecast or snapshot version."""
+        days = await self.get_days()
+        key = (self.generation, snapshot_version)
+        cached = self._matrices.get(resolution)
+        if cached is None or cached[0] != key:
+            built = build_forecast(days, report_counts(), wards, self.model, self.levels, resolution)
+            self.last_compute_ms = built["compute_ms"]
+            cached = (key, built)
+            self._matrices[resolution] = cached
+        return cached[1]
+
+    def status(self) -> dict:
+        now = time.time()
+        return {
+            "fetched_at": self.fetched_at or None,
+            "age_sec": round(now - self.fetched_at, 1) if self.fetched_at else None,
+            "stale": bool(self.days is not None and now >= self.expires_at),
+            "upstream_calls": self.upstream_calls,
+            "last_error": self.last_error,
+            "model": self.model.name,
+            "last_compute_ms": self.last_compute_ms,
+        }
@@ -0,0 +1,74 @@
+"""
+InfraWatch Nexus — Report Freshness Tracking
+==============================================
+How long a report takes to go from the API that accepted it to a client
+that can see it (SLA: FRESHNESS_SLA_SEC on the admin map).
+
+Timestamps carried along the path:
+    ingested_at      API, stamped into the event file          (_write_event)
+    newest_ingest    engine, newest ingested_at per stream      (snapshot)
+    computed_at      engine, recompute instant                  (snapshot)
+    version          engine, write instant in epoch-ms          (snapshot)
+    cache load       API reader, snapshot published to the bus  (on_load)
+    WS send          API, snapshot pushed to one client         (on_send)
+
+Each stage is observed as "seconds since ingest" per stream, only when a
+stream's newest_ingest moves forward. The first snapshot after startup and
+the first message to each client only set the baseline, since their
+newest event may be hours old.
+"""
+import time
+
+
+class FreshnessTracker:
+    """Feeds ingest→stage latencies into a histogram labelled (stream, stage)."""
+
+    def __init__(self, histogram, breaches=None, sla_sec: float = 5.0):
+        self.histogram = histogram
+        self.breaches = breaches        # counter labelled (stream,) — ws_send over the SLA
+        self.sla_sec = sla_sec
+        self._loaded = None             # stream → newest ingest already seen by on_load
+        self.last = {}                  # stream → latest per-stage latencies (for /health)
+
+    def _observe(self, stream: str, stage: str, seconds: float):
+        seconds = max(0.0, seconds)
+        self.histogram.labels(stream, stage).observe(seconds)
+        self.last.setdefault(stream, {})[stage] = round(seconds, 3)
+
+    def on_load(self, snapshot: dict, version: int, now: float = None):
+        """Reader published a new snapshot version to the bus."""
+        now = time.time() if now is None else now
+        newest = snapshot.get("newest_ingest") or {}
+        if self._loaded is None:
+            self._loaded = {stream: ingested or 0 for stream, ingested in newest.items()}
+            return
+        computed_at = snapshot.get("computed_at")
+        for stream, ingested in newest.items():
+            if not ingested or ingested <= self._loaded.get(stream, 0):
+                continue
+            self._loaded[stream] = ingested
+            self.last[stream] = {"ingested_at": ingested}
+            if computed_at:
+                self._observe(stream, "compute", computed_at - ingested)
+            if version:
+                self._observe(stream, "write", version / 1000 - ingested)
+            self._observe(stream, "cache_load", now - ingested)
+
+    def on_send(self, seen, snapshot: dict, now: float = None) -> dict:
+        """
+        A snapshot was pushed to one client. `seen` is that connection's
+        newest delivered ingest per stream (None before the first message);
+        returns it updated, to be passed back on the next send.
+        """
+        newest = snapshot.get("newest_ingest") or {}
+        if seen is None:
+            return {stream: ingested or 0 for stream, ingested in newest.items()}
+        now = time.time() if now is None else now
+        for stream, ingested in newest.items():
+            if not ingested or ingested <= seen.get(stream, 0):
+                continue
+            seen[stream] = ingested
+            self._observe(stream, "ws_send", now - ingested)
+            if self.breaches is not None and now - ingested > self.sla_sec:
+                self.breaches.labels(stream).inc()
+        return seen
@@ -0,0 +1,123 @@
+"""
+InfraWatch Nexus — Event-Loop Lag Monitor
+===========================================
+A task that sleeps LOOP_LAG_SAMPLE_SEC at a time and records how late it
+woke up. Anything that blocks the loop (a sync HTTP call, a big
+json.dumps, a slow file read in a handler) shows up as lag for every
+request and WebSocket client on that worker.
+
+The last LOOP_LAG_WINDOW samples are kept; stats() summarizes them for
+/health and the load-test harness.
+
+LoopWatchdog is the slow-callback detector: a plain thread that notices
+when the monitor misses its beat by more than a threshold, grabs the
+loop thread's stack at that moment (the handler that is blocking), and
+logs it with the total blocked time once the loop comes back.
+"""
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+
+class LoopLagMonitor:
+    """Rolling window of event-loop wake-up delays (ms)."""
+
+    def __init__(self, interval: float = 0.25, window: int = 1200):
+        self.interval = interval
+        self._samples = deque(maxlen=window)
+        self.max_ms = 0.0
+        self.total = 0
+        self.last_beat = None       # monotonic time of the loop's last wake-up
+        self.thread_id = None       # thread running the loop
+
+    def record(self, lag_ms: float):
+        self._samples.append(lag_ms)
+        self.total += 1
+        if lag_ms > self.max_ms:
+            self.max_ms = lag_ms
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self.thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_beat = time.monotonic()
+            self.record(max(0.0, (loop.time() - expected) * 1000))
+
+    def stats(self) -> dict:
+        """p50/p95/p99/max over the window, plus the all-time max."""
+        if not self._samples:
+            return {"samples": 0}
+        s = sorted(self._samples)
+        pick = lambda q: round(s[min(len(s) - 1, int(q * len(s)))], 2)
+        return {
+            "samples": len(s),
+            "p50": pick(0.50),
+            "p95": pick(0.95),
+            "p99": pick(0.99),
+            "max": round(s[-1], 2),
+            "max_ever": round(self.max_ms, 2),
+        }
+
+
+class LoopWatchdog:
+    """Logs any stretch where the event loop was blocked longer than threshold_ms."""
+
+    def __init__(self, monitor: LoopLagMonitor, threshold_ms: float = 100, keep: int = 50,
+                 max_frames: int = 12, on_block=None):
+        self.monitor = monitor
+        self.threshold_ms = threshold_ms
+        self.max_frames = max_frames
+        self.on_block = on_block        # called with each finished episode (metrics)
+        self.recent = deque(maxlen=keep)
+        self.blocked = 0
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="loop_watchdog", daemon=True)
+            self._thread.start()
+
+    def _loop_stack(self) -> tuple:
+        """(last max_frames frames of the loop thread, innermost frame outside the stdlib / site-packages)."""
+        frame = sys._current_frames().get(self.monitor.thread_id)
+        if frame is None:
+            return [], None
+        summary = traceback.extract_stack(frame)
+        frame = None
+        lib_prefixes = (sys.base_prefix, sys.prefix)
+        own = [f for f in summary if not f.filename.startswith(lib_prefixes)]
+        handler = f"{own[-1].filename}:{own[-1].lineno} in {own[-1].name}" if own else None
+        return [f"{f.filename}:{f.lineno} in {f.name}" for f in summary[-self.max_frames:]], handler
+
+    def _run(self):
+        poll = max(0.005, self.threshold_ms / 4000)
+        episode = None
+        while True:
+            time.sleep(poll)
+            beat = self.monitor.last_beat
+            if beat is None:
+                continue
+            if episode is None:
+                overdue_ms = (time.monotonic() - beat - self.monitor.interval) * 1000
+                if overdue_ms >= self.threshold_ms:
+                    stack, handler = self._loop_stack()
+                    episode = {"beat": beat, "at": round(time.time(), 3), "handler": handler, "stack": stack}
+            elif beat != episode["beat"]:
+                self._finish(episode, beat)
+                episode = None
+
+    def _finish(self, episode: dict, resumed_beat: float):
+        blocked_ms = round((resumed_beat - episode.pop("beat") - self.monitor.interval) * 1000, 1)
+        episode["blocked_ms"] = blocked_ms
+        self.blocked += 1
+        self.recent.append(episode)
+        where = episode["handler"] or (episode["stack"][-1] if episode["stack"] else "unknown")
+        print(f"[LoopWatchdog] Event loop blocked {blocked_ms:.0f} ms in {where}")
+        if self.on_block:
+            self.on_block(episode)
@@ -3,14 +3,16 @@ InfraWatch Nexus — API Server (Transport Layer)
 =================================================
 FastAPI transport layer. ZERO computation.
   - Validates inputs against dustbin registry
-  - Writes strict event JSONs → Pathway watches
+  - Writes strict event JSONs → Pathway watches (or the SQLite event store)
   - Reads Pathway atomic dashboard output → caches in memory
   - WebSocket broadcasts same state to both portals
-  - Gemini Vision for dustbin photo extraction
+  - Local QR/barcode decode, then Gemini Vision for dustbin photo extraction
   - Admin auth via bearer token
 """
 import asyncio
+import hashlib
 import json
+import math
 import os
 import re
 import sys
@@ -18,22 +20,62 @@ import threading
 import time
 import uuid
 from datetime import datetime, timedelta
+from functools import partial
 from typing import Optional
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Header, File, UploadFile, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Header, File, Form, UploadFile, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel
 from dotenv import load_dotenv
+import requests
 
 load_dotenv()
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config.settings import SERVER_HOST, SERVER_PORT, OUTPUT_DIR, REPORT_DIR, DEDUP_WINDOW_MINUTES
+from config.settings import (
+    SERVER_HOST, SERVER_PORT, OUTPUT_DIR, REPORT_DIR,
+    GEMINI_API_URL, GEMINI_TIMEOUT_SEC, LOOP_LAG_SAMPLE_SEC, LOOP_LAG_WINDOW,
+    METRICS_ENABLED, METRICS_ENGINE_FILE, METRICS_EXPORT_SEC, METRICS_WORKER_DIR, METRICS_WORKER_STALE_SEC,
+    FRESHNESS_SLA_SEC, FRESHNESS_BUCKETS,
+    LOOP_SLOW_CALLBACK_MS, PROFILE_DEFAULT_SEC, PROFILE_MAX_SEC, PROFILE_INTERVAL_MS,
+    PROFILE_CONTROL_FILE, PROFILE_ENGINE_FILE,
+    DEDUP_WINDOW_MINUTES, DEDUP_MAX_ENTRIES, DEDUP_BACKEND, DEDUP_SQLITE_FILE,
+    EVENT_STORE_BACKEND, EVENT_STORE_FILE, EVENT_STORE_BATCH_SIZE, EVENT_STORE_BATCH_MS,
+    ARCHIVE_DIR, ANALYTICS_DEFAULT_DAYS, ANALYTICS_MAX_DAYS, ANALYTICS_MAX_ROWS,
+    FANOUT_POLL_SEC, SSE_HEARTBEAT_SEC, SSE_RETRY_MS, WS_KEEPALIVE_SEC,
+    TRANSITIONS_FILE, TRANSITIONS_PAGE_MAX, TRANSITIONS_BACKLOG,
+    HISTORY_DIR, HISTORY_MAX_POINTS, HISTORY_DEFAULT_SEC, JOURNAL_DIR,
+    QUERY_PAGE_DEFAULT, QUERY_PAGE_MAX,
+    NEAREST_K_DEFAULT, NEAREST_K_MAX, DETECT_CANDIDATES, DETECT_CANDIDATE_RADIUS_KM,
+    WEATHER_FORECAST_URL, WEATHER_CITY, FORECAST_DAYS, FORECAST_MAX_DAYS, FORECAST_TTL_SEC,
+    FORECAST_STALE_SEC, FORECAST_RETRY_SEC, FORECAST_TIMEOUT_SEC,
+    FORECAST_MODEL, FORECAST_COEF_FILE, FORECAST_NORM, FORECAST_LEVELS,
+)
 from config.wards import WARDS, ROAD_SEGMENTS, CITY_CENTER
 from config.dustbins import DUSTBINS, get_dustbin, get_ward_dustbins, validate_dustbin_id
+from api.fanout import SnapshotFanout, filter_snapshot_by_ward
+from api.transition_feed import TransitionFeed
+from api.loop_monitor import LoopLagMonitor, LoopWatchdog
+from api.freshness import FreshnessTracker
+from api.forecast_cache import ForecastCache, fetch_forecast_days
+from stream_engine.forecast_model import load_model as load_forecast_model
+from api.snapshot_bus import create_snapshot_bus
+from api.snapshot_index import SnapshotIndex, QueryError, parse_csv, parse_bbox
+from ingestion.dedup_store import create_dedup_store
+from ingestion.event_store import create_event_store, event_epoch
+from stream_engine.geo import GridIndex
+from stream_engine.timeseries import TimeSeriesStore
+from stream_engine.snapshot_journal import SnapshotJournal
+from stream_engine.metrics import MetricsRegistry, env_enabled, merge_expositions
+from stream_engine.profiler import SamplingProfiler, write_json_atomic
+from stream_engine.event_archive import PYARROW_AVAILABLE, ArchiveQueryError, EventArchive, day_range
+from ingestion.qr_decoder import (
+    decode_dustbin_id, record_remote, available_decoder as available_qr_decoder,
+    get_stats as get_vision_detection_stats,
+)
 
 app = FastAPI(title="InfraWatch Nexus", version="3.0")
 
@@ -59,6 +101,9 @@ FRONTEND_DIR     = os.path.join(PROJECT_ROOT, "frontend")
 
 ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "INFRAWATCH_ADMIN_2026")
 GEMINI_KEY  = os.getenv("GEMINI_API_KEY", "")
+GEMINI_URL  = os.getenv("GEMINI_API_URL", GEMINI_API_URL)
+WX_KEY      = os.getenv("WX_API_KEY", "")
+WX_FORECAST_URL = os.getenv("WX_FORECAST_URL", WEATHER_FORECAST_URL)
 
 DUSTBIN_PATTERN = re.compile(r"MCD-W\d{2}-\d{3}")
 
@@ -68,55 +113,195 @@ for d in [WASTE_REPORT_DIR, ROAD_REPORT_DIR, VAN_LOG_DIR, WEATHER_DIR, PW_OUTPUT
 # ═══════════════════════════════════════════════════════════════════════════
 # GLOBAL STATE — cached from Pathway atomic output (NOT computed here)
 # ═══════════════════════════════════════════════════════════════════════════
-cached_state = {
+EMPTY_STATE = {
     "dustbin_states": [],
     "ward_risks": [],
     "road_issues": [],
     "priority_queue": [],
+    "van_routes": [],
+    "zone_risks": [],
     "city_waste_index": 0,
     "city_road_index": 0,
     "rainfall_mm_hr": 0.0,
     "timestamp": None,
 }
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+SNAPSHOT_BUS_MODE = os.getenv("SNAPSHOT_BUS", "shared" if API_WORKERS > 1 else "local")
+SNAPSHOT_SHM_NAME = os.getenv(
+    "SNAPSHOT_SHM_NAME",
+    "infrawatch_" + hashlib.md5(PW_OUTPUT_DIR.encode()).hexdigest()[:8],
+)
+_snapshot_bus = create_snapshot_bus(SNAPSHOT_BUS_MODE, EMPTY_STATE, name=SNAPSHOT_SHM_NAME,
+                                    lock_dir=PW_OUTPUT_DIR)
+
+
+_fanout = SnapshotFanout(_snapshot_bus)
+_transitions = TransitionFeed(os.path.join(PW_OUTPUT_DIR, TRANSITIONS_FILE), TRANSITIONS_BACKLOG)
+_loop_lag = LoopLagMonitor(LOOP_LAG_SAMPLE_SEC, LOOP_LAG_WINDOW)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# METRICS (this worker's registry; /metrics appends the engine's export)
+# ═══════════════════════════════════════════════════════════════════════════
+# With several workers every series carries worker="<pid>" and each worker
+# exports to METRICS_WORKER_DIR, so any worker can answer for all of them.
+_metrics = MetricsRegistry(env_enabled(METRICS_ENABLED),
+                           const_labels={"worker": str(os.getpid())} if API_WORKERS > 1 else None)
+_metrics_worker_dir = os.path.join(PW_OUTPUT_DIR, METRICS_WORKER_DIR)
+_metrics_worker_file = os.path.join(_metrics_worker_dir, f"{os.getpid()}.prom")
+_M_REQUEST = _metrics.histogram("api_request_seconds", "HTTP handler time (until response start)",
+                                ["method", "route", "status"])
+_M_EVENTS_WRITTEN = _metrics.counter("api_events_written", "Events written for the engine", ["stream"])
+_M_REPORTS_MERGED = _metrics.counter("api_reports_merged", "Citizen reports merged by dedup")
+_M_GEMINI = _metrics.histogram("api_gemini_seconds", "Gemini Vision call time", ["result"],
+                               buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0))
+_M_SNAPSHOT_LOADS = _metrics.counter("api_snapshot_loads", "Reader-side dashboard.jsonl checks", ["result"])
+_M_SNAPSHOT_LOAD = _metrics.histogram("api_snapshot_load_seconds", "Read + parse + publish of a new snapshot")
+_M_WS_SEND = _metrics.histogram("api_ws_send_seconds", "WebSocket snapshot send time")
+_M_WS_BYTES = _metrics.counter("api_ws_bytes", "Bytes pushed to WebSocket clients")
+_M_WS_CONNECTIONS = _metrics.counter("api_ws_connections", "WebSocket connects / disconnects", ["event"])
+_freshness = FreshnessTracker(
+    _metrics.histogram("api_freshness_seconds", "Seconds from report ingest to each delivery stage",
+                       ["stream", "stage"], buckets=FRESHNESS_BUCKETS),
+    _metrics.counter("api_freshness_sla_breaches", "WebSocket deliveries later than the freshness SLA",
+                     ["stream"]),
+    FRESHNESS_SLA_SEC,
+)
+_M_LOOP_BLOCKED = _metrics.histogram("api_loop_blocked_seconds", "Event-loop stalls over the slow-callback threshold",
+                                     buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+_loop_watchdog = LoopWatchdog(_loop_lag, LOOP_SLOW_CALLBACK_MS,
+                              on_block=lambda ep: _M_LOOP_BLOCKED.observe(ep["blocked_ms"] / 1000))
+_metrics.gauge("api_ws_clients", "Connected WebSocket clients").set_function(lambda: len(ws_clients))
+_metrics.gauge("api_sse_listeners", "Connected SSE listeners").set_function(lambda: _fanout.listeners)
+_metrics.gauge("api_transition_listeners", "Connected transition-stream listeners").set_function(
+    lambda: _transitions.listeners)
+_metrics.gauge("api_snapshot_version", "Snapshot version this worker serves").set_function(
+    lambda: _snapshot_bus.current().version)
+
+
+def _snapshot_age() -> float:
+    version = _snapshot_bus.current().version
+    return time.time() - version / 1000 if version > 0 else math.nan
+
+
+_metrics.gauge("api_snapshot_age_seconds", "Age of the served snapshot (from its version)").set_function(
+    _snapshot_age)
+_metrics.gauge("api_loop_lag_p99_seconds", "Event-loop lag p99 over the sampler window").set_function(
+    lambda: _loop_lag.stats().get("p99", math.nan) / 1000)
+
+
+class _RequestMetrics:
+    """ASGI middleware: one histogram sample per HTTP request, labelled by route template."""
+
+    def __init__(self, asgi_app):
+        self.app = asgi_app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _metrics.enabled:
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                route = getattr(scope.get("route"), "path", "unmatched")
+                _M_REQUEST.labels(scope["method"], route, f"{status[0] // 100}xx").observe(
+                    time.perf_counter() - started)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+app.add_middleware(_RequestMetrics)
+
+
+def _state() -> dict:
+    """Current dashboard snapshot (parsed lazily, once per version)."""
+    return _snapshot_bus.current().state
+
+
+_index_lock = threading.Lock()
+_index = None
+
+
+def _snapshot_index() -> SnapshotIndex:
+    """Read indexes for the current snapshot version (built once per version)."""
+    global _index
+    view = _snapshot_bus.current()
+    index = _index
+    if index is None or index.version != view.version:
+        with _index_lock:
+            if _index is None or _index.version != view.version:
+                _index = SnapshotIndex(view.version, view.state, DUSTBINS, WARDS)
+            index = _index
+    return index
+
+
+# Static registry → spatial grid for nearest-dustbin lookups
+_dustbin_locator = GridIndex((did, d["lat"], d["lng"]) for did, d in DUSTBINS.items())
+
+
+def _nearest_dustbins(lat: float, lng: float, k: int, max_km: float = None) -> list:
+    """Top-k registry dustbins around a point, closest first."""
+    return [{
+        "dustbin_id": did,
+        "distance_m": round(dist_km * 1000, 1),
+        "street": DUSTBINS[did]["street"],
+        "ward_id": DUSTBINS[did]["ward_id"],
+        "lat": dlat,
+        "lng": dlng,
+    } for dist_km, did, dlat, dlng in _dustbin_locator.nearest(lat, lng, k, max_km)]
+
+
+def _run_query(collection, ward, zone, state, type_, bbox, sort, cursor, limit, with_type=True):
+    """Shared filter/sort/paginate path. Returns (page, next_cursor, total)."""
+    filters = {"ward_id": parse_csv(ward), "zone": parse_csv(zone), "state": parse_csv(state)}
+    if with_type:
+        filters["type"] = parse_csv(type_)
+    elif type_:
+        raise QueryError("Filter 'type' is not supported here")
+    limit = QUERY_PAGE_DEFAULT if limit is None else limit
+    if not 1 <= limit <= QUERY_PAGE_MAX:
+        raise QueryError(f"limit must be between 1 and {QUERY_PAGE_MAX}")
+    return collection.query(filters, parse_bbox(bbox), sort, cursor, limit)
+
 SERVER_STARTED_AT = datetime.now().isoformat()
 ws_clients = set()
 
+# Optional SQLite event store (EVENT_STORE=sqlite) in place of per-event files
+_event_store = create_event_store(
+    os.getenv("EVENT_STORE", EVENT_STORE_BACKEND), os.path.join(PW_OUTPUT_DIR, EVENT_STORE_FILE),
+    EVENT_STORE_BATCH_SIZE, EVENT_STORE_BATCH_MS,
+)
+
 # ═══════════════════════════════════════════════════════════════════════════
-# IN-MEMORY DEDUP (O(1) per request, rebuilt on restart)
+# DEDUP (TTL-evicting, bounded; optionally shared across workers via SQLite)
 # ═══════════════════════════════════════════════════════════════════════════
-_last_report: dict = {}  # dustbin_id → {"timestamp": str, "overflow": int}
-
+_last_report = create_dedup_store(
+    os.getenv("DEDUP_BACKEND", DEDUP_BACKEND),
+    window_sec=DEDUP_WINDOW_MINUTES * 60,
+    max_entries=DEDUP_MAX_ENTRIES,
+    sqlite_path=os.path.join(PW_OUTPUT_DIR, DEDUP_SQLITE_FILE),
+)
 
-from datetime import timezone
 
 def _is_duplicate(dustbin_id: str, overflow_level: int) -> bool:
-    """Check if same dustbin was reported within DEDUP_WINDOW_MINUTES."""
-    now = datetime.now(timezone.utc)
-    if dustbin_id in _last_report:
-        last = _last_report[dustbin_id]
-        try:
-            last_ts = datetime.fromisoformat(last["timestamp"].replace("Z", "+00:00"))
-            if last_ts.tzinfo is None:
-                last_ts = last_ts.replace(tzinfo=timezone.utc)
-            if (now - last_ts).total_seconds() < DEDUP_WINDOW_MINUTES * 60:
-                # Merge: keep max overflow
-                _last_report[dustbin_id] = {
-                    "timestamp": now.isoformat(),
-                    "overflow": max(last["overflow"], overflow_level),
-                }
-                return True
-        except (ValueError, KeyError, TypeError):
-            pass
-    _last_report[dustbin_id] = {
-        "timestamp": now.isoformat(),
-        "overflow": overflow_level,
-    }
-    return False
+    """Check if same dustbin was reported within DEDUP_WINDOW_MINUTES (merges if so)."""
+    return _last_report.check_and_merge(dustbin_id, overflow_level)
 
 
 def _rebuild_dedup_cache():
-    """On restart, rebuild dedup cache from recent waste event files."""
+    """On restart, rebuild dedup cache from recent waste events (files or event store)."""
     cutoff = datetime.now() - timedelta(minutes=DEDUP_WINDOW_MINUTES)
+    if _event_store is not None:
+        # Index range on (stream, epoch_ts) instead of a directory scan
+        for e in _event_store.window("waste", event_epoch(cutoff.isoformat())):
+            did = e.get("dustbin_id", "")
+            ts = event_epoch(e.get("timestamp"))
+            if did and ts:
+                _last_report.seed(did, ts, e.get("overflow_level", 1))
+        return
     try:
         for fname in os.listdir(WASTE_REPORT_DIR):
             fpath = os.path.join(WASTE_REPORT_DIR, fname)
@@ -129,11 +314,9 @@ def _rebuild_dedup_cache():
                 if isinstance(events, list):
                     for e in events:
                         did = e.get("dustbin_id", "")
-                        if did:
-                            _last_report[did] = {
-                                "timestamp": e.get("timestamp", ""),
-                                "overflow": e.get("overflow_level", 1),
-                            }
+                        ts = event_epoch(e.get("timestamp"))
+                        if did and ts:
+                            _last_report.seed(did, ts, e.get("overflow_level", 1))
             except Exception:
                 continue
     except FileNotFoundError:
@@ -159,18 +342,33 @@ class VanCollectionReport(BaseModel):
 class RoadClearReport(BaseModel):
     event_id: str
 
+class ProfileRequest(BaseModel):
+    target: str = "api"                        # api (this worker) | engine
+    duration_sec: float = PROFILE_DEFAULT_SEC
+    interval_ms: float = PROFILE_INTERVAL_MS
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # HELPERS — write strict event files
 # ═══════════════════════════════════════════════════════════════════════════
-def _write_event(directory: str, prefix: str, data: dict) -> str:
-    """Write a single event as a unique JSON file. Strict schema."""
+async def _write_event(directory: str, prefix: str, data: dict) -> str:
+    """
+    Write a single event as a unique JSON file. Strict schema.
+    With the SQLite event store, waits for the group commit instead.
+    """
+    if _event_store is not None:
+        data["ingested_at"] = round(time.time(), 3)
+        rowid = await asyncio.wrap_future(_event_store.append(os.path.basename(directory), data))
+        _M_EVENTS_WRITTEN.labels(prefix).inc()
+        return f"{EVENT_STORE_FILE}#{rowid}"
     ts = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
     uid = uuid.uuid4().hex[:8]
     filename = f"{prefix}_{ts}_{uid}.json"
     filepath = os.path.join(directory, filename)
+    data["ingested_at"] = round(time.time(), 3)   # freshness: ingest → visible
     with open(filepath, "w") as f:
         json.dump([data], f)  # Array format for Pathway
+    _M_EVENTS_WRITTEN.labels(prefix).inc()
     return filename
 
 
@@ -185,29 +383,67 @@ def _check_admin_token(authorization: Optional[str]) -> bool:
 # CITIZEN ENDPOINTS
 # ═══════════════════════════════════════════════════════════════════════════
 
+def _detection_fallback(message: str, lat: float = None, lng: float = None) -> JSONResponse:
+    """
+    Manual-selection response when no dustbin ID could be detected.
+    Offers only the dustbins nearest the reporter's location (if sent);
+    the full registry is already available from /api/config.
+    """
+    candidates = []
+    if lat is not None and lng is not None:
+        candidates = _nearest_dustbins(lat, lng, DETECT_CANDIDATES, DETECT_CANDIDATE_RADIUS_KM)
+    return JSONResponse(content={
+        "detected_id": None,
+        "fallback": True,
+        "message": message,
+        "candidates": candidates,
+    })
+
+
+def _detection_hit(candidate: str, source: str) -> JSONResponse:
+    """Response for a validated dustbin ID, local or remote."""
+    dustbin = get_dustbin(candidate)
+    return JSONResponse(content={
+        "detected_id": candidate,
+        "fallback": False,
+        "source": source,
+        "street": dustbin["street"],
+        "ward_id": dustbin["ward_id"],
+        "message": f"Detected: {candidate} — {dustbin['street']}. Please confirm.",
+    })
+
+
 @app.post("/api/report/dustbin/detect")
-async def detect_dustbin_from_photo(file: UploadFile = File(...)):
+async def detect_dustbin_from_photo(
+    file: UploadFile = File(...),
+    lat: Optional[float] = Form(None),
+    lng: Optional[float] = Form(None),
+):
     """
-    Step 1 of citizen flow: Upload photo → Gemini Vision → extract dustbin ID.
+    Step 1 of citizen flow: Upload photo → local QR/barcode → Gemini Vision.
+    The local decoder runs first; Gemini is only called when it finds nothing.
     Returns detected ID for user confirmation. Does NOT create event.
+    Optional lat/lng (device location) narrows the fallback to nearby dustbins.
     """
+    image_bytes = await file.read()
+
+    # Local fast path — QR/barcode printed on the bin
+    local_id = await asyncio.to_thread(decode_dustbin_id, image_bytes, validate_dustbin_id)
+    if local_id:
+        return _detection_hit(local_id, "qr")
+
     if not GEMINI_KEY:
-        return JSONResponse(content={
-            "detected_id": None,
-            "fallback": True,
-            "message": "AI not configured. Please select dustbin manually.",
-            "dustbins": {k: {"street": v["street"], "ward_id": v["ward_id"]}
-                         for k, v in DUSTBINS.items()},
-        })
+        return _detection_fallback("AI not configured. Please select dustbin manually.", lat, lng)
 
+    started = time.perf_counter()
+    candidate = None
     try:
         import requests
         import base64
         
-        image_bytes = await file.read()
         img_data = base64.b64encode(image_bytes).decode('utf-8')
         
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={GEMINI_KEY}"
+        url = f"{GEMINI_URL}?key={GEMINI_KEY}"
         headers = {'Content-Type': 'application/json'}
         payload = {
             "contents": [{
@@ -218,7 +454,10 @@ async def detect_dustbin_from_photo(file: UploadFile = File(...)):
             }]
         }
         
-        response = requests.post(url, headers=headers, json=payload, timeout=15)
+        # Off the event loop: a slow Gemini call must not stall every other client
+        response = await asyncio.to_thread(
+            requests.post, url, headers=headers, json=payload, timeout=GEMINI_TIMEOUT_SEC,
+        )
         response.raise_for_status()
         resp_json = response.json()
         
@@ -229,35 +468,27 @@ async def detect_dustbin_from_photo(file: UploadFile = File(...)):
 
         # Strict regex extraction
         match = DUSTBIN_PATTERN.search(raw_text)
-        if match:
+        if match and validate_dustbin_id(match.group(0)):
             candidate = match.group(0)
-            if validate_dustbin_id(candidate):
-                dustbin = get_dustbin(candidate)
-                return JSONResponse(content={
-                    "detected_id": candidate,
-                    "fallback": False,
-                    "street": dustbin["street"],
-                    "ward_id": dustbin["ward_id"],
-                    "message": f"Detected: {candidate} — {dustbin['street']}. Please confirm.",
-                })
-
-        # No valid ID found → fallback
-        return JSONResponse(content={
-            "detected_id": None,
-            "fallback": True,
-            "message": "Could not detect dustbin ID. Please select manually.",
-            "dustbins": {k: {"street": v["street"], "ward_id": v["ward_id"]}
-                         for k, v in DUSTBINS.items()},
-        })
 
-    except Exception as e:
-        return JSONResponse(content={
-            "detected_id": None,
-            "fallback": True,
-            "message": f"AI detection failed. Please select manually.",
-            "dustbins": {k: {"street": v["street"], "ward_id": v["ward_id"]}
-                         for k, v in DUSTBINS.items()},
-        })
+    except Exception:
+        record_remote(False, (time.perf_counter() - started) * 1000)
+        _M_GEMINI.labels("error").observe(time.perf_counter() - started)
+        return _detection_fallback("AI detection failed. Please select manually.", lat, lng)
+
+    record_remote(candidate is not None, (time.perf_counter() - started) * 1000)
+    _M_GEMINI.labels("hit" if candidate else "miss").observe(time.perf_counter() - started)
+    if candidate:
+        return _detection_hit(candidate, "gemini")
+
+    # No valid ID found → fallback
+    return _detection_fallback("Could not detect dustbin ID. Please select manually.", lat, lng)
+
+
+@app.get("/api/vision/stats")
+async def get_vision_stats():
+    """Local QR/barcode vs remote Gemini detection: hit rates and latency."""
+    return JSONResponse(content=get_vision_detection_stats())
 
 
 @app.post("/api/report/dustbin/confirm")
@@ -278,6 +509,7 @@ async def confirm_dustbin_report(report: DustbinConfirmReport):
 
     # Dedup check
     if _is_duplicate(report.dustbin_id, overflow):
+        _M_REPORTS_MERGED.inc()
         return JSONResponse(content={
             "status": "merged",
             "dustbin_id": report.dustbin_id,
@@ -295,7 +527,7 @@ async def confirm_dustbin_report(report: DustbinConfirmReport):
         "source": "citizen",
     }
 
-    filename = _write_event(WASTE_REPORT_DIR, "waste", event)
+    filename = await _write_event(WASTE_REPORT_DIR, "waste", event)
     return JSONResponse(content={
         "status": "accepted",
         "event_id": event["event_id"],
@@ -362,7 +594,7 @@ async def report_road_issue(
         "source": "driver",
     }
 
-    filename = _write_event(ROAD_REPORT_DIR, "road", event)
+    filename = await _write_event(ROAD_REPORT_DIR, "road", event)
     return JSONResponse(content={
         "status": "accepted",
         "event_id": event["event_id"],
@@ -392,7 +624,7 @@ async def simulate_crisis(authorization: Optional[str] = Header(None)):
             "timestamp": datetime.now().isoformat(),
             "source": "demo_bot"
         }
-        _write_event(WASTE_REPORT_DIR, "waste", event)
+        await _write_event(WASTE_REPORT_DIR, "waste", event)
         demo_events.append(event)
         
     # Generate a massive road issue nearby
@@ -406,7 +638,7 @@ async def simulate_crisis(authorization: Optional[str] = Header(None)):
         "timestamp": datetime.now().isoformat(),
         "source": "demo_bot"
     }
-    _write_event(ROAD_REPORT_DIR, "road", road_event)
+    await _write_event(ROAD_REPORT_DIR, "road", road_event)
     
     return JSONResponse(content={
         "status": "success",
@@ -439,7 +671,7 @@ async def report_van_collection(
         "event_type": "collection_confirmed",
     }
 
-    filename = _write_event(VAN_LOG_DIR, "van", event)
+    filename = await _write_event(VAN_LOG_DIR, "van", event)
 
     # Clear dedup cache for this dustbin
     _last_report.pop(report.dustbin_id, None)
@@ -470,7 +702,7 @@ async def report_road_cleared(
     }
 
     # Write a clearing event to the road logs
-    _write_event(ROAD_REPORT_DIR, "road", event)
+    await _write_event(ROAD_REPORT_DIR, "road", event)
 
     return JSONResponse(content={
         "status": "success",
@@ -478,6 +710,161 @@ async def report_road_cleared(
     })
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+# PROFILING (admin token; bounded sampling runs in this worker or the engine)
+# ═══════════════════════════════════════════════════════════════════════════
+_profiler = SamplingProfiler(PROFILE_MAX_SEC)
+PROFILE_TARGETS = ("api", "engine")
+
+
+def _engine_profile() -> dict:
+    """Last status / result the engine wrote; pending while a start request is unanswered."""
+    try:
+        with open(os.path.join(PW_OUTPUT_DIR, PROFILE_ENGINE_FILE), "r") as f:
+            result = json.load(f)
+    except (FileNotFoundError, ValueError):
+        result = {"status": "idle"}
+    try:
+        with open(os.path.join(PW_OUTPUT_DIR, PROFILE_CONTROL_FILE), "r") as f:
+            request = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return result
+    if request.get("action") == "start" and request.get("id") not in (result.get("id"), result.get("last_request")):
+        return {"id": request.get("id"), "status": "pending", "requested_at": request.get("requested_at")}
+    return result
+
+
+def _request_engine_profile(action: str, **fields) -> dict:
+    request = {"id": f"p{int(time.time() * 1000)}", "action": action, "requested_at": time.time(), **fields}
+    write_json_atomic(os.path.join(PW_OUTPUT_DIR, PROFILE_CONTROL_FILE), request)
+    return request
+
+
+@app.post("/api/admin/profile")
+async def start_profile(req: ProfileRequest, authorization: Optional[str] = Header(None)):
+    """
+    Admin: start a sampling profile of this API worker or of the engine.
+    Runs for duration_sec (≤ PROFILE_MAX_SEC), then results stay available
+    from GET /api/admin/profile until the next run.
+    """
+    if not _check_admin_token(authorization):
+        return JSONResponse(content={"error": "Unauthorized"}, status_code=401)
+    if req.target not in PROFILE_TARGETS:
+        return JSONResponse(content={"error": f"target must be one of {', '.join(PROFILE_TARGETS)}"},
+                            status_code=400)
+    if not 0 < req.duration_sec <= PROFILE_MAX_SEC or not 1 <= req.interval_ms <= 1000:
+        return JSONResponse(content={"error": f"duration_sec must be in (0, {PROFILE_MAX_SEC}], "
+                                              "interval_ms in [1, 1000]"}, status_code=400)
+    if req.target == "engine":
+        request = _request_engine_profile("start", duration_sec=req.duration_sec, interval_ms=req.interval_ms)
+        return JSONResponse(content={"status": "requested", "target": "engine", "id": request["id"],
+                                     "message": "The engine picks the request up within ~1s."}, status_code=202)
+    try:
+        info = _profiler.start(req.duration_sec, req.interval_ms / 1000)
+    except RuntimeError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=409)
+    return JSONResponse(content={**info, "target": "api"}, status_code=202)
+
+
+@app.post("/api/admin/profile/stop")
+async def stop_profile(target: str = "api", authorization: Optional[str] = Header(None)):
+    """Admin: end the running profile early (results are kept)."""
+    if not _check_admin_token(authorization):
+        return JSONResponse(content={"error": "Unauthorized"}, status_code=401)
+    if target == "engine":
+        request = _request_engine_profile("stop")
+        return JSONResponse(content={"status": "requested", "target": "engine", "id": request["id"]})
+    if target != "api":
+        return JSONResponse(content={"error": f"target must be one of {', '.join(PROFILE_TARGETS)}"},
+                            status_code=400)
+    info = await asyncio.to_thread(_profiler.stop)
+    return JSONResponse(content={**info, "target": "api"})
+
+
+@app.get("/api/admin/profile")
+async def get_profile(target: str = "api", format: str = "json", authorization: Optional[str] = Header(None)):
+    """
+    Admin: status of the last / running profile. format=collapsed returns
+    the collapsed stacks as text (flamegraph.pl, speedscope, inferno).
+    With several API workers, target=api reports the worker that answers.
+    """
+    if not _check_admin_token(authorization):
+        return JSONResponse(content={"error": "Unauthorized"}, status_code=401)
+    if target not in PROFILE_TARGETS:
+        return JSONResponse(content={"error": f"target must be one of {', '.join(PROFILE_TARGETS)}"},
+                            status_code=400)
+    result = _engine_profile() if target == "engine" else _profiler.result()
+    if format == "collapsed":
+        return Response(content=result.get("collapsed", ""), media_type="text/plain; charset=utf-8")
+    return JSONResponse(content={**result, "target": target})
+
+
+@app.get("/api/admin/slow-callbacks")
+async def get_slow_callbacks(authorization: Optional[str] = Header(None)):
+    """Admin: recent event-loop stalls over LOOP_SLOW_CALLBACK_MS, with the blocking stack."""
+    if not _check_admin_token(authorization):
+        return JSONResponse(content={"error": "Unauthorized"}, status_code=401)
+    return JSONResponse(content={
+        "threshold_ms": _loop_watchdog.threshold_ms,
+        "total": _loop_watchdog.blocked,
+        "recent": list(_loop_watchdog.recent)[::-1],
+    })
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ANALYTICS (admin token; group-by over the engine's daily Parquet archive)
+# ═══════════════════════════════════════════════════════════════════════════
+_archive = {"store": None}
+ANALYTICS_FILTERS = {"ward": "ward_id", "dustbin": "dustbin_id", "zone": "zone",
+                     "issue_type": "issue_type", "source": "source", "event_type": "event_type"}
+
+
+@app.get("/api/admin/analytics")
+async def get_analytics(
+    request: Request,
+    stream: str = "waste",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    group_by: str = "ward_id,day",
+    metrics: str = "count",
+    authorization: Optional[str] = Header(None),
+):
+    """
+    Admin: aggregates over archived (expired) events, e.g. reports per ward
+    per day (?stream=waste&group_by=ward_id,day) or mean time-to-collection
+    per month (?stream=vans&group_by=month&metrics=count,mean:wait_sec).
+    Days are [start, end) as YYYY-MM-DD (default: the last
+    ANALYTICS_DEFAULT_DAYS); filters: ward, dustbin, zone, issue_type,
+    source, event_type (comma-separated values).
+    """
+    if not _check_admin_token(authorization):
+        return JSONResponse(content={"error": "Unauthorized"}, status_code=401)
+    if not PYARROW_AVAILABLE:
+        return JSONResponse(content={"error": "Analytics needs pyarrow"}, status_code=503)
+    default_start, default_end = day_range(ANALYTICS_DEFAULT_DAYS)
+    start, end = start or default_start, end or default_end
+    try:
+        span = (datetime.strptime(end, "%Y-%m-%d") - datetime.strptime(start, "%Y-%m-%d")).days
+    except ValueError:
+        return JSONResponse(content={"error": "start / end must be YYYY-MM-DD"}, status_code=400)
+    if span > ANALYTICS_MAX_DAYS:
+        return JSONResponse(content={"error": f"At most {ANALYTICS_MAX_DAYS} days per query"}, status_code=400)
+    filters = {column: parse_csv(request.query_params.get(param))
+               for param, column in ANALYTICS_FILTERS.items() if request.query_params.get(param)}
+    if _archive["store"] is None:
+        _archive["store"] = EventArchive(os.path.join(PW_OUTPUT_DIR, ARCHIVE_DIR))
+    try:
+        result = await asyncio.to_thread(
+            _archive["store"].query, stream, start, end, parse_csv(group_by),
+            parse_csv(metrics) or ["count"], filters, ANALYTICS_MAX_ROWS,
+        )
+    except ArchiveQueryError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    result["filters"] = filters
+    result["archived_until"] = _archive["store"].watermarks().get(stream)
+    return JSONResponse(content=result)
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # READ-ONLY ENDPOINTS (serve cached Pathway output — NO computation)
 # ═══════════════════════════════════════════════════════════════════════════
@@ -489,118 +876,226 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "engine": "active",
-        "cache_entries": len(_last_report)
+        "cache_entries": len(_last_report),
+        "snapshot_version": _snapshot_bus.current().version,
+        "ws_clients": len(ws_clients),
+        "sse_listeners": _fanout.listeners,
+        "transition_listeners": _transitions.listeners,
+        "loop_lag_ms": _loop_lag.stats(),
+        "loop_blocked": _loop_watchdog.blocked,
+        "freshness_sec": _freshness.last,
     })
 
 
-@app.get("/api/forecast")
-async def get_risk_forecast():
+def _sibling_metrics() -> list:
+    """Other workers' recent exports (skips this worker's and exited workers' files)."""
+    texts, cutoff = [], time.time() - METRICS_WORKER_STALE_SEC
+    try:
+        names = sorted(os.listdir(_metrics_worker_dir))
+    except FileNotFoundError:
+        return texts
+    for name in names:
+        path = os.path.join(_metrics_worker_dir, name)
+        if not name.endswith(".prom") or path == _metrics_worker_file:
+            continue
+        try:
+            if os.path.getmtime(path) < cutoff:
+                continue
+            with open(path, "r") as f:
+                texts.append(f.read())
+        except FileNotFoundError:
+            continue
+    return texts
+
+
+async def _export_worker_metrics():
+    """API_WORKERS>1: keep this worker's export fresh for whichever worker gets scraped."""
+    os.makedirs(_metrics_worker_dir, exist_ok=True)
+    while True:
+        await asyncio.to_thread(_metrics.write, _metrics_worker_file)
+        await asyncio.sleep(METRICS_EXPORT_SEC)
+
+
+@app.get("/metrics")
+async def get_metrics():
     """
-    Predictive Risk Forecast: 3-day ward-level risk projection.
-    Combines WeatherAPI forecast with current report density to predict
-    which wards will become critical before it happens.
+    Prometheus text: the API's registry followed by the engine's last export.
+    With API_WORKERS>1 this covers every live worker — its own registry plus
+    the others' exports (at most METRICS_EXPORT_SEC old), labelled by worker.
     """
-    import requests as req
-    wx_key = os.getenv("WX_API_KEY", "")
-    forecast_data = []
-
-    # Fetch 3-day forecast from WeatherAPI
+    if not _metrics.enabled:
+        return JSONResponse(content={"error": "Metrics disabled (METRICS_ENABLED=0)"}, status_code=404)
+    text = _metrics.render()
+    if API_WORKERS > 1:
+        text = merge_expositions([text] + await asyncio.to_thread(_sibling_metrics))
     try:
-        resp = req.get(
-            "http://api.weatherapi.com/v1/forecast.json",
-            params={"key": wx_key, "q": "Delhi", "days": 3, "aqi": "no"},
-            timeout=8,
-        )
-        resp.raise_for_status()
-        days = resp.json().get("forecast", {}).get("forecastday", [])
-    except Exception:
-        days = []
+        with open(os.path.join(PW_OUTPUT_DIR, METRICS_ENGINE_FILE), "r") as f:
+            text += f.read()
+    except FileNotFoundError:
+        pass
+    return Response(content=text, media_type="text/plain; version=0.0.4; charset=utf-8")
 
-    # Current report counts per ward from cached Pathway state
-    ward_report_counts = {}
-    for ds in cached_state.get("dustbin_states", []):
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FORECAST (background-refreshed cache; never blocks the event loop)
+# ═══════════════════════════════════════════════════════════════════════════
+FORECAST_HORIZON_DAYS = min(FORECAST_MAX_DAYS, max(1, int(os.getenv("FORECAST_DAYS", FORECAST_DAYS))))
+_forecast_cache = ForecastCache(
+    fetch=partial(fetch_forecast_days, WX_FORECAST_URL, WX_KEY, WEATHER_CITY, FORECAST_HORIZON_DAYS,
+                  FORECAST_TIMEOUT_SEC, requests.Session()),
+    model=load_forecast_model(
+        os.getenv("FORECAST_MODEL", FORECAST_MODEL), FORECAST_NORM,
+        os.path.join(PROJECT_ROOT, FORECAST_COEF_FILE),
+    ),
+    levels=FORECAST_LEVELS,
+    ttl_sec=FORECAST_TTL_SEC,
+    stale_sec=FORECAST_STALE_SEC,
+    retry_sec=FORECAST_RETRY_SEC,
+)
+
+
+def _ward_report_counts(state: dict) -> dict:
+    """Report counts per ward from one cached Pathway snapshot."""
+    counts = {}
+    for ds in state.get("dustbin_states", []):
         wid = ds.get("ward_id", "")
-        ward_report_counts[wid] = ward_report_counts.get(wid, 0) + ds.get("report_count", 0)
-
-    # Build per-ward, per-day predictive risk
-    for day_data in days:
-        date = day_data.get("date", "")
-        day_info = day_data.get("day", {})
-        total_precip_mm = day_info.get("totalprecip_mm", 0)
-        max_wind_kph = day_info.get("maxwind_kph", 0)
-        condition = day_info.get("condition", {}).get("text", "Clear")
-
-        # Weather severity multiplier (0.0 to 1.0)
-        rain_factor = min(1.0, total_precip_mm / 50.0)  # 50mm = max severity
-        wind_factor = min(1.0, max_wind_kph / 80.0)
-        weather_severity = round((rain_factor * 0.7 + wind_factor * 0.3), 2)
-
-        ward_forecasts = []
-        for wid, winfo in WARDS.items():
-            current_reports = ward_report_counts.get(wid, 0)
-            # Base risk = current report density (0-1 scale, 10 reports = max)
-            base_risk = min(1.0, current_reports / 10.0)
-            # Predicted risk = base risk amplified by weather forecast
-            predicted_risk = round(min(1.0, base_risk + weather_severity * 0.6), 2)
-            # Risk level label
-            if predicted_risk >= 0.7:
-                level = "CRITICAL"
-            elif predicted_risk >= 0.4:
-                level = "ELEVATED"
-            else:
-                level = "LOW"
-
-            ward_forecasts.append({
-                "ward_id": wid,
-                "ward_name": winfo["name"],
-                "current_reports": current_reports,
-                "predicted_risk": predicted_risk,
-                "risk_level": level,
-            })
-
-        # Sort by predicted risk descending
-        ward_forecasts.sort(key=lambda w: w["predicted_risk"], reverse=True)
-
-        forecast_data.append({
-            "date": date,
-            "condition": condition,
-            "total_precip_mm": total_precip_mm,
-            "max_wind_kph": max_wind_kph,
-            "weather_severity": weather_severity,
-            "wards": ward_forecasts,
-        })
+        counts[wid] = counts.get(wid, 0) + ds.get("report_count", 0)
+    return counts
 
-    return JSONResponse(content={
-        "forecast": forecast_data,
+
+@app.get("/api/forecast")
+async def get_risk_forecast(resolution: str = "daily", format: str = "wards"):
+    """
+    Predictive Risk Forecast: ward-level risk projection per day (or hour).
+    Combines WeatherAPI forecast with current report density to predict
+    which wards will become critical before it happens.
+    Served from memory; the matrix is rebuilt per forecast refresh / snapshot version.
+    format=matrix returns the compact ward × step risk array instead of per-step lists.
+    """
+    if resolution not in ("daily", "hourly") or format not in ("wards", "matrix"):
+        return JSONResponse(content={"error": "resolution must be daily|hourly, format wards|matrix"},
+                            status_code=400)
+    if not WX_KEY:
+        # No key → no upstream call (the background refresher is not started either)
+        content = {"resolution": resolution, "model": _forecast_cache.model.name,
+                   "error": "Forecast unavailable: WX_API_KEY not set",
+                   "generated_at": datetime.now().isoformat(), "cache": _forecast_cache.status()}
+        if format == "matrix":
+            content["matrix"] = {"wards": list(WARDS), "steps": [], "risk": [[] for _ in WARDS]}
+        else:
+            content["forecast"] = []
+        return JSONResponse(content=content)
+    view = _snapshot_bus.current()
+    built = await _forecast_cache.get_forecast(
+        view.version, lambda: _ward_report_counts(view.state), WARDS, resolution,
+    )
+    content = {
+        "resolution": built["resolution"],
+        "model": built["model"],
+        "compute_ms": built["compute_ms"],
         "generated_at": datetime.now().isoformat(),
-    })
+        "cache": _forecast_cache.status(),
+    }
+    if format == "matrix":
+        content["matrix"] = built["matrix"]
+    else:
+        content["forecast"] = built["forecast"]
+    return JSONResponse(content=content)
+
+
+# Read side of the engine's snapshot journal (time-travel queries)
+_journal = SnapshotJournal(os.path.join(PW_OUTPUT_DIR, JOURNAL_DIR))
 
 
 @app.get("/api/dashboard")
-async def get_dashboard():
-    """Full dashboard state — cached from Pathway atomic output. No computation here."""
-    return JSONResponse(content=cached_state)
+async def get_dashboard(ward: Optional[str] = None, at: Optional[str] = None,
+                        version: Optional[int] = None):
+    """
+    Full dashboard state — pre-serialized Pathway output, sent as-is. ?ward= narrows it.
+    ?at=<ISO or epoch> (or ?version=) reconstructs a past snapshot from the journal.
+    """
+    if ward and ward not in WARDS:
+        return JSONResponse(content={"error": f"Unknown ward: {ward}"}, status_code=400)
+    if at or version is not None:
+        try:
+            at_ts = _parse_time(at, None) if at else None
+        except QueryError as e:
+            return JSONResponse(content={"error": str(e)}, status_code=400)
+        state = await asyncio.to_thread(_journal.state_at, at_ts, version)
+        if state is None:
+            return JSONResponse(content={"error": "No journaled snapshot for that instant"},
+                                status_code=404)
+        return JSONResponse(content=filter_snapshot_by_ward(state, ward) if ward else state)
+    if ward:
+        return Response(content=_snapshot_index().ward_payload(ward), media_type="application/json")
+    return Response(content=_snapshot_bus.current().raw, media_type="application/json")
+
+
+@app.get("/api/dustbins/nearest")
+async def get_nearest_dustbins(lat: float, lng: float, k: int = NEAREST_K_DEFAULT,
+                               max_km: Optional[float] = None):
+    """Top-k registry dustbins nearest (lat, lng), with distances (grid index)."""
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return JSONResponse(content={"error": "lat/lng out of range"}, status_code=400)
+    if k < 1 or k > NEAREST_K_MAX:
+        return JSONResponse(content={"error": f"k must be 1–{NEAREST_K_MAX}"}, status_code=400)
+    started = time.perf_counter()
+    results = _nearest_dustbins(lat, lng, k, max_km)
+    return JSONResponse(content={
+        "lat": lat,
+        "lng": lng,
+        "results": results,
+        "count": len(results),
+        "took_us": round((time.perf_counter() - started) * 1e6, 1),
+    })
 
 
 @app.get("/api/dustbins")
-async def get_dustbins():
-    """Return dustbin registry with live states from Pathway output."""
-    # Merge static registry with live states
-    live_states = {}
-    for ds in cached_state.get("dustbin_states", []):
-        live_states[ds.get("dustbin_id", "")] = ds
-
-    result = {}
-    for did, info in DUSTBINS.items():
-        live = live_states.get(did, {})
-        result[did] = {
-            **info,
-            "state": live.get("state", "Clear"),
-            "report_count": live.get("report_count", 0),
-            "overflow_level": live.get("overflow_level", 0),
-        }
+async def get_dustbins(
+    ward: Optional[str] = None, zone: Optional[str] = None, state: Optional[str] = None,
+    type: Optional[str] = None, bbox: Optional[str] = None, sort: Optional[str] = None,
+    cursor: Optional[str] = None, limit: Optional[int] = None,
+):
+    """
+    Dustbin registry with live states, served from per-version indexes.
+    Filters: ward, zone, state (comma-separated), bbox=min_lat,min_lng,max_lat,max_lng.
+    sort=field or -field; cursor from the previous page's next_cursor.
+    """
+    index = _snapshot_index()
+    try:
+        page, next_cursor, total = _run_query(index.dustbins, ward, zone, state, type, bbox,
+                                              sort, cursor, limit, with_type=False)
+    except QueryError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    return JSONResponse(content={
+        "dustbins": {d["dustbin_id"]: d for d in page},
+        "count": len(page),
+        "total": total,
+        "next_cursor": next_cursor,
+        "snapshot_version": index.version,
+    })
+
 
-    return JSONResponse(content={"dustbins": result})
+@app.get("/api/road-issues")
+async def get_road_issues(
+    ward: Optional[str] = None, zone: Optional[str] = None, state: Optional[str] = None,
+    type: Optional[str] = None, bbox: Optional[str] = None, sort: Optional[str] = None,
+    cursor: Optional[str] = None, limit: Optional[int] = None,
+):
+    """Active road issues; same filters as /api/dustbins plus type (issue_type)."""
+    index = _snapshot_index()
+    try:
+        page, next_cursor, total = _run_query(index.road_issues, ward, zone, state, type, bbox,
+                                              sort, cursor, limit)
+    except QueryError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    return JSONResponse(content={
+        "road_issues": page,
+        "count": len(page),
+        "total": total,
+        "next_cursor": next_cursor,
+        "snapshot_version": index.version,
+    })
 
 
 @app.get("/api/config")
@@ -614,20 +1109,149 @@ async def get_config():
 
 
 @app.get("/api/priority")
-async def get_priority():
-    """Priority queue — served from Pathway output."""
+async def get_priority(
+    ward: Optional[str] = None, zone: Optional[str] = None, state: Optional[str] = None,
+    type: Optional[str] = None, bbox: Optional[str] = None, sort: Optional[str] = None,
+    cursor: Optional[str] = None, limit: Optional[int] = None,
+):
+    """Priority queue — served from Pathway output, filterable like /api/dustbins."""
+    index = _snapshot_index()
+    try:
+        page, next_cursor, total = _run_query(index.priority_queue, ward, zone, state, type, bbox,
+                                              sort, cursor, limit)
+    except QueryError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
     return JSONResponse(content={
-        "priority_queue": cached_state.get("priority_queue", []),
-        "timestamp": cached_state.get("timestamp"),
+        "priority_queue": page,
+        "count": len(page),
+        "total": total,
+        "next_cursor": next_cursor,
+        "timestamp": index.state.get("timestamp"),
+        "snapshot_version": index.version,
     })
 
 
+@app.get("/api/zones")
+async def get_zones(zone: Optional[str] = None):
+    """Zone rollups (risk indices, counts, top offender wards) + city totals from the engine."""
+    view = _snapshot_bus.current()
+    state = view.state
+    zones = state.get("zone_risks", [])
+    if zone:
+        zones = [z for z in zones if z.get("zone", "").lower() == zone.lower()]
+        if not zones:
+            return JSONResponse(content={"error": f"Unknown zone: {zone}"}, status_code=404)
+    return JSONResponse(content={
+        "zones": zones,
+        "city": state.get("city_rollup"),
+        "timestamp": state.get("timestamp"),
+        "snapshot_version": view.version,
+    })
+
+
+@app.get("/api/routes")
+async def get_routes(ward: Optional[str] = None):
+    """Van routes planned by the Pathway engine (per ward, one entry per van with stops)."""
+    view = _snapshot_bus.current()
+    state = view.state
+    routes = state.get("van_routes", [])
+    if ward:
+        if ward not in WARDS:
+            return JSONResponse(content={"error": f"Unknown ward: {ward}"}, status_code=400)
+        routes = [r for r in routes if r.get("ward_id") == ward]
+    return JSONResponse(content={
+        "routes": routes,
+        "count": len(routes),
+        "stats": state.get("route_stats"),
+        "timestamp": state.get("timestamp"),
+        "snapshot_version": view.version,
+    })
+
+
+_history = {"store": None, "sig": None}
+
+
+def _history_store():
+    """Read-only view of the engine's history store, reopened if the engine re-created it."""
+    directory = os.path.join(PW_OUTPUT_DIR, HISTORY_DIR)
+    try:
+        st = os.stat(os.path.join(directory, "meta.json"))
+    except FileNotFoundError:
+        return None
+    sig = (st.st_mtime_ns, st.st_ino)
+    if sig != _history["sig"]:
+        _history["store"], _history["sig"] = TimeSeriesStore.open_readonly(directory), sig
+    return _history["store"]
+
+
+def _parse_time(value: Optional[str], default: float) -> float:
+    """Epoch seconds or ISO-8601 (naive = server local time) → epoch seconds."""
+    if not value:
+        return default
+    try:
+        ts = float(value)
+    except ValueError:
+        pass
+    else:
+        if not math.isfinite(ts):       # float() accepts "nan" / "inf"
+            raise QueryError(f"Invalid time: {value}")
+        return ts
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        raise QueryError(f"Invalid time: {value}")
+
+
+@app.get("/api/history")
+async def get_history(
+    ward: Optional[str] = None,
+    metrics: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    resolution: str = "auto",
+):
+    """
+    Metric history for one ward (or the city when ?ward is omitted) over
+    [start, end]. resolution=1m|15m|1h, or auto (finest tier that fits
+    HISTORY_MAX_POINTS buckets). Buckets without samples are left out.
+    """
+    store = _history_store()
+    if store is None:
+        return JSONResponse(content={"error": "History not available yet"}, status_code=503)
+    if ward and ward not in WARDS:
+        return JSONResponse(content={"error": f"Unknown ward: {ward}"}, status_code=400)
+    prefix = f"{ward}." if ward else "city."
+    available = [name[len(prefix):] for name in store.series if name.startswith(prefix)]
+    wanted = parse_csv(metrics) or available
+    unknown = [m for m in wanted if m not in available]
+    if unknown:
+        return JSONResponse(content={"error": f"Unknown metric: {', '.join(unknown)}",
+                                     "available": available}, status_code=400)
+    tier_names = [t.name for t in store.tiers]
+    if resolution != "auto" and resolution not in tier_names:
+        return JSONResponse(content={"error": f"resolution must be auto or one of {tier_names}"},
+                            status_code=400)
+    try:
+        t_end = _parse_time(end, time.time())
+        t_start = _parse_time(start, t_end - HISTORY_DEFAULT_SEC)
+    except QueryError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    if t_start > t_end:
+        return JSONResponse(content={"error": "start must be before end"}, status_code=400)
+
+    result = store.query([prefix + m for m in wanted], t_start, t_end,
+                         None if resolution == "auto" else resolution, HISTORY_MAX_POINTS)
+    result["series"] = {name[len(prefix):]: v for name, v in result["series"].items()}
+    return JSONResponse(content={"scope": ward or "city", "start": t_start, "end": t_end, **result})
+
+
 @app.get("/api/weather")
 async def get_weather():
     """Current weather — from Pathway output."""
+    state = _state()
     return JSONResponse(content={
-        "rainfall_mm_hr": cached_state.get("rainfall_mm_hr", 0),
-        "timestamp": cached_state.get("timestamp"),
+        "rainfall_mm_hr": state.get("rainfall_mm_hr", 0),
+        "timestamp": state.get("timestamp"),
     })
 
 
@@ -635,37 +1259,78 @@ async def get_weather():
 # PATHWAY OUTPUT READER (background thread — reads atomic snapshot)
 # ═══════════════════════════════════════════════════════════════════════════
 
-def _read_dashboard_snapshot():
-    """Read last complete line from Pathway's atomic dashboard.jsonl."""
+def _read_dashboard_raw():
+    """Read last complete line (bytes) from Pathway's atomic dashboard.jsonl."""
     filepath = os.path.join(PW_OUTPUT_DIR, "dashboard.jsonl")
     if not os.path.exists(filepath):
         return None
     try:
-        with open(filepath, "r") as f:
-            lines = f.readlines()
-        if not lines:
-            return None
+        with open(filepath, "rb") as f:
+            lines = f.read().splitlines()
         # Read last non-empty line (atomic snapshot)
         for line in reversed(lines):
             line = line.strip()
             if line:
-                return json.loads(line)
+                return line
         return None
     except Exception:
         return None
 
 
+def _read_dashboard_snapshot():
+    """Parsed variant of _read_dashboard_raw()."""
+    raw = _read_dashboard_raw()
+    try:
+        return json.loads(raw) if raw else None
+    except ValueError:
+        return None
+
+
+def _load_snapshot_into_bus(last_sig=None):
+    """
+    Reader side: if dashboard.jsonl changed (mtime/size), parse it once and
+    publish the original bytes. Returns the file signature seen.
+    """
+    filepath = os.path.join(PW_OUTPUT_DIR, "dashboard.jsonl")
+    try:
+        st = os.stat(filepath)
+    except FileNotFoundError:
+        return last_sig
+    sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+    if sig == last_sig:
+        _M_SNAPSHOT_LOADS.labels("unchanged").inc()
+        return sig
+    started = time.perf_counter()
+    raw = _read_dashboard_raw()
+    if not raw:
+        return last_sig
+    snapshot = json.loads(raw)
+    version = snapshot.get("version") or st.st_mtime_ns // 1_000_000
+    if version != _snapshot_bus.current().version:
+        _snapshot_bus.publish(version, raw, snapshot)
+        _M_SNAPSHOT_LOAD.observe(time.perf_counter() - started)
+        _freshness.on_load(snapshot, version)
+        _M_SNAPSHOT_LOADS.labels("published").inc()
+    return sig
+
+
 def _cache_updater():
-    """Background thread: re-read Pathway atomic output every 3 seconds."""
-    global cached_state
+    """
+    Background thread. The one reader per host re-reads Pathway atomic
+    output every 3 seconds; other workers pull new versions off the bus.
+    """
+    last_sig = None
     while True:
+        is_reader = _snapshot_bus.try_become_reader()
         try:
-            snapshot = _read_dashboard_snapshot()
-            if snapshot:
-                cached_state = snapshot
+            if is_reader:
+                last_sig = _load_snapshot_into_bus(last_sig)
+            else:
+                _snapshot_bus.poll()
         except Exception as e:
             print(f"[Cache] Error: {e}")
-        time.sleep(3)
+            _M_SNAPSHOT_LOADS.labels("error").inc()
+        time.sleep(3 if is_reader else 0.25)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -674,17 +1339,152 @@ def _cache_updater():
 
 @app.websocket("/ws")
 async def websocket_stream(websocket: WebSocket):
-    """Push same dashboard state to ALL connected clients every 4 seconds."""
+    """Push dashboard state to ALL connected clients on every new snapshot version."""
     await websocket.accept()
     ws_clients.add(websocket)
+    _M_WS_CONNECTIONS.labels("open").inc()
+    sent = -1
+    seen = None   # newest ingest per stream delivered to this client
     try:
         while True:
-            await websocket.send_json(cached_state)
-            await asyncio.sleep(4)
+            sent = _fanout.version
+            text = _fanout.ws_text()
+            with _M_WS_SEND.time():
+                await websocket.send_text(text)
+            _M_WS_BYTES.inc(len(text))
+            seen = _freshness.on_send(seen, _fanout.state)
+            # Wake on the next version, or re-send after WS_KEEPALIVE_SEC
+            await _fanout.wait_for_change(sent, WS_KEEPALIVE_SEC)
     except WebSocketDisconnect:
         ws_clients.discard(websocket)
     except Exception:
         ws_clients.discard(websocket)
+    _M_WS_CONNECTIONS.labels("close").inc()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SERVER-SENT EVENTS (one-way live feed for kiosks / displays)
+# ═══════════════════════════════════════════════════════════════════════════
+
+@app.get("/api/stream")
+async def stream_snapshots(
+    request: Request,
+    ward: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    SSE feed: one `snapshot` event per published version (id = version).
+    Resumes from Last-Event-ID; ?ward=W05 limits ward-scoped lists.
+    """
+    if ward and ward not in WARDS:
+        return JSONResponse(content={"error": f"Unknown ward: {ward}"}, status_code=400)
+    try:
+        resume_from = int(last_event_id) if last_event_id else -1
+    except ValueError:
+        resume_from = -1
+
+    async def events():
+        _fanout.listeners += 1
+        sent = resume_from
+        try:
+            yield b"retry: %d\n\n" % SSE_RETRY_MS
+            while True:
+                if _fanout.version > sent:
+                    sent = _fanout.version
+                    yield _fanout.sse_frame(ward)
+                elif not await _fanout.wait_for_change(sent, SSE_HEARTBEAT_SEC):
+                    if await request.is_disconnected():
+                        break
+                    yield b": heartbeat\n\n"
+        finally:
+            _fanout.listeners -= 1
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+
+# Entity kinds emitted by stream_engine/hysteresis.StateMachine
+TRANSITION_KINDS = ("dustbin", "ward_waste", "ward_road", "segment")
+
+
+def _transition_filters(ward: Optional[str], kind: Optional[str]):
+    """Validate ?ward / ?kind for the transition endpoints → (kinds, error response)."""
+    if ward and ward not in WARDS:
+        return None, JSONResponse(content={"error": f"Unknown ward: {ward}"}, status_code=400)
+    kinds = parse_csv(kind)
+    unknown = [k for k in kinds or [] if k not in TRANSITION_KINDS]
+    if unknown:
+        return None, JSONResponse(content={"error": f"Unknown kind: {', '.join(unknown)}"}, status_code=400)
+    return kinds, None
+
+
+@app.get("/api/transitions")
+async def get_transitions(
+    after: int = 0,
+    ward: Optional[str] = None,
+    kind: Optional[str] = None,
+    limit: int = TRANSITIONS_PAGE_MAX,
+):
+    """
+    State transitions with seq > after (oldest first). `truncated` means
+    events between `after` and the oldest one kept were dropped — re-sync
+    from /api/dashboard.
+    """
+    kinds, error = _transition_filters(ward, kind)
+    if error:
+        return error
+    limit = max(1, min(limit, TRANSITIONS_PAGE_MAX))
+    events = _transitions.since(after, ward, kinds, limit)
+    return JSONResponse(content={
+        "transitions": events,
+        "count": len(events),
+        "last_seq": _transitions.last_seq,
+        "truncated": bool(_transitions.oldest_seq) and after < _transitions.oldest_seq - 1,
+    })
+
+
+@app.get("/api/transitions/stream")
+async def stream_transitions(
+    request: Request,
+    ward: Optional[str] = None,
+    kind: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    SSE feed: one compact `transition` event per state change (id = seq).
+    Resumes from Last-Event-ID; without it only new transitions are sent.
+    """
+    kinds, error = _transition_filters(ward, kind)
+    if error:
+        return error
+    try:
+        resume_from = int(last_event_id) if last_event_id else _transitions.last_seq
+    except ValueError:
+        resume_from = _transitions.last_seq
+
+    async def events():
+        _transitions.listeners += 1
+        sent = resume_from
+        try:
+            yield b"retry: %d\n\n" % SSE_RETRY_MS
+            while True:
+                if _transitions.last_seq > sent:
+                    for event in _transitions.since(sent, ward, kinds):
+                        yield _transitions.sse_frame(event)
+                    sent = _transitions.last_seq
+                elif not await _transitions.wait_for_change(sent, SSE_HEARTBEAT_SEC):
+                    if await request.is_disconnected():
+                        break
+                    yield b": heartbeat\n\n"
+        finally:
+            _transitions.listeners -= 1
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -723,7 +1523,9 @@ async def startup():
     print(f"  Admin Portal    : http://localhost:{SERVER_PORT}/admin")
     print(f"  Dustbins loaded : {len(DUSTBINS)}")
     print(f"  Gemini AI       : {'✓ Configured' if GEMINI_KEY else '✗ Manual fallback'}")
+    print(f"  QR/barcode      : {available_qr_decoder() or '✗ Not installed (remote only)'}")
     print(f"  Pathway output  : {PW_OUTPUT_DIR}")
+    print(f"  Event store     : {'SQLite ' + _event_store.path if _event_store else 'JSON files'}")
 
     _rebuild_dedup_cache()
     print(f"  Dedup cache     : {len(_last_report)} recent entries")
@@ -731,6 +1533,20 @@ async def startup():
     # Start background cache updater
     t = threading.Thread(target=_cache_updater, daemon=True)
     t.start()
+    print(f"  Snapshot bus    : {SNAPSHOT_BUS_MODE} (pid {os.getpid()})")
+
+    # Live feed pump: wakes WS + SSE listeners once per snapshot version
+    asyncio.create_task(_fanout.run(FANOUT_POLL_SEC))
+    asyncio.create_task(_transitions.run(FANOUT_POLL_SEC))
+    asyncio.create_task(_loop_lag.run())
+    _loop_watchdog.start()
+    if API_WORKERS > 1 and _metrics.enabled:
+        asyncio.create_task(_export_worker_metrics())
+
+    # Forecast refresher (only if there is a key to call upstream with)
+    if WX_KEY:
+        asyncio.create_task(_forecast_cache.run())
+        print(f"  Forecast cache  : refresh every {FORECAST_TTL_SEC}s (stale-while-revalidate)")
     print("  Cache updater started (3s interval)")
 
     # Start keep-alive self-ping (prevents Render free-tier spin-down)
@@ -752,6 +1568,17 @@ async def startup():
     print("  Keep-alive ping started (13min interval)")
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    # Release the shared-memory snapshot segment (the last worker out removes it)
+    _snapshot_bus.close()
+    if API_WORKERS > 1:
+        try:
+            os.unlink(_metrics_worker_file)
+        except FileNotFoundError:
+            pass
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # RUN
 # ═══════════════════════════════════════════════════════════════════════════
@@ -760,4 +1587,8 @@ if __name__ == "__main__":
     import uvicorn
     # Render provides PORT in the environment. Bind to it securely.
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run("api.server:app", host="0.0.0.0", port=port, reload=False)
+    if API_WORKERS > 1:
+        # Workers inherit these: one shared snapshot reader, host-wide dedup
+        os.environ.setdefault("SNAPSHOT_BUS", "shared")
+        os.environ.setdefault("DEDUP_BACKEND", "sqlite")
+    uvicorn.run("api.server:app", host="0.0.0.0", port=port, reload=False, workers=API_WORKERS)
@@ -0,0 +1,201 @@
+"""
+InfraWatch Nexus — Snapshot Bus (API side)
+============================================
+One reader per host parses Pathway's dashboard.jsonl; every API worker
+gets the same pre-serialized bytes through a shared-memory segment.
+
+  - LocalSnapshotBus  : single-process mode (default). The cache updater
+                        publishes straight into memory.
+  - SharedSnapshotBus : multi-worker mode. An mmap'd file under /dev/shm
+                        holds [header | JSON bytes]. The worker holding
+                        an flock on the lock file is the only reader of
+                        dashboard.jsonl; the rest poll the 32-byte header
+                        and copy the payload only when the version moves.
+                        If the reader dies, another worker takes the lock.
+                        Every worker holds a shared flock on the segment;
+                        the last one to close() removes it from /dev/shm.
+
+Workers hold a SnapshotView: version + raw bytes, parsed lazily on the
+first endpoint that needs structured access.
+"""
+import fcntl
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+_HEADER = struct.Struct("<4sIQQQ")   # magic, reserved, seq, version, length
+_MAGIC = b"IWSB"
+_MIN_CAPACITY = 1 << 20               # 1 MiB, grows on demand
+
+
+class SnapshotView:
+    """Immutable (version, bytes) pair; JSON parsed at most once."""
+
+    __slots__ = ("version", "raw", "_state", "_lock")
+
+    def __init__(self, version: int, raw: bytes, state: dict = None):
+        self.version = version
+        self.raw = raw
+        self._state = state
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> dict:
+        if self._state is None:
+            with self._lock:
+                if self._state is None:
+                    self._state = json.loads(self.raw)
+        return self._state
+
+
+def _empty_view(default_state: dict) -> SnapshotView:
+    return SnapshotView(0, json.dumps(default_state).encode(), default_state)
+
+
+class LocalSnapshotBus:
+    """In-process bus: the publishing thread and the handlers share memory."""
+
+    is_reader = True
+
+    def __init__(self, default_state: dict):
+        self._view = _empty_view(default_state)
+
+    def publish(self, version: int, raw: bytes, state: dict = None):
+        self._view = SnapshotView(version, raw, state)
+
+    def current(self) -> SnapshotView:
+        return self._view
+
+    def poll(self) -> bool:
+        """Nothing to pull in single-process mode."""
+        return False
+
+    def try_become_reader(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+
+class SharedSnapshotBus:
+    """Cross-process bus over an mmap'd file guarded by a seqlock header."""
+
+    def __init__(self, default_state: dict, name: str = "infrawatch_snapshot", lock_dir: str = None):
+        shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        self.path = os.path.join(shm_dir, name)
+        self.lock_path = os.path.join(lock_dir or shm_dir, f"{name}.lock")
+        self.is_reader = False
+        self._lock_fd = None
+        self._view = _empty_view(default_state)
+
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_SH)                # "segment in use" (see close)
+        if os.fstat(self._fd).st_size < _HEADER.size + _MIN_CAPACITY:
+            os.ftruncate(self._fd, _HEADER.size + _MIN_CAPACITY)
+        self._map_size = 0
+        self._mm = None
+        self._remap()
+
+    # ── mapping ─────────────────────────────────────────────────────────
+    def _remap(self):
+        size = os.fstat(self._fd).st_size
+        if size != self._map_size:
+            if self._mm is not None:
+                self._mm.close()
+            self._mm = mmap.mmap(self._fd, size)
+            self._map_size = size
+
+    def _read_header(self):
+        return _HEADER.unpack_from(self._mm, 0)
+
+    # ── leadership ──────────────────────────────────────────────────────
+    def try_become_reader(self) -> bool:
+        """Non-blocking flock; the holder is the only dashboard.jsonl reader."""
+        if self.is_reader:
+            return True
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        self.is_reader = True
+        return True
+
+    # ── writer ──────────────────────────────────────────────────────────
+    def publish(self, version: int, raw: bytes, state: dict = None):
+        if self._fd is None:
+            return                                        # closed (shutting down)
+        needed = _HEADER.size + len(raw)
+        if needed > self._map_size:
+            os.ftruncate(self._fd, max(needed, self._map_size * 2))
+            self._remap()
+        _, _, seq, _, _ = self._read_header()
+        seq += 1 if seq % 2 == 0 else 2                   # odd = write in progress
+        _HEADER.pack_into(self._mm, 0, _MAGIC, 0, seq, 0, 0)
+        self._mm[_HEADER.size:needed] = raw
+        _HEADER.pack_into(self._mm, 0, _MAGIC, 0, seq + 1, version, len(raw))
+        self._view = SnapshotView(version, raw, state)
+
+    # ── readers ─────────────────────────────────────────────────────────
+    def poll(self) -> bool:
+        """Copy the payload if a newer version was published. True if updated."""
+        if self._fd is None:
+            return False
+        for _ in range(50):
+            magic, _, seq1, version, length = self._read_header()
+            if magic != _MAGIC or version == 0 or version == self._view.version:
+                return False
+            if seq1 % 2:
+                time.sleep(0.001)
+                continue
+            if _HEADER.size + length > self._map_size:
+                self._remap()
+            raw = bytes(self._mm[_HEADER.size:_HEADER.size + length])
+            if self._read_header()[2] == seq1:
+                self._view = SnapshotView(version, raw)
+                return True
+        return False
+
+    def current(self) -> SnapshotView:
+        return self._view
+
+    # ── shutdown ────────────────────────────────────────────────────────
+    def close(self):
+        """Unmap; the last worker out unlinks the segment and lock file so restarts start clean."""
+        if self._fd is None:
+            return
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        try:
+            # Exclusive only succeeds once no other worker holds its shared lock
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            last = True
+        except OSError:
+            last = False
+        if last:
+            for path in (self.path, self.lock_path):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+            self.is_reader = False
+        os.close(self._fd)
+        self._fd = None
+
+
+def create_snapshot_bus(mode: str, default_state: dict, name: str = "infrawatch_snapshot",
+                        lock_dir: str = None):
+    """Factory: "shared" for multi-worker deployments, anything else → local."""
+    if mode == "shared":
+        return SharedSnapshotBus(default_state, name=name, lock_dir=lock_dir)
+    return LocalSnapshotBus(default_state)
@@ -0,0 +1,244 @@
+"""
+InfraWatch Nexus — Per-Version Snapshot Indexes
+=================================================
+Read-side indexes over one snapshot version, built once when the
+version changes and shared by every query until the next one.
+
+  - IndexedCollection : records + {field → value → positions} + geohash
+                        cells; filtered, sorted, keyset-paginated queries
+                        touch only candidate positions.
+  - SnapshotIndex     : dustbins (registry ⋈ live state), road issues and
+                        the priority queue, each an IndexedCollection.
+
+Transport only: no scoring happens here, records are reshaped Pathway
+output joined with the static registry.
+"""
+import base64
+import bisect
+import json
+
+from api.fanout import filter_snapshot_by_ward
+from stream_engine.geo import geohash_encode, geohash_cover
+
+GEOHASH_PRECISION = 5
+
+
+class QueryError(ValueError):
+    """Bad query parameter (→ HTTP 400)."""
+
+
+def encode_cursor(key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor(): ((kind, value), record_id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        (kind, value), rec_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise QueryError("Invalid cursor")
+    # Must match _sort_value(), or bisect ends up comparing str with int
+    numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+    if not ((kind == 0 and numeric) or (kind == 1 and isinstance(value, str))) or not isinstance(rec_id, str):
+        raise QueryError("Invalid cursor")
+    return ((kind, value), rec_id)
+
+
+def _sort_value(v):
+    # Keep keys comparable when a field is missing on some records
+    return (0, v) if isinstance(v, (int, float)) else (1, "" if v is None else str(v))
+
+
+class IndexedCollection:
+    """Immutable record list with equality indexes and a geohash cell index."""
+
+    def __init__(self, records: list, id_field: str, index_fields: tuple, sort_fields: tuple,
+                 default_sort: str):
+        self.records = records
+        self.id_field = id_field
+        self.sort_fields = sort_fields
+        self.default_sort = default_sort
+        self.indexes = {f: {} for f in index_fields}
+        self.cells = {}
+        for pos, rec in enumerate(records):
+            for f in index_fields:
+                self.indexes[f].setdefault(rec.get(f), []).append(pos)
+            if rec.get("lat") is not None and rec.get("lng") is not None:
+                cell = geohash_encode(rec["lat"], rec["lng"], GEOHASH_PRECISION)
+                self.cells.setdefault(cell, []).append(pos)
+        self._orders = {}   # sort field → (positions, keys) ascending (lazy)
+
+    # ── candidate selection ─────────────────────────────────────────────
+    def _candidates(self, filters: dict, bbox):
+        """Intersect index hits; None means "every record"."""
+        sets = []
+        for field, values in filters.items():
+            if not values:
+                continue
+            idx = self.indexes[field]
+            hits = set()
+            for v in values:
+                hits.update(idx.get(v, ()))
+            sets.append(hits)
+        if bbox:
+            min_lat, min_lng, max_lat, max_lng = bbox
+            cells = geohash_cover(min_lat, min_lng, max_lat, max_lng, GEOHASH_PRECISION)
+            if cells is None:
+                pool = range(len(self.records))
+            else:
+                pool = [p for c in cells for p in self.cells.get(c, ())]
+            sets.append({
+                p for p in pool
+                if self.records[p].get("lat") is not None
+                and min_lat <= self.records[p]["lat"] <= max_lat
+                and min_lng <= self.records[p]["lng"] <= max_lng
+            })
+        if not sets:
+            return None
+        sets.sort(key=len)
+        result = sets[0]
+        for s in sets[1:]:
+            result = result & s
+        return result
+
+    # ── sorting ─────────────────────────────────────────────────────────
+    def _key_fn(self, field: str):
+        if field not in self.sort_fields:
+            raise QueryError(f"Invalid sort field '{field}'. Use one of: {list(self.sort_fields)}")
+
+        def key(pos):
+            rec = self.records[pos]
+            # Record id breaks ties, so every key is unique (stable keyset)
+            return (_sort_value(rec.get(field)), str(rec.get(self.id_field, "")))
+        return key
+
+    def _sorted(self, field: str, positions=None):
+        """(positions, keys) ascending. The unfiltered order is cached per field."""
+        if positions is None and field in self._orders:
+            return self._orders[field]
+        key = self._key_fn(field)
+        order = sorted(range(len(self.records)) if positions is None else positions, key=key)
+        result = (order, [key(p) for p in order])
+        if positions is None:
+            self._orders[field] = result
+        return result
+
+    # ── query ───────────────────────────────────────────────────────────
+    def query(self, filters: dict = None, bbox=None, sort: str = None, cursor: str = None,
+              limit: int = 100):
+        """Returns (records_page, next_cursor, total_matches)."""
+        for field in (filters or {}):
+            if field not in self.indexes:
+                raise QueryError(f"Unsupported filter '{field}'")
+        sort = sort or self.default_sort
+        desc = sort.startswith("-")
+        field = sort.lstrip("-")
+        self._key_fn(field)  # validate before touching indexes
+        candidates = self._candidates(filters or {}, bbox)
+        order, keys = self._sorted(field, candidates)
+
+        if desc:
+            end = bisect.bisect_left(keys, decode_cursor(cursor)) if cursor else len(order)
+            begin = max(0, end - limit)
+            page_pos = order[begin:end][::-1]
+            has_more = begin > 0
+        else:
+            begin = bisect.bisect_right(keys, decode_cursor(cursor)) if cursor else 0
+            page_pos = order[begin:begin + limit]
+            has_more = begin + limit < len(order)
+
+        next_cursor = None
+        if has_more and page_pos:
+            last = page_pos[-1]
+            next_cursor = encode_cursor(self._key_fn(field)(last))
+        return [self.records[p] for p in page_pos], next_cursor, len(order)
+
+
+class SnapshotIndex:
+    """All read indexes for one snapshot version."""
+
+    def __init__(self, version: int, state: dict, dustbins: dict, wards: dict):
+        self.version = version
+        self.state = state
+        self._ward_payloads = {}
+        zone_of = {wid: w.get("zone") for wid, w in wards.items()}
+
+        live = {d.get("dustbin_id"): d for d in state.get("dustbin_states", [])}
+        bins = []
+        for did, info in dustbins.items():
+            ds = live.get(did, {})
+            bins.append({
+                "dustbin_id": did,
+                **info,
+                "zone": zone_of.get(info["ward_id"]),
+                "state": ds.get("state", "Clear"),
+                "color": ds.get("color"),
+                "report_count": ds.get("report_count", 0),
+                "max_overflow": ds.get("max_overflow", 0),
+                "avg_overflow": ds.get("avg_overflow", 0),
+                "latest_report_ts": ds.get("latest_report_ts", ""),
+            })
+        self.dustbins = IndexedCollection(
+            bins, "dustbin_id", ("ward_id", "zone", "state"),
+            ("dustbin_id", "ward_id", "report_count", "max_overflow", "avg_overflow", "capacity_liters"),
+            "dustbin_id",
+        )
+
+        roads = []
+        for ri in state.get("road_issues", []):
+            roads.append({
+                **ri,
+                "zone": zone_of.get(ri.get("ward_id")),
+                "type": ri.get("issue_type"),
+                "lat": (ri.get("from_lat", 0) + ri.get("to_lat", 0)) / 2,
+                "lng": (ri.get("from_lng", 0) + ri.get("to_lng", 0)) / 2,
+            })
+        self.road_issues = IndexedCollection(
+            roads, "event_id", ("ward_id", "zone", "state", "type"),
+            ("event_id", "ward_id", "severity", "timestamp"),
+            "-severity",
+        )
+
+        queue = []
+        for rank, item in enumerate(state.get("priority_queue", [])):
+            loc = dustbins.get(item.get("id")) or {}
+            queue.append({
+                **item,
+                "rank": rank + 1,
+                "zone": zone_of.get(item.get("ward_id")),
+                "lat": item.get("lat", loc.get("lat")),
+                "lng": item.get("lng", loc.get("lng")),
+            })
+        self.priority_queue = IndexedCollection(
+            queue, "id", ("ward_id", "zone", "state", "type"),
+            ("rank", "risk_score", "ward_id"),
+            "rank",
+        )
+
+
+    def ward_payload(self, ward_id: str) -> bytes:
+        """Serialized single-ward dashboard, built once per version and ward."""
+        payload = self._ward_payloads.get(ward_id)
+        if payload is None:
+            payload = json.dumps(filter_snapshot_by_ward(self.state, ward_id)).encode()
+            self._ward_payloads[ward_id] = payload
+        return payload
+
+
+def parse_csv(value) -> list:
+    """"Critical,Escalated" → ["Critical", "Escalated"]; None → []."""
+    return [v.strip() for v in value.split(",") if v.strip()] if value else []
+
+
+def parse_bbox(value):
+    """"min_lat,min_lng,max_lat,max_lng" → tuple of floats, or None."""
+    if not value:
+        return None
+    try:
+        parts = [float(v) for v in value.split(",")]
+    except ValueError:
+        raise QueryError("bbox must be min_lat,min_lng,max_lat,max_lng")
+    if len(parts) != 4 or parts[0] > parts[2] or parts[1] > parts[3]:
+        raise QueryError("bbox must be min_lat,min_lng,max_lat,max_lng")
+    return tuple(parts)
@@ -0,0 +1,114 @@
+"""
+InfraWatch Nexus — State Transition Feed
+==========================================
+Tails the engine's transitions.jsonl (see stream_engine/hysteresis.py)
+so clients can follow ward / segment / dustbin state changes without
+diffing full snapshots.
+
+  - One pump task per worker reads only the bytes appended since the
+    last tick (rotation is detected by inode / shrinking size).
+  - The most recent TRANSITIONS_BACKLOG events stay in memory for
+    /api/transitions?after=<seq> catch-up and SSE resume.
+  - Listeners park on an asyncio.Event swapped once per batch, like
+    SnapshotFanout.
+"""
+import asyncio
+import bisect
+import json
+import os
+from collections import deque
+
+
+class TransitionFeed:
+    """In-memory tail of the transition stream, keyed by seq."""
+
+    def __init__(self, path: str, backlog: int = 5000):
+        self.path = path
+        self._events = deque(maxlen=backlog)
+        self._seqs = deque(maxlen=backlog)
+        self._offset = 0
+        self._inode = None
+        self._partial = b""
+        self._changed = asyncio.Event()
+        self.last_seq = 0
+        self.listeners = 0
+
+    # ── pump ────────────────────────────────────────────────────────────
+    def tick(self) -> bool:
+        """Read newly appended events; wake listeners if there were any."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # New or rotated file: start from its beginning
+            self._inode, self._offset, self._partial = st.st_ino, 0, b""
+        if st.st_size == self._offset:
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(st.st_size - self._offset)
+        self._offset += len(chunk)
+        lines = (self._partial + chunk).split(b"\n")
+        self._partial = lines.pop()
+        added = 0
+        for line in lines:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            seq = event.get("seq", 0)
+            if seq <= self.last_seq:
+                continue
+            self._events.append(event)
+            self._seqs.append(seq)
+            self.last_seq = seq
+            added += 1
+        if not added:
+            return False
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        return True
+
+    async def run(self, interval: float):
+        while True:
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"[Transitions] Error: {e}")
+            await asyncio.sleep(interval)
+
+    async def wait_for_change(self, after_seq: int, timeout: float) -> bool:
+        """Block until last_seq > after_seq. False on timeout (heartbeat)."""
+        if self.last_seq > after_seq:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    # ── reads ───────────────────────────────────────────────────────────
+    @property
+    def oldest_seq(self) -> int:
+        return self._seqs[0] if self._seqs else 0
+
+    def since(self, after_seq: int, ward_id: str = None, kinds: list = None, limit: int = None) -> list:
+        """Events with seq > after_seq, oldest first, optionally filtered."""
+        start = bisect.bisect_right(self._seqs, after_seq)
+        out = []
+        for i in range(start, len(self._events)):
+            event = self._events[i]
+            if ward_id and event.get("ward_id") != ward_id:
+                continue
+            if kinds and event.get("kind") not in kinds:
+                continue
+            out.append(event)
+            if limit and len(out) >= limit:
+                break
+        return out
+
+    @staticmethod
+    def sse_frame(event: dict) -> bytes:
+        return b"id: %d\nevent: transition\ndata: %s\n\n" % (
+            event["seq"], json.dumps(event, separators=(",", ":")).encode())
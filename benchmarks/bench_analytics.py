@@ -0,0 +1,110 @@
+"""
+InfraWatch Nexus — Analytics Archive Benchmark
+================================================
+Writes DAYS × EVENTS_PER_DAY synthetic waste reports and van collections
+into a scratch Parquet archive (stream_engine/event_archive.py), then
+times the admin analytics queries over the whole range:
+
+    reports per ward per day · monthly report count + mean overflow
+    · one ward's reports per day · monthly mean time-to-collection
+
+Usage:
+    python benchmarks/bench_analytics.py                                  # 30 days × 100k
+    python benchmarks/bench_analytics.py --days 90 --events-per-day 50000 --runs 5 \\
+        --out data/output/bench_analytics.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from config.dustbins import DUSTBINS
+from config.wards import WARDS
+from stream_engine.event_archive import EventArchive, collection_waits
+
+QUERIES = {
+    "ward_day_count": ("waste", ["ward_id", "day"], ["count"], None),
+    "month_count_mean_overflow": ("waste", ["month"], ["count", "mean:overflow_level"], None),
+    "one_ward_per_day": ("waste", ["day"], ["count"], {"ward_id": ["W12"]}),
+    "month_time_to_collection": ("vans", ["ward_id", "month"], ["count", "mean:wait_sec"], None),
+}
+
+
+def build_archive(root: str, days: int, events_per_day: int, seed: int, start: datetime) -> dict:
+    rng = random.Random(seed)
+    bins = sorted(DUSTBINS)
+    zone_of = {wid: info["zone"] for wid, info in WARDS.items()}
+    archive = EventArchive(root)
+    rows = 0
+    for d in range(days):
+        day = start + timedelta(days=d)
+        waste = []
+        for i in range(events_per_day):
+            did = rng.choice(bins)
+            waste.append({
+                "event_id": f"WR-{d}-{i}", "dustbin_id": did, "ward_id": DUSTBINS[did]["ward_id"],
+                "overflow_level": rng.randint(1, 5), "source": "citizen",
+                "timestamp": (day + timedelta(seconds=rng.randrange(86400))).isoformat(),
+            })
+        vans = [{
+            "event_id": f"VC-{d}-{i}", "dustbin_id": did, "ward_id": DUSTBINS[did]["ward_id"],
+            "event_type": "collection_confirmed", "source": "driver",
+            "timestamp": (day + timedelta(hours=rng.uniform(12, 24))).isoformat(),
+        } for i, did in enumerate(rng.sample(bins, min(len(bins), max(1, events_per_day // 20))))]
+        name = day.strftime("%Y-%m-%d")
+        archive.write_day("waste", name, waste, zone_of)
+        archive.write_day("vans", name, vans, zone_of, {"wait_sec": collection_waits(vans, waste, 86400)})
+        rows += len(waste) + len(vans)
+    return {"rows": rows, "bytes": sum(os.path.getsize(os.path.join(dp, f))
+                                       for dp, _, fs in os.walk(root) for f in fs)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--events-per-day", type=int, default=100_000)
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", default="")
+    args = ap.parse_args()
+
+    start = datetime(2026, 1, 1)
+    end = (start + timedelta(days=args.days)).strftime("%Y-%m-%d")
+    root = tempfile.mkdtemp(prefix="infrawatch_archive_")
+    try:
+        t0 = time.perf_counter()
+        built = build_archive(root, args.days, args.events_per_day, args.seed, start)
+        print(f"  archive: {built['rows']} rows, {built['bytes'] / 1e6:.1f} MB "
+              f"in {time.perf_counter() - t0:.1f}s")
+        archive = EventArchive(root)
+        results = {}
+        for name, (stream, group_by, metrics, filters) in QUERIES.items():
+            timings, last = [], None
+            for _ in range(args.runs):
+                last = archive.query(stream, start.strftime("%Y-%m-%d"), end, group_by, metrics, filters)
+                timings.append(last["elapsed_ms"])
+            results[name] = {"median_ms": statistics.median(timings), "max_ms": max(timings),
+                             "matched_rows": last["matched_rows"], "groups": len(last["rows"])}
+            print(f"  {name:<28} median={results[name]['median_ms']:>8} ms  "
+                  f"rows={last['matched_rows']:>9}  groups={len(last['rows'])}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    report = {"benchmark": "analytics_archive", "days": args.days, "events_per_day": args.events_per_day,
+              "archive": built, "queries": results}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
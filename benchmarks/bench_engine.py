@@ -0,0 +1,180 @@
+"""
+InfraWatch Nexus — Engine Scaling Benchmark
+=============================================
+Generates synthetic cities (benchmarks/synthetic_city.py) of increasing
+size, runs compute_dashboard_snapshot + _write_atomic_snapshot against
+each in a scratch data/ tree, and reports per-stage time and memory:
+
+    read · parse · aggregate · score · queue · routes · rollup · state
+    · serialize · write · journal          (pathway_engine.STAGE_MS)
+
+plus event/snapshot sizes, peak traced allocation and RSS.
+
+Usage:
+    python benchmarks/bench_engine.py                                 # default scales
+    python benchmarks/bench_engine.py --scale 1000x20:100000 --runs 3
+    python benchmarks/bench_engine.py --scale 10000x20:10000000 --events-per-file 10000 \\
+        --out data/output/bench_engine.json
+
+A scale is WARDSxBINS_PER_WARD:EVENTS. Each scale runs in a fresh
+process so registries, caches and peak RSS don't leak between sizes.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+DEFAULT_SCALES = ["12x6:500", "100x20:20000", "1000x20:200000"]
+# History ring buffers sized for a benchmark, not for 30 days × 10k wards
+BENCH_HISTORY_TIERS = {"1m": (60, 3600)}
+
+
+def parse_scale(text: str) -> dict:
+    shape, _, events = text.partition(":")
+    wards, _, bins = shape.partition("x")
+    return {"wards": int(wards), "bins_per_ward": int(bins), "events": int(events or 0)}
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    return 0.0
+
+
+def run_scale(scale: dict, runs: int, seed: int, events_per_file: int, hours: float,
+              trace_memory: bool = True) -> dict:
+    """Benchmark one city size in this process."""
+    import pathway_engine as engine
+    from benchmarks.synthetic_city import generate_city, generate_events, write_events
+
+    t0 = time.perf_counter()
+    wards, dustbins, segments = generate_city(scale["wards"], scale["bins_per_ward"], seed)
+    events = generate_events(wards, dustbins, scale["events"], hours=hours, seed=seed)
+    generate_sec = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory(prefix="infrawatch_bench_") as root:
+        files = write_events(root, events, events_per_file)
+        engine.use_registry(wards, dustbins, segments)
+        engine.use_workspace(root, BENCH_HISTORY_TIERS)
+        if events["weather"]:
+            engine._publish_weather(events["weather"][-1])
+        rss_before = _rss_mb()
+
+        samples, totals, written = [], [], 0
+        peak_traced = 0
+        for i in range(runs):
+            if trace_memory and i == 0:
+                tracemalloc.start()
+            started = time.perf_counter()
+            snapshot = engine.compute_dashboard_snapshot()
+            # Force a write every run so serialize/write are always measured
+            engine._snapshot_last["digest"] = None
+            written += bool(engine._write_atomic_snapshot(snapshot))
+            totals.append((time.perf_counter() - started) * 1000)
+            samples.append(dict(engine.STAGE_MS))
+            if trace_memory and i == 0:
+                peak_traced = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        snapshot_bytes = os.path.getsize(os.path.join(engine.OUTPUT_DIR, "dashboard.jsonl"))
+
+    # First run pays cold-start costs (and tracemalloc overhead); report both
+    steady = samples[1:] or samples
+    stages = sorted({k for s in samples for k in s})
+    return {
+        **scale,
+        "dustbins": len(dustbins),
+        "files": files,
+        "events_per_file": events_per_file,
+        "generate_sec": round(generate_sec, 2),
+        "runs": runs,
+        "total_ms": {
+            "first": round(totals[0], 1),
+            "median": round(statistics.median(totals[1:] or totals), 1),
+        },
+        "stage_ms_first": {k: samples[0].get(k, 0.0) for k in stages},
+        "stage_ms_median": {k: round(statistics.median(s.get(k, 0.0) for s in steady), 3) for k in stages},
+        "snapshot_bytes": snapshot_bytes,
+        "snapshots_written": written,
+        "memory": {
+            "traced_peak_mb_first_run": round(peak_traced / 1e6, 1) if trace_memory else None,
+            "rss_before_mb": rss_before,
+            "rss_after_mb": _rss_mb(),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+    }
+
+
+def _run_in_subprocess(scale_text: str, args) -> dict:
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", "--scale", scale_text,
+           "--runs", str(args.runs), "--seed", str(args.seed), "--hours", str(args.hours),
+           "--events-per-file", str(args.events_per_file)]
+    if args.no_trace:
+        cmd.append("--no-trace")
+    out = subprocess.run(cmd, cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=args.timeout)
+    if out.returncode != 0:
+        return {**parse_scale(scale_text), "error": (out.stderr or out.stdout).strip()[-2000:]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--scale", nargs="+", default=DEFAULT_SCALES, help="WARDSxBINS:EVENTS …")
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--hours", type=float, default=2.0, help="Span of the event history")
+    ap.add_argument("--events-per-file", type=int, default=1)
+    ap.add_argument("--no-trace", action="store_true", help="Skip tracemalloc (faster at huge scales)")
+    ap.add_argument("--timeout", type=float, default=3600)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--out", default="")
+    args = ap.parse_args()
+
+    if args.child:
+        import contextlib
+        with contextlib.redirect_stdout(sys.stderr):   # engine prints stay off the result line
+            result = run_scale(parse_scale(args.scale[0]), args.runs, args.seed,
+                               args.events_per_file, args.hours, not args.no_trace)
+        print(json.dumps(result))
+        return
+
+    results = []
+    for text in args.scale:
+        r = _run_in_subprocess(text, args)
+        if "error" in r:
+            print(f"  {text:<22} ERROR {r['error'].splitlines()[-1] if r['error'] else ''}")
+        else:
+            top = sorted(r["stage_ms_median"].items(), key=lambda kv: -kv[1])[:3]
+            print(f"  {text:<22} median={r['total_ms']['median']:>10} ms  "
+                  f"max_rss={r['memory']['max_rss_mb']:>8} MB  "
+                  f"top: {', '.join(f'{k}={v:.1f}' for k, v in top)}")
+        results.append(r)
+
+    report = {
+        "benchmark": "engine_scaling",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "cpu_count": os.cpu_count(),
+        "settings": {"runs": args.runs, "seed": args.seed, "hours": args.hours,
+                     "events_per_file": args.events_per_file},
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
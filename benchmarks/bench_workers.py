@@ -0,0 +1,169 @@
+"""
+InfraWatch Nexus — Multi-Worker API Benchmark
+===============================================
+Starts `uvicorn api.server:app --workers N` with the shared snapshot bus,
+drives keep-alive GET traffic against the read endpoints and reports
+requests/sec plus RSS per worker process.
+
+Usage:
+    python benchmarks/bench_workers.py                  # 1, 4, 16 workers
+    python benchmarks/bench_workers.py --workers 1 4 --duration 5
+    python benchmarks/bench_workers.py --out data/output/bench_workers.json
+
+Needs data/output/dashboard.jsonl (run pathway_engine.py once); if it
+is missing a snapshot is computed in-process first.
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DASHBOARD = os.path.join(PROJECT_ROOT, "data", "output", "dashboard.jsonl")
+ENDPOINTS = ["/api/dashboard", "/api/priority", "/api/weather", "/api/dustbins"]
+
+
+def _ensure_snapshot():
+    if os.path.exists(DASHBOARD):
+        return
+    sys.path.insert(0, PROJECT_ROOT)
+    import pathway_engine
+    pathway_engine._write_atomic_snapshot(pathway_engine.compute_dashboard_snapshot())
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except FileNotFoundError:
+        pass
+    return 0
+
+
+def _children(pid: int) -> list:
+    kids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (FileNotFoundError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            kids.append(int(entry))
+    return kids
+
+
+def _wait_healthy(port: int, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.3)
+    raise RuntimeError(f"server on :{port} did not become healthy")
+
+
+def _drive(port: int, duration: float, concurrency: int) -> dict:
+    """Closed-loop keep-alive clients cycling through ENDPOINTS."""
+    counts = [0] * concurrency
+    errors = [0] * concurrency
+    stop_at = time.time() + duration
+
+    def client(i):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        n = i
+        while time.time() < stop_at:
+            try:
+                conn.request("GET", ENDPOINTS[n % len(ENDPOINTS)])
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status == 200:
+                    counts[i] += 1
+                else:
+                    errors[i] += 1
+            except (OSError, http.client.HTTPException):
+                errors[i] += 1
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            n += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {"requests": sum(counts), "errors": sum(errors)}
+
+
+def bench(workers: int, duration: float, concurrency: int, port: int) -> dict:
+    env = dict(os.environ, API_WORKERS=str(workers), SNAPSHOT_BUS="shared",
+               DEDUP_BACKEND="sqlite", PYTHONUNBUFFERED="1")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.server:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_healthy(port)
+        time.sleep(1.0)  # let every worker load the snapshot from the bus
+        _drive(port, 1.0, concurrency)  # warm-up
+        result = _drive(port, duration, concurrency)
+        pids = _children(proc.pid) if workers > 1 else [proc.pid]
+        rss = [_rss_kb(p) for p in pids if _rss_kb(p)]
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return {
+        "workers": workers,
+        "duration_sec": duration,
+        "concurrency": concurrency,
+        "requests": result["requests"],
+        "errors": result["errors"],
+        "req_per_sec": round(result["requests"] / duration, 1),
+        "rss_kb_per_worker": round(sum(rss) / len(rss)) if rss else None,
+        "rss_kb_total": sum(rss),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    ap.add_argument("--duration", type=float, default=10.0)
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--out", default="")
+    args = ap.parse_args()
+
+    _ensure_snapshot()
+    results = []
+    for n in args.workers:
+        r = bench(n, args.duration, args.concurrency, args.port)
+        print(f"  workers={r['workers']:>3}  req/s={r['req_per_sec']:>9}  "
+              f"rss/worker={r['rss_kb_per_worker']} kB  errors={r['errors']}")
+        results.append(r)
+
+    report = {"benchmark": "api_workers", "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "results": results}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""
+InfraWatch Nexus — API Load Test
+==================================
+Drives mixed, realistic traffic at `api.server:app` with Gemini and
+WeatherAPI replaced by local mocks (benchmarks/mock_upstreams.py):
+
+  - closed-loop virtual users picking scenarios by weight —
+      confirm    citizen dustbin report        POST /api/report/dustbin/confirm
+      detect     citizen photo (→ mock Gemini)  POST /api/report/dustbin/detect
+      road       admin road issue               POST /api/report/road-issue
+      van        admin van collection           POST /api/van/collection
+      dashboard  portal poll                    GET  /api/dashboard
+      ward       ward-filtered poll             GET  /api/dashboard?ward=…
+      priority   priority queue poll            GET  /api/priority
+      forecast   forecast (→ mock WeatherAPI)   GET  /api/forecast
+  - hundreds of WebSocket listeners on /ws, held open for the whole run
+  - a /health probe every second for the server's event-loop lag
+
+Reports throughput, p50/p95/p99 latency and status codes per scenario,
+WebSocket connect time and message counts, server loop lag (from
+/health) and the generator's own loop lag — if that is high the client,
+not the server, was the bottleneck.
+
+Usage:
+    python benchmarks/load_test.py                                   # 30s, 32 users, 200 WS
+    python benchmarks/load_test.py --users 64 --ws 500 --duration 60
+    python benchmarks/load_test.py --gemini-latency-ms 3000 --gemini-fail 0.2 --weather-fail 0.5
+    python benchmarks/load_test.py --mix confirm=50,dashboard=50 --out data/output/load_test.json
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --ws 0  # existing server, no mocks
+
+Event files written by the run's own requests (named in each response's
+"file") are removed afterwards — never other clients' reports on a shared
+server; --keep-events keeps them for the engine. SQLite-store rows stay.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+from api.loop_monitor import LoopLagMonitor
+from benchmarks.replay import _percentiles
+from config.dustbins import DUSTBINS
+from config.wards import WARDS
+
+DEFAULT_MIX = "confirm=25,detect=5,road=3,van=4,dashboard=38,ward=12,priority=10,forecast=3"
+EVENT_DIRS = {s: os.path.join(PROJECT_ROOT, "data", "reports", s) for s in ("waste", "road", "vans")}
+WRITES = {"confirm": "waste", "road": "road", "van": "vans"}   # scenario → stream its event file lands in
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "INFRAWATCH_ADMIN_2026")
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f"unknown scenario {name!r} (choose from {', '.join(SCENARIOS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SCENARIOS — each returns the aiohttp request coroutine for one call
+# ═══════════════════════════════════════════════════════════════════════════
+_BINS = sorted(DUSTBINS)
+_BINS_BY_WARD = {}
+for _did, _d in DUSTBINS.items():
+    _BINS_BY_WARD.setdefault(_d["ward_id"], []).append(_did)
+_ADMIN = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
+
+
+def _confirm(session, base, rng):
+    return session.post(f"{base}/api/report/dustbin/confirm",
+                        json={"dustbin_id": rng.choice(_BINS), "overflow_level": rng.randint(1, 5)})
+
+
+def _detect(session, base, rng):
+    d = DUSTBINS[rng.choice(_BINS)]
+    form = aiohttp.FormData()
+    # Random bytes: the local QR decoder finds nothing, so every call reaches Gemini
+    form.add_field("file", rng.randbytes(rng.randint(20_000, 80_000)),
+                   filename="photo.jpg", content_type="image/jpeg")
+    form.add_field("lat", str(d["lat"]))
+    form.add_field("lng", str(d["lng"]))
+    return session.post(f"{base}/api/report/dustbin/detect", data=form)
+
+
+def _road(session, base, rng):
+    ward = _BINS_BY_WARD[rng.choice(sorted(_BINS_BY_WARD))]
+    return session.post(f"{base}/api/report/road-issue", headers=_ADMIN, json={
+        "from_dustbin": rng.choice(ward), "to_dustbin": rng.choice(ward),
+        "issue_type": rng.choice(["pothole", "waterlogging", "crack", "construction"]),
+        "severity": rng.randint(1, 5),
+    })
+
+
+def _van(session, base, rng):
+    return session.post(f"{base}/api/van/collection", headers=_ADMIN, json={"dustbin_id": rng.choice(_BINS)})
+
+
+SCENARIOS = {
+    "confirm": _confirm,
+    "detect": _detect,
+    "road": _road,
+    "van": _van,
+    "dashboard": lambda s, base, rng: s.get(f"{base}/api/dashboard"),
+    "ward": lambda s, base, rng: s.get(f"{base}/api/dashboard", params={"ward": rng.choice(sorted(WARDS))}),
+    "priority": lambda s, base, rng: s.get(f"{base}/api/priority"),
+    "forecast": lambda s, base, rng: s.get(f"{base}/api/forecast"),
+}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LOAD GENERATION
+# ═══════════════════════════════════════════════════════════════════════════
+async def _user(uid, session, base, mix, think_ms, stop_at, samples, seed, written):
+    rng = random.Random(seed * 10_007 + uid)
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < stop_at:
+        name = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            async with SCENARIOS[name](session, base, rng) as resp:
+                body = await resp.read()
+                status = resp.status
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            status = "error"
+        if status == 200 and name in WRITES:
+            try:
+                written.add((WRITES[name], json.loads(body).get("file")))
+            except (ValueError, AttributeError):
+                pass
+        samples.append((name, (time.perf_counter() - started) * 1000, status))
+        if think_ms:
+            await asyncio.sleep(rng.expovariate(1000 / think_ms))
+
+
+async def _listener(session, base, stop_at, ws_stats):
+    url = base.replace("http", "ws", 1) + "/ws"
+    started = time.perf_counter()
+    try:
+        async with session.ws_connect(url, heartbeat=None) as ws:
+            ws_stats["connected"] += 1
+            first = True
+            while True:
+                remaining = stop_at - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    msg = await ws.receive(timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    ws_stats["closed_early"] += 1
+                    break
+                if first:
+                    ws_stats["first_message_ms"].append((time.perf_counter() - started) * 1000)
+                    first = False
+                ws_stats["messages"] += 1
+                ws_stats["bytes"] += len(msg.data)
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+        ws_stats["failed"] += 1
+        ws_stats["last_error"] = f"{type(e).__name__}: {e}"
+
+
+async def _health_probe(session, base, stop_at, health):
+    while time.perf_counter() < stop_at:
+        try:
+            async with session.get(f"{base}/health") as resp:
+                body = await resp.json()
+                health["last"] = body
+                health["max_ws_clients"] = max(health["max_ws_clients"], body.get("ws_clients", 0))
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            health["errors"] += 1
+        await asyncio.sleep(1.0)
+
+
+async def run_load(base: str, mix: dict, users: int, ws_listeners: int, duration: float,
+                   think_ms: float = 50.0, seed: int = 1, ramp_sec: float = 2.0, written: set = None) -> dict:
+    """
+    Drive the mix at base for duration seconds; returns the report dict.
+    written collects (stream, file name) of every event the run created.
+    """
+    written = set() if written is None else written
+    client_lag = LoopLagMonitor(0.1, 100_000)
+    lag_task = asyncio.create_task(client_lag.run())
+    samples, health = [], {"last": {}, "max_ws_clients": 0, "errors": 0}
+    ws_stats = {"connected": 0, "failed": 0, "closed_early": 0, "messages": 0, "bytes": 0,
+                "last_error": None, "first_message_ms": []}
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        stop_at = time.perf_counter() + ramp_sec + duration
+        listeners = []
+        for i in range(ws_listeners):
+            listeners.append(asyncio.create_task(_listener(session, base, stop_at, ws_stats)))
+            if ramp_sec:
+                await asyncio.sleep(ramp_sec / ws_listeners)
+        probe = asyncio.create_task(_health_probe(session, base, stop_at, health))
+        started = time.perf_counter()
+        await asyncio.gather(*(_user(u, session, base, mix, think_ms, stop_at, samples, seed, written)
+                               for u in range(users)))
+        elapsed = time.perf_counter() - started
+        await asyncio.gather(probe, *listeners)
+        try:
+            async with session.get(f"{base}/health") as resp:
+                health["last"] = await resp.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            pass
+    lag_task.cancel()
+
+    per_scenario = {}
+    for name in mix:
+        rows = [s for s in samples if s[0] == name]
+        statuses = {}
+        for _, _, status in rows:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        ok = [ms for _, ms, status in rows if status == 200]
+        per_scenario[name] = {
+            "requests": len(rows),
+            "rps": round(len(rows) / elapsed, 1) if elapsed else 0.0,
+            "latency_ms": _percentiles([ms for _, ms, _ in rows]),
+            "ok_latency_ms": _percentiles(ok),
+            "status": statuses,
+        }
+    total_errors = sum(1 for s in samples if s[2] == "error" or (isinstance(s[2], int) and s[2] >= 500))
+    return {
+        "duration_sec": round(elapsed, 2),
+        "requests": len(samples),
+        "rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "errors": total_errors,
+        "latency_ms": _percentiles([ms for _, ms, _ in samples]),
+        "scenarios": per_scenario,
+        "websocket": {
+            **{k: v for k, v in ws_stats.items() if k != "first_message_ms"},
+            "requested": ws_listeners,
+            "max_server_clients": health["max_ws_clients"],
+            "first_message_ms": _percentiles(ws_stats["first_message_ms"]),
+        },
+        "loop_lag_ms": {
+            "server": health["last"].get("loop_lag_ms", {}),
+            "client": client_lag.stats(),
+        },
+        "health_probe_errors": health["errors"],
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PROCESSES — mock upstreams + API server
+# ═══════════════════════════════════════════════════════════════════════════
+def _wait_http(url: str, timeout: float = 30.0):
+    import urllib.request
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resp:
+                if resp.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.3)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def _stop(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def _remove_written(written: set) -> int:
+    """Delete the event files this run's requests created (merged reports wrote none)."""
+    removed = 0
+    for stream, name in written:
+        if not isinstance(name, str) or not name.endswith(".json"):
+            continue                    # SQLite store ("events.sqlite3#rowid") or no file
+        try:
+            os.unlink(os.path.join(EVENT_DIRS[stream], os.path.basename(name)))
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    procs, upstream_stats, mock_url = [], None, None
+    written = set()
+    try:
+        if args.url:
+            base = args.url.rstrip("/")
+        else:
+            mock_port, api_port = _free_port(), _free_port()
+            mock_url = f"http://127.0.0.1:{mock_port}"
+            procs.append(subprocess.Popen(
+                [sys.executable, os.path.join(PROJECT_ROOT, "benchmarks", "mock_upstreams.py"),
+                 "--port", str(mock_port), "--seed", str(args.seed),
+                 "--gemini-latency-ms", str(args.gemini_latency_ms), "--gemini-fail", str(args.gemini_fail),
+                 "--weather-latency-ms", str(args.weather_latency_ms), "--weather-fail", str(args.weather_fail)],
+                cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            ))
+            _wait_http(f"{mock_url}/_stats")
+            env = dict(
+                os.environ, PYTHONUNBUFFERED="1", ADMIN_TOKEN=ADMIN_TOKEN,
+                GEMINI_API_KEY="mock", GEMINI_API_URL=f"{mock_url}/v1beta/models/gemini-2.5-flash:generateContent",
+                WX_API_KEY="mock", WX_FORECAST_URL=f"{mock_url}/v1/forecast.json",
+                WX_API_URL=f"{mock_url}/v1/current.json",
+            )
+            if args.workers > 1:
+                env.update(API_WORKERS=str(args.workers), SNAPSHOT_BUS="shared", DEDUP_BACKEND="sqlite")
+            procs.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "api.server:app", "--host", "127.0.0.1",
+                 "--port", str(api_port), "--workers", str(args.workers), "--log-level", "warning"],
+                cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            ))
+            if args.engine:
+                procs.append(subprocess.Popen(
+                    [sys.executable, "pathway_engine.py"], cwd=PROJECT_ROOT, env=env,
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                ))
+            base = f"http://127.0.0.1:{api_port}"
+        _wait_http(f"{base}/health")
+
+        result = asyncio.run(run_load(base, mix, args.users, args.ws, args.duration,
+                                      think_ms=args.think_ms, seed=args.seed, ramp_sec=args.ramp,
+                                      written=written))
+        if mock_url:
+            import urllib.request
+            with urllib.request.urlopen(f"{mock_url}/_stats", timeout=5) as resp:
+                upstream_stats = json.loads(resp.read())["upstreams"]
+    finally:
+        for proc in reversed(procs):
+            _stop(proc)
+        if not args.keep_events:
+            _remove_written(written)
+
+    return {
+        "benchmark": "api_load",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "target": args.url or "api.server:app",
+        "settings": {
+            "users": args.users, "ws": args.ws, "duration": args.duration, "think_ms": args.think_ms,
+            "workers": args.workers, "engine": args.engine, "mix": mix, "seed": args.seed,
+            "gemini_latency_ms": args.gemini_latency_ms, "gemini_fail": args.gemini_fail,
+            "weather_latency_ms": args.weather_latency_ms, "weather_fail": args.weather_fail,
+        },
+        "upstreams": upstream_stats,
+        **result,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--url", default="", help="Target an already running server (no mocks started)")
+    ap.add_argument("--users", type=int, default=32, help="Closed-loop virtual users")
+    ap.add_argument("--ws", type=int, default=200, help="WebSocket listeners held open")
+    ap.add_argument("--duration", type=float, default=30.0)
+    ap.add_argument("--ramp", type=float, default=2.0, help="Seconds to open WS listeners over")
+    ap.add_argument("--think-ms", type=float, default=50.0, help="Mean think time between a user's requests")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,…")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--engine", action="store_true", help="Also run pathway_engine.py (live snapshots)")
+    ap.add_argument("--gemini-latency-ms", type=float, default=800.0)
+    ap.add_argument("--gemini-fail", type=float, default=0.05)
+    ap.add_argument("--weather-latency-ms", type=float, default=120.0)
+    ap.add_argument("--weather-fail", type=float, default=0.05)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--keep-events", action="store_true")
+    ap.add_argument("--out", default="")
+    args = ap.parse_args()
+
+    report = run(args)
+    print(f"  {report['requests']} requests in {report['duration_sec']}s  "
+          f"({report['rps']} req/s, {report['errors']} errors)")
+    for name, s in report["scenarios"].items():
+        lat = s["latency_ms"]
+        if lat["count"]:
+            print(f"  {name:<10} n={s['requests']:>6}  p50={lat['p50']:>8}  p95={lat['p95']:>8}  "
+                  f"p99={lat['p99']:>8} ms  {s['status']}")
+    ws = report["websocket"]
+    print(f"  websocket  connected={ws['connected']}/{ws['requested']}  messages={ws['messages']}  "
+          f"failed={ws['failed']}" + (f"  ({ws['last_error']})" if ws["last_error"] else ""))
+    print(f"  loop lag   server={report['loop_lag_ms']['server']}  client={report['loop_lag_ms']['client']}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+InfraWatch Nexus — Mock Gemini + WeatherAPI Upstreams
+=======================================================
+Local stand-ins for the two third-party services, so load tests never
+touch (or pay for) the real ones:
+
+    POST /v1beta/models/<model>:generateContent   Gemini Vision
+    GET  /v1/current.json                         WeatherAPI current
+    GET  /v1/forecast.json                        WeatherAPI forecast
+    GET  /_stats                                  calls / failures per upstream
+
+Each upstream has a latency (ms, uniformly jittered by ±jitter) and a
+failure rate (429 / 500 / 503 picked at random). Gemini answers with a
+real registry dustbin ID `gemini_hit` of the time, unreadable text
+otherwise.
+
+Point the API at it with:
+    GEMINI_API_URL=http://127.0.0.1:<port>/v1beta/models/gemini-2.5-flash:generateContent
+    WX_FORECAST_URL=http://127.0.0.1:<port>/v1/forecast.json
+    WX_API_URL=http://127.0.0.1:<port>/v1/current.json      (engine)
+
+Usage:
+    python benchmarks/mock_upstreams.py --port 8790 --gemini-latency-ms 1200 --gemini-fail 0.1
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.dustbins import DUSTBINS
+
+DEFAULTS = {
+    "gemini_latency_ms": 800.0,
+    "gemini_fail": 0.0,
+    "gemini_hit": 0.8,
+    "weather_latency_ms": 120.0,
+    "weather_fail": 0.0,
+    "jitter": 0.5,
+    "seed": None,
+}
+FAIL_STATUSES = (429, 500, 503)
+
+
+def build_app(config: dict = None) -> web.Application:
+    cfg = {**DEFAULTS, **(config or {})}
+    rng = random.Random(cfg["seed"])
+    dustbin_ids = sorted(DUSTBINS)
+    stats = {name: {"calls": 0, "failures": 0} for name in ("gemini", "weather_current", "weather_forecast")}
+
+    async def _upstream(name: str, latency_ms: float, fail_rate: float):
+        """Sleep the configured latency; a web.Response if this call fails, else None."""
+        stats[name]["calls"] += 1
+        jitter = cfg["jitter"]
+        await asyncio.sleep(max(0.0, latency_ms * rng.uniform(1 - jitter, 1 + jitter)) / 1000)
+        if rng.random() < fail_rate:
+            stats[name]["failures"] += 1
+            status = rng.choice(FAIL_STATUSES)
+            return web.json_response({"error": {"code": status, "message": "injected failure"}}, status=status)
+        return None
+
+    async def gemini(request: web.Request):
+        await request.read()
+        failed = await _upstream("gemini", cfg["gemini_latency_ms"], cfg["gemini_fail"])
+        if failed:
+            return failed
+        text = rng.choice(dustbin_ids) if rng.random() < cfg["gemini_hit"] else "No ID visible"
+        return web.json_response({"candidates": [{"content": {"parts": [{"text": text}]}}]})
+
+    async def current(request: web.Request):
+        failed = await _upstream("weather_current", cfg["weather_latency_ms"], cfg["weather_fail"])
+        if failed:
+            return failed
+        return web.json_response({
+            "location": {"name": request.query.get("q", "")},
+            "current": {"precip_mm": round(rng.uniform(0, 20), 1), "wind_kph": round(rng.uniform(0, 40), 1)},
+        })
+
+    async def forecast(request: web.Request):
+        failed = await _upstream("weather_forecast", cfg["weather_latency_ms"], cfg["weather_fail"])
+        if failed:
+            return failed
+        days = []
+        for d in range(int(request.query.get("days", 3))):
+            day = (date.today() + timedelta(days=d)).isoformat()
+            hours = [{"time": f"{day} {h:02d}:00", "precip_mm": round(rng.uniform(0, 4), 1),
+                      "wind_kph": round(rng.uniform(0, 30), 1), "condition": {"text": "Patchy rain"}}
+                     for h in range(24)]
+            days.append({"date": day, "hour": hours, "day": {
+                "totalprecip_mm": round(sum(h["precip_mm"] for h in hours), 1),
+                "maxwind_kph": max(h["wind_kph"] for h in hours),
+                "condition": {"text": "Patchy rain"},
+            }})
+        return web.json_response({"forecast": {"forecastday": days}},
+                                 headers={"Cache-Control": "max-age=300"})
+
+    async def get_stats(request: web.Request):
+        return web.json_response({"config": cfg, "upstreams": stats})
+
+    app = web.Application()
+    app.router.add_post("/v1beta/models/{model}", gemini)
+    app.router.add_get("/v1/current.json", current)
+    app.router.add_get("/v1/forecast.json", forecast)
+    app.router.add_get("/_stats", get_stats)
+    return app
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8790)
+    for key, value in DEFAULTS.items():
+        if key != "seed":
+            ap.add_argument(f"--{key.replace('_', '-')}", type=float, default=value)
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args()
+    config = {key: getattr(args, key) for key in DEFAULTS}
+    web.run_app(build_app(config), host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
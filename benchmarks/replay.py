@@ -0,0 +1,337 @@
+"""
+InfraWatch Nexus — Event Replay Harness
+=========================================
+Feeds a recorded (or generated) event log through the real engine on a
+virtual clock, in a scratch data/ tree, and reports how it behaved.
+
+  - Events are written as files exactly like the API writes them; the
+    engine recomputes once per REPLAY tick (the recompute loop's 3 s) in
+    which something arrived.
+  - The engine clock is injected (pathway_engine.set_clock), so event
+    time, hysteresis dwell, snapshot versions and history buckets follow
+    the log, not the machine. --speed N sleeps to replay at N× real time;
+    --speed 0 runs as fast as possible.
+  - Per event: ingest → snapshot latency = wait for the tick (virtual)
+    + the recompute that picked it up (measured). Per run: recomputes,
+    snapshots written, and a digest of every written snapshot.
+  - --compare baseline.json flags snapshot differences and compute
+    regressions (exit code 1), so runs can gate changes.
+
+Usage:
+    python benchmarks/replay.py --generate 2000 --hours 24 --seed 7 --out data/output/replay.json
+    python benchmarks/replay.py --record data/reports --save-log day.jsonl
+    python benchmarks/replay.py --log day.jsonl --speed 60
+    python benchmarks/replay.py --log day.jsonl --compare data/output/replay.json
+
+Log format (JSONL): {"stream": "waste|road|vans|weather", "event": {..., "timestamp": ISO}}
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+TICK_SEC = 3.0
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# EVENT LOGS
+# ═══════════════════════════════════════════════════════════════════════════
+def _event_ts(event: dict) -> float:
+    dt = datetime.fromisoformat(event["timestamp"].replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)   # same assumption as the engine
+    return dt.timestamp()
+
+
+def load_log(path: str) -> list:
+    with open(path, "r") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return sorted(records, key=lambda r: _event_ts(r["event"]))
+
+
+def save_log(path: str, records: list):
+    with open(path, "w") as f:
+        for r in records:
+            f.write(json.dumps(r, separators=(",", ":")) + "\n")
+
+
+def record_dirs(report_dir: str) -> list:
+    """Collect every event under data/reports/{waste,road,vans} into a log."""
+    records = []
+    for stream in ("waste", "road", "vans"):
+        directory = os.path.join(report_dir, stream)
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, name), "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for event in data if isinstance(data, list) else [data]:
+                if event.get("timestamp"):
+                    records.append({"stream": stream, "event": event})
+    return sorted(records, key=lambda r: _event_ts(r["event"]))
+
+
+def generate_log(n_events: int, hours: float, seed: int, start: datetime = None,
+                 dustbins: dict = None) -> list:
+    """
+    Deterministic synthetic day: waste reports (75%) with a morning and an
+    evening peak, road issues (15%), van collections (10%), and an hourly
+    rainfall reading with one afternoon storm.
+    """
+    if dustbins is None:
+        from config.dustbins import DUSTBINS as dustbins
+    rng = random.Random(seed)
+    start = start or datetime(2026, 1, 15, 6, 0, tzinfo=timezone.utc)
+    span = hours * 3600
+    bins = sorted(dustbins)
+    by_ward = {}
+    for did in bins:
+        by_ward.setdefault(dustbins[did]["ward_id"], []).append(did)
+
+    def when() -> float:
+        # Two peaks (≈ 2 h and ≈ 11 h into the day) over a uniform base
+        r = rng.random()
+        if r < 0.3:
+            return min(span, max(0.0, rng.gauss(2 * 3600, 1800)))
+        if r < 0.6:
+            return min(span, max(0.0, rng.gauss(11 * 3600, 2400)))
+        return rng.uniform(0, span)
+
+    records = []
+    for i in range(n_events):
+        ts = (start + timedelta(seconds=when())).isoformat()
+        r = rng.random()
+        did = rng.choice(bins)
+        if r < 0.75:
+            records.append({"stream": "waste", "event": {
+                "dustbin_id": did, "overflow_level": rng.randint(1, 5),
+                "timestamp": ts, "source": "replay",
+            }})
+        elif r < 0.90:
+            ward = dustbins[did]["ward_id"]
+            other = rng.choice(by_ward[ward])
+            records.append({"stream": "road", "event": {
+                "event_id": f"RP-{seed}-{i}", "from_dustbin": did, "to_dustbin": other,
+                "ward_id": ward, "issue_type": rng.choice(["pothole", "waterlogging", "crack"]),
+                "severity": rng.randint(1, 5), "timestamp": ts, "source": "replay",
+            }})
+        else:
+            records.append({"stream": "vans", "event": {
+                "event_id": f"VP-{seed}-{i}", "dustbin_id": did,
+                "ward_id": dustbins[did]["ward_id"], "event_type": "collection_confirmed",
+                "timestamp": ts, "source": "replay",
+            }})
+    for h in range(int(math.ceil(hours))):
+        storm = 8 <= h <= 10
+        records.append({"stream": "weather", "event": {
+            "rainfall_mm_hr": round(rng.uniform(12, 30) if storm else rng.uniform(0, 2), 1),
+            "weather_source": "replay",
+            "timestamp": (start + timedelta(hours=h)).isoformat(),
+        }})
+    return sorted(records, key=lambda r: _event_ts(r["event"]))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CLOCK
+# ═══════════════════════════════════════════════════════════════════════════
+class VirtualClock:
+    """Engine time. speed > 0 sleeps so virtual time runs speed× real time."""
+
+    def __init__(self, start: float, speed: float = 0.0):
+        self.t = start
+        self.speed = speed
+
+    def __call__(self) -> float:
+        return self.t
+
+    def advance_to(self, ts: float):
+        if ts <= self.t:
+            return
+        if self.speed > 0:
+            time.sleep((ts - self.t) / self.speed)
+        self.t = ts
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REPLAY
+# ═══════════════════════════════════════════════════════════════════════════
+def _percentiles(values: list) -> dict:
+    if not values:
+        return {"count": 0}
+    s = sorted(values)
+    pick = lambda q: s[min(len(s) - 1, int(q * len(s)))]
+    return {"count": len(s), "p50": round(pick(0.50), 2), "p95": round(pick(0.95), 2),
+            "p99": round(pick(0.99), 2), "max": round(s[-1], 2)}
+
+
+def snapshot_digests(snapshot: dict, volatile: tuple) -> dict:
+    """sha256 (12 hex) per top-level key, ignoring fields that vary run to run."""
+    return {k: hashlib.sha256(json.dumps(v, sort_keys=True).encode()).hexdigest()[:12]
+            for k, v in sorted(snapshot.items()) if k not in volatile}
+
+
+def _combined(sections: dict) -> str:
+    return hashlib.sha256(json.dumps(sections, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def replay(records: list, workspace: str, speed: float = 0.0, tick_sec: float = TICK_SEC,
+           snapshot_sink=None) -> dict:
+    """Run records through pathway_engine inside workspace; returns the report dict."""
+    import pathway_engine as engine
+
+    engine.use_workspace(workspace)
+    dirs = {"waste": engine.WASTE_DIR, "road": engine.ROAD_DIR, "vans": engine.VAN_DIR}
+    volatile = tuple(engine.SNAPSHOT_VOLATILE_KEYS)
+    clock = VirtualClock(_event_ts(records[0]["event"]) if records else 0.0, speed)
+    engine.set_clock(clock)
+
+    latencies, computes, digests = [], [], []
+    recomputes = written = 0
+    last_sections = {}
+    started = time.perf_counter()
+    try:
+        i = 0
+        while i < len(records):
+            tick_end = (math.floor(_event_ts(records[i]["event"]) / tick_sec) + 1) * tick_sec
+            arrivals = []
+            while i < len(records) and _event_ts(records[i]["event"]) < tick_end:
+                rec = records[i]
+                ts = _event_ts(rec["event"])
+                clock.advance_to(ts)
+                if rec["stream"] == "weather":
+                    engine._publish_weather(rec["event"])
+                else:
+                    with open(os.path.join(dirs[rec["stream"]], f"replay_{i:08d}.json"), "w") as f:
+                        json.dump([rec["event"]], f)
+                arrivals.append(ts)
+                i += 1
+
+            clock.advance_to(tick_end)
+            t0 = time.perf_counter()
+            snapshot = engine.compute_dashboard_snapshot()
+            did_write = engine._write_atomic_snapshot(snapshot)
+            compute_ms = (time.perf_counter() - t0) * 1000
+            recomputes += 1
+            computes.append(compute_ms)
+            latencies.extend((tick_end - ts) * 1000 + compute_ms for ts in arrivals)
+            if did_write:
+                written += 1
+                last_sections = snapshot_digests(snapshot, volatile)
+                digests.append({"v": snapshot["version"], "digest": _combined(last_sections)})
+                if snapshot_sink is not None:
+                    snapshot_sink.write(json.dumps(snapshot) + "\n")
+    finally:
+        engine.set_clock(None)
+    wall = time.perf_counter() - started
+
+    return {
+        "benchmark": "replay",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "run": {"speed": speed, "tick_sec": tick_sec,
+                "virtual_start": _event_ts(records[0]["event"]) if records else None,
+                "virtual_end": clock.t},
+        "events": len(records),
+        "recomputes": recomputes,
+        "snapshots_written": written,
+        "wall_sec": round(wall, 3),
+        "events_per_sec": round(len(records) / wall, 1) if wall > 0 else None,
+        "latency_ms": _percentiles(latencies),
+        "compute_ms": _percentiles(computes),
+        "final": {"digest": _combined(last_sections), "sections": last_sections},
+        "digests": digests,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float = 2.0) -> list:
+    """Differences that should fail a regression check (empty list = OK)."""
+    problems = []
+    if report["events"] != baseline.get("events"):
+        problems.append(f"event count {report['events']} != baseline {baseline.get('events')}")
+    ours, theirs = report["digests"], baseline.get("digests", [])
+    for n, (a, b) in enumerate(zip(ours, theirs)):
+        if a["digest"] != b["digest"]:
+            problems.append(f"snapshot #{n} (v{a['v']}) differs from baseline (v{b['v']})")
+            break
+    if len(ours) != len(theirs):
+        problems.append(f"{len(ours)} snapshots written, baseline wrote {len(theirs)}")
+    base_sections = baseline.get("final", {}).get("sections", {})
+    changed = sorted(k for k, v in report["final"]["sections"].items() if base_sections.get(k) != v)
+    if changed:
+        problems.append(f"final snapshot differs in: {', '.join(changed)}")
+    base_p95 = baseline.get("compute_ms", {}).get("p95")
+    p95 = report["compute_ms"].get("p95")
+    if base_p95 and p95 and p95 > base_p95 * tolerance:
+        problems.append(f"compute p95 {p95} ms > {tolerance}× baseline {base_p95} ms")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--log", help="JSONL event log to replay")
+    src.add_argument("--generate", type=int, metavar="N", help="Generate N synthetic events")
+    src.add_argument("--record", metavar="REPORT_DIR", help="Build a log from data/reports/*")
+    ap.add_argument("--hours", type=float, default=24.0)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--speed", type=float, default=0.0, help="N× real time; 0 = as fast as possible")
+    ap.add_argument("--tick", type=float, default=TICK_SEC, help="Virtual seconds per recompute")
+    ap.add_argument("--save-log", default="", help="Write the (generated/recorded) log here")
+    ap.add_argument("--snapshots", default="", help="Write every snapshot written (JSONL)")
+    ap.add_argument("--compare", default="", help="Baseline report to check against")
+    ap.add_argument("--tolerance", type=float, default=2.0, help="Allowed compute p95 ratio")
+    ap.add_argument("--out", default="")
+    args = ap.parse_args()
+
+    if args.log:
+        records = load_log(args.log)
+    elif args.record:
+        records = record_dirs(args.record)
+    else:
+        records = generate_log(args.generate, args.hours, args.seed)
+    if args.save_log:
+        save_log(args.save_log, records)
+        print(f"  Log: {len(records)} events → {args.save_log}")
+    if not records:
+        print("  No events to replay")
+        return
+
+    sink = open(args.snapshots, "w") if args.snapshots else None
+    try:
+        with tempfile.TemporaryDirectory(prefix="infrawatch_replay_") as workspace:
+            report = replay(records, workspace, args.speed, args.tick, sink)
+    finally:
+        if sink:
+            sink.close()
+
+    print(f"  events={report['events']}  recomputes={report['recomputes']}  "
+          f"written={report['snapshots_written']}  wall={report['wall_sec']}s  "
+          f"latency p95={report['latency_ms'].get('p95')} ms  compute p95={report['compute_ms'].get('p95')} ms")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            problems = compare(report, json.load(f), args.tolerance)
+        for p in problems:
+            print(f"  REGRESSION: {p}")
+        if problems:
+            sys.exit(1)
+        print("  Matches baseline")
+
+
+if __name__ == "__main__":
+    main()
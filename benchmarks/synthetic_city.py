@@ -0,0 +1,144 @@
+"""
+InfraWatch Nexus — Synthetic City Generator
+=============================================
+Registries and event histories of any size, in the same schema as
+config/wards.py, config/dustbins.py and the API's event files.
+
+  - generate_city(): wards on a square grid around CITY_CENTER (zones are
+    grid quadrants), dustbins scattered around each ward centroid, one
+    road segment per ward between neighbouring bins.
+  - generate_events(): waste reports / road issues / van collections
+    with a configurable distribution —
+      hotspots:  a fraction of wards receives a given share of reports
+      bursts:    short windows where many reports hit one ward
+      rain:      periods of heavy rainfall (weather readings)
+  - write_events(): event files under a data/ tree, N events per file
+    (the API writes 1; batching keeps 10M-event histories on disk sane).
+
+Everything is seeded, so a (size, seed) pair always yields the same city.
+"""
+import json
+import math
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+from config.wards import CITY_CENTER
+
+ZONES = ("North", "East", "South", "West")
+
+
+def generate_city(n_wards: int, bins_per_ward: int, seed: int = 1, spacing_deg: float = 0.02) -> tuple:
+    """→ (wards, dustbins, road_segments) dicts in the registry schema."""
+    rng = random.Random(seed)
+    side = max(1, math.ceil(math.sqrt(n_wards)))
+    lat0 = CITY_CENTER["lat"] - side * spacing_deg / 2
+    lng0 = CITY_CENTER["lng"] - side * spacing_deg / 2
+    width = len(str(n_wards))
+    wards, dustbins, segments = {}, {}, {}
+    for w in range(n_wards):
+        row, col = divmod(w, side)
+        wid = f"W{w + 1:0{max(2, width)}d}"
+        lat = round(lat0 + (row + 0.5) * spacing_deg, 5)
+        lng = round(lng0 + (col + 0.5) * spacing_deg, 5)
+        quadrant = (2 if row >= side / 2 else 0) + (1 if col >= side / 2 else 0)
+        wards[wid] = {
+            "name": f"Synthetic Ward {w + 1}",
+            "zone": ZONES[quadrant],
+            "lat": lat, "lng": lng,
+            "bins": bins_per_ward, "vans": max(1, bins_per_ward // 20),
+            "population_density": rng.choice(["Medium", "High", "Very High"]),
+        }
+        bin_ids = []
+        for b in range(bins_per_ward):
+            did = f"SYN-{wid}-{b + 1:04d}"
+            dustbins[did] = {
+                "ward_id": wid,
+                "lat": round(lat + rng.uniform(-0.4, 0.4) * spacing_deg, 5),
+                "lng": round(lng + rng.uniform(-0.4, 0.4) * spacing_deg, 5),
+                "street": f"Synthetic Street {b + 1}, {wid}",
+                "capacity_liters": rng.choice([240, 360]),
+            }
+            bin_ids.append(did)
+        if len(bin_ids) >= 2:
+            a, b = dustbins[bin_ids[0]], dustbins[bin_ids[1]]
+            segments[f"S{wid}"] = {
+                "name": f"Synthetic Road {wid}",
+                "ward_id": wid,
+                "type": "Residential",
+                "lat": round((a["lat"] + b["lat"]) / 2, 5),
+                "lng": round((a["lng"] + b["lng"]) / 2, 5),
+                "length_km": 1.0,
+            }
+    return wards, dustbins, segments
+
+
+def generate_events(wards: dict, dustbins: dict, n_events: int, hours: float = 2.0, seed: int = 1,
+                    hotspot_frac: float = 0.05, hotspot_share: float = 0.5,
+                    bursts: int = 3, burst_share: float = 0.1, rain_periods: int = 1,
+                    end: datetime = None) -> dict:
+    """
+    → {"waste": [...], "road": [...], "vans": [...], "weather": [...]}.
+    Waste 80%, road 10%, vans 10%; timestamps inside the last `hours` before `end`.
+    """
+    rng = random.Random(seed)
+    end = end or datetime(2026, 1, 15, 12, 0, tzinfo=timezone.utc)
+    span = hours * 3600
+    ward_ids = sorted(wards)
+    bins_by_ward = {}
+    for did, d in dustbins.items():
+        bins_by_ward.setdefault(d["ward_id"], []).append(did)
+    for ids in bins_by_ward.values():
+        ids.sort()
+    hotspots = ward_ids[:max(1, int(len(ward_ids) * hotspot_frac))] if hotspot_frac > 0 else []
+    burst_windows = [(rng.choice(ward_ids), rng.uniform(0, max(0.0, span - 300))) for _ in range(bursts)]
+
+    def pick() -> tuple:
+        r = rng.random()
+        if burst_windows and r < burst_share:
+            wid, t0 = rng.choice(burst_windows)
+            return wid, t0 + rng.uniform(0, 300)
+        if hotspots and r < burst_share + hotspot_share * (1 - burst_share):
+            return rng.choice(hotspots), rng.uniform(0, span)
+        return rng.choice(ward_ids), rng.uniform(0, span)
+
+    out = {"waste": [], "road": [], "vans": [], "weather": []}
+    start = end - timedelta(seconds=span)
+    for i in range(n_events):
+        wid, offset = pick()
+        did = rng.choice(bins_by_ward[wid])
+        ts = (start + timedelta(seconds=offset)).isoformat()
+        r = rng.random()
+        if r < 0.8:
+            out["waste"].append({"dustbin_id": did, "overflow_level": rng.randint(1, 5),
+                                 "timestamp": ts, "source": "synthetic"})
+        elif r < 0.9:
+            out["road"].append({
+                "event_id": f"SR-{seed}-{i}", "from_dustbin": did,
+                "to_dustbin": rng.choice(bins_by_ward[wid]), "ward_id": wid,
+                "issue_type": rng.choice(["pothole", "waterlogging", "crack"]),
+                "severity": rng.randint(1, 5), "timestamp": ts, "source": "synthetic",
+            })
+        else:
+            out["vans"].append({"event_id": f"SV-{seed}-{i}", "dustbin_id": did, "ward_id": wid,
+                                "event_type": "collection_confirmed", "timestamp": ts,
+                                "source": "synthetic"})
+    for p in range(rain_periods):
+        t0 = start + timedelta(seconds=rng.uniform(0, span))
+        out["weather"].append({"rainfall_mm_hr": round(rng.uniform(15, 45), 1),
+                               "weather_source": "synthetic", "timestamp": t0.isoformat()})
+    return out
+
+
+def write_events(data_root: str, events: dict, events_per_file: int = 1) -> int:
+    """Write waste/road/vans events under data_root/reports/*; returns files written."""
+    files = 0
+    for stream in ("waste", "road", "vans"):
+        directory = os.path.join(data_root, "reports", stream)
+        os.makedirs(directory, exist_ok=True)
+        items = events.get(stream, [])
+        for n, i in enumerate(range(0, len(items), events_per_file)):
+            with open(os.path.join(directory, f"syn_{stream}_{n:08d}.json"), "w") as f:
+                json.dump(items[i:i + events_per_file], f)
+            files += 1
+    return files
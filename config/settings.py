@@ -49,8 +49,18 @@ ROAD_NORM = {
     "report_count_6hr":    6,      # 6+ road reports in 6 hrs = max
     "severity":            5,      # Severity 5 = critical
     "rainfall_mm_hr":      50,     # Same rainfall threshold (CAPPED)
+    "severity_per_km":     4,      # Segment: 4 severity points per km in window = max
 }
 
+# Road issue → ROAD_SEGMENTS snapping (segment reach = length_km / 2 + tolerance)
+ROAD_SNAP_TOLERANCE_KM = 0.5
+
+# A single road issue has no window aggregate to score, so its severity
+# (1–5) is put on the STATE_BANDS scale linearly: 1 → 20 (Normal),
+# 2 → 40 (Elevated), 3 → 60 (Warning), 4–5 → 80–100 (Critical).
+# Used by the road-issue list and the priority queue alike.
+ROAD_ISSUE_SEVERITY_SCORE = 20    # Score points per severity level
+
 # ══════════════════════════════════════════════════════════════════════════════
 # STATE BANDS (shared by both waste-ward and road scoring)
 # ══════════════════════════════════════════════════════════════════════════════
@@ -61,7 +71,11 @@ STATE_BANDS = [
     {"min": 76, "max": 100, "label": "Critical",  "color": "#DC2626"},
 ]
 
-HYSTERESIS_BUFFER = 10
+HYSTERESIS_BUFFER = 10           # Dead zone (score points) around each band boundary
+HYSTERESIS_DWELL_SEC  = 300      # Dustbin de-escalation must hold this long
+HYSTERESIS_STATE_FILE = "hysteresis_state.json"   # Created inside OUTPUT_DIR
+TRANSITIONS_FILE      = "transitions.jsonl"       # Compact state-transition stream
+TRANSITIONS_MAX_BYTES = 5_000_000                 # Rotated to transitions.jsonl.1 beyond this
 
 # ══════════════════════════════════════════════════════════════════════════════
 # ROLLING WINDOW DURATIONS
@@ -73,6 +87,35 @@ ROAD_ISSUE_WINDOW_HOURS = 6       # Road issues expire after 6 hours
 # DEDUPLICATION
 # ══════════════════════════════════════════════════════════════════════════════
 DEDUP_WINDOW_MINUTES = 5          # Same dustbin, same 5 min = merge
+DEDUP_MAX_ENTRIES    = 100_000    # Hard cap; oldest entries evicted first
+DEDUP_BACKEND        = "memory"   # "memory" (per-process) | "sqlite" (shared by all workers)
+DEDUP_SQLITE_FILE    = "dedup.sqlite3"  # Created inside OUTPUT_DIR
+
+# ══════════════════════════════════════════════════════════════════════════════
+# EVENT STORE (ingestion/event_store.py)
+# ══════════════════════════════════════════════════════════════════════════════
+EVENT_STORE_BACKEND    = "files"           # "files" (one JSON per event) | "sqlite"; env EVENT_STORE overrides
+EVENT_STORE_FILE       = "events.sqlite3"  # Created inside OUTPUT_DIR
+EVENT_STORE_BATCH_SIZE = 256               # Rows per group commit, at most…
+EVENT_STORE_BATCH_MS   = 20                # …collected for this long
+EVENT_STORE_POLL_SEC   = 0.25              # Engine checks for new rows this often between recomputes
+
+# ══════════════════════════════════════════════════════════════════════════════
+# EVENT ARCHIVE (stream_engine/event_archive.py — /api/admin/analytics)
+# ══════════════════════════════════════════════════════════════════════════════
+ARCHIVE_ENABLED      = True        # Needs pyarrow; env ARCHIVE_ENABLED=0 turns it off
+ARCHIVE_DIR          = "archive"   # Created inside OUTPUT_DIR
+ARCHIVE_INTERVAL_SEC = 3600        # Engine looks for newly expired whole days this often
+ARCHIVE_EXPIRY_HOURS = {           # A day is archived once it is this far behind (≥ the live window)
+    "waste": WASTE_REPORT_WINDOW_HOURS,
+    "road": ROAD_ISSUE_WINDOW_HOURS,
+    "vans": 24,
+    "weather": 24,
+}
+ARCHIVE_COLLECTION_LOOKBACK_HOURS = 48   # Reports considered for a van collection's wait_sec
+ANALYTICS_DEFAULT_DAYS = 30        # Range when ?start / ?end are omitted
+ANALYTICS_MAX_DAYS     = 400
+ANALYTICS_MAX_ROWS     = 5000      # Result groups returned (truncated flag beyond)
 
 # ══════════════════════════════════════════════════════════════════════════════
 # DATA DIRECTORIES (Pathway watches these)
@@ -84,16 +127,148 @@ OUTPUT_DIR       = "./data/output"
 # ══════════════════════════════════════════════════════════════════════════════
 # WEATHER API (WeatherAPI.com — single source)
 # ══════════════════════════════════════════════════════════════════════════════
-WEATHER_API_URL  = "http://api.weatherapi.com/v1/current.json"
+WEATHER_API_URL  = "http://api.weatherapi.com/v1/current.json"   # env WX_API_URL overrides
 WEATHER_CITY     = "Delhi"
 WEATHER_POLL_SEC = 600       # 10 minutes
 
+# Spatial rainfall: one station per ward centroid, IDW-interpolated to
+# every ward and dustbin (False → single WEATHER_CITY reading)
+WEATHER_SPATIAL           = True
+WEATHER_STATION_PRECISION = 2      # Centroids rounding to the same 0.01° share a station
+WEATHER_IDW_POWER         = 2.0
+WEATHER_STATION_TTL_SEC   = 300    # Fresh reading is not re-fetched
+WEATHER_STATION_STALE_SEC = 1800   # Last good reading survives failed polls this long
+WEATHER_CONCURRENCY       = 8      # Max in-flight station requests (pooled session)
+
+# Poller resilience: jittered backoff after a failed round, circuit breaker
+# after repeated failures (cool-down doubles up to the max)
+WEATHER_RETRY_BASE_SEC        = 5
+WEATHER_BREAKER_FAILURES      = 3
+WEATHER_BREAKER_RESET_SEC     = 300
+WEATHER_BREAKER_MAX_RESET_SEC = 3600
+
+# FORECAST_DAYS-day forecast (/api/forecast) — cached per API worker, refreshed in background
+WEATHER_FORECAST_URL = "http://api.weatherapi.com/v1/forecast.json"
+FORECAST_DAYS        = 7     # Horizon (daily steps; hourly = 24 × this). WeatherAPI serves 1–14
+FORECAST_MAX_DAYS    = 14
+FORECAST_TTL_SEC     = 1800  # Fresh for 30 min unless upstream sends Cache-Control max-age
+FORECAST_STALE_SEC   = 3600  # Serve stale up to 1 h more while revalidating
+FORECAST_RETRY_SEC   = 120   # Back-off after a failed upstream fetch
+FORECAST_TIMEOUT_SEC = 8
+
+# Predictive risk model (stream_engine/forecast_model.py)
+FORECAST_MODEL       = "linear"          # "linear" | "fitted"
+FORECAST_COEF_FILE   = "config/forecast_coef.json"  # {"intercept", "reports", "rain", "wind"}; see forecast_model.py
+FORECAST_NORM = {
+    "daily_precip_mm":  50,   # 50 mm/day = max rain factor
+    "hourly_precip_mm": 10,   # 10 mm/hr  = max rain factor (hourly steps)
+    "wind_kph":         80,   # 80 kph    = max wind factor
+    "report_count":     10,   # 10 current reports = max base risk
+}
+FORECAST_LEVELS = {"CRITICAL": 0.7, "ELEVATED": 0.4}   # else LOW
+
 # ══════════════════════════════════════════════════════════════════════════════
 # SERVER
 # ══════════════════════════════════════════════════════════════════════════════
 SERVER_HOST = "0.0.0.0"
 SERVER_PORT = 8000
 
+# Gemini Vision (photo → dustbin ID fallback); env GEMINI_API_URL overrides
+GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
+GEMINI_TIMEOUT_SEC = 15
+
+# Event-loop lag sampler (api/loop_monitor.py — reported by /health)
+LOOP_LAG_SAMPLE_SEC = 0.25
+LOOP_LAG_WINDOW     = 1200    # Samples kept (≈ 5 min at 0.25s)
+LOOP_SLOW_CALLBACK_MS = 100   # Watchdog logs the handler when the loop is blocked this long
+
+# On-demand sampling profiler (stream_engine/profiler.py — /api/admin/profile)
+PROFILE_DEFAULT_SEC  = 10
+PROFILE_MAX_SEC      = 120
+PROFILE_INTERVAL_MS  = 10
+PROFILE_CONTROL_FILE = "profile_request.json"   # API → engine, inside OUTPUT_DIR
+PROFILE_ENGINE_FILE  = "profile_engine.json"    # Engine → API (status + collapsed stacks)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# LIVE FEED (WebSocket + Server-Sent Events fan-out)
+# ══════════════════════════════════════════════════════════════════════════════
+FANOUT_POLL_SEC    = 0.25    # How often each worker checks for a new snapshot version
+SSE_HEARTBEAT_SEC  = 15      # Comment frame to keep idle SSE connections open
+SSE_RETRY_MS       = 3000    # Client reconnect delay advertised to EventSource
+WS_KEEPALIVE_SEC   = 4       # Re-send current state to idle WebSocket clients
+SNAPSHOT_HEARTBEAT_SEC = 30  # Unchanged snapshots are re-written (new version) this often
+TRANSITIONS_PAGE_MAX   = 1000  # Hard cap on /api/transitions?limit
+TRANSITIONS_BACKLOG    = 5000  # Recent transitions kept in memory per API worker
+
+# ══════════════════════════════════════════════════════════════════════════════
+# QUERY API (filtered / paginated reads over the live snapshot)
+# ══════════════════════════════════════════════════════════════════════════════
+QUERY_PAGE_DEFAULT = 500     # Items per page when ?limit is omitted
+QUERY_PAGE_MAX     = 5000    # Hard cap on ?limit
+
+# Nearest-dustbin lookup (grid index over the registry)
+NEAREST_K_DEFAULT           = 5
+NEAREST_K_MAX               = 50
+DETECT_CANDIDATES           = 5      # Nearby bins offered when photo detection fails
+DETECT_CANDIDATE_RADIUS_KM  = 2.0
+
+# ══════════════════════════════════════════════════════════════════════════════
+# VAN ROUTING (stream_engine/route_planner.py)
+# ══════════════════════════════════════════════════════════════════════════════
+ROUTE_STATE_WEIGHTS = {"Critical": 3.0, "Escalated": 2.0, "Reported": 1.0}  # Bins that get a stop
+ROUTE_REF_CAPACITY_LITERS   = 240    # capacity_liters / this scales a stop's weight
+ROUTE_DETOUR_FACTOR         = 1.3    # Road distance ≈ haversine × this
+ROUTE_ISSUE_PENALTY         = 0.25   # Edge × (1 + this·severity) when a road issue spans it
+ROUTE_LATENCY_WEIGHT        = 1.0    # Weight of Σ stop_weight·arrival_km vs tour length
+ROUTE_TIME_BUDGET_MS        = 50     # Local-search budget per ward, full solve
+ROUTE_INCREMENTAL_BUDGET_MS = 10     # … after a stop was added / collected
+
+# ══════════════════════════════════════════════════════════════════════════════
+# ZONE ROLLUPS
+# ══════════════════════════════════════════════════════════════════════════════
+ZONE_TOP_OFFENDERS = 3       # Highest-risk wards listed per zone
+
+# ══════════════════════════════════════════════════════════════════════════════
+# RISK HISTORY (stream_engine/timeseries.py — /api/history)
+# ══════════════════════════════════════════════════════════════════════════════
+HISTORY_DIR  = "history"     # Created inside OUTPUT_DIR
+HISTORY_TIERS = {            # name → (bucket seconds, retention seconds); finest first
+    "1m":  (60,   30 * 86400),
+    "15m": (900,  90 * 86400),
+    "1h":  (3600, 365 * 86400),
+}                            # ≈ 0.7 MB on disk per series, fixed
+HISTORY_WARD_METRICS = ("waste_score", "road_score", "report_count", "bins_reported", "rainfall_mm_hr")
+HISTORY_CITY_METRICS = ("waste_index", "road_index", "reports", "bins_open", "bins_escalated", "bins_critical")
+HISTORY_MAX_POINTS   = 2000  # resolution=auto picks the finest tier within this many buckets
+HISTORY_DEFAULT_SEC  = 86400 # Range when ?start is omitted
+
+# Snapshot journal (stream_engine/snapshot_journal.py — /api/dashboard?at=)
+JOURNAL_DIR             = "journal"   # Created inside OUTPUT_DIR
+JOURNAL_KEYFRAME_EVERY  = 100         # Full snapshot after this many deltas…
+JOURNAL_KEYFRAME_SEC    = 600         # …or this many seconds, whichever first
+JOURNAL_RETENTION_HOURS = 72          # Older segments are deleted
+
+# Pathway processing logs (stream_engine/processing_log.py — pw_<stream>_log.jsonl)
+PW_LOG_VERBOSE        = False             # env PW_LOG_VERBOSE=1 → one line per processed file
+PW_LOG_SUMMARY_SEC    = 60                # Otherwise one count line per stream per minute
+PW_LOG_MAX_BYTES      = 8 * 1024 * 1024   # Rotate (gzip) at this size…
+PW_LOG_MAX_AGE_HOURS  = 24                # …or this age, whichever first
+PW_LOG_KEEP           = 14                # Archives kept per stream
+PW_LOG_RETENTION_DAYS = 30                # Older archives are deleted regardless
+
+# ══════════════════════════════════════════════════════════════════════════════
+# METRICS (stream_engine/metrics.py — Prometheus text on /metrics)
+# ══════════════════════════════════════════════════════════════════════════════
+METRICS_ENABLED     = True                    # env METRICS_ENABLED=0 → every metric is a no-op
+METRICS_ENGINE_FILE = "engine_metrics.prom"   # Engine's rendered registry, inside OUTPUT_DIR
+METRICS_EXPORT_SEC  = 5                       # Engine re-renders it at most this often
+METRICS_WORKER_DIR  = "api_metrics"           # API_WORKERS>1: each worker's export (<pid>.prom), inside OUTPUT_DIR
+METRICS_WORKER_STALE_SEC = 30                 # Exports older than this (exited workers) are left out
+
+# Report freshness (api/freshness.py): ingest → engine → API cache → WebSocket
+FRESHNESS_SLA_SEC = 5        # "A report shows on the admin map within 5 s"
+FRESHNESS_BUCKETS = (0.25, 0.5, 1, 2, 3, 4, 5, 7.5, 10, 15, 30, 60, 300)
+
 # ══════════════════════════════════════════════════════════════════════════════
 # PRIORITY QUEUE
 # ══════════════════════════════════════════════════════════════════════════════
@@ -480,6 +480,9 @@ function zoomToItem(index) {
                 marker.setIcon(createDivIcon(stateClass, 'marker-lg'));
             }, 1500);
         }
+    } else if (item.type === 'road_segment') {
+        // Road segment risk: centre on the segment midpoint
+        map.flyTo([item.lat, item.lng], 15, { duration: 1.2 });
     } else if (item.type === 'road') {
         // Extract dustbin IDs from road issue data
         const roadIssues = dashboard.road_issues || [];
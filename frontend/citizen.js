@@ -519,6 +519,9 @@ function zoomToAlert(item) {
                     marker.setIcon(createDivIcon(stateClass, 'marker-lg'));
                 }, 2000);
             }
+        } else if (item.type === 'road_segment') {
+            // Road segment risk: centre on the segment midpoint
+            dashMap.flyTo([item.lat, item.lng], 15, { duration: 1.2 });
         } else if (item.type === 'road') {
             // Look up the full road_issue data from dashboard (has coordinates)
             const roadIssues = dashboard?.road_issues || [];
@@ -596,6 +599,31 @@ function initReportFlow() {
         }
     });
 
+    // Device location (best effort) → the server can offer the nearest bins on fallback
+    function getDeviceLocation(timeoutMs = 5000) {
+        if (!navigator.geolocation) return Promise.resolve(null);
+        return new Promise(resolve => {
+            navigator.geolocation.getCurrentPosition(
+                pos => resolve({ lat: pos.coords.latitude, lng: pos.coords.longitude }),
+                () => resolve(null),
+                { timeout: timeoutMs, maximumAge: 60000 }
+            );
+        });
+    }
+
+    // Fallback: put the nearby candidates at the top of the manual form
+    function showNearbyCandidates(candidates) {
+        if (!candidates || !candidates.length) return;
+        document.getElementById('manualForm').classList.remove('hidden');
+        document.getElementById('manualWard').value = candidates[0].ward_id;
+        const sel = document.getElementById('manualDustbin');
+        sel.innerHTML = '<option value="">— Nearby Dustbins —</option>';
+        for (const c of candidates) {
+            sel.innerHTML += `<option value="${c.dustbin_id}">${c.dustbin_id} — ${c.street} (${Math.round(c.distance_m)} m)</option>`;
+        }
+        sel.value = candidates[0].dustbin_id;
+    }
+
     // AI Detection
     btnDetect.addEventListener('click', async () => {
         if (!photoInput.files.length) { showToast('Upload a photo first.', 'error'); return; }
@@ -606,16 +634,22 @@ function initReportFlow() {
         try {
             const formData = new FormData();
             formData.append('file', photoInput.files[0]);
+            const location = await getDeviceLocation();
+            if (location) {
+                formData.append('lat', location.lat);
+                formData.append('lng', location.lng);
+            }
             const resp = await fetch(`${API_BASE}/api/report/dustbin/detect`, { method: 'POST', body: formData });
             const data = await resp.json();
 
-            if (data.dustbin_id) {
-                detectedDustbinId = data.dustbin_id;
-                document.getElementById('detectedId').textContent = data.dustbin_id;
+            if (data.detected_id) {
+                detectedDustbinId = data.detected_id;
+                document.getElementById('detectedId').textContent = data.detected_id;
                 document.getElementById('detectedStreet').textContent = data.street || '';
                 document.getElementById('detectionResult').classList.remove('hidden');
             } else {
                 showToast(data.message || 'Detection failed. Try manual.', 'error');
+                showNearbyCandidates(data.candidates);
             }
         } catch (e) {
             showToast('Detection failed. Try manual.', 'error');
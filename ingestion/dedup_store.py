@@ -0,0 +1,213 @@
+"""
+InfraWatch Nexus — Report Dedup Store
+=======================================
+"Same dustbin, same DEDUP_WINDOW_MINUTES = merge" with bounded memory.
+
+Backends:
+  - MemoryDedupStore : per-process dict + min-heap of expiry times.
+                       Expired entries are evicted lazily; a hard
+                       max_entries cap drops the oldest first.
+  - SQLiteDedupStore : local SQLite file in WAL mode, shared by every
+                       uvicorn worker on the host. Check-and-merge runs
+                       inside BEGIN IMMEDIATE so it is atomic across
+                       processes. Triggers keep a row count, so every
+                       write trims to max_entries via the last_ts index.
+
+Both expose the same small dict-like API used by api/server.py:
+check_and_merge(), seed(), pop(), clear(), len().
+"""
+import heapq
+import os
+import sqlite3
+import threading
+import time
+
+
+class MemoryDedupStore:
+    """In-process dedup with TTL eviction (min-heap) and a hard size cap."""
+
+    def __init__(self, window_sec: float, max_entries: int):
+        self.window_sec = window_sec
+        self.max_entries = max_entries
+        self._entries = {}   # dustbin_id → (last_ts, overflow)
+        self._heap = []      # (expires_at, dustbin_id) — may hold stale items
+        self._lock = threading.Lock()
+
+    def _push(self, dustbin_id: str, ts: float, overflow: int):
+        self._entries[dustbin_id] = (ts, overflow)
+        heapq.heappush(self._heap, (ts + self.window_sec, dustbin_id))
+
+    def _evict(self, now: float):
+        """Drop expired entries, then the oldest ones while over the cap."""
+        heap = self._heap
+        while heap:
+            expires_at, did = heap[0]
+            entry = self._entries.get(did)
+            # Stale heap item: entry was refreshed or removed since push
+            if entry is None or entry[0] + self.window_sec != expires_at:
+                heapq.heappop(heap)
+                continue
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            heapq.heappop(heap)
+            del self._entries[did]
+        # Lazy deletion leaves stale items behind; compact if they dominate
+        if len(heap) > 2 * self.max_entries:
+            self._heap = [(ts + self.window_sec, did) for did, (ts, _) in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def check_and_merge(self, dustbin_id: str, overflow_level: int, now: float = None) -> bool:
+        """True if a report for this dustbin is inside the window (merged)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._evict(now)
+            last = self._entries.get(dustbin_id)
+            if last and now - last[0] < self.window_sec:
+                # Merge: keep max overflow, slide the window
+                self._push(dustbin_id, now, max(last[1], overflow_level))
+                return True
+            self._push(dustbin_id, now, overflow_level)
+            self._evict(now)
+            return False
+
+    def seed(self, dustbin_id: str, ts: float, overflow_level: int):
+        """Insert a past report (restart rebuild). Keeps the newest timestamp."""
+        with self._lock:
+            last = self._entries.get(dustbin_id)
+            if last is None or ts > last[0]:
+                self._push(dustbin_id, ts, overflow_level)
+            self._evict(time.time())
+
+    def pop(self, dustbin_id: str, default=None):
+        with self._lock:
+            return self._entries.pop(dustbin_id, default)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._heap.clear()
+
+    def __len__(self):
+        with self._lock:
+            self._evict(time.time())
+            return len(self._entries)
+
+
+class SQLiteDedupStore:
+    """Host-wide dedup shared by all worker processes (SQLite WAL)."""
+
+    def __init__(self, path: str, window_sec: float, max_entries: int):
+        self.path = path
+        self.window_sec = window_sec
+        self.max_entries = max_entries
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS dedup ("
+            " dustbin_id TEXT PRIMARY KEY,"
+            " last_ts REAL NOT NULL,"
+            " overflow INTEGER NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_dedup_ts ON dedup(last_ts)")
+        # Row count kept by triggers: COUNT(*) would scan the table on every write
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS dedup_count ("
+                " id INTEGER PRIMARY KEY CHECK (id = 0), n INTEGER NOT NULL)"
+            )
+            conn.execute("INSERT OR IGNORE INTO dedup_count(id, n) SELECT 0, COUNT(*) FROM dedup")
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS dedup_ins AFTER INSERT ON dedup"
+                " BEGIN UPDATE dedup_count SET n = n + 1 WHERE id = 0; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS dedup_del AFTER DELETE ON dedup"
+                " BEGIN UPDATE dedup_count SET n = n - 1 WHERE id = 0; END"
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; autocommit so BEGIN is explicit."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _trim(self, conn, now: float):
+        """Drop expired rows, then the oldest ones while over the cap (in the caller's txn)."""
+        conn.execute("DELETE FROM dedup WHERE last_ts < ?", (now - self.window_sec,))
+        excess = conn.execute("SELECT n FROM dedup_count WHERE id = 0").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM dedup WHERE dustbin_id IN ("
+                " SELECT dustbin_id FROM dedup ORDER BY last_ts LIMIT ?)",
+                (excess,),
+            )
+
+    def check_and_merge(self, dustbin_id: str, overflow_level: int, now: float = None) -> bool:
+        now = time.time() if now is None else now
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT last_ts, overflow FROM dedup WHERE dustbin_id = ?", (dustbin_id,)
+            ).fetchone()
+            duplicate = bool(row) and now - row[0] < self.window_sec
+            overflow = max(row[1], overflow_level) if duplicate else overflow_level
+            conn.execute(
+                "INSERT INTO dedup(dustbin_id, last_ts, overflow) VALUES (?, ?, ?)"
+                " ON CONFLICT(dustbin_id) DO UPDATE SET last_ts = excluded.last_ts,"
+                " overflow = excluded.overflow",
+                (dustbin_id, now, overflow),
+            )
+            self._trim(conn, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return duplicate
+
+    def seed(self, dustbin_id: str, ts: float, overflow_level: int):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO dedup(dustbin_id, last_ts, overflow) VALUES (?, ?, ?)"
+                " ON CONFLICT(dustbin_id) DO UPDATE SET last_ts = excluded.last_ts,"
+                " overflow = excluded.overflow WHERE excluded.last_ts > dedup.last_ts",
+                (dustbin_id, ts, overflow_level),
+            )
+            self._trim(conn, time.time())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def pop(self, dustbin_id: str, default=None):
+        row = self._conn().execute(
+            "DELETE FROM dedup WHERE dustbin_id = ? RETURNING last_ts, overflow", (dustbin_id,)
+        ).fetchone()
+        return tuple(row) if row else default
+
+    def clear(self):
+        self._conn().execute("DELETE FROM dedup")
+
+    def __len__(self):
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM dedup WHERE last_ts >= ?", (time.time() - self.window_sec,)
+        ).fetchone()[0]
+
+
+def create_dedup_store(backend: str, window_sec: float, max_entries: int, sqlite_path: str):
+    """Factory: "sqlite" for a worker-shared store, anything else → memory."""
+    if backend == "sqlite":
+        return SQLiteDedupStore(sqlite_path, window_sec, max_entries)
+    return MemoryDedupStore(window_sec, max_entries)
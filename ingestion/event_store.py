@@ -0,0 +1,270 @@
+"""
+InfraWatch Nexus — SQLite Event Store
+=======================================
+Optional backend for the four event streams (waste, road, vans, weather)
+instead of one JSON file per event (EVENT_STORE=sqlite).
+
+  - One table, local SQLite file in WAL mode: readers (engine, every API
+    worker) never block the writer.
+  - Indexed on (stream, epoch_ts), (dustbin_id, epoch_ts) and
+    (ward_id, epoch_ts), so "bin X in the last 2 h", "ward W's open road
+    issues" or "the waste window" are index range reads, not directory
+    scans.
+  - Writes are group-committed: append() queues the event and returns a
+    Future; a writer thread commits everything queued within batch_ms
+    (up to batch_size rows) in one transaction, then resolves each Future
+    with the event's rowid. One fsync per batch instead of per report.
+  - rowid is the ingest order: since(rowid) hands the engine exactly the
+    rows committed after its last pull.
+  - The one-off backfill from the JSON event files is recorded by a marker
+    row in meta, not inferred from an empty table — the API may have
+    accepted reports before the engine first opened the store.
+
+epoch_ts follows the engine's convention for event timestamps: ISO
+strings, naive ones read as UTC (see event_epoch).
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+
+STREAMS = ("waste", "road", "vans", "weather")
+
+
+def event_epoch(ts_str) -> float:
+    """Event timestamp → epoch seconds (naive → UTC, like the engine); 0.0 if missing / invalid."""
+    if not ts_str:
+        return 0.0
+    try:
+        dt = datetime.fromisoformat(str(ts_str).replace("Z", "+00:00"))
+    except ValueError:
+        return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class EventStore:
+    """Append-only event log in SQLite (WAL) with time / dustbin / ward indexes."""
+
+    def __init__(self, path: str, batch_size: int = 256, batch_ms: float = 20):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_ms = batch_ms
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self.batches = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            " id INTEGER PRIMARY KEY,"
+            " stream TEXT NOT NULL,"
+            " epoch_ts REAL NOT NULL,"
+            " dustbin_id TEXT,"
+            " ward_id TEXT,"
+            " event_id TEXT,"
+            " ingested_at REAL,"
+            " payload TEXT NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_events_stream_ts ON events(stream, epoch_ts)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_events_dustbin_ts ON events(dustbin_id, epoch_ts)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_events_ward_ts ON events(ward_id, epoch_ts)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; autocommit so BEGIN is explicit."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(stream: str, event: dict) -> tuple:
+        return (
+            stream, event_epoch(event.get("timestamp")), event.get("dustbin_id") or event.get("from_dustbin"),
+            event.get("ward_id"), event.get("event_id"), event.get("ingested_at"),
+            json.dumps(event, separators=(",", ":")),
+        )
+
+    def _insert(self, rows: list) -> list:
+        """Insert rows in one transaction; returns their rowids."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            ids = [conn.execute(
+                "INSERT INTO events(stream, epoch_ts, dustbin_id, ward_id, event_id, ingested_at, payload)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", row,
+            ).lastrowid for row in rows]
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.batches += 1
+        return ids
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # WRITES
+    # ═══════════════════════════════════════════════════════════════════════
+    def append(self, stream: str, event: dict) -> Future:
+        """Queue one event for the next group commit; the Future resolves to its rowid."""
+        future = Future()
+        self._queue.put((self._row(stream, event), future))
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="event_store_writer", daemon=True)
+                    self._writer.start()
+        return future
+
+    def add_many(self, stream: str, events: list) -> list:
+        """Insert synchronously in one transaction (imports, tools, tests)."""
+        return self._insert([self._row(stream, e) for e in events]) if events else []
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_ms / 1000
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                ids = self._insert([row for row, _ in batch])
+            except Exception as e:
+                print(f"[EventStore] Batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), rowid in zip(batch, ids):
+                    future.set_result(rowid)
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued event is committed (or failed)."""
+        self._queue.join()
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # READS (index ranges)
+    # ═══════════════════════════════════════════════════════════════════════
+    def last_rowid(self) -> int:
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    def since(self, rowid: int, limit: int = 5000) -> list:
+        """(rowid, stream, ingested_at, payload) committed after rowid, oldest first."""
+        return self._conn().execute(
+            "SELECT id, stream, ingested_at, payload FROM events WHERE id > ? ORDER BY id LIMIT ?",
+            (rowid, limit),
+        ).fetchall()
+
+    def latest_ts(self, stream: str):
+        """Newest event time in a stream (None if empty)."""
+        return self._conn().execute(
+            "SELECT MAX(epoch_ts) FROM events WHERE stream = ?", (stream,)
+        ).fetchone()[0]
+
+    def earliest_ts(self, stream: str):
+        """Oldest valid event time in a stream (None if empty)."""
+        return self._conn().execute(
+            "SELECT MIN(epoch_ts) FROM events WHERE stream = ? AND epoch_ts > 0", (stream,)
+        ).fetchone()[0]
+
+    def window(self, stream: str, start_ts: float, end_ts: float = None) -> list:
+        """Events of one stream with start_ts ≤ event time (< end_ts), in time order."""
+        sql, args = "SELECT payload FROM events WHERE stream = ? AND epoch_ts >= ?", [stream, start_ts]
+        if end_ts is not None:
+            sql += " AND epoch_ts < ?"
+            args.append(end_ts)
+        rows = self._conn().execute(sql + " ORDER BY epoch_ts", args).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def _by_key(self, column: str, value: str, start_ts: float, stream: str = None) -> list:
+        sql, args = f"SELECT payload FROM events WHERE {column} = ? AND epoch_ts >= ?", [value, start_ts]
+        if stream:
+            sql += " AND stream = ?"
+            args.append(stream)
+        rows = self._conn().execute(sql + " ORDER BY epoch_ts", args).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def for_dustbin(self, dustbin_id: str, start_ts: float = 0.0, stream: str = None) -> list:
+        """Events at one dustbin (road issues: their from_dustbin) since start_ts."""
+        return self._by_key("dustbin_id", dustbin_id, start_ts, stream)
+
+    def for_ward(self, ward_id: str, start_ts: float = 0.0, stream: str = None) -> list:
+        return self._by_key("ward_id", ward_id, start_ts, stream)
+
+    def count(self, stream: str = None) -> int:
+        if stream:
+            return self._conn().execute("SELECT COUNT(*) FROM events WHERE stream = ?", (stream,)).fetchone()[0]
+        return self._conn().execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    @staticmethod
+    def _read_files(directory: str) -> list:
+        events = []
+        if not os.path.isdir(directory):
+            return events
+        for fname in sorted(os.listdir(directory)):
+            if not fname.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, fname), "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            events.extend(e for e in (data if isinstance(data, list) else [data]) if isinstance(e, dict))
+        return events
+
+    def import_once(self, directories: dict):
+        """
+        Backfill {stream: directory of JSON event files} unless the marker
+        says it was done; returns the rows imported, or None if it was.
+        Events whose event_id is already stored are skipped (stores imported
+        before the marker existed). Marker and rows commit together.
+        """
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'files_imported'").fetchone():
+            return None
+        loaded = {stream: self._read_files(d) for stream, d in directories.items()}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'files_imported'").fetchone():
+                conn.execute("ROLLBACK")
+                return None             # another process got there first
+            imported = 0
+            for stream, events in loaded.items():
+                known = {eid for (eid,) in conn.execute(
+                    "SELECT event_id FROM events WHERE stream = ? AND event_id IS NOT NULL", (stream,))}
+                rows = [self._row(stream, e) for e in events
+                        if not e.get("event_id") or e["event_id"] not in known]
+                conn.executemany(
+                    "INSERT INTO events(stream, epoch_ts, dustbin_id, ward_id, event_id, ingested_at, payload)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)", rows,
+                )
+                imported += len(rows)
+            conn.execute("INSERT INTO meta(key, value) VALUES ('files_imported', ?)", (str(time.time()),))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return imported
+
+
+def create_event_store(backend: str, sqlite_path: str, batch_size: int = 256, batch_ms: float = 20):
+    """Factory: EventStore for "sqlite", None for the file backend."""
+    if backend == "sqlite":
+        return EventStore(sqlite_path, batch_size, batch_ms)
+    return None
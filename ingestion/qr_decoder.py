@@ -0,0 +1,163 @@
+"""
+InfraWatch Nexus — Local QR / Barcode Decoder
+===============================================
+Fast path for citizen photos: try to read the dustbin ID from a QR code
+or barcode printed on the bin before paying for a remote vision call.
+
+Decoders (first available wins, all optional):
+  - pyzbar + Pillow   (QR + common 1D barcodes)
+  - OpenCV            (QRCodeDetector / BarcodeDetector)
+
+Every attempt is timed; hit rate and latency are kept separately from
+the remote model so the avoided vision spend is visible.
+"""
+import io
+import re
+import threading
+import time
+
+# Try to import decoder libraries
+try:
+    from PIL import Image
+    from pyzbar import pyzbar
+    PYZBAR_AVAILABLE = True
+except ImportError:
+    PYZBAR_AVAILABLE = False
+
+try:
+    import cv2
+    import numpy as np
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
+DUSTBIN_PATTERN = re.compile(r"MCD-W\d{2}-\d{3}")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# STATS (local vs remote, process-wide)
+# ═══════════════════════════════════════════════════════════════════════════
+_stats_lock = threading.Lock()
+_stats = {
+    "local_attempts": 0,
+    "local_hits": 0,
+    "local_ms_total": 0.0,
+    "remote_calls": 0,
+    "remote_hits": 0,
+    "remote_ms_total": 0.0,
+}
+
+
+def record_local(hit: bool, elapsed_ms: float):
+    """Record one local decode attempt."""
+    with _stats_lock:
+        _stats["local_attempts"] += 1
+        _stats["local_hits"] += int(hit)
+        _stats["local_ms_total"] += elapsed_ms
+
+
+def record_remote(hit: bool, elapsed_ms: float):
+    """Record one remote vision model call."""
+    with _stats_lock:
+        _stats["remote_calls"] += 1
+        _stats["remote_hits"] += int(hit)
+        _stats["remote_ms_total"] += elapsed_ms
+
+
+def get_stats() -> dict:
+    """Snapshot of local/remote detection counters with derived rates."""
+    with _stats_lock:
+        s = dict(_stats)
+    attempts = s["local_attempts"]
+    calls = s["remote_calls"]
+    return {
+        "decoder": available_decoder(),
+        "local": {
+            "attempts": attempts,
+            "hits": s["local_hits"],
+            "hit_rate": round(s["local_hits"] / attempts, 3) if attempts else 0.0,
+            "avg_ms": round(s["local_ms_total"] / attempts, 2) if attempts else 0.0,
+        },
+        "remote": {
+            "calls": calls,
+            "hits": s["remote_hits"],
+            "avg_ms": round(s["remote_ms_total"] / calls, 2) if calls else 0.0,
+        },
+        # Every local hit is one remote vision call that never happened
+        "remote_calls_avoided": s["local_hits"],
+    }
+
+
+def reset_stats():
+    """Zero all counters (tests / benchmarks)."""
+    with _stats_lock:
+        for k in _stats:
+            _stats[k] = 0 if isinstance(_stats[k], int) else 0.0
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DECODERS — each returns a list of decoded text payloads
+# ═══════════════════════════════════════════════════════════════════════════
+def _decode_pyzbar(image_bytes: bytes) -> list:
+    img = Image.open(io.BytesIO(image_bytes))
+    img = img.convert("L")
+    return [s.data.decode("utf-8", errors="ignore") for s in pyzbar.decode(img)]
+
+
+def _decode_opencv(image_bytes: bytes) -> list:
+    buf = np.frombuffer(image_bytes, dtype=np.uint8)
+    img = cv2.imdecode(buf, cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return []
+    texts = []
+    ok, decoded, _, _ = cv2.QRCodeDetector().detectAndDecodeMulti(img)
+    if ok:
+        texts.extend(t for t in decoded if t)
+    if hasattr(cv2, "barcode"):
+        try:
+            ok, decoded, _, _ = cv2.barcode.BarcodeDetector().detectAndDecodeWithType(img)
+            if ok:
+                texts.extend(t for t in decoded if t)
+        except (cv2.error, ValueError):
+            pass
+    return texts
+
+
+def available_decoder() -> str | None:
+    """Name of the decoder that will be used, or None."""
+    if PYZBAR_AVAILABLE:
+        return "pyzbar"
+    if OPENCV_AVAILABLE:
+        return "opencv"
+    return None
+
+
+def _decode_payloads(image_bytes: bytes) -> list:
+    if PYZBAR_AVAILABLE:
+        return _decode_pyzbar(image_bytes)
+    if OPENCV_AVAILABLE:
+        return _decode_opencv(image_bytes)
+    return []
+
+
+def decode_dustbin_id(image_bytes: bytes, validate) -> str | None:
+    """
+    Try to read a dustbin ID from QR/barcodes in the image.
+    `validate` is the registry check (config.dustbins.validate_dustbin_id).
+    Returns the first valid ID, or None. Never raises.
+    """
+    start = time.perf_counter()
+    found = None
+    try:
+        for text in _decode_payloads(image_bytes):
+            for candidate in DUSTBIN_PATTERN.findall(text):
+                if validate(candidate):
+                    found = candidate
+                    break
+            if found:
+                break
+    except Exception:
+        found = None
+    if available_decoder():
+        record_local(found is not None, (time.perf_counter() - start) * 1000)
+    return found
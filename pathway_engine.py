@@ -7,20 +7,22 @@ Responsibilities:
   - Watch event directories (waste, road, vans, weather)
   - Aggregate per-dustbin (with event-time rolling windows)
   - Compute dustbin states (Clear/Reported/Escalated/Critical/Cleared)
-  - Compute ward-level risk scores
-  - Process road issues (with expiry)
+  - Compute ward-level risk scores, rolled up to zones and city
+  - Process road issues (with expiry), snapped to road segments
   - Build unified priority queue
+  - Plan per-ward van routes over the bins that need collection
   - Output atomic dashboard JSON snapshot
-  - Poll WeatherAPI.com for live rainfall
+  - Poll WeatherAPI.com for live rainfall (per-ward, spatially interpolated)
 """
 
+import asyncio
 import json
 import os
+import re
 import sys
 import tempfile
 import threading
 import time
-import requests
 from datetime import datetime, timedelta
 
 import pathway as pw
@@ -30,14 +32,43 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from config.settings import (
     WASTE_RISK_WEIGHTS, ROAD_RISK_WEIGHTS,
-    WASTE_NORM, ROAD_NORM, STATE_BANDS,
+    WASTE_NORM, ROAD_NORM, STATE_BANDS, ROAD_SNAP_TOLERANCE_KM, ROAD_ISSUE_SEVERITY_SCORE,
     DUSTBIN_STATE_THRESHOLDS,
     WASTE_REPORT_WINDOW_HOURS, ROAD_ISSUE_WINDOW_HOURS,
     WEATHER_API_URL, WEATHER_CITY, WEATHER_POLL_SEC,
-    PRIORITY_QUEUE_MAX,
+    WEATHER_SPATIAL, WEATHER_STATION_PRECISION, WEATHER_IDW_POWER,
+    WEATHER_STATION_TTL_SEC, WEATHER_STATION_STALE_SEC, WEATHER_CONCURRENCY,
+    WEATHER_RETRY_BASE_SEC, WEATHER_BREAKER_FAILURES, WEATHER_BREAKER_RESET_SEC,
+    WEATHER_BREAKER_MAX_RESET_SEC,
+    PRIORITY_QUEUE_MAX, ZONE_TOP_OFFENDERS,
+    HYSTERESIS_BUFFER, HYSTERESIS_DWELL_SEC, HYSTERESIS_STATE_FILE,
+    TRANSITIONS_FILE, TRANSITIONS_MAX_BYTES, SNAPSHOT_HEARTBEAT_SEC,
+    HISTORY_DIR, HISTORY_TIERS, HISTORY_WARD_METRICS, HISTORY_CITY_METRICS,
+    JOURNAL_DIR, JOURNAL_KEYFRAME_EVERY, JOURNAL_KEYFRAME_SEC, JOURNAL_RETENTION_HOURS,
+    ROUTE_STATE_WEIGHTS, ROUTE_REF_CAPACITY_LITERS, ROUTE_DETOUR_FACTOR, ROUTE_ISSUE_PENALTY,
+    ROUTE_LATENCY_WEIGHT, ROUTE_TIME_BUDGET_MS, ROUTE_INCREMENTAL_BUDGET_MS,
+    METRICS_ENABLED, METRICS_ENGINE_FILE, METRICS_EXPORT_SEC,
+    PROFILE_DEFAULT_SEC, PROFILE_MAX_SEC, PROFILE_INTERVAL_MS, PROFILE_CONTROL_FILE, PROFILE_ENGINE_FILE,
+    PW_LOG_VERBOSE, PW_LOG_SUMMARY_SEC, PW_LOG_MAX_BYTES, PW_LOG_MAX_AGE_HOURS, PW_LOG_KEEP,
+    PW_LOG_RETENTION_DAYS,
+    EVENT_STORE_BACKEND, EVENT_STORE_FILE, EVENT_STORE_BATCH_SIZE, EVENT_STORE_BATCH_MS, EVENT_STORE_POLL_SEC,
+    ARCHIVE_ENABLED, ARCHIVE_DIR, ARCHIVE_INTERVAL_SEC, ARCHIVE_EXPIRY_HOURS, ARCHIVE_COLLECTION_LOOKBACK_HOURS,
 )
-from config.wards import WARDS, CITY_CENTER
+from config.wards import WARDS, ROAD_SEGMENTS, CITY_CENTER
 from config.dustbins import DUSTBINS
+from stream_engine.spatial_weather import AIOHTTP_AVAILABLE, RainfallField, StationCache, station_points
+from stream_engine.weather_poller import CircuitBreaker, WeatherPoller
+from stream_engine.route_planner import RoutePlanner
+from stream_engine.road_network import RoadNetwork
+from stream_engine.rollup import RollupTree
+from stream_engine.hysteresis import StateMachine
+from stream_engine.timeseries import TimeSeriesStore
+from stream_engine.snapshot_journal import SnapshotJournal
+from stream_engine.metrics import MetricsRegistry, env_enabled
+from stream_engine.profiler import SamplingProfiler, write_json_atomic
+from stream_engine.processing_log import ProcessingLog, RotatingLog
+from ingestion.event_store import create_event_store, event_epoch
+from stream_engine.event_archive import PYARROW_AVAILABLE, EventArchive
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -60,60 +91,194 @@ WARD_IDS    = list(WARDS.keys())
 DUSTBIN_IDS = list(DUSTBINS.keys())
 DUSTBIN_TO_WARD = {did: info["ward_id"] for did, info in DUSTBINS.items()}
 
+# Road issues snap to ROAD_SEGMENTS through a precomputed grid (memoized per bin pair)
+ROAD_NETWORK = RoadNetwork(ROAD_SEGMENTS, ROAD_SNAP_TOLERANCE_KM)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CLOCK (injectable — the replay harness runs the engine on virtual time)
+# ═══════════════════════════════════════════════════════════════════════════
+_clock = time.time
+
+
+def set_clock(clock=None):
+    """Every engine timestamp comes from clock() → epoch seconds (None → wall clock)."""
+    global _clock
+    _clock = clock or time.time
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# STATEFUL COMPONENTS (survive across recomputes)
+# ═══════════════════════════════════════════════════════════════════════════
+# Built by main(), use_workspace() or the first recompute — never at import,
+# so tests and tools that import the engine leave the live data/output alone.
+ROLLUP = STATE_MACHINE = HISTORY = JOURNAL = ROUTE_PLANNER = None
+
+
+def _init_state(output_dir: str, history_tiers: dict = None):
+    """(Re)build everything that carries state between recomputes over output_dir."""
+    global ROLLUP, STATE_MACHINE, HISTORY, JOURNAL, ROUTE_PLANNER
+
+    # dustbin → ward → zone → city sums, updated by deltas from changed leaves only
+    ROLLUP = RollupTree(WARDS, DUSTBINS, ZONE_TOP_OFFENDERS)
+
+    # Ward / segment bands and dustbin states only move past the hysteresis
+    # buffer; state is persisted and transitions go to a compact JSONL stream
+    STATE_MACHINE = StateMachine(
+        STATE_BANDS, HYSTERESIS_BUFFER, HYSTERESIS_DWELL_SEC,
+        os.path.join(output_dir, HYSTERESIS_STATE_FILE),
+        os.path.join(output_dir, TRANSITIONS_FILE), TRANSITIONS_MAX_BYTES,
+    )
+
+    # Per-ward + city metric history: fixed-size memory-mapped ring buffers per tier
+    HISTORY = TimeSeriesStore(
+        os.path.join(output_dir, HISTORY_DIR),
+        [f"city.{m}" for m in HISTORY_CITY_METRICS]
+        + [f"{wid}.{m}" for wid in WARD_IDS for m in HISTORY_WARD_METRICS],
+        history_tiers or HISTORY_TIERS,
+    )
+
+    # Every written snapshot version → keyframe + delta journal (/api/dashboard?at=)
+    JOURNAL = SnapshotJournal(
+        os.path.join(output_dir, JOURNAL_DIR), JOURNAL_KEYFRAME_EVERY, JOURNAL_KEYFRAME_SEC,
+        JOURNAL_RETENTION_HOURS * 3600,
+    )
+
+    # Van tours survive across recomputes; only wards whose stops changed are re-planned
+    ROUTE_PLANNER = RoutePlanner(
+        DUSTBINS, WARDS, ROUTE_STATE_WEIGHTS, ROUTE_REF_CAPACITY_LITERS,
+        ROUTE_DETOUR_FACTOR, ROUTE_ISSUE_PENALTY, ROUTE_LATENCY_WEIGHT,
+        ROUTE_TIME_BUDGET_MS, ROUTE_INCREMENTAL_BUDGET_MS,
+    )
+
+
+def use_registry(wards: dict, dustbins: dict, road_segments: dict):
+    """
+    Swap the ward / dustbin / road-segment registries (synthetic cities in
+    benchmarks). Call use_workspace() afterwards to rebuild state. The
+    weather poller's station field is not rebuilt — feed rainfall directly.
+    """
+    global WARDS, DUSTBINS, ROAD_SEGMENTS, WARD_IDS, DUSTBIN_IDS, DUSTBIN_TO_WARD, ROAD_NETWORK
+    WARDS, DUSTBINS, ROAD_SEGMENTS = wards, dustbins, road_segments
+    WARD_IDS    = list(WARDS.keys())
+    DUSTBIN_IDS = list(DUSTBINS.keys())
+    DUSTBIN_TO_WARD = {did: info["ward_id"] for did, info in DUSTBINS.items()}
+    ROAD_NETWORK = RoadNetwork(ROAD_SEGMENTS, ROAD_SNAP_TOLERANCE_KM)
+
+
+def use_workspace(data_root: str, history_tiers: dict = None):
+    """
+    Point the engine at another data/ tree (reports/* + output) with fresh
+    state — replay and benchmark runs never touch the live data/.
+    """
+    global WASTE_DIR, ROAD_DIR, VAN_DIR, WEATHER_DIR, OUTPUT_DIR, _latest_weather, _snapshot_version
+    WASTE_DIR   = os.path.join(data_root, "reports", "waste")
+    ROAD_DIR    = os.path.join(data_root, "reports", "road")
+    VAN_DIR     = os.path.join(data_root, "reports", "vans")
+    WEATHER_DIR = os.path.join(data_root, "reports", "weather")
+    OUTPUT_DIR  = os.path.join(data_root, "output")
+    for d in [WASTE_DIR, ROAD_DIR, VAN_DIR, WEATHER_DIR, OUTPUT_DIR]:
+        os.makedirs(d, exist_ok=True)
+    _init_state(OUTPUT_DIR, history_tiers)
+    use_event_store(None)   # workspaces are file trees
+    _latest_weather = {"rainfall_mm_hr": 0.0, "weather_source": "none", "timestamp": ""}
+    _snapshot_version = 0
+    _snapshot_last.update(digest=None, written_at=0.0)
+
+
+def _history_sample(ward_risks: list, road_ward_risks: list, city: dict) -> dict:
+    """Flatten one recompute into {series name: value} for HISTORY."""
+    sample = {f"city.{m}": city.get(m, 0) for m in HISTORY_CITY_METRICS}
+    for wr in ward_risks:
+        wid = wr["ward_id"]
+        sample[f"{wid}.waste_score"] = wr["risk_score"]
+        sample[f"{wid}.report_count"] = wr["report_count"]
+        sample[f"{wid}.bins_reported"] = wr["bins_reported"]
+        sample[f"{wid}.rainfall_mm_hr"] = wr["rainfall_mm_hr"]
+    for rr in road_ward_risks:
+        sample[f"{rr['ward_id']}.road_score"] = rr["risk_score"]
+    return sample
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # WEATHER POLLER (background thread, writes to watched directory)
 # ═══════════════════════════════════════════════════════════════════════════
 _latest_weather = {"rainfall_mm_hr": 0.0, "weather_source": "none", "timestamp": ""}
 
-def _weather_poller():
-    """Poll WeatherAPI.com every WEATHER_POLL_SEC. Write to weather directory."""
+# Stations at ward centroids; IDW weights to every ward and dustbin are static
+WEATHER_STATIONS = station_points(WARDS, WEATHER_STATION_PRECISION)
+RAIN_FIELD = RainfallField(WEATHER_STATIONS, {"ward": WARDS, "dustbin": DUSTBINS}, WEATHER_IDW_POWER)
+
+
+def _publish_weather(weather_event: dict):
+    """Make a weather reading current and write it for Pathway to pick up."""
     global _latest_weather
-    api_key = os.getenv("WX_API_KEY", "")
-    started_at = datetime.now().isoformat()
+    _latest_weather = weather_event
 
-    if not api_key:
-        print("\n❌ CRITICAL: WX_API_KEY IS MISSING IN .env!")
-        print("❌ Real-time weather polling is DISABLED. Pathway needs this key to operate in live mode!\n")
+    weather_file = os.path.join(WEATHER_DIR, "current_weather.json")
+    try:
+        with open(weather_file, "w") as f:
+            json.dump([weather_event], f)
+    except Exception as e:
+        print(f"[Weather] Write error: {e}")
+    if EVENT_STORE is not None:
+        EVENT_STORE.append("weather", weather_event)   # reading history; not awaited
 
-    while True:
-        rainfall = 0.0
-        source = "weatherapi.com"
 
-        if api_key:
-            try:
-                resp = requests.get(
-                    WEATHER_API_URL,
-                    params={"key": api_key, "q": WEATHER_CITY, "aqi": "no"},
-                    timeout=10,
-                )
-                if resp.status_code == 200:
-                    data = resp.json()
-                    rainfall = data.get("current", {}).get("precip_mm", 0.0)
-                else:
-                    print(f"[Weather] API error HTTP {resp.status_code}: {resp.text}")
-            except Exception as e:
-                print(f"[Weather] Network error: {e}")
+def _weather_fields(readings: dict) -> dict:
+    """Station readings → weather event fields (spatial or single city reading)."""
+    if not WEATHER_SPATIAL:
+        return {"rainfall_mm_hr": readings.get("city", 0.0), "stations_ok": len(readings)}
+    field = RAIN_FIELD.interpolate(readings)
+    return {
+        "rainfall_mm_hr": round(sum(readings.values()) / len(readings), 2) if readings else 0.0,
+        "ward_rainfall": field.get("ward", {}),
+        "dustbin_rainfall": field.get("dustbin", {}),
+        "stations_ok": len(readings),
+    }
 
-        now_ts = datetime.now().isoformat()
-        weather_event = {
-            "rainfall_mm_hr": rainfall,
-            "timestamp": now_ts,
-            "weather_source": source,
-            "engine_started_at": started_at,
-        }
 
-        _latest_weather = weather_event
+_weather = None   # WeatherPoller, once started
 
-        # Write to weather directory for Pathway to pick up
-        weather_file = os.path.join(WEATHER_DIR, "current_weather.json")
-        try:
-            with open(weather_file, "w") as f:
-                json.dump([weather_event], f)
-        except Exception as e:
-            print(f"[Weather] Write error: {e}")
 
-        print(f"[Weather] {source}: {rainfall}mm/hr @ {now_ts}")
-        time.sleep(WEATHER_POLL_SEC)
+def _weather_poller():
+    """
+    Run the async weather poller (own event loop, this thread).
+    Publishes only when rainfall changes; see stream_engine/weather_poller.py.
+    """
+    global _weather
+    api_key = os.getenv("WX_API_KEY", "")
+    started_at = datetime.now().isoformat()
+
+    if not api_key:
+        print("\n❌ CRITICAL: WX_API_KEY IS MISSING IN .env!")
+        print("❌ Real-time weather polling is DISABLED. Pathway needs this key to operate in live mode!\n")
+    if not AIOHTTP_AVAILABLE:
+        print("[Weather] aiohttp not installed — weather polling DISABLED")
+    if not api_key or not AIOHTTP_AVAILABLE:
+        _publish_weather({"rainfall_mm_hr": 0.0, "weather_source": "none",
+                          "timestamp": started_at, "engine_started_at": started_at})
+        return
+
+    def publish(fields: dict):
+        now_ts = datetime.now().isoformat()
+        _publish_weather({**fields, "timestamp": now_ts, "engine_started_at": started_at})
+        print(f"[Weather] {fields['weather_source']}: {fields['rainfall_mm_hr']}mm/hr "
+              f"({fields['stations_ok']} stations) @ {now_ts}")
+
+    stations = WEATHER_STATIONS if WEATHER_SPATIAL else [{"id": "city", "q": WEATHER_CITY}]
+    _weather = WeatherPoller(
+        os.getenv("WX_API_URL", WEATHER_API_URL), api_key, stations,
+        cache=StationCache(WEATHER_STATION_TTL_SEC, WEATHER_STATION_STALE_SEC),
+        interpolate=_weather_fields,
+        publish=publish,
+        poll_sec=WEATHER_POLL_SEC,
+        breaker=CircuitBreaker(WEATHER_BREAKER_FAILURES, WEATHER_BREAKER_RESET_SEC,
+                               WEATHER_BREAKER_MAX_RESET_SEC),
+        retry_base_sec=WEATHER_RETRY_BASE_SEC,
+        concurrency=WEATHER_CONCURRENCY,
+        source="weatherapi.com (spatial)" if WEATHER_SPATIAL else "weatherapi.com",
+    )
+    asyncio.run(_weather.run())
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -134,6 +299,15 @@ def _classify(score):
     return "Critical" if score > 100 else "Normal"
 
 
+def _road_issue_score(severity):
+    """Single road issue severity (1–5) → 0–100 score (see ROAD_ISSUE_SEVERITY_SCORE)."""
+    try:
+        severity = float(severity)
+    except (TypeError, ValueError):
+        severity = 1
+    return min(100, max(0, round(severity * ROAD_ISSUE_SEVERITY_SCORE)))
+
+
 def _color(state):
     """State label → color hex."""
     for band in STATE_BANDS:
@@ -159,30 +333,176 @@ def _parse_ts(ts_str):
         return datetime.min.replace(tzinfo=timezone.utc)
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+# STAGE TIMING (last recompute, per stage — benchmarks/bench_engine.py)
+# ═══════════════════════════════════════════════════════════════════════════
+STAGE_MS = {}
+
+
+class _Stages:
+    """Accumulates wall time between mark() calls under the given stage name."""
+
+    def __init__(self):
+        self.t = time.perf_counter()
+        self.ms = {}
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        self.ms[name] = self.ms.get(name, 0.0) + (now - self.t) * 1000
+        self.t = now
+
+    def publish(self):
+        STAGE_MS.update({k: round(v, 3) for k, v in self.ms.items()})
+        for name, ms in self.ms.items():
+            _M_STAGE.labels(name).observe(ms / 1000)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# METRICS (rendered to OUTPUT_DIR/METRICS_ENGINE_FILE; served by the API's /metrics)
+# ═══════════════════════════════════════════════════════════════════════════
+METRICS = MetricsRegistry(env_enabled(METRICS_ENABLED))
+_M_STAGE = METRICS.histogram("engine_stage_seconds", "Wall time per recompute stage", ["stage"])
+_M_RECOMPUTE = METRICS.histogram("engine_recompute_seconds", "Recompute + snapshot write", ["trigger"])
+_M_RECOMPUTES = METRICS.counter("engine_recomputes", "Recomputes by trigger and result", ["trigger", "result"])
+_M_FILES = METRICS.gauge("engine_event_files", "Event files read by the last recompute", ["stream"])
+_M_EVENTS = METRICS.gauge("engine_events", "Events parsed by the last recompute", ["stream"])
+_M_SNAPSHOTS = METRICS.counter("engine_snapshots", "Snapshot writes by result", ["result"])
+_M_SNAPSHOT_BYTES = METRICS.gauge("engine_snapshot_bytes", "Size of the last written snapshot")
+_M_SNAPSHOT_VERSION = METRICS.gauge("engine_snapshot_version", "Version of the last written snapshot")
+_M_QUEUE = METRICS.gauge("engine_queue_depth", "Items waiting per queue in the last recompute", ["queue"])
+_M_PROCESSED = METRICS.counter("engine_processed_files", "Event files processed by Pathway", ["stream", "result"])
+_metrics_exported = {"at": 0.0}
+
+
+def _export_metrics(force: bool = False):
+    """Render the registry for the API, at most every METRICS_EXPORT_SEC."""
+    now = time.monotonic()
+    if not METRICS.enabled or (not force and now - _metrics_exported["at"] < METRICS_EXPORT_SEC):
+        return
+    _metrics_exported["at"] = now
+    METRICS.write(os.path.join(OUTPUT_DIR, METRICS_ENGINE_FILE))
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # FILE READERS — reads all event files from a directory
 # ═══════════════════════════════════════════════════════════════════════════
-def _read_all_events(directory: str) -> list:
+def _read_all_events(directory: str, stages: _Stages = None) -> list:
     """Read all JSON event files from a directory. Returns flat event list."""
     events = []
     if not os.path.exists(directory):
         return events
+    stages = stages or _Stages()
+    files = 0
     for fname in sorted(os.listdir(directory)):
         if not fname.endswith(".json"):
             continue
+        files += 1
         fpath = os.path.join(directory, fname)
         try:
             with open(fpath, "r") as f:
-                data = json.load(f)
+                raw = f.read()
+            stages.mark("read")
+            data = json.loads(raw)
+            stages.mark("parse")
             if isinstance(data, list):
                 events.extend(data)
             elif isinstance(data, dict):
                 events.append(data)
         except Exception:
             continue
+    stream = os.path.basename(os.path.normpath(directory))
+    _M_FILES.labels(stream).set(files)
+    _M_EVENTS.labels(stream).set(len(events))
     return events
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+# EVENT STORE READERS (EVENT_STORE=sqlite — index ranges instead of scans)
+# ═══════════════════════════════════════════════════════════════════════════
+# Windowed streams, re-queried by event-time range only after new rows arrive
+STORE_WINDOWS = (("waste", WASTE_REPORT_WINDOW_HOURS), ("road", ROAD_ISSUE_WINDOW_HOURS))
+EVENT_STORE = None
+_store_lock = threading.Lock()
+_store_feed = {}
+
+
+def use_event_store(store):
+    """Read events from an EventStore (None → the report directories)."""
+    global EVENT_STORE
+    with _store_lock:
+        EVENT_STORE = store
+        _store_feed.clear()
+        _store_feed.update(
+            rowid=0,                        # last rowid pulled
+            newest_ingest={},               # stream → newest ingested_at
+            vans={},                        # dustbin_id → latest collection_confirmed event
+            dirty={s for s, _ in STORE_WINDOWS},
+            windows={s: [] for s, _ in STORE_WINDOWS},
+        )
+
+
+def _pull_store_rows():
+    """
+    Rows committed since the last pull (rowid order = ingest order). Only
+    the van stream is kept in memory, reduced to the latest collection per
+    bin; waste / road just mark their window for a re-query.
+    """
+    feed = _store_feed
+    while True:
+        rows = EVENT_STORE.since(feed["rowid"])
+        if not rows:
+            return
+        for rowid, stream, ingested_at, payload in rows:
+            feed["rowid"] = rowid
+            if ingested_at and ingested_at > feed["newest_ingest"].get(stream, 0):
+                feed["newest_ingest"][stream] = ingested_at
+            if stream in feed["windows"]:
+                feed["dirty"].add(stream)
+            elif stream == "vans":
+                e = json.loads(payload)
+                did = e.get("dustbin_id")
+                if e.get("event_type") != "collection_confirmed" or not did or not e.get("timestamp"):
+                    continue
+                last = feed["vans"].get(did)
+                if last is None or _parse_ts(e["timestamp"]) > _parse_ts(last["timestamp"]):
+                    feed["vans"][did] = e
+
+
+def _read_store_events(stages: _Stages) -> tuple:
+    """(waste, road, van events, newest_ingest) — the same inputs the file readers give compute."""
+    with _store_lock:
+        _pull_store_rows()
+        feed = _store_feed
+        for stream, hours in STORE_WINDOWS:
+            if stream not in feed["dirty"]:
+                continue                    # no new rows → same window (event time, not wall clock)
+            latest = EVENT_STORE.latest_ts(stream)
+            feed["windows"][stream] = [] if latest is None else EVENT_STORE.window(stream, latest - hours * 3600)
+            feed["dirty"].discard(stream)
+        stages.mark("read")
+        waste, road, vans = feed["windows"]["waste"], feed["windows"]["road"], list(feed["vans"].values())
+        newest_ingest = {s: feed["newest_ingest"].get(s) for s in ("waste", "road", "vans")}
+    for stream, events in (("waste", waste), ("road", road), ("vans", vans)):
+        _M_FILES.labels(stream).set(0)
+        _M_EVENTS.labels(stream).set(len(events))
+    return waste, road, vans, newest_ingest
+
+
+def _wait_for_events(timeout: float):
+    """Sleep up to timeout; with the event store, return as soon as new rows are committed."""
+    if EVENT_STORE is None:
+        time.sleep(timeout)
+        return
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if EVENT_STORE.last_rowid() > _store_feed.get("rowid", 0):
+                return
+        except Exception as e:
+            print(f"[EventStore] Poll error: {e}")
+        time.sleep(EVENT_STORE_POLL_SEC)
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # CORE COMPUTATION — EVERYTHING LIVES HERE
 # ═══════════════════════════════════════════════════════════════════════════
@@ -192,26 +512,43 @@ def compute_dashboard_snapshot() -> dict:
     Uses EVENT-TIME windowing (not wall-clock).
     Returns atomic JSON snapshot.
     """
+    if ROLLUP is None:
+        _init_state(OUTPUT_DIR)
+    now = _clock()
+    stages = _Stages()
+
     # ── Read all events ─────────────────────────────────────────────────
-    waste_events = _read_all_events(WASTE_DIR)
-    van_events   = _read_all_events(VAN_DIR)
-    road_events  = _read_all_events(ROAD_DIR)
+    if EVENT_STORE is not None:
+        # Index ranges: waste / road windows + latest van collection per bin
+        waste_events, road_events, van_events, newest_ingest = _read_store_events(stages)
+    else:
+        waste_events = _read_all_events(WASTE_DIR, stages)
+        van_events   = _read_all_events(VAN_DIR, stages)
+        road_events  = _read_all_events(ROAD_DIR, stages)
+        stages.mark("read")
+
+        # ── Freshness: API ingest time of the newest event per stream ──
+        newest_ingest = {
+            stream: max((e.get("ingested_at") or 0 for e in events), default=0) or None
+            for stream, events in (("waste", waste_events), ("road", road_events), ("vans", van_events))
+        }
 
     # ── Weather (from poller) ───────────────────────────────────────────
+    # City-wide reading, plus per-ward / per-dustbin interpolated rainfall
+    # when the spatial poller is running (falls back to the city reading).
     rainfall = _latest_weather.get("rainfall_mm_hr", 0.0)
-    # CAP rainfall at normalization threshold
-    rainfall_capped = min(rainfall, WASTE_NORM["rainfall_mm_hr"])
-    n_rain = _norm(rainfall_capped, WASTE_NORM["rainfall_mm_hr"])
+    ward_rainfall = _latest_weather.get("ward_rainfall") or {}
+    dustbin_rainfall = _latest_weather.get("dustbin_rainfall") or {}
 
     # ── Event-Time Window Start ─────────────────────────────────────────
     # Parse all timestamps to tz-aware datetimes for safe comparison
     waste_dts = [_parse_ts(e.get("timestamp", "")) for e in waste_events if e.get("timestamp")]
-    latest_waste_dt = max(waste_dts) if waste_dts else datetime.now(timezone.utc)
+    latest_waste_dt = max(waste_dts) if waste_dts else datetime.fromtimestamp(now, timezone.utc)
     waste_window_start_dt = latest_waste_dt - timedelta(hours=WASTE_REPORT_WINDOW_HOURS)
 
     # Road event window
     road_dts = [_parse_ts(e.get("timestamp", "")) for e in road_events if e.get("timestamp")]
-    latest_road_dt = max(road_dts) if road_dts else datetime.now(timezone.utc)
+    latest_road_dt = max(road_dts) if road_dts else datetime.fromtimestamp(now, timezone.utc)
     road_window_start_dt = latest_road_dt - timedelta(hours=ROAD_ISSUE_WINDOW_HOURS)
 
     # ── Van collection events (latest per dustbin) ──────────────────────
@@ -270,6 +607,7 @@ def compute_dashboard_snapshot() -> dict:
         van_ts = van_data.get("ts", "")
         van_dt = van_data.get("dt", None)
         latest_report_dt = agg.get("latest_dt", None)
+        bin_rain = dustbin_rainfall.get(did, rainfall)
 
         if van_dt and (not latest_report_dt or van_dt > latest_report_dt):
             state = "Cleared"
@@ -277,7 +615,7 @@ def compute_dashboard_snapshot() -> dict:
             state = "Critical"
         elif report_count >= thresholds["Escalated"]["min_reports"] or max_overflow >= thresholds["Escalated"]["or_overflow_gte"]:
             # Check if Escalated + rain → Critical
-            if rainfall >= thresholds["Critical"]["or_escalated_with_rain_gte"]:
+            if bin_rain >= thresholds["Critical"]["or_escalated_with_rain_gte"]:
                 state = "Critical"
             else:
                 state = "Escalated"
@@ -287,6 +625,7 @@ def compute_dashboard_snapshot() -> dict:
             state = "Clear"
 
         info = DUSTBINS[did]
+        state = STATE_MACHINE.dustbin_state(did, state, now, info["ward_id"])
         dustbin_states.append({
             "dustbin_id": did,
             "ward_id": info["ward_id"],
@@ -299,14 +638,25 @@ def compute_dashboard_snapshot() -> dict:
             "avg_overflow": avg_overflow,
             "latest_report_ts": agg.get("latest_ts", ""),
             "van_cleared_ts": van_ts or None,
+            "rainfall_mm_hr": bin_rain,
             "color": _dustbin_color(state),
         })
 
+    stages.mark("aggregate")
+
     # ── Ward-Level Risk Scores ──────────────────────────────────────────
+    # Group once: per-ward scans of every dustbin / van event are O(wards × bins)
+    dustbins_by_ward = {}
+    for d in dustbin_states:
+        dustbins_by_ward.setdefault(d["ward_id"], []).append(d)
+    van_dts_by_ward = {}
+    for did, van in latest_van_by_dustbin.items():
+        van_dts_by_ward.setdefault(DUSTBIN_TO_WARD.get(did), []).append(van["dt"])
+
     ward_risks = []
     for wid, ward_info in WARDS.items():
         # Aggregate dustbin data for this ward
-        ward_dustbins = [d for d in dustbin_states if d["ward_id"] == wid]
+        ward_dustbins = dustbins_by_ward.get(wid, [])
         total_reports = sum(d["report_count"] for d in ward_dustbins)
         avg_overflow = 0
         overflow_vals = [d["avg_overflow"] for d in ward_dustbins if d["avg_overflow"] > 0]
@@ -314,8 +664,7 @@ def compute_dashboard_snapshot() -> dict:
             avg_overflow = round(sum(overflow_vals) / len(overflow_vals), 1)
 
         # Collection delay: hours since last van event in this ward
-        ward_van_times = [latest_van_by_dustbin[did]["dt"] for did in latest_van_by_dustbin
-                          if DUSTBIN_TO_WARD.get(did) == wid]
+        ward_van_times = van_dts_by_ward.get(wid, [])
         if ward_van_times:
             latest_van_dt_val = max(ward_van_times)
             delay_hr = (latest_waste_dt - latest_van_dt_val).total_seconds() / 3600.0
@@ -325,12 +674,13 @@ def compute_dashboard_snapshot() -> dict:
 
         # Active vans: count vans that collected within last 2 hours
         active_vans = 0
-        for did in [d for d in latest_van_by_dustbin if DUSTBIN_TO_WARD.get(d) == wid]:
-            vt = latest_van_by_dustbin[did]["dt"]
+        for vt in ward_van_times:
             if (latest_waste_dt - vt).total_seconds() < 7200:
                 active_vans += 1
 
-        # Risk score
+        # Risk score (rain CAPPED at normalization threshold)
+        w_rain     = ward_rainfall.get(wid, rainfall)
+        n_rain     = _norm(min(w_rain, WASTE_NORM["rainfall_mm_hr"]), WASTE_NORM["rainfall_mm_hr"])
         n_reports  = _norm(total_reports, WASTE_NORM["report_count_2hr"])
         n_overflow = _norm(avg_overflow, WASTE_NORM["overflow_level"])
         n_delay    = _norm(delay_hr, WASTE_NORM["collection_delay_hr"])
@@ -342,7 +692,7 @@ def compute_dashboard_snapshot() -> dict:
             + n_rain     * WASTE_RISK_WEIGHTS["rainfall"]
         ) * 100
         score = min(100, max(0, round(score)))
-        state = _classify(score)
+        state = STATE_MACHINE.score_state("ward_waste", wid, score, now, wid)
 
         # Count dustbins in non-clear states
         bins_reported = len([d for d in ward_dustbins if d["state"] not in ("Clear", "Cleared")])
@@ -362,12 +712,14 @@ def compute_dashboard_snapshot() -> dict:
             "collection_delay_hr": delay_hr,
             "active_vans": active_vans,
             "bins_reported": bins_reported,
+            "rainfall_mm_hr": w_rain,
             "type": "waste",
         })
 
     # ── Road Issues (windowed) ──────────────────────────────────────────
     road_issues = []
-    road_by_ward = {}  # ward_id → {report_count, total_severity}
+    road_by_ward = {}     # ward_id → {report_count, total_severity}
+    road_by_segment = {}  # segment_id → {count, total_severity, max_severity}
 
     # First pass: find all cleared road events
     cleared_road_ids = set()
@@ -399,7 +751,14 @@ def compute_dashboard_snapshot() -> dict:
 
         from_info = DUSTBINS.get(from_bin, {})
         to_info = DUSTBINS.get(to_bin, {})
-
+        segment_ids = []
+        if from_info and to_info:
+            segment_ids = ROAD_NETWORK.snap_issue(
+                from_bin, to_bin,
+                (from_info["lat"], from_info["lng"]), (to_info["lat"], to_info["lng"]),
+            )
+
+        issue_score = _road_issue_score(e.get("severity", 1))
         road_issues.append({
             "event_id": event_id,
             "from_dustbin": from_bin,
@@ -411,6 +770,9 @@ def compute_dashboard_snapshot() -> dict:
             "ward_id": ward_id,
             "issue_type": e.get("issue_type", ""),
             "severity": e.get("severity", 1),
+            "state": _classify(issue_score),
+            "color": _color(_classify(issue_score)),
+            "segment_ids": segment_ids,
             "timestamp": ts_str,
         })
 
@@ -420,6 +782,13 @@ def compute_dashboard_snapshot() -> dict:
         road_by_ward[ward_id]["count"] += 1
         road_by_ward[ward_id]["total_severity"] += e.get("severity", 1)
 
+        # …and per snapped road segment
+        for sid in segment_ids:
+            seg = road_by_segment.setdefault(sid, {"count": 0, "total_severity": 0, "max_severity": 0})
+            seg["count"] += 1
+            seg["total_severity"] += e.get("severity", 1)
+            seg["max_severity"] = max(seg["max_severity"], e.get("severity", 1))
+
     # ── Road Risk per Ward ──────────────────────────────────────────────
     road_ward_risks = []
     for wid, ward_info in WARDS.items():
@@ -427,6 +796,8 @@ def compute_dashboard_snapshot() -> dict:
         report_count = r.get("count", 0)
         avg_severity = round(r.get("total_severity", 0) / max(1, report_count), 1) if report_count else 0
 
+        w_rain     = ward_rainfall.get(wid, rainfall)
+        n_rain     = _norm(min(w_rain, ROAD_NORM["rainfall_mm_hr"]), ROAD_NORM["rainfall_mm_hr"])
         n_reports  = _norm(report_count, ROAD_NORM["report_count_6hr"])
         n_severity = _norm(avg_severity, ROAD_NORM["severity"])
 
@@ -436,7 +807,7 @@ def compute_dashboard_snapshot() -> dict:
             + n_rain     * ROAD_RISK_WEIGHTS["rainfall"]
         ) * 100
         score = min(100, max(0, round(score)))
-        state = _classify(score)
+        state = STATE_MACHINE.score_state("ward_road", wid, score, now, wid)
 
         road_ward_risks.append({
             "ward_id": wid,
@@ -446,9 +817,54 @@ def compute_dashboard_snapshot() -> dict:
             "color": _color(state),
             "report_count": report_count,
             "avg_severity": avg_severity,
+            "rainfall_mm_hr": w_rain,
             "type": "road",
         })
 
+    # ── Road Risk per Segment (length-normalized density) ──────────────
+    segment_risks = []
+    for sid, seg_info in ROAD_SEGMENTS.items():
+        r = road_by_segment.get(sid, {})
+        report_count = r.get("count", 0)
+        total_severity = r.get("total_severity", 0)
+        avg_severity = round(total_severity / max(1, report_count), 1) if report_count else 0
+        density = round(total_severity / max(0.1, seg_info["length_km"]), 2)
+
+        w_rain     = ward_rainfall.get(seg_info["ward_id"], rainfall)
+        n_rain     = _norm(min(w_rain, ROAD_NORM["rainfall_mm_hr"]), ROAD_NORM["rainfall_mm_hr"])
+        n_density  = _norm(density, ROAD_NORM["severity_per_km"])
+        n_severity = _norm(avg_severity, ROAD_NORM["severity"])
+
+        score = 0
+        if report_count:
+            score = (
+                n_density  * ROAD_RISK_WEIGHTS["report_density"]
+                + n_severity * ROAD_RISK_WEIGHTS["severity"]
+                + n_rain     * ROAD_RISK_WEIGHTS["rainfall"]
+            ) * 100
+            score = min(100, max(0, round(score)))
+        state = STATE_MACHINE.score_state("segment", sid, score, now, seg_info["ward_id"])
+
+        segment_risks.append({
+            "segment_id": sid,
+            "name": seg_info["name"],
+            "ward_id": seg_info["ward_id"],
+            "road_type": seg_info["type"],
+            "lat": seg_info["lat"],
+            "lng": seg_info["lng"],
+            "length_km": seg_info["length_km"],
+            "risk_score": score,
+            "state": state,
+            "color": _color(state),
+            "report_count": report_count,
+            "avg_severity": avg_severity,
+            "max_severity": r.get("max_severity", 0),
+            "severity_per_km": density,
+            "type": "road_segment",
+        })
+
+    stages.mark("score")
+
     # ── Unified Priority Queue ──────────────────────────────────────────
     STATE_PRIORITY = {"Critical": 0, "Warning": 1, "Elevated": 2, "Normal": 3}
 
@@ -474,24 +890,55 @@ def compute_dashboard_snapshot() -> dict:
             "id": ri["event_id"],
             "name": f"{ri['issue_type'].title()}: {ri['from_dustbin']} → {ri['to_dustbin']}",
             "type": "road",
-            "risk_score": ri["severity"] * 20,
-            "state": _classify(ri["severity"] * 20),
-            "color": _color(_classify(ri["severity"] * 20)),
+            "risk_score": _road_issue_score(ri["severity"]),
+            "state": ri["state"],
+            "color": ri["color"],
             "ward_id": ri["ward_id"],
             "issue_type": ri["issue_type"],
         })
 
+    # Road segments carrying active issues
+    for sr in segment_risks:
+        if sr["report_count"]:
+            priority.append({
+                "id": sr["segment_id"],
+                "name": f"{sr['name']} ({sr['report_count']} issues, {sr['severity_per_km']}/km)",
+                "type": "road_segment",
+                "risk_score": sr["risk_score"],
+                "state": sr["state"],
+                "color": sr["color"],
+                "ward_id": sr["ward_id"],
+                "lat": sr["lat"],
+                "lng": sr["lng"],
+            })
+
     # Sort: Critical waste first, then by score
     priority.sort(key=lambda x: (
         0 if x["type"] == "waste" else 1,
         {"Critical": 0, "Escalated": 1, "Warning": 2, "Reported": 3, "Elevated": 4, "Normal": 5}.get(x["state"], 5),
         -x["risk_score"],
     ))
+    _M_QUEUE.labels("priority").set(len(priority))
+    _M_QUEUE.labels("road_issues").set(len(road_issues))
     priority = priority[:PRIORITY_QUEUE_MAX]
+    stages.mark("queue")
+
+    # ── Van Routes (incremental re-plan) ────────────────────────────────
+    van_routes = ROUTE_PLANNER.update(dustbin_states, road_issues)
+    stages.mark("routes")
 
-    # ── City-Level Indices ──────────────────────────────────────────────
-    city_waste = round(sum(w["risk_score"] for w in ward_risks) / max(1, len(ward_risks)), 1)
-    city_road  = round(sum(r["risk_score"] for r in road_ward_risks) / max(1, len(road_ward_risks)), 1)
+    # ── Zone + City Rollups (delta-maintained) ──────────────────────────
+    zone_risks, city = ROLLUP.refresh(dustbin_states, ward_risks, road_ward_risks)
+    city_waste = city["waste_index"]
+    city_road  = city["road_index"]
+    stages.mark("rollup")
+
+    # ── State Transitions (persist + append to the transition stream) ──
+    STATE_MACHINE.commit()
+
+    # ── Metric History (every tier gets this sample) ────────────────────
+    HISTORY.record(now, _history_sample(ward_risks, road_ward_risks, city))
+    stages.mark("state")
 
     # ── Atomic Snapshot ─────────────────────────────────────────────────
     snapshot = {
@@ -499,13 +946,24 @@ def compute_dashboard_snapshot() -> dict:
         "ward_risks": ward_risks,
         "road_ward_risks": road_ward_risks,
         "road_issues": road_issues,
+        "segment_risks": segment_risks,
         "priority_queue": priority,
+        "van_routes": van_routes,
+        "route_stats": dict(ROUTE_PLANNER.stats),
+        "zone_risks": zone_risks,
+        "city_rollup": city,
         "city_waste_index": city_waste,
         "city_road_index": city_road,
         "rainfall_mm_hr": rainfall,
         "weather_source": _latest_weather.get("weather_source", "none"),
-        "timestamp": datetime.now().isoformat(),
+        "transition_seq": STATE_MACHINE.seq,
+        "weather_status": {"breaker": _weather.breaker.state, **_weather.status} if _weather else None,
+        "timestamp": datetime.fromtimestamp(now).isoformat(),
+        "computed_at": round(now, 3),
+        "newest_ingest": newest_ingest,
     }
+    STAGE_MS.clear()
+    stages.publish()
 
     return snapshot
 
@@ -547,6 +1005,22 @@ def _read_dir(label, path):
     )
 
 
+def _recompute(trigger: str) -> dict:
+    """Recompute + write the snapshot, counted and timed under trigger."""
+    started = time.perf_counter()
+    try:
+        snapshot = compute_dashboard_snapshot()
+        _write_atomic_snapshot(snapshot)
+    except Exception:
+        _M_RECOMPUTES.labels(trigger, "error").inc()
+        _export_metrics()
+        raise
+    _M_RECOMPUTE.labels(trigger).observe(time.perf_counter() - started)
+    _M_RECOMPUTES.labels(trigger, "ok").inc()
+    _export_metrics()
+    return snapshot
+
+
 def _on_change_recompute(data: bytes) -> str:
     """
     Called by Pathway on every file change.
@@ -554,36 +1028,76 @@ def _on_change_recompute(data: bytes) -> str:
     Writes atomic snapshot to output.
     """
     try:
-        snapshot = compute_dashboard_snapshot()
-        _write_atomic_snapshot(snapshot)
+        snapshot = _recompute("pathway")
         return json.dumps({"status": "ok", "timestamp": snapshot["timestamp"]})
     except Exception as e:
         return json.dumps({"status": "error", "error": str(e)})
 
 
+_snapshot_lock = threading.Lock()
+_snapshot_version = 0
+_snapshot_last = {"digest": None, "written_at": 0.0}
+
+# Fields that change on every recompute without the city changing
+SNAPSHOT_VOLATILE_KEYS = ("timestamp", "computed_at", "version", "route_stats", "weather_status")
+
+
+def _next_snapshot_version() -> int:
+    """Monotonic snapshot version: epoch-ms, bumped if two writes share a ms."""
+    global _snapshot_version
+    _snapshot_version = max(_snapshot_version + 1, int(_clock() * 1000))
+    return _snapshot_version
+
+
 def _write_atomic_snapshot(snapshot: dict):
-    """Write dashboard snapshot atomically (temp file + rename)."""
+    """
+    Stamp a version and write dashboard snapshot atomically (temp file + rename).
+    Serialized once; the API publishes these exact bytes to its workers.
+    A recompute that changed nothing but volatile fields is not written
+    (no new version, no push) until SNAPSHOT_HEARTBEAT_SEC has passed.
+    Returns True when a new version was written.
+    """
     dashboard_path = os.path.join(OUTPUT_DIR, "dashboard.jsonl")
-    try:
-        # Write to temp file first
-        fd, tmp_path = tempfile.mkstemp(dir=OUTPUT_DIR, suffix=".tmp")
-        try:
-            with os.fdopen(fd, "w") as tmp:
-                tmp.write(json.dumps(snapshot) + "\n")
-                tmp.flush()
-        except Exception:
-            os.close(fd)
-            raise
-        # Atomic rename
-        os.replace(tmp_path, dashboard_path)
-    except Exception as e:
-        print(f"[Snapshot] Write error: {e}")
-        # Fallback: direct write
+    stages = _Stages()
+    with _snapshot_lock:
+        digest = hash(json.dumps({k: v for k, v in snapshot.items() if k not in SNAPSHOT_VOLATILE_KEYS}))
+        now = _clock()
+        if digest == _snapshot_last["digest"] and now - _snapshot_last["written_at"] < SNAPSHOT_HEARTBEAT_SEC:
+            _M_SNAPSHOTS.labels("unchanged").inc()
+            return False
+        _snapshot_last["digest"], _snapshot_last["written_at"] = digest, now
+        snapshot["version"] = _next_snapshot_version()
+        payload = json.dumps(snapshot) + "\n"
+        stages.mark("serialize")
         try:
-            with open(dashboard_path, "w") as f:
-                f.write(json.dumps(snapshot) + "\n")
-        except Exception:
-            pass
+            # Write to temp file first
+            fd, tmp_path = tempfile.mkstemp(dir=OUTPUT_DIR, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as tmp:
+                    tmp.write(payload)
+                    tmp.flush()
+            except Exception:
+                os.close(fd)
+                raise
+            # Atomic rename
+            os.replace(tmp_path, dashboard_path)
+        except Exception as e:
+            print(f"[Snapshot] Write error: {e}")
+            _M_SNAPSHOTS.labels("error").inc()
+            # Fallback: direct write
+            try:
+                with open(dashboard_path, "w") as f:
+                    f.write(payload)
+            except Exception:
+                pass
+        stages.mark("write")
+        _M_SNAPSHOTS.labels("written").inc()
+        _M_SNAPSHOT_BYTES.set(len(payload))
+        _M_SNAPSHOT_VERSION.set(snapshot["version"])
+        JOURNAL.append(snapshot, now)
+        stages.mark("journal")
+        stages.publish()
+        return True
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -596,38 +1110,232 @@ def _recompute_loop():
     """
     while True:
         try:
-            snapshot = compute_dashboard_snapshot()
-            _write_atomic_snapshot(snapshot)
+            _recompute("loop")
         except Exception as e:
             print(f"[Recompute] Error: {e}")
-        time.sleep(3)
+        for plog in PROCESSING_LOGS:
+            try:
+                plog.flush()
+            except Exception as e:
+                print(f"[ProcessingLog] Flush error: {e}")
+        _wait_for_events(3)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ON-DEMAND PROFILING (requested through the API's admin endpoint)
+# ═══════════════════════════════════════════════════════════════════════════
+PROFILE_REQUEST_MAX_AGE_SEC = 30   # Older control files (e.g. from before a restart) are ignored
+
+
+_profile_request = None   # id of the last control request handled (answered or rejected)
+
+
+def _write_profile_result(result: dict):
+    # last_request lets the API tell "answered" from "pending" even when this is another run's result
+    try:
+        write_json_atomic(os.path.join(OUTPUT_DIR, PROFILE_ENGINE_FILE),
+                          {**result, "last_request": _profile_request})
+    except OSError as e:
+        print(f"[Profiler] Result write error: {e}")
+
+
+PROFILER = SamplingProfiler(PROFILE_MAX_SEC, on_finish=_write_profile_result)
+
+
+def _profile_control():
+    """
+    Background thread: picks up start/stop requests the API drops in
+    PROFILE_CONTROL_FILE; status and collapsed stacks go to PROFILE_ENGINE_FILE.
+    """
+    global _profile_request
+    handled = None
+    while True:
+        try:
+            with open(os.path.join(OUTPUT_DIR, PROFILE_CONTROL_FILE), "r") as f:
+                request = json.load(f)
+        except (FileNotFoundError, ValueError):
+            request = None
+        if (request and request.get("id") != handled
+                and time.time() - request.get("requested_at", 0) < PROFILE_REQUEST_MAX_AGE_SEC):
+            handled = _profile_request = request.get("id")
+            try:
+                if request.get("action") == "stop":
+                    PROFILER.stop()
+                else:
+                    _write_profile_result(PROFILER.start(
+                        request.get("duration_sec", PROFILE_DEFAULT_SEC),
+                        request.get("interval_ms", PROFILE_INTERVAL_MS) / 1000,
+                        handled,
+                    ))
+                    print(f"[Profiler] Run {handled} started ({request.get('duration_sec')}s)")
+            except RuntimeError as e:
+                print(f"[Profiler] {e}")
+                _write_profile_result({"id": handled, "status": "rejected", "error": str(e)})
+        time.sleep(1)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# EVENT ARCHIVE (expired whole days → daily Parquet, for /api/admin/analytics)
+# ═══════════════════════════════════════════════════════════════════════════
+ARCHIVE = None
+
+
+# API event files are <prefix>_YYYYmmdd_HHMMSS_ffffff_<uid>.json, named from the
+# same clock read as their (naive, UTC-like) timestamp a moment apart
+_EVENT_FILE_STAMP = re.compile(r"_(\d{8}_\d{6})_\d{6}_[0-9a-f]+\.json$")
+_FILE_STAMP_SLACK_SEC = 60
+
+
+def _file_name_days(fname: str):
+    """Day start epochs an event file's name places it in (both days near midnight); None if unnamed."""
+    match = _EVENT_FILE_STAMP.search(fname)
+    if not match:
+        return None
+    try:
+        stamp = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+    return {int((stamp + d) // 86400) * 86400 for d in (-_FILE_STAMP_SLACK_SEC, 0, _FILE_STAMP_SLACK_SEC)}
+
+
+def _archive_expired() -> dict:
+    """
+    One archive pass over all streams, a day at a time. With event files,
+    a day → file paths index is built once per stream and pass — from the
+    file names where they carry the API's timestamp, parsing only the rest
+    — and only the files of the requested days are read, so no stream's
+    history is parsed or held in memory at once.
+    """
+    directories = {"waste": WASTE_DIR, "road": ROAD_DIR, "vans": VAN_DIR, "weather": WEATHER_DIR}
+    file_days = {}   # stream → {day start epoch: {paths}}
+
+    def read_file(path: str) -> list:
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return [e for e in (data if isinstance(data, list) else [data]) if isinstance(e, dict)]
+
+    def day_index(stream: str) -> dict:
+        if stream not in file_days:
+            days, directory = {}, directories[stream]
+            for fname in sorted(os.listdir(directory)) if os.path.isdir(directory) else ():
+                if fname.endswith(".json"):
+                    path = os.path.join(directory, fname)
+                    named = _file_name_days(fname)
+                    if named is not None:
+                        for day in named:
+                            days.setdefault(day, set()).add(path)
+                        continue
+                    for e in read_file(path):
+                        ts = event_epoch(e.get("timestamp"))
+                        if ts > 0:
+                            days.setdefault(int(ts // 86400) * 86400, set()).add(path)
+            file_days[stream] = days
+        return file_days[stream]
+
+    def fetch(stream: str, start: float, end: float) -> list:
+        if EVENT_STORE is not None:
+            return EVENT_STORE.window(stream, start, end)
+        days = day_index(stream)
+        paths = sorted({p for d in range(int(start // 86400) * 86400, int(end), 86400) for p in days.get(d, ())})
+        return [e for p in paths for e in read_file(p) if start <= event_epoch(e.get("timestamp")) < end]
+
+    def earliest(stream: str):
+        if EVENT_STORE is not None:
+            return EVENT_STORE.earliest_ts(stream)
+        return min(day_index(stream), default=None)
+
+    zone_of = {wid: info.get("zone") for wid, info in WARDS.items()}
+    return ARCHIVE.archive_expired(fetch, earliest, _clock(), ARCHIVE_EXPIRY_HOURS, zone_of,
+                                   ARCHIVE_COLLECTION_LOOKBACK_HOURS * 3600)
+
+
+def _archive_loop():
+    """Background thread: archive newly expired days every ARCHIVE_INTERVAL_SEC."""
+    while True:
+        try:
+            written = _archive_expired()
+            if written:
+                print(f"[Archive] Wrote {written}")
+        except Exception as e:
+            print(f"[Archive] Error: {e}")
+        time.sleep(ARCHIVE_INTERVAL_SEC)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PROCESSING LOGS (rotated, gzipped, bounded — replaces pw.io.jsonlines.write)
+# ═══════════════════════════════════════════════════════════════════════════
+PROCESSING_LOGS = []
+
+
+def _processing_log(stream: str) -> ProcessingLog:
+    verbose = os.getenv("PW_LOG_VERBOSE", "1" if PW_LOG_VERBOSE else "0").strip().lower() in ("1", "true", "yes", "on")
+    log = RotatingLog(
+        os.path.join(OUTPUT_DIR, f"pw_{stream}_log.jsonl"),
+        max_bytes=PW_LOG_MAX_BYTES,
+        max_age_sec=PW_LOG_MAX_AGE_HOURS * 3600,
+        keep=PW_LOG_KEEP,
+        retention_sec=PW_LOG_RETENTION_DAYS * 86400,
+    )
+    plog = ProcessingLog(stream, log, verbose, PW_LOG_SUMMARY_SEC, counter=_M_PROCESSED, clock=lambda: _clock())
+    PROCESSING_LOGS.append(plog)
+    return plog
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # MAIN
 # ═══════════════════════════════════════════════════════════════════════════
 def main():
+    global ARCHIVE
     print("═" * 60)
     print("  InfraWatch Nexus — Pathway Streaming Engine v3.0")
     print(f"  Pathway {pw.__version__}")
     print(f"  Dustbins: {len(DUSTBINS)}")
     print(f"  Wards: {len(WARDS)}")
     print("═" * 60)
+    _init_state(OUTPUT_DIR)
 
-    # Start weather poller
-    weather_thread = threading.Thread(target=_weather_poller, daemon=True)
+    # SQLite event store: the existing event files are imported once (marker in the store)
+    use_event_store(create_event_store(
+        os.getenv("EVENT_STORE", EVENT_STORE_BACKEND), os.path.join(OUTPUT_DIR, EVENT_STORE_FILE),
+        EVENT_STORE_BATCH_SIZE, EVENT_STORE_BATCH_MS,
+    ))
+    if EVENT_STORE is not None:
+        imported = EVENT_STORE.import_once({os.path.basename(d): d for d in (WASTE_DIR, ROAD_DIR, VAN_DIR)})
+        if imported is not None:
+            print(f"  Event store: imported {imported} events from report files")
+        print(f"  Event store: SQLite ({EVENT_STORE.count()} events, {EVENT_STORE.path})")
+
+    # Start weather poller (a configured key without aiohttp is a broken deployment, not "no weather")
+    if os.getenv("WX_API_KEY", "") and not AIOHTTP_AVAILABLE:
+        raise SystemExit("❌ WX_API_KEY is set but aiohttp is not installed — weather polling needs it "
+                         "(pip install -r requirements.txt), or unset WX_API_KEY to run without weather.")
+    weather_thread = threading.Thread(target=_weather_poller, name="weather_poller", daemon=True)
     weather_thread.start()
     print("  Weather poller started")
 
     # Start recomputation loop
-    recompute_thread = threading.Thread(target=_recompute_loop, daemon=True)
+    recompute_thread = threading.Thread(target=_recompute_loop, name="recompute_loop", daemon=True)
     recompute_thread.start()
     print("  Recompute loop started (3s interval)")
 
+    # Columnar archive of expired days (Parquet; /api/admin/analytics)
+    if os.getenv("ARCHIVE_ENABLED", "1" if ARCHIVE_ENABLED else "0").strip().lower() in ("1", "true", "yes", "on"):
+        if PYARROW_AVAILABLE:
+            ARCHIVE = EventArchive(os.path.join(OUTPUT_DIR, ARCHIVE_DIR))
+            threading.Thread(target=_archive_loop, name="archive_loop", daemon=True).start()
+            print(f"  Event archive started ({ARCHIVE.root})")
+        else:
+            print("  Event archive disabled (pyarrow not installed)")
+
+    # Admin-triggered sampling profiler (via /api/admin/profile?target=engine)
+    threading.Thread(target=_profile_control, name="profile_control", daemon=True).start()
+
     # Initial snapshot
     try:
-        snapshot = compute_dashboard_snapshot()
-        _write_atomic_snapshot(snapshot)
+        _recompute("startup")
         print(f"  Initial snapshot written")
     except Exception as e:
         print(f"  Initial snapshot error: {e}")
@@ -652,10 +1360,10 @@ def main():
         result=pw.apply(_on_change_recompute, pw.this.data)
     )
 
-    # Write Pathway processing log
-    pw.io.jsonlines.write(waste_result, os.path.join(OUTPUT_DIR, "pw_waste_log.jsonl"))
-    pw.io.jsonlines.write(road_result, os.path.join(OUTPUT_DIR, "pw_road_log.jsonl"))
-    pw.io.jsonlines.write(van_result, os.path.join(OUTPUT_DIR, "pw_van_log.jsonl"))
+    # Pathway processing logs: rotated + gzipped, per-minute counts unless PW_LOG_VERBOSE
+    for stream, result in (("waste", waste_result), ("road", road_result), ("van", van_result)):
+        plog = _processing_log(stream)
+        pw.io.subscribe(result, on_change=plog.on_change, on_end=plog.close)
 
     print("\n  ▶ Pathway pipeline running. Watching for events...\n")
     pw.run()
@@ -0,0 +1,319 @@
+"""
+InfraWatch Nexus — Columnar Event Archive
+===========================================
+Expired events, one Parquet file per stream per day, for month-scale
+reporting (reports per ward per day, mean time-to-collection…) without
+parsing millions of JSON event files.
+
+Layout (hive partitioning, so a date range prunes whole directories):
+    archive/<stream>/date=YYYY-MM-DD/part-0.parquet
+    archive/_state.json                 stream → archived-up-to (epoch)
+
+  - The engine archives whole days only, once every event of the day is
+    past the stream's live window, behind a per-stream watermark — so a
+    day is normally written exactly once and re-runs are no-ops. A day has
+    one fixed file name, so re-archiving it (crash before the watermark was
+    saved, lost _state.json) replaces the file instead of doubling counts. A
+    backlog is walked one day at a time (fetch, write, advance and save
+    the watermark), so memory is bounded by one day, not the history.
+  - Rows are typed and sorted by (ward_id, ts) before writing; Parquet
+    row-group statistics then let ward / dustbin filters skip data.
+  - Van collections carry wait_sec: seconds from the first report at
+    that dustbin since its previous collection (within the lookback).
+  - query() reads only the columns it needs, pushes the date range and
+    equality filters into the scan, and aggregates with Arrow's group-by.
+    sum / mean take numeric columns only; timestamps come back as ISO strings.
+
+Needs pyarrow (a Pathway dependency); without it the archive is disabled.
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from ingestion.event_store import event_epoch
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+if PYARROW_AVAILABLE:
+    _COMMON = [
+        ("event_id", pa.string()), ("ts", pa.timestamp("ms", tz="UTC")), ("ingested_at", pa.float64()),
+        ("ward_id", pa.string()), ("zone", pa.string()), ("source", pa.string()), ("event_type", pa.string()),
+    ]
+    STREAM_SCHEMAS = {
+        "waste": pa.schema(_COMMON + [("dustbin_id", pa.string()), ("overflow_level", pa.int8())]),
+        "road": pa.schema(_COMMON + [
+            ("from_dustbin", pa.string()), ("to_dustbin", pa.string()),
+            ("issue_type", pa.string()), ("severity", pa.int8()),
+        ]),
+        "vans": pa.schema(_COMMON + [("dustbin_id", pa.string()), ("wait_sec", pa.float64())]),
+        "weather": pa.schema(_COMMON + [("rainfall_mm_hr", pa.float64()), ("weather_source", pa.string())]),
+    }
+    _PARTITIONING = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+else:
+    STREAM_SCHEMAS = {}
+
+AGGREGATES = ("count", "count_distinct", "sum", "mean", "min", "max")
+NUMERIC_AGGREGATES = ("sum", "mean")
+TIME_KEYS = {"day": "date"}    # group_by alias → partition column ("month" is derived from it)
+
+
+class ArchiveQueryError(ValueError):
+    """Bad analytics query (unknown stream / column / aggregate, bad dates)."""
+
+
+def _day(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _day_floor(epoch: float) -> float:
+    return float(int(epoch // 86400) * 86400)
+
+
+def _typed_array(values: list, type_):
+    """Arrow array of type_; hand-written events may carry "3" or 3.0 for an int8."""
+    try:
+        return pa.array(values, type=type_)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        cast = int if pa.types.is_integer(type_) else float if pa.types.is_floating(type_) else str
+        clean = []
+        for v in values:
+            try:
+                clean.append(None if v is None else cast(v))
+            except (TypeError, ValueError):
+                clean.append(None)
+        return pa.array(clean, type=type_)
+
+
+def collection_waits(vans: list, waste: list, lookback_sec: float) -> dict:
+    """
+    event_id of each van collection → seconds since the first report at its
+    dustbin after the previous collection (None if no report within lookback).
+    """
+    reports = {}
+    for e in waste:
+        if e.get("dustbin_id"):
+            reports.setdefault(e["dustbin_id"], []).append(event_epoch(e.get("timestamp")))
+    for times in reports.values():
+        times.sort()
+    waits, previous = {}, {}
+    collections = [(event_epoch(v.get("timestamp")), v) for v in vans
+                   if v.get("event_type") == "collection_confirmed" and v.get("dustbin_id")]
+    for ts, v in sorted(collections, key=lambda item: item[0]):
+        did = v["dustbin_id"]
+        since = max(previous.get(did, 0.0), ts - lookback_sec)
+        first = next((r for r in reports.get(did, ()) if since < r <= ts), None)
+        waits[v.get("event_id")] = None if first is None else ts - first
+        previous[did] = ts
+    return waits
+
+
+class EventArchive:
+    """Daily Parquet partitions per stream + group-by queries over them."""
+
+    def __init__(self, root: str):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("pyarrow is required for the event archive")
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._state_path = os.path.join(root, "_state.json")
+        self.state = self.watermarks()
+
+    def watermarks(self) -> dict:
+        """stream → archived-up-to epoch, as last saved (the engine writes, API workers read)."""
+        try:
+            with open(self._state_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # WRITE
+    # ═══════════════════════════════════════════════════════════════════════
+    def write_day(self, stream: str, day: str, events: list, zone_of: dict = None, extra: dict = None) -> str:
+        """The Parquet file of one stream-day (replaced if present); extra = {column: {event_id: value}}."""
+        schema = STREAM_SCHEMAS[stream]
+        zone_of = zone_of or {}
+        extra = extra or {}
+        keyed = sorted(((e.get("ward_id") or "", event_epoch(e.get("timestamp"))), i) for i, e in enumerate(events))
+        rows = [events[i] for _, i in keyed]
+        columns = {}
+        for field in schema:
+            name = field.name
+            if name == "ts":
+                values = [int(ts * 1000) for (_, ts), _ in keyed]
+            elif name == "zone":
+                values = [zone_of.get(e.get("ward_id")) for e in rows]
+            elif name in extra:
+                values = [extra[name].get(e.get("event_id")) for e in rows]
+            else:
+                values = [e.get(name) for e in rows]
+            columns[name] = _typed_array(values, field.type)
+        table = pa.table(columns, schema=schema)
+        directory = os.path.join(self.root, stream, f"date={day}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "part-0.parquet")
+        tmp_path = os.path.join(directory, ".part-0.parquet.tmp")   # dot: hidden from dataset scans
+        pq.write_table(table, tmp_path, compression="zstd", row_group_size=64_000)
+        os.replace(tmp_path, path)
+        for name in os.listdir(directory):
+            if name.startswith("part-") and name != "part-0.parquet":
+                os.unlink(os.path.join(directory, name))   # earlier copies of this day
+        return path
+
+    def _save_state(self):
+        tmp_path = self._state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self._state_path)
+
+    def archive_expired(self, fetch, earliest, now: float, expiry_hours: dict, zone_of: dict = None,
+                        lookback_sec: float = 48 * 3600) -> dict:
+        """
+        Archive every whole day that has left each stream's live window.
+        fetch(stream, start_epoch, end_epoch) → events with start ≤ ts < end;
+        earliest(stream) → epoch of its oldest event (None if empty), where
+        a stream with no watermark yet starts. Returns {stream: rows written}.
+        """
+        written = {}
+        for stream, hours in expiry_hours.items():
+            if stream not in STREAM_SCHEMAS:
+                continue
+            cutoff = _day_floor(now - hours * 3600)
+            day = self.state.get(stream)
+            if day is None:
+                first = earliest(stream)
+                day = cutoff if first is None else min(cutoff, _day_floor(first))
+            if day >= cutoff:
+                continue
+            rows = 0
+            while day < cutoff:
+                end = day + 86400
+                events = fetch(stream, day, end)
+                if events:
+                    extra = {}
+                    if stream == "vans":
+                        # Previous collections and reports within the lookback, not the whole history
+                        extra["wait_sec"] = collection_waits(fetch("vans", day - lookback_sec, end),
+                                                             fetch("waste", day - lookback_sec, end),
+                                                             lookback_sec)
+                    self.write_day(stream, _day(day), events, zone_of, extra)
+                    rows += len(events)
+                self.state[stream] = end
+                if events or end >= cutoff:
+                    self._save_state()
+                day = end
+            written[stream] = rows
+        return written
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # QUERY
+    # ═══════════════════════════════════════════════════════════════════════
+    def query(self, stream: str, start: str, end: str, group_by=("ward_id",),
+              metrics=("count",), filters: dict = None, limit: int = 5000) -> dict:
+        """
+        Group-by over [start, end) days (YYYY-MM-DD). metrics: "count" or
+        "<agg>:<column>" with agg in AGGREGATES; filters: {column: [values]}.
+        """
+        started = time.perf_counter()
+        schema = STREAM_SCHEMAS.get(stream)
+        if schema is None:
+            raise ArchiveQueryError(f"stream must be one of {', '.join(STREAM_SCHEMAS)}")
+        try:
+            day_start = datetime.strptime(start, "%Y-%m-%d")
+            day_end = datetime.strptime(end, "%Y-%m-%d")
+        except (TypeError, ValueError):
+            raise ArchiveQueryError("start / end must be YYYY-MM-DD")
+        if day_end <= day_start:
+            raise ArchiveQueryError("end must be after start")
+        columns = set(schema.names)
+
+        keys = []
+        for key in group_by:
+            key = TIME_KEYS.get(key, key)
+            if key not in columns and key not in ("date", "month"):
+                raise ArchiveQueryError(f"cannot group {stream} by {key}")
+            keys.append(key)
+
+        aggregations, needed = [], {k for k in keys if k != "month"}
+        for metric in metrics:
+            agg, _, column = metric.partition(":")
+            if agg not in AGGREGATES:
+                raise ArchiveQueryError(f"aggregate must be one of {', '.join(AGGREGATES)}")
+            if agg == "count" and not column:
+                aggregations.append(([], "count_all", "count"))
+                continue
+            if column not in columns:
+                raise ArchiveQueryError(f"{stream} has no column {column}")
+            column_type = schema.field(column).type
+            if agg in NUMERIC_AGGREGATES and not (pa.types.is_integer(column_type)
+                                                  or pa.types.is_floating(column_type)):
+                raise ArchiveQueryError(f"{agg} needs a numeric column, {column} is not")
+            needed.add(column)
+            aggregations.append((column, agg, f"{agg}_{column}"))
+        if "month" in keys:
+            needed.add("date")
+
+        expr = (ds.field("date") >= start) & (ds.field("date") < end)
+        for column, values in (filters or {}).items():
+            if column not in columns:
+                raise ArchiveQueryError(f"cannot filter {stream} on {column}")
+            expr = expr & ds.field(column).isin(list(values))
+
+        directory = os.path.join(self.root, stream)
+        files, table = 0, None
+        if os.path.isdir(directory):
+            dataset = ds.dataset(directory, format="parquet", partitioning=_PARTITIONING,
+                                 schema=schema.append(pa.field("date", pa.string())))
+            fragments = list(dataset.get_fragments(filter=expr))
+            files = len(fragments)
+            if fragments:
+                table = dataset.to_table(columns=sorted(needed) or ["date"], filter=expr)
+        if table is None:
+            table = pa.table({c: pa.array([], type=schema.field(c).type if c in columns else pa.string())
+                              for c in (sorted(needed) or ["date"])})
+        matched = table.num_rows
+        if "month" in keys:
+            table = table.append_column("month", pc.utf8_slice_codeunits(table["date"], 0, 7))
+
+        result = table.group_by(keys).aggregate([(col, agg) for col, agg, _ in aggregations])
+        renames = {}
+        for col, agg, alias in aggregations:
+            renames[f"{col}_{agg}" if col else agg] = alias
+        if "day" in group_by:
+            renames["date"] = "day"
+        result = result.rename_columns([renames.get(name, name) for name in result.column_names])
+        if keys:
+            result = result.sort_by([(renames.get(k, k), "ascending") for k in keys])
+        for i, field in enumerate(result.schema):
+            if pa.types.is_timestamp(field.type):
+                # ts keys / min / max come back as datetimes; JSON wants ISO strings
+                iso = pc.strftime(result.column(i), format="%Y-%m-%dT%H:%M:%SZ")
+                result = result.set_column(i, field.name, iso)
+        rows = result.to_pylist()
+        truncated = len(rows) > limit
+        return {
+            "stream": stream,
+            "start": start,
+            "end": end,
+            "group_by": list(group_by),
+            "metrics": list(metrics),
+            "rows": rows[:limit],
+            "truncated": truncated,
+            "matched_rows": matched,
+            "files": files,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+
+def day_range(days: int, end: datetime = None) -> tuple:
+    """(start, end) YYYY-MM-DD strings for the last `days` whole days before end (default today)."""
+    end = (end or datetime.now(timezone.utc)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (end - timedelta(days=days)).strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
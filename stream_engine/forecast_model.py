@@ -0,0 +1,165 @@
+"""
+InfraWatch Nexus — Predictive Risk Forecast Model
+===================================================
+Builds the full ward × time-step risk tensor in one vectorized pass.
+
+Inputs:
+  - forecast features per step (precip mm, wind kph), daily or hourly,
+    extracted from a WeatherAPI forecast.json response
+  - current report count per ward
+
+Models (FORECAST_MODEL):
+  - "linear" : the original hand-tuned formula
+                 severity = 0.7·rain + 0.3·wind
+                 risk     = min(1, reports/10 + 0.6·severity)
+  - "fitted" : logistic model with coefficients loaded from a JSON file
+                 risk = σ(b0 + b_reports·reports_n + b_rain·rain_n + b_wind·wind_n)
+               config/forecast_coef.json ships a logistic fit of the linear
+               formula (same 0.5 crossing); replace it with coefficients fitted
+               on real outcomes, e.g. sklearn LogisticRegression on normalized
+               (reports, rain, wind) → intercept_, coef_.
+"""
+import json
+import math
+import time
+
+import numpy as np
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FEATURES
+# ═══════════════════════════════════════════════════════════════════════════
+def extract_features(days: list, resolution: str = "daily") -> dict:
+    """
+    forecastday list → parallel arrays, one entry per time step.
+    resolution="hourly" uses day["hour"][] (24 steps per day).
+    """
+    labels, conditions, precip, wind = [], [], [], []
+    for day_data in days:
+        if resolution == "hourly":
+            for hour in day_data.get("hour", []):
+                labels.append(hour.get("time", ""))
+                conditions.append(hour.get("condition", {}).get("text", "Clear"))
+                precip.append(hour.get("precip_mm", 0) or 0)
+                wind.append(hour.get("wind_kph", 0) or 0)
+        else:
+            day_info = day_data.get("day", {})
+            labels.append(day_data.get("date", ""))
+            conditions.append(day_info.get("condition", {}).get("text", "Clear"))
+            precip.append(day_info.get("totalprecip_mm", 0) or 0)
+            wind.append(day_info.get("maxwind_kph", 0) or 0)
+    return {
+        "labels": labels,
+        "conditions": conditions,
+        "precip_mm": np.asarray(precip, dtype=np.float64),
+        "wind_kph": np.asarray(wind, dtype=np.float64),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# MODELS
+# ═══════════════════════════════════════════════════════════════════════════
+class LinearRiskModel:
+    """Original formula, broadcast over wards × steps."""
+
+    name = "linear"
+
+    def __init__(self, norm: dict):
+        self.norm = norm
+
+    def weather_severity(self, rain_n: np.ndarray, wind_n: np.ndarray) -> np.ndarray:
+        return np.round(rain_n * 0.7 + wind_n * 0.3, 2)
+
+    def predict(self, reports_n: np.ndarray, rain_n: np.ndarray, wind_n: np.ndarray) -> np.ndarray:
+        severity = self.weather_severity(rain_n, wind_n)
+        return np.minimum(1.0, reports_n[:, None] + severity[None, :] * 0.6)
+
+
+class FittedRiskModel:
+    """Logistic model; coefficients come from a fitted JSON file."""
+
+    name = "fitted"
+
+    COEF_KEYS = ("intercept", "reports", "rain", "wind")
+
+    def __init__(self, norm: dict, coef: dict):
+        self.norm = norm
+        self.b0, self.b_reports, self.b_rain, self.b_wind = self._validate(coef)
+
+    @classmethod
+    def _validate(cls, coef) -> list:
+        """Coefficient JSON → [b0, b_reports, b_rain, b_wind]; ValueError if malformed."""
+        if not isinstance(coef, dict):
+            raise ValueError(f"coefficients must be a JSON object with keys {list(cls.COEF_KEYS)}, "
+                             f"got {type(coef).__name__}")
+        missing = [k for k in cls.COEF_KEYS if k not in coef]
+        if missing:
+            raise ValueError(f"coefficients missing {missing}")
+        values = []
+        for key in cls.COEF_KEYS:
+            value = coef[key]
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                raise ValueError(f"coefficient {key!r} must be a finite number, got {value!r}")
+            values.append(float(value))
+        return values
+
+    @classmethod
+    def from_file(cls, norm: dict, path: str):
+        with open(path, "r") as f:
+            return cls(norm, json.load(f))
+
+    def weather_severity(self, rain_n: np.ndarray, wind_n: np.ndarray) -> np.ndarray:
+        # Weather-only contribution, rescaled to 0–1 for display
+        total = abs(self.b_rain) + abs(self.b_wind)
+        if total == 0:
+            return np.zeros_like(rain_n)
+        return np.round((self.b_rain * rain_n + self.b_wind * wind_n) / total, 2).clip(0, 1)
+
+    def predict(self, reports_n: np.ndarray, rain_n: np.ndarray, wind_n: np.ndarray) -> np.ndarray:
+        z = (self.b0
+             + self.b_reports * reports_n[:, None]
+             + (self.b_rain * rain_n + self.b_wind * wind_n)[None, :])
+        return 1.0 / (1.0 + np.exp(-z))
+
+
+def load_model(name: str, norm: dict, coef_file: str = ""):
+    """Factory for FORECAST_MODEL; falls back to linear if the file is unusable."""
+    if name == "fitted":
+        try:
+            return FittedRiskModel.from_file(norm, coef_file)
+        except (OSError, ValueError) as e:
+            print(f"[Forecast] Fitted model unavailable ({e}); using linear")
+    return LinearRiskModel(norm)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TENSOR
+# ═══════════════════════════════════════════════════════════════════════════
+def build_risk_tensor(model, features: dict, ward_ids: list, ward_report_counts: dict,
+                      resolution: str = "daily") -> dict:
+    """
+    One vectorized pass → {"risk": W×T array, "severity": T array, "compute_ms": float}.
+    """
+    started = time.perf_counter()
+    norm = model.norm
+    precip_norm = norm["hourly_precip_mm"] if resolution == "hourly" else norm["daily_precip_mm"]
+    reports = np.fromiter((ward_report_counts.get(w, 0) for w in ward_ids),
+                          dtype=np.float64, count=len(ward_ids))
+    reports_n = np.minimum(1.0, reports / norm["report_count"])
+    rain_n = np.minimum(1.0, features["precip_mm"] / precip_norm)
+    wind_n = np.minimum(1.0, features["wind_kph"] / norm["wind_kph"])
+
+    risk = np.round(model.predict(reports_n, rain_n, wind_n), 2)
+    severity = model.weather_severity(rain_n, wind_n)
+    return {
+        "risk": risk,
+        "severity": severity,
+        "reports": reports,
+        "compute_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+def risk_levels(risk: np.ndarray, levels: dict) -> np.ndarray:
+    """Vectorized risk → label (CRITICAL / ELEVATED / LOW)."""
+    return np.where(risk >= levels["CRITICAL"], "CRITICAL",
+                    np.where(risk >= levels["ELEVATED"], "ELEVATED", "LOW"))
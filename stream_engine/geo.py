@@ -0,0 +1,209 @@
+"""
+InfraWatch Nexus — Geo Helpers
+================================
+Small spatial primitives shared by the engine and API:
+  - haversine distance (scalar, and a numpy pairwise matrix)
+  - geohash encoding and bounding-box cell cover
+  - GridIndex: uniform lat/lng grid for k-nearest lookups
+"""
+import heapq
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in km."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_matrix_km(lat1, lng1, lat2, lng2) -> np.ndarray:
+    """Pairwise great-circle distances, len(lat1) × len(lat2), in km."""
+    p1 = np.radians(np.asarray(lat1, dtype=np.float64))[:, None]
+    p2 = np.radians(np.asarray(lat2, dtype=np.float64))[None, :]
+    dl = np.radians(np.asarray(lng2, dtype=np.float64))[None, :] - \
+        np.radians(np.asarray(lng1, dtype=np.float64))[:, None]
+    a = np.sin((p2 - p1) / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def geohash_encode(lat: float, lng: float, precision: int = 5) -> str:
+    """Standard base-32 geohash (precision 5 ≈ 4.9 km × 4.9 km cells)."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bit, ch, even = 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                ch = (ch << 1) | 1
+                lng_lo = mid
+            else:
+                ch <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch = (ch << 1) | 1
+                lat_lo = mid
+            else:
+                ch <<= 1
+                lat_hi = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(_BASE32[ch])
+            bit, ch = 0, 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> tuple:
+    """(lat_degrees, lng_degrees) spanned by one cell at this precision."""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = (5 * precision) // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def geohash_cover(min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                  precision: int = 5, max_cells: int = 4096):
+    """
+    Set of geohash cells intersecting the bounding box, or None if the box
+    needs more than max_cells (caller should fall back to a scan).
+    """
+    dlat, dlng = geohash_cell_size(precision)
+    # Snap to cell grid so every intersecting cell is visited exactly once
+    lat0 = math.floor((min_lat + 90.0) / dlat) * dlat - 90.0
+    lng0 = math.floor((min_lng + 180.0) / dlng) * dlng - 180.0
+    n_lat = int(math.floor((max_lat - lat0) / dlat)) + 1
+    n_lng = int(math.floor((max_lng - lng0) / dlng)) + 1
+    if n_lat * n_lng > max_cells:
+        return None
+    cells = set()
+    for i in range(n_lat):
+        lat = min(89.999999, lat0 + (i + 0.5) * dlat)
+        for j in range(n_lng):
+            lng = min(179.999999, lng0 + (j + 0.5) * dlng)
+            cells.add(geohash_encode(lat, lng, precision))
+    return cells
+
+
+class GridIndex:
+    """
+    Static points bucketed into a uniform lat/lng grid. k-nearest search
+    walks rings of cells outward from the query cell and stops as soon as
+    no unvisited ring can hold a closer point, so a lookup touches a
+    handful of cells regardless of how many points are indexed.
+    """
+
+    # Lower bounds on km per degree (meridian / equator), for the ring bound
+    _KM_PER_DEG_LAT = 110.57
+    _KM_PER_DEG_LNG = 111.32
+
+    def __init__(self, points, cell_deg: float = None, target_per_cell: int = 2):
+        """points: iterable of (id, lat, lng)."""
+        self.points = [(pid, float(lat), float(lng)) for pid, lat, lng in points]
+        if not self.points:
+            self.cell_deg = cell_deg or 0.01
+            self.cells, self._max_abs_lat, self._span = {}, 0.0, (0, 0, 0, 0)
+            return
+        lats = [p[1] for p in self.points]
+        lngs = [p[2] for p in self.points]
+        if cell_deg is None:
+            # Size cells for ~target_per_cell points on average
+            area = max(1e-6, (max(lats) - min(lats)) * (max(lngs) - min(lngs)))
+            cell_deg = math.sqrt(area * target_per_cell / len(self.points))
+        self.cell_deg = max(1e-5, cell_deg)
+        self.cells = {}
+        self._rad = [(math.radians(lat), math.radians(lng), math.cos(math.radians(lat)))
+                     for _, lat, lng in self.points]
+        for pos, (_, lat, lng) in enumerate(self.points):
+            self.cells.setdefault(self._cell(lat, lng), []).append(pos)
+        self._max_abs_lat = max(abs(min(lats)), abs(max(lats)))
+        keys = list(self.cells)
+        self._span = (min(k[0] for k in keys), max(k[0] for k in keys),
+                      min(k[1] for k in keys), max(k[1] for k in keys))
+
+    def __len__(self):
+        return len(self.points)
+
+    def _min_km_per_deg(self, lat: float) -> float:
+        """Lower bound on km per degree between a query at `lat` and any indexed point."""
+        # A degree of longitude is shortest at the highest latitude either end reaches
+        cos_max = math.cos(math.radians(min(89.0, max(abs(lat), self._max_abs_lat))))
+        return min(self._KM_PER_DEG_LAT, self._KM_PER_DEG_LNG * cos_max)
+
+    def _cell(self, lat: float, lng: float) -> tuple:
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def _ring(self, ci: int, cj: int, r: int):
+        if r == 0:
+            yield (ci, cj)
+            return
+        for dj in range(-r, r + 1):
+            yield (ci - r, cj + dj)
+            yield (ci + r, cj + dj)
+        for di in range(-r + 1, r):
+            yield (ci + di, cj - r)
+            yield (ci + di, cj + r)
+
+    def nearest(self, lat: float, lng: float, k: int = 5, max_km: float = None) -> list:
+        """[(distance_km, id, lat, lng)] closest first, at most k, within max_km."""
+        if not self.points or k <= 0:
+            return []
+        # Candidates are ranked by the haversine term a = sin²(dφ/2) + cosφ1·cosφ2·sin²(dλ/2),
+        # which is monotonic in distance; asin/sqrt only run for the final k.
+        sin, to_a = math.sin, self._km_to_a
+        qp, ql = math.radians(lat), math.radians(lng)
+        qcos = math.cos(qp)
+        a_max = to_a(max_km) if max_km is not None else None
+        rad = self._rad
+        ci, cj = self._cell(lat, lng)
+        i0, i1, j0, j1 = self._span
+        # Rings beyond this cannot contain any cell of the grid
+        max_r = max(abs(ci - i0), abs(ci - i1), abs(cj - j0), abs(cj - j1))
+        best = []   # max-heap via negation: (-a, pos)
+        cd = self.cell_deg
+        km_per_deg = self._min_km_per_deg(lat)
+        r = 0
+        while r <= max_r:
+            for cell in self._ring(ci, cj, r):
+                for pos in self.cells.get(cell, ()):
+                    pp, pl, pcos = rad[pos]
+                    a = sin((pp - qp) / 2) ** 2 + qcos * pcos * sin((pl - ql) / 2) ** 2
+                    if a_max is not None and a > a_max:
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-a, pos))
+                    elif a < -best[0][0]:
+                        heapq.heapreplace(best, (-a, pos))
+            # Anything outside the visited block is at least as far as its nearest edge
+            edge_deg = min(lat - (ci - r) * cd, (ci + r + 1) * cd - lat,
+                           lng - (cj - r) * cd, (cj + r + 1) * cd - lng)
+            bound_a = to_a(edge_deg * km_per_deg)
+            if len(best) == k and -best[0][0] <= bound_a:
+                break
+            if a_max is not None and bound_a > a_max:
+                break
+            r += 1
+        out = []
+        for na, pos in sorted(best, reverse=True):
+            d = 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(-na)))
+            pid, plat, plng = self.points[pos]
+            out.append((d, pid, plat, plng))
+        return out
+
+    def within(self, lat: float, lng: float, max_km: float) -> list:
+        """[(distance_km, id, lat, lng)] of every point within max_km, closest first."""
+        return self.nearest(lat, lng, len(self.points), max_km)
+
+    @staticmethod
+    def _km_to_a(km: float) -> float:
+        return math.sin(min(math.pi / 2, km / (2 * EARTH_RADIUS_KM))) ** 2
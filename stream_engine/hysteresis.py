@@ -0,0 +1,173 @@
+"""
+InfraWatch Nexus — Hysteresis State Machine
+=============================================
+Stateless banding flips a ward hovering on a boundary (55 ↔ 56) between
+Elevated and Warning on every recompute. This machine remembers the last
+state per entity and only moves when the evidence is clear:
+
+  - Score entities (ward waste / road risk, road segments): a band is
+    entered only HYSTERESIS_BUFFER / 2 past its lower edge and left only
+    HYSTERESIS_BUFFER / 2 past it the other way, so a band boundary has a
+    dead zone of HYSTERESIS_BUFFER points.
+  - Dustbins (rule-based states): escalation and "Cleared" (a confirmed
+    van collection) apply at once; de-escalation only after the lower
+    state has held for HYSTERESIS_DWELL_SEC.
+
+State survives restarts (JSON file, rewritten only when something
+changed). Every transition is appended to a compact JSONL stream with a
+monotonic seq, so consumers can follow changes instead of diffing whole
+snapshots.
+"""
+import json
+import os
+import tempfile
+import threading
+
+DUSTBIN_RANK = {"Clear": 0, "Cleared": 0, "Reported": 1, "Escalated": 2, "Critical": 3}
+
+
+class BandHysteresis:
+    """Score → band label with a symmetric dead zone around each boundary."""
+
+    def __init__(self, bands: list, buffer: float):
+        self.bands = bands
+        self.half = buffer / 2.0
+
+    def raw_index(self, score: float) -> int:
+        for i, band in enumerate(self.bands):
+            if band["min"] <= score <= band["max"]:
+                return i
+        return len(self.bands) - 1 if score > self.bands[-1]["max"] else 0
+
+    def next_index(self, current: int, score: float) -> int:
+        idx = current
+        # Climb while the score is clearly inside the next band up
+        while idx + 1 < len(self.bands) and score >= self.bands[idx + 1]["min"] + self.half:
+            idx += 1
+        if idx != current:
+            return idx
+        # Descend while the score is clearly below the current band
+        while idx > 0 and score < self.bands[idx]["min"] - self.half:
+            idx -= 1
+        return idx
+
+
+class StateMachine:
+    """Per-entity hysteresis with persistence and a transition log."""
+
+    def __init__(self, bands: list, buffer: float, dwell_sec: float, state_path: str,
+                 log_path: str, log_max_bytes: int = 5_000_000):
+        self.band = BandHysteresis(bands, buffer)
+        self.labels = [b["label"] for b in bands]
+        self.dwell_sec = dwell_sec
+        self.state_path = state_path
+        self.log_path = log_path
+        self.log_max_bytes = log_max_bytes
+        self._lock = threading.Lock()
+        self.seq = 0
+        self._states = {}     # "kind:id" → {"state", "since", "pending", "pending_since"}
+        self._pending_events = []
+        self._dirty = False
+        self._load()
+
+    # ── persistence ─────────────────────────────────────────────────────
+    def _load(self):
+        try:
+            with open(self.state_path, "r") as f:
+                data = json.load(f)
+            self.seq = int(data.get("seq", 0))
+            self._states = data.get("states", {})
+        except (OSError, ValueError):
+            pass
+
+    def _save(self):
+        payload = json.dumps({"seq": self.seq, "states": self._states})
+        directory = os.path.dirname(self.state_path) or "."
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(payload)
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            print(f"[Hysteresis] Persist error: {e}")
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+    def _append_log(self, events: list):
+        try:
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > self.log_max_bytes:
+                os.replace(self.log_path, self.log_path + ".1")
+            with open(self.log_path, "a") as f:
+                f.write("".join(json.dumps(e, separators=(",", ":")) + "\n" for e in events))
+        except OSError as e:
+            print(f"[Hysteresis] Transition log error: {e}")
+
+    # ── transitions ─────────────────────────────────────────────────────
+    def _emit(self, kind: str, ent_id: str, old, new: str, now: float, ward_id: str, score):
+        self.seq += 1
+        event = {"seq": self.seq, "ts": round(now, 3), "kind": kind, "id": ent_id,
+                 "ward_id": ward_id, "from": old, "to": new}
+        if score is not None:
+            event["score"] = score
+        self._pending_events.append(event)
+
+    def score_state(self, kind: str, ent_id: str, score: float, now: float, ward_id: str = None) -> str:
+        """Stabilized band label for a 0–100 score."""
+        key = f"{kind}:{ent_id}"
+        with self._lock:
+            entry = self._states.get(key)
+            if entry is None or entry["state"] not in self.labels:
+                idx = self.band.raw_index(score)
+                self._states[key] = {"state": self.labels[idx], "since": now}
+                self._dirty = True
+                return self.labels[idx]
+            current = self.labels.index(entry["state"])
+            idx = self.band.next_index(current, score)
+            if idx != current:
+                new = self.labels[idx]
+                self._emit(kind, ent_id, entry["state"], new, now, ward_id, score)
+                self._states[key] = {"state": new, "since": now}
+                self._dirty = True
+            return self._states[key]["state"]
+
+    def dustbin_state(self, ent_id: str, raw: str, now: float, ward_id: str = None) -> str:
+        """Stabilized dustbin state: up (or Cleared) immediately, down after dwell."""
+        key = f"dustbin:{ent_id}"
+        with self._lock:
+            entry = self._states.get(key)
+            if entry is None:
+                self._states[key] = {"state": raw, "since": now}
+                self._dirty = True
+                return raw
+            current = entry["state"]
+            if raw == current:
+                if entry.get("pending"):
+                    entry.pop("pending", None)
+                    entry.pop("pending_since", None)
+                    self._dirty = True
+                return current
+            immediate = raw == "Cleared" or DUSTBIN_RANK.get(raw, 0) >= DUSTBIN_RANK.get(current, 0)
+            if not immediate:
+                if entry.get("pending") != raw:
+                    entry["pending"], entry["pending_since"] = raw, now
+                    self._dirty = True
+                    return current
+                if now - entry["pending_since"] < self.dwell_sec:
+                    return current
+            self._emit("dustbin", ent_id, current, raw, now, ward_id, None)
+            self._states[key] = {"state": raw, "since": now}
+            self._dirty = True
+            return raw
+
+    def commit(self) -> list:
+        """Persist state (if changed) and flush new transitions to the log."""
+        with self._lock:
+            events, self._pending_events = self._pending_events, []
+            dirty, self._dirty = self._dirty, False
+            if events:
+                self._append_log(events)
+            if dirty:
+                self._save()
+            return events
@@ -0,0 +1,360 @@
+"""
+InfraWatch Nexus — Metrics Registry
+=====================================
+Counters, gauges and fixed-bucket histograms, rendered in the Prometheus
+text exposition format (0.0.4). No client library: one registry per
+process, a lock per metric, nothing allocated per observation.
+
+  - The engine renders its registry to data/output/engine_metrics.prom
+    after recomputes (throttled); the API's /metrics serves its own
+    registry followed by that file, so one scrape covers both processes.
+  - Gauges can be bound to a callable (set_function) and are evaluated at
+    render time — WebSocket client counts, cache age, listener counts.
+  - Several API workers: each registry carries a constant worker label and
+    exports itself to a file; merge_expositions() joins the exports into
+    one exposition (one HELP/TYPE header per family, every worker's series).
+  - A disabled registry hands out one shared no-op metric, so
+    instrumented code costs a method call and nothing else.
+
+Usage:
+    METRICS = MetricsRegistry(enabled=True)
+    RECOMPUTE = METRICS.histogram("engine_recompute_seconds", "Full recompute time")
+    with RECOMPUTE.time():
+        ...
+    FILES = METRICS.gauge("engine_event_files", "Event files read", ["stream"])
+    FILES.labels("waste").set(1234)
+"""
+import bisect
+import math
+import os
+import tempfile
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def env_enabled(default: bool) -> bool:
+    """METRICS_ENABLED env var (1/0, true/false) overriding the settings default."""
+    value = os.getenv("METRICS_ENABLED")
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Timer:
+    __slots__ = ("_target", "_started")
+
+    def __init__(self, target):
+        self._target = target
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._target.observe(time.perf_counter() - self._started)
+        return False
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# METRIC TYPES
+# ═══════════════════════════════════════════════════════════════════════════
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=(), const_labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.const_labels = tuple(const_labels)
+        self._lock = threading.Lock()
+        self._children = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def labels(self, *values):
+        """Child metric for one label-value combination (created on first use)."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_str(self, key: tuple, extra: tuple = ()) -> str:
+        pairs = list(self.const_labels) + list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def render(self, prefix: str) -> list:
+        name = prefix + self.name
+        lines = [f"# HELP {name} {self.documentation}", f"# TYPE {name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(name, key, child))
+        return lines
+
+    # Unlabelled metrics forward straight to their only child
+    def __getattr__(self, attr):
+        children = self.__dict__.get("_children")
+        if attr.startswith("_") or not children or () not in children:
+            raise AttributeError(attr)
+        return getattr(children[()], attr)
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def _render_child(self, name, key, child):
+        return [f"{name}_total{self._label_str(key)} {_fmt(child.value)}"]
+
+
+class _GaugeChild:
+    __slots__ = ("value", "fn", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.fn = None
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set_function(self, fn):
+        """Evaluate fn() at render time instead of storing a value."""
+        self.fn = fn
+
+    def current(self) -> float:
+        if self.fn is None:
+            return self.value
+        try:
+            return float(self.fn())
+        except Exception:
+            return math.nan
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def _render_child(self, name, key, child):
+        value = child.current()
+        return [] if math.isnan(value) else [f"{name}{self._label_str(key)} {_fmt(value)}"]
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last slot = +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> _Timer:
+        """Context manager observing the elapsed seconds."""
+        return _Timer(self)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), const_labels=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames, const_labels)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, name, key, child):
+        with child._lock:
+            counts, total, count = list(child.counts), child.sum, child.count
+        lines, running = [], 0
+        for bound, n in zip(self.buckets + (math.inf,), counts):
+            running += n
+            lines.append(f"{name}_bucket{self._label_str(key, (('le', _fmt(bound)),))} {running}")
+        lines.append(f"{name}_sum{self._label_str(key)} {_fmt(round(total, 6))}")
+        lines.append(f"{name}_count{self._label_str(key)} {count}")
+        return lines
+
+
+class _NoopMetric:
+    """Stands in for every metric of a disabled registry."""
+
+    def labels(self, *values):
+        return self
+
+    def inc(self, amount: float = 1.0):
+        pass
+
+    def dec(self, amount: float = 1.0):
+        pass
+
+    def set(self, value: float):
+        pass
+
+    def set_function(self, fn):
+        pass
+
+    def observe(self, value: float):
+        pass
+
+    def time(self):
+        return _NOOP_TIMER
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopMetric()
+_NOOP_TIMER = _NoopTimer()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REGISTRY
+# ═══════════════════════════════════════════════════════════════════════════
+class MetricsRegistry:
+    """Named metrics of one process; render() → Prometheus text."""
+
+    def __init__(self, enabled: bool = True, prefix: str = "infrawatch_", const_labels: dict = None):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.const_labels = tuple(sorted((const_labels or {}).items()))
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, documentation, labelnames, **kwargs):
+        if not self.enabled:
+            return _NOOP
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, self.const_labels, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"metric {name} already registered as {metric.kind}")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()):
+        return self._get(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames=()):
+        return self._get(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        if not self.enabled:
+            return ""
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        for _, metric in metrics:
+            lines.extend(metric.render(self.prefix))
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def write(self, path: str) -> bool:
+        """Render atomically to path (temp file + rename) for another process to serve."""
+        if not self.enabled:
+            return False
+        text = self.render()
+        directory = os.path.dirname(path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[Metrics] Write error: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return False
+        return True
+
+
+def merge_expositions(texts) -> str:
+    """
+    Join Prometheus texts from several processes into one exposition: each
+    family keeps the first HELP/TYPE header seen and gathers every text's
+    samples (the processes must label their series apart, e.g. by worker).
+    """
+    families, order = {}, []
+    for text in texts:
+        family = None
+        for line in text.splitlines():
+            if not line:
+                continue
+            if line.startswith("# HELP "):
+                family = line.split(" ", 3)[2]
+                if family not in families:
+                    families[family] = ([line], [])
+                    order.append(family)
+            elif line.startswith("# TYPE "):
+                header = families[family][0]
+                if len(header) < 2:
+                    header.append(line)
+            elif family is not None:
+                families[family][1].append(line)
+    lines = []
+    for family in order:
+        header, samples = families[family]
+        lines.extend(header)
+        lines.extend(samples)
+    return "\n".join(lines) + "\n" if lines else ""
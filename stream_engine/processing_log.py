@@ -0,0 +1,196 @@
+"""
+InfraWatch Nexus — Rotating Processing Logs
+=============================================
+Replaces the unbounded pw_<stream>_log.jsonl files Pathway used to append
+one line per processed event file to, forever.
+
+  - RotatingLog: append-only JSON lines with a size and an age limit.
+    When either is hit the active file is gzipped to
+        pw_waste_log.<YYYYmmdd-HHMMSS>.jsonl.gz
+    and a fresh one is started. Only the newest `keep` archives younger
+    than `retention_sec` are kept, so disk use is capped at roughly
+    max_bytes × (1 + keep / compression ratio).
+  - ProcessingLog: the pw.io.subscribe() callback for one stream. Verbose
+    mode writes the old per-file line ({"result", "time", "diff"});
+    otherwise only a summary line per stream per minute:
+        {"stream": "waste", "minute": "...", "start": <epoch>, "events": n, "ok": n, "errors": n}
+    flush() closes finished minutes and applies the age limit, so call it
+    periodically — events alone don't arrive on a schedule.
+"""
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+
+class RotatingLog:
+    """JSON-lines file rotated (and gzipped) by size or age, with bounded retention."""
+
+    def __init__(self, path: str, max_bytes: int = 8 * 1024 * 1024, max_age_sec: float = 86400,
+                 keep: int = 14, retention_sec: float = 30 * 86400, clock=time.time):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_sec = max_age_sec
+        self.keep = keep
+        self.retention_sec = retention_sec
+        self.clock = clock
+        self.rotations = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._opened_at = 0.0
+        base = os.path.basename(path)
+        self._stem = base[:-len(".jsonl")] if base.endswith(".jsonl") else base
+
+    def _open(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+        # A file left by a previous run is as old as its last write, at least
+        self._opened_at = os.path.getmtime(self.path) if self._size else self.clock()
+
+    def write(self, record: dict):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._open()
+            if self._size and self._due(len(line)):
+                self._rotate()
+                self._open()
+            self._file.write(line)
+            self._file.flush()
+            self._size += len(line)
+
+    def _due(self, incoming: int = 0) -> bool:
+        return (self._size + incoming > self.max_bytes
+                or self.clock() - self._opened_at >= self.max_age_sec)
+
+    def maybe_rotate(self) -> bool:
+        """Apply the age limit without a write (quiet streams)."""
+        with self._lock:
+            if self._file is None:
+                if not os.path.exists(self.path) or not os.path.getsize(self.path):
+                    return False
+                self._open()
+            if not self._size or not self._due():
+                return False
+            self._rotate()
+            return True
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        stamp = datetime.fromtimestamp(self.clock()).strftime("%Y%m%d-%H%M%S")
+        directory = os.path.dirname(self.path) or "."
+        archive = os.path.join(directory, f"{self._stem}.{stamp}.jsonl.gz")
+        n = 1
+        while os.path.exists(archive):
+            archive = os.path.join(directory, f"{self._stem}.{stamp}-{n}.jsonl.gz")
+            n += 1
+        try:
+            with open(self.path, "rb") as src, gzip.open(archive + ".tmp", "wb", compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(archive + ".tmp", archive)
+            os.unlink(self.path)
+        except OSError as e:
+            # Keep the uncompressed lines rather than lose them; retry next time
+            print(f"[ProcessingLog] Rotate error for {self.path}: {e}")
+            try:
+                os.unlink(archive + ".tmp")
+            except OSError:
+                pass
+            return
+        self.rotations += 1
+        self._prune()
+
+    def archives(self) -> list:
+        """Rotated files of this log, oldest first."""
+        directory = os.path.dirname(self.path) or "."
+        prefix = self._stem + "."
+        try:
+            names = [n for n in os.listdir(directory) if n.startswith(prefix) and n.endswith(".jsonl.gz")]
+        except FileNotFoundError:
+            return []
+        return [os.path.join(directory, n) for n in sorted(names)]
+
+    def _archived_at(self, path: str) -> float:
+        """Rotation time from the archive name (…<YYYYmmdd-HHMMSS>[-n].jsonl.gz)."""
+        stamp = os.path.basename(path)[len(self._stem) + 1:].split(".")[0][:15]
+        try:
+            return datetime.strptime(stamp, "%Y%m%d-%H%M%S").timestamp()
+        except ValueError:
+            return os.path.getmtime(path)
+
+    def _prune(self):
+        archives = self.archives()
+        cutoff = self.clock() - self.retention_sec
+        excess = len(archives) - self.keep
+        for i, path in enumerate(archives):
+            try:
+                if i < excess or self._archived_at(path) < cutoff:
+                    os.unlink(path)
+            except OSError:
+                pass
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class ProcessingLog:
+    """pw.io.subscribe() sink for one stream: per-file lines or per-minute summaries."""
+
+    def __init__(self, stream: str, log: RotatingLog, verbose: bool = False,
+                 summary_sec: int = 60, counter=None, clock=time.time):
+        self.stream = stream
+        self.log = log
+        self.verbose = verbose
+        self.summary_sec = summary_sec
+        self.counter = counter          # labelled (stream, result) — processed event files
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._buckets = {}              # bucket start → {"events", "ok", "errors"}
+
+    def on_change(self, key, row: dict, time: int, is_addition: bool):
+        if self.verbose:
+            self.log.write({"result": row.get("result"), "time": time, "diff": 1 if is_addition else -1})
+        if not is_addition:
+            return          # retraction of a file that changed / was removed — not new work
+        try:
+            ok = json.loads(row.get("result") or "{}").get("status") == "ok"
+        except ValueError:
+            ok = False
+        if self.counter is not None:
+            self.counter.labels(self.stream, "ok" if ok else "error").inc()
+        if self.verbose:
+            return
+        start = int(self.clock() // self.summary_sec * self.summary_sec)
+        with self._lock:
+            bucket = self._buckets.setdefault(start, {"events": 0, "ok": 0, "errors": 0})
+            bucket["events"] += 1
+            bucket["ok" if ok else "errors"] += 1
+        self.flush()
+
+    def flush(self, force: bool = False):
+        """Write summaries for finished minutes (all of them if force), then check the age limit."""
+        current = int(self.clock() // self.summary_sec * self.summary_sec)
+        with self._lock:
+            done = sorted(s for s in self._buckets if force or s < current)
+            lines = [(s, self._buckets.pop(s)) for s in done]
+        for start, counts in lines:
+            self.log.write({
+                "stream": self.stream,
+                "minute": datetime.fromtimestamp(start).isoformat(timespec="minutes"),
+                "start": start,
+                **counts,
+            })
+        if not lines:
+            self.log.maybe_rotate()
+
+    def close(self):
+        self.flush(force=True)
+        self.log.close()
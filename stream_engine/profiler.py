@@ -0,0 +1,161 @@
+"""
+InfraWatch Nexus — On-Demand Sampling Profiler
+================================================
+Started and stopped at runtime (admin API), never on by default.
+
+  - A daemon thread wakes every `interval` seconds, grabs every other
+    thread's current frame (sys._current_frames) and counts the stack.
+    Nothing is installed in the profiled threads, so the cost is one
+    stack walk per thread per sample, and zero when no run is active.
+  - Runs are bounded: they stop themselves after duration_sec (capped
+    at max_sec) or when stop() is called.
+  - Output is collapsed stacks, one line per distinct stack:
+        <thread>;<outer frame>;…;<inner frame> <count>
+    which flamegraph.pl, speedscope and inferno read directly.
+    Frames are "function (path:first line)", so every sample in the
+    same function merges into one frame.
+
+The engine runs one for its threads (recompute loop, weather poller,
+Pathway callbacks); each API worker runs one for its event loop and
+helper threads.
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    if path.startswith(PROJECT_ROOT):
+        path = os.path.relpath(path, PROJECT_ROOT)
+    else:
+        # Library frames: keep the tail (pkg/module.py) for readability
+        path = "/".join(path.replace("\\", "/").split("/")[-2:])
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame, thread_name: str, max_depth: int = 128) -> str:
+    """Root-first ';'-joined stack for one frame, prefixed by the thread name."""
+    labels = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.append(thread_name.replace(";", ":").replace(" ", "_"))
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """One bounded profiling run at a time; results kept until the next run."""
+
+    def __init__(self, max_sec: float = 120, on_finish=None):
+        self.max_sec = max_sec
+        self.on_finish = on_finish     # called with result() when a run ends
+        self._lock = threading.Lock()      # run start + counter updates / snapshots
+        self._stop = threading.Event()
+        self._thread = None
+        self._stacks = Counter()
+        self._threads = Counter()
+        self._info = {"status": "idle"}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration_sec: float, interval_sec: float = 0.01, profile_id: str = None) -> dict:
+        """Begin a run; raises RuntimeError if one is already active."""
+        with self._lock:
+            if self.running:
+                raise RuntimeError(f"profile {self._info.get('id')} is already running")
+            duration_sec = max(0.1, min(float(duration_sec), self.max_sec))
+            interval_sec = max(0.001, float(interval_sec))
+            self._stacks, self._threads = Counter(), Counter()
+            self._stop = threading.Event()
+            now = time.time()
+            self._info = {
+                "id": profile_id or f"p{int(now * 1000)}",
+                "status": "running",
+                "pid": os.getpid(),
+                "started_at": round(now, 3),
+                "duration_sec": duration_sec,
+                "interval_ms": round(interval_sec * 1000, 3),
+                "samples": 0,
+            }
+            self._thread = threading.Thread(target=self._run, args=(duration_sec, interval_sec),
+                                            name="sampling_profiler", daemon=True)
+            self._thread.start()
+            return dict(self._info)
+
+    def stop(self, wait: float = 5.0) -> dict:
+        """End the active run early (no-op when idle); returns status()."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(wait)
+        return self.status()
+
+    def _run(self, duration_sec: float, interval_sec: float):
+        own = threading.get_ident()
+        deadline = time.perf_counter() + duration_sec
+        stacks, threads = self._stacks, self._threads
+        samples = 0
+        while not self._stop.is_set() and time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            sample = []
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                name = names.get(ident, f"thread-{ident}")
+                sample.append((collapse_stack(frame, name), name))
+            frames = frame = None   # don't keep other threads' frames alive between samples
+            with self._lock:        # status() may be reading the counters from another thread
+                for stack, name in sample:
+                    stacks[stack] += 1
+                    threads[name] += 1
+            samples += 1
+            self._info["samples"] = samples
+            self._stop.wait(interval_sec)
+        self._info["status"] = "stopped" if self._stop.is_set() else "finished"
+        self._info["ended_at"] = round(time.time(), 3)
+        if self.on_finish:
+            try:
+                self.on_finish(self.result())
+            except Exception as e:
+                print(f"[Profiler] on_finish error: {e}")
+
+    def status(self) -> dict:
+        with self._lock:
+            info = dict(self._info)
+            threads = Counter(self._threads)
+        info["threads"] = dict(threads.most_common())
+        return info
+
+    def collapsed(self) -> str:
+        """Flamegraph-ready collapsed stacks, heaviest first."""
+        with self._lock:
+            stacks = Counter(self._stacks)
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    def result(self) -> dict:
+        return {**self.status(), "collapsed": self.collapsed()}
+
+
+def write_json_atomic(path: str, data: dict):
+    """Temp file + rename, for control / result files shared between processes."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
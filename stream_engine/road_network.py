@@ -0,0 +1,55 @@
+"""
+InfraWatch Nexus — Road Network Layer
+=======================================
+Snaps road issues onto the ROAD_SEGMENTS registry (config/wards.py).
+
+A segment is recorded as its midpoint plus length_km, so it is treated
+as reaching length_km / 2 from that point. An issue (from_dustbin →
+to_dustbin) is sampled at both endpoints and the midpoint; every
+segment whose reach (+ tolerance) covers a sample is hit.
+
+  - Precompute: one GridIndex over segment midpoints (O(S)).
+  - Snap: a radius lookup per sample point out to the longest reach in
+    the registry, so a long segment is found even when several short
+    ones have nearer midpoints; each candidate is then checked against
+    its own reach. Cost depends on the cells inside that radius, not on
+    the number of segments, and the result is memoized per
+    (from_dustbin, to_dustbin) pair, since bins don't move.
+"""
+from stream_engine.geo import GridIndex
+
+
+class RoadNetwork:
+    """Spatial lookup from road-issue endpoints to road segments."""
+
+    def __init__(self, segments: dict, tolerance_km: float = 0.5):
+        self.segments = segments
+        self.tolerance_km = tolerance_km
+        self._grid = GridIndex((sid, s["lat"], s["lng"]) for sid, s in segments.items())
+        # No segment reaches further than this from its midpoint
+        self._max_reach_km = max((s["length_km"] / 2 for s in segments.values()), default=0.0) \
+            + tolerance_km
+        self._cache = {}
+
+    def snap_point(self, lat: float, lng: float) -> list:
+        """[(distance_km, segment_id)] of segments whose reach covers the point."""
+        hits = []
+        for dist, sid, _, _ in self._grid.within(lat, lng, self._max_reach_km):
+            if dist <= self.segments[sid]["length_km"] / 2 + self.tolerance_km:
+                hits.append((dist, sid))
+        return hits
+
+    def snap_issue(self, from_id: str, to_id: str, from_pt: tuple, to_pt: tuple) -> list:
+        """Segment ids hit by an issue between two dustbins, nearest first (memoized)."""
+        key = (from_id, to_id)
+        cached = self._cache.get(key)
+        if cached is None:
+            mid = ((from_pt[0] + to_pt[0]) / 2, (from_pt[1] + to_pt[1]) / 2)
+            best = {}
+            for pt in (from_pt, mid, to_pt):
+                for dist, sid in self.snap_point(*pt):
+                    if dist < best.get(sid, float("inf")):
+                        best[sid] = dist
+            cached = [sid for sid, _ in sorted(best.items(), key=lambda kv: (kv[1], kv[0]))]
+            self._cache[key] = cached
+        return cached
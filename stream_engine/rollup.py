@@ -0,0 +1,152 @@
+"""
+InfraWatch Nexus — Hierarchical Rollups
+=========================================
+dustbin → ward → zone → city aggregates, maintained by deltas.
+
+Every node keeps running sums. When a leaf (a dustbin's state or a
+ward's risk scores) changes, the difference is added to its ancestors
+only; unchanged leaves cost one dict compare. Zone views (indices,
+counts, top offenders) are rebuilt only for zones that were touched.
+
+All maintained values are integers (counts, 0–100 scores), so the
+running sums never drift.
+"""
+import heapq
+import threading
+
+# Per-dustbin metrics rolled up to ward / zone / city
+OPEN_STATES = ("Reported", "Escalated", "Critical")
+
+
+def dustbin_metrics(ds: dict) -> dict:
+    state = ds.get("state", "Clear")
+    return {
+        "bins": 1,
+        "reports": ds.get("report_count", 0),
+        "bins_open": 1 if state in OPEN_STATES else 0,
+        "bins_escalated": 1 if state == "Escalated" else 0,
+        "bins_critical": 1 if state == "Critical" else 0,
+    }
+
+
+def ward_metrics(waste_score: int, road_score: int) -> dict:
+    return {"wards": 1, "waste_score": waste_score, "road_score": road_score}
+
+
+class RollupTree:
+    """Delta-maintained sums over the ward/zone/city hierarchy."""
+
+    def __init__(self, wards: dict, dustbins: dict, top_n: int = 3):
+        self.wards = wards
+        self.top_n = top_n
+        self._lock = threading.RLock()
+        self._parent = {("city",): None}
+        self._zone_members = {}       # zone → ward ids in registry order
+        for wid, w in wards.items():
+            zone = ("zone", w.get("zone", "Unknown"))
+            self._parent[zone] = ("city",)
+            self._parent[("ward", wid)] = zone
+            self._zone_members.setdefault(zone, []).append(wid)
+        for did, d in dustbins.items():
+            self._parent[("dustbin", did)] = ("ward", d["ward_id"])
+        self._sums = {node: {} for node in self._parent if node[0] != "dustbin"}
+        self._leaves = {}             # leaf node → last metrics
+        self._ward_scores = {}        # ward_id → (waste, road) for top offenders
+        self._zone_views = {}         # zone → cached view
+        self._dirty_zones = set(z for z in self._parent if z[0] == "zone")
+        self.stats = {"leaf_updates": 0, "leaf_unchanged": 0, "node_updates": 0, "zone_rebuilds": 0}
+
+    # ── maintenance ─────────────────────────────────────────────────────
+    def _set_leaf(self, leaf: tuple, metrics: dict, start: tuple):
+        old = self._leaves.get(leaf, {})
+        if old == metrics:
+            self.stats["leaf_unchanged"] += 1
+            return
+        delta = {k: metrics.get(k, 0) - old.get(k, 0) for k in set(metrics) | set(old)}
+        delta = {k: v for k, v in delta.items() if v}
+        self._leaves[leaf] = metrics
+        self.stats["leaf_updates"] += 1
+        node = start
+        while node is not None:
+            sums = self._sums[node]
+            for k, v in delta.items():
+                sums[k] = sums.get(k, 0) + v
+            self.stats["node_updates"] += 1
+            if node[0] == "zone":
+                self._dirty_zones.add(node)
+            node = self._parent[node]
+
+    def update_dustbin(self, ds: dict):
+        leaf = ("dustbin", ds["dustbin_id"])
+        if leaf in self._parent:
+            self._set_leaf(leaf, dustbin_metrics(ds), self._parent[leaf])
+
+    def update_ward(self, ward_id: str, waste_score: int, road_score: int):
+        # Ward scores are a leaf hanging off the ward node
+        self._ward_scores[ward_id] = (waste_score, road_score)
+        self._set_leaf(("ward_score", ward_id), ward_metrics(waste_score, road_score),
+                       ("ward", ward_id))
+
+    def apply(self, dustbin_states: list, ward_risks: list, road_ward_risks: list):
+        """Feed one recompute's leaves; only changed ones propagate."""
+        road = {r["ward_id"]: r["risk_score"] for r in road_ward_risks}
+        with self._lock:
+            for ds in dustbin_states:
+                self.update_dustbin(ds)
+            for wr in ward_risks:
+                self.update_ward(wr["ward_id"], wr["risk_score"], road.get(wr["ward_id"], 0))
+
+    def refresh(self, dustbin_states: list, ward_risks: list, road_ward_risks: list) -> tuple:
+        """apply() + (zone views, city view), atomically."""
+        with self._lock:
+            self.apply(dustbin_states, ward_risks, road_ward_risks)
+            return self.zones(), self.city()
+
+    # ── views ───────────────────────────────────────────────────────────
+    @staticmethod
+    def _index(sums: dict, key: str) -> float:
+        return round(sums.get(key, 0) / max(1, sums.get("wards", 0)), 1)
+
+    def _zone_view(self, zone: tuple) -> dict:
+        view = self._zone_views.get(zone)
+        if view is None or zone in self._dirty_zones:
+            sums = self._sums[zone]
+            ranked = heapq.nlargest(
+                self.top_n, enumerate(self._zone_members.get(zone, [])),
+                key=lambda item: (self._ward_scores.get(item[1], (0, 0))[0], -item[0]),
+            )
+            top = [wid for _, wid in ranked]
+            view = {
+                "zone": zone[1],
+                "waste_index": self._index(sums, "waste_score"),
+                "road_index": self._index(sums, "road_score"),
+                "wards": sums.get("wards", 0),
+                "bins": sums.get("bins", 0),
+                "reports": sums.get("reports", 0),
+                "bins_open": sums.get("bins_open", 0),
+                "bins_escalated": sums.get("bins_escalated", 0),
+                "bins_critical": sums.get("bins_critical", 0),
+                "top_offenders": [{
+                    "ward_id": wid,
+                    "name": self.wards[wid]["name"],
+                    "risk_score": self._ward_scores.get(wid, (0, 0))[0],
+                } for wid in top],
+            }
+            self._zone_views[zone] = view
+            self._dirty_zones.discard(zone)
+            self.stats["zone_rebuilds"] += 1
+        return view
+
+    def zones(self) -> list:
+        with self._lock:
+            return [self._zone_view(z) for z in sorted(n for n in self._sums if n[0] == "zone")]
+
+    def city(self) -> dict:
+        with self._lock:
+            sums = self._sums[("city",)]
+            return {
+                "waste_index": self._index(sums, "waste_score"),
+                "road_index": self._index(sums, "road_score"),
+                **{k: sums.get(k, 0) for k in ("wards", "bins", "reports", "bins_open",
+                                                "bins_escalated", "bins_critical")},
+            }
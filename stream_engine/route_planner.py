@@ -0,0 +1,380 @@
+"""
+InfraWatch Nexus — Van Route Planner
+======================================
+Turns the bins that need collection into per-ward van tours.
+
+  - Distance matrix: haversine × ROUTE_DETOUR_FACTOR over each ward's
+    dustbins plus a depot (the ward centroid). The registry is static, so
+    each ward block is built once and cached; active road issues between
+    two bins inflate that edge (road-segment weighting).
+  - Stops: Reported / Escalated / Critical bins, weighted by state and
+    capacity_liters. A tour's cost is its length plus the weighted
+    distance travelled before each stop, so heavy Critical bins are
+    reached first.
+  - Solve: sweep the stops into one group per van, priority-weighted
+    nearest-neighbour construction, then 2-opt + relocate local search
+    until nothing improves or the time budget runs out. Moves are priced
+    in O(1) from per-tour prefix sums, so the budget is checked often.
+  - Incremental: a ward whose stop set changed (e.g. collection_confirmed
+    cleared a bin) keeps its tours — removed stops are spliced out, new
+    ones are cheapest-inserted, and a short local search polishes the
+    result. Unchanged wards are reused as-is.
+"""
+import threading
+import time
+
+import numpy as np
+
+from stream_engine.geo import haversine_matrix_km
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DISTANCE MATRIX
+# ═══════════════════════════════════════════════════════════════════════════
+class DistanceMatrix:
+    """Cached per-ward distance blocks. Row/column 0 is the depot."""
+
+    def __init__(self, dustbins: dict, wards: dict, detour_factor: float = 1.0,
+                 issue_penalty: float = 0.0):
+        self.dustbins = dustbins
+        self.wards = wards
+        self.detour_factor = detour_factor
+        self.issue_penalty = issue_penalty
+        self._by_ward = {}
+        for did, info in dustbins.items():
+            self._by_ward.setdefault(info["ward_id"], []).append(did)
+        self._blocks = {}      # ward_id → (ids, pos, base matrix)
+        self._weighted = {}    # ward_id → (issue signature, matrix)
+
+    def block(self, ward_id: str):
+        """(ids, {id: index}, base km matrix); ids[0] is the depot."""
+        cached = self._blocks.get(ward_id)
+        if cached is None:
+            ward = self.wards[ward_id]
+            ids = ["depot"] + self._by_ward.get(ward_id, [])
+            lats = [ward["lat"]] + [self.dustbins[d]["lat"] for d in ids[1:]]
+            lngs = [ward["lng"]] + [self.dustbins[d]["lng"] for d in ids[1:]]
+            matrix = haversine_matrix_km(lats, lngs, lats, lngs) * self.detour_factor
+            cached = (ids, {d: i for i, d in enumerate(ids)}, matrix)
+            self._blocks[ward_id] = cached
+        return cached
+
+    def weighted(self, ward_id: str, issues: tuple):
+        """
+        Block with road-issue edges inflated. issues: ((from_bin, to_bin,
+        severity), …) sorted. Rebuilt only when the ward's issues change.
+        """
+        ids, pos, base = self.block(ward_id)
+        cached = self._weighted.get(ward_id)
+        if cached is not None and cached[0] == issues:
+            return ids, pos, cached[1]
+        matrix = base
+        if issues and self.issue_penalty:
+            matrix = base.copy()
+            for a, b, severity in issues:
+                if a in pos and b in pos:
+                    factor = 1.0 + self.issue_penalty * severity
+                    matrix[pos[a], pos[b]] *= factor
+                    matrix[pos[b], pos[a]] *= factor
+        self._weighted[ward_id] = (issues, matrix)
+        return ids, pos, matrix
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TOUR COST + LOCAL SEARCH
+# ═══════════════════════════════════════════════════════════════════════════
+def tour_cost(tour: list, dist, weights: dict, latency_weight: float) -> float:
+    """Open tour from the depot (index 0): length + latency_weight · Σ w·arrival_km."""
+    total = latency = 0.0
+    prev = 0
+    for stop in tour:
+        total += dist[prev][stop]
+        latency += weights[stop] * total
+        prev = stop
+    return total + latency_weight * latency
+
+
+def _nearest_neighbour(stops: list, dist, weights: dict) -> list:
+    """Priority-weighted NN: next stop minimises distance / weight."""
+    tour, left, prev = [], set(stops), 0
+    while left:
+        nxt = min(left, key=lambda s: (dist[prev][s] / weights[s], s))
+        tour.append(nxt)
+        left.discard(nxt)
+        prev = nxt
+    return tour
+
+
+def _sweep_groups(stops: list, n_groups: int, angle: dict, weights: dict) -> list:
+    """Split stops by polar angle around the depot into weight-balanced groups."""
+    ordered = sorted(stops, key=lambda s: angle[s])
+    if n_groups <= 1 or len(ordered) <= 1:
+        return [ordered]
+    n_groups = min(n_groups, len(ordered))
+    target = sum(weights[s] for s in ordered) / n_groups
+    groups, current, acc = [], [], 0.0
+    for i, s in enumerate(ordered):
+        current.append(s)
+        acc += weights[s]
+        remaining_stops = len(ordered) - i - 1
+        remaining_groups = n_groups - len(groups) - 1
+        if remaining_groups > 0 and (acc >= target or remaining_stops == remaining_groups):
+            groups.append(current)
+            current, acc = [], 0.0
+    groups.append(current)
+    return groups
+
+
+class _Profile:
+    """
+    Per-position prefix data of one tour, so a move is priced in O(1).
+
+    Cost = Σ_p d_p · (1 + λ·W_p): d_p is the edge into position p, W_p the
+    weight still to be served from p on (each edge delays every later stop).
+    """
+    __slots__ = ("edge", "arrival", "suffix", "sum_d", "sum_dw")
+
+    def __init__(self, tour: list, dist, weights: dict):
+        n = len(tour)
+        self.edge = edge = [0.0] * n
+        self.arrival = arrival = [0.0] * n
+        self.suffix = suffix = [0.0] * (n + 1)
+        prev, km = 0, 0.0
+        for p, stop in enumerate(tour):
+            edge[p] = dist[prev][stop]
+            km += edge[p]
+            arrival[p] = km
+            prev = stop
+        for p in range(n - 1, -1, -1):
+            suffix[p] = suffix[p + 1] + weights[tour[p]]
+        self.sum_d = sum_d = [0.0] * (n + 1)
+        self.sum_dw = sum_dw = [0.0] * (n + 1)
+        for p in range(n):
+            sum_d[p + 1] = sum_d[p] + edge[p]
+            sum_dw[p + 1] = sum_dw[p] + edge[p] * suffix[p]
+
+
+def _removal_delta(tour: list, prof: _Profile, i: int, dist, weights: dict, lam: float) -> float:
+    """Cost change from dropping position i; later stops arrive earlier by -shift."""
+    prev = tour[i - 1] if i else 0
+    shift = -prof.edge[i]
+    if i + 1 < len(tour):
+        shift += dist[prev][tour[i + 1]] - prof.edge[i + 1]
+    return shift * (1 + lam * prof.suffix[i + 1]) - lam * weights[tour[i]] * prof.arrival[i]
+
+
+def _insertion_delta(tour: list, prof: _Profile, k: int, stop: int, dist, weights: dict, lam: float) -> float:
+    """Cost change from inserting stop before position k (k == len(tour): append)."""
+    prev = tour[k - 1] if k else 0
+    before = prof.arrival[k - 1] if k else 0.0
+    into = dist[prev][stop]
+    shift = into
+    if k < len(tour):
+        shift += dist[stop][tour[k]] - prof.edge[k]
+    return shift * (1 + lam * prof.suffix[k]) + lam * weights[stop] * (before + into)
+
+
+def local_search(tours: list, dist, weights: dict, latency_weight: float, deadline: float) -> int:
+    """
+    2-opt within tours + relocate between tours, first improvement, in place.
+    Moves are priced from prefix sums (dist must be symmetric, as the road
+    network is) and the deadline is checked per 2-opt row and per stop.
+    """
+    lam = latency_weight
+    clock = time.perf_counter
+    moves = 0
+    improved = True
+    while improved and clock() < deadline:
+        improved = False
+        # 2-opt (segment reversal) within each tour
+        for t in tours:
+            prof = _Profile(t, dist, weights)
+            n = len(t)
+            for i in range(n - 1):
+                if clock() >= deadline:
+                    return moves
+                w_i = 1 + lam * prof.suffix[i]
+                d_prev = dist[t[i - 1] if i else 0]
+                for j in range(i + 1, n):
+                    # Reversed inner edges are re-weighted by W_i + W_{j+1} - W_p
+                    w_after = prof.suffix[j + 1]
+                    delta = (d_prev[t[j]] - prof.edge[i]) * w_i + lam * (
+                        (prof.suffix[i] + w_after) * (prof.sum_d[j + 1] - prof.sum_d[i + 1])
+                        - 2 * (prof.sum_dw[j + 1] - prof.sum_dw[i + 1]))
+                    if j + 1 < n:
+                        delta += (dist[t[i]][t[j + 1]] - prof.edge[j + 1]) * (1 + lam * w_after)
+                    if delta < -1e-9:
+                        t[i:j + 1] = t[i:j + 1][::-1]
+                        prof = _Profile(t, dist, weights)
+                        w_i = 1 + lam * prof.suffix[i]
+                        improved = True
+                        moves += 1
+        # Relocate one stop to another position / tour
+        profiles = {id(b): _Profile(b, dist, weights) for b in tours}
+        for a in tours:
+            i = 0
+            while i < len(a):
+                if clock() >= deadline:
+                    return moves
+                stop = a[i]
+                removal = _removal_delta(a, profiles[id(a)], i, dist, weights, lam)
+                rest = a[:i] + a[i + 1:]
+                rest_prof = _Profile(rest, dist, weights)
+                best = None
+                for b in tours:
+                    target, prof = (rest, rest_prof) if b is a else (b, profiles[id(b)])
+                    for k in range(len(target) + 1):
+                        delta = removal + _insertion_delta(target, prof, k, stop, dist, weights, lam)
+                        if delta < -1e-9 and (best is None or delta < best[0]):
+                            best = (delta, b, k)
+                if best:
+                    _, b, k = best
+                    if b is a:
+                        a[:] = rest[:k] + [stop] + rest[k:]
+                    else:
+                        a[:] = rest
+                        b.insert(k, stop)
+                        profiles[id(b)] = _Profile(b, dist, weights)
+                    profiles[id(a)] = _Profile(a, dist, weights)
+                    improved = True
+                    moves += 1
+                i += 1
+    return moves
+
+
+def cheapest_insertion(tours: list, stop: int, dist, weights: dict, latency_weight: float):
+    """Insert stop where it raises total cost least."""
+    best = None
+    for t in tours:
+        prof = _Profile(t, dist, weights)
+        for k in range(len(t) + 1):
+            delta = _insertion_delta(t, prof, k, stop, dist, weights, latency_weight)
+            if best is None or delta < best[0]:
+                best = (delta, t, k)
+    best[1].insert(best[2], stop)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PLANNER
+# ═══════════════════════════════════════════════════════════════════════════
+class RoutePlanner:
+    """Keeps per-ward tours alive across snapshots; thread-safe."""
+
+    def __init__(self, dustbins: dict, wards: dict, state_weights: dict, ref_capacity: float,
+                 detour_factor: float, issue_penalty: float, latency_weight: float,
+                 budget_ms: float, incremental_budget_ms: float):
+        self.dustbins = dustbins
+        self.wards = wards
+        self.state_weights = state_weights
+        self.ref_capacity = ref_capacity
+        self.latency_weight = latency_weight
+        self.budget_ms = budget_ms
+        self.incremental_budget_ms = incremental_budget_ms
+        self.matrix = DistanceMatrix(dustbins, wards, detour_factor, issue_penalty)
+        self._lock = threading.Lock()
+        self._plans = {}   # ward_id → {"weights", "issues", "tours" (dustbin ids)}
+        self._angles = {}
+        self.stats = {"full_solves": 0, "incremental": 0, "reused": 0, "last_update_ms": 0.0}
+
+    def _stop_weight(self, did: str, state: str) -> float:
+        cap = self.dustbins[did].get("capacity_liters", self.ref_capacity)
+        return round(self.state_weights[state] * cap / self.ref_capacity, 3)
+
+    def _ward_angles(self, ward_id: str, ids: list) -> dict:
+        angles = self._angles.get(ward_id)
+        if angles is None:
+            ward = self.wards[ward_id]
+            angles = {i: float(np.arctan2(self.dustbins[d]["lat"] - ward["lat"],
+                                          self.dustbins[d]["lng"] - ward["lng"]))
+                      for i, d in enumerate(ids) if i > 0}
+            self._angles[ward_id] = angles
+        return angles
+
+    def update(self, dustbin_states: list, road_issues: list) -> list:
+        """Current states → list of van routes (one per van with stops)."""
+        started = time.perf_counter()
+        stops_by_ward, issues_by_ward = {}, {}
+        for ds in dustbin_states:
+            if ds["state"] in self.state_weights and ds["dustbin_id"] in self.dustbins:
+                stops_by_ward.setdefault(ds["ward_id"], {})[ds["dustbin_id"]] = (
+                    self._stop_weight(ds["dustbin_id"], ds["state"]), ds["state"])
+        for ri in road_issues:
+            issues_by_ward.setdefault(ri.get("ward_id"), []).append(
+                (ri["from_dustbin"], ri["to_dustbin"], ri.get("severity", 1)))
+
+        routes = []
+        with self._lock:
+            for wid in self.wards:
+                stops = stops_by_ward.get(wid, {})
+                issues = tuple(sorted(issues_by_ward.get(wid, [])))
+                if not stops:
+                    self._plans.pop(wid, None)
+                    continue
+                tours = self._plan_ward(wid, stops, issues)
+                routes.extend(self._describe(wid, tours, stops))
+            self.stats["last_update_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return routes
+
+    def _plan_ward(self, wid: str, stops: dict, issues: tuple) -> list:
+        ids, pos, dist = self.matrix.weighted(wid, issues)
+        dist = dist.tolist()   # list-of-lists indexing is far faster than numpy scalars
+        weights = {pos[d]: w for d, (w, _) in stops.items()}
+        vans = max(1, self.wards[wid].get("vans", 1))
+        plan = self._plans.get(wid)
+
+        if plan and plan["issues"] == issues and plan["vans"] == vans:
+            old_weights = plan["weights"]
+            if old_weights == weights:
+                self.stats["reused"] += 1
+                return plan["tours"]
+            # Incremental: splice out gone stops, insert new ones, short polish
+            tours = [[pos[d] for d in t if pos[d] in weights] for t in plan["tours"]]
+            while len(tours) < vans:
+                tours.append([])
+            for s in sorted(set(weights) - set(old_weights)):
+                cheapest_insertion(tours, s, dist, weights, self.latency_weight)
+            deadline = time.perf_counter() + self.incremental_budget_ms / 1000
+            self.stats["incremental"] += 1
+        else:
+            angle = self._ward_angles(wid, ids)
+            groups = _sweep_groups(sorted(weights), vans, angle, weights)
+            tours = [_nearest_neighbour(g, dist, weights) for g in groups]
+            while len(tours) < vans:
+                tours.append([])
+            deadline = time.perf_counter() + self.budget_ms / 1000
+            self.stats["full_solves"] += 1
+
+        local_search(tours, dist, weights, self.latency_weight, deadline)
+        id_tours = [[ids[s] for s in t] for t in tours]
+        self._plans[wid] = {"weights": weights, "issues": issues, "vans": vans, "tours": id_tours}
+        return id_tours
+
+    def _describe(self, wid: str, tours: list, stops: dict) -> list:
+        ids, pos, dist = self.matrix.weighted(wid, self._plans[wid]["issues"])
+        ward = self.wards[wid]
+        out = []
+        for n, tour in enumerate(tours):
+            if not tour:
+                continue
+            prev, km, seq = 0, 0.0, []
+            for did in tour:
+                km += float(dist[prev, pos[did]])
+                prev = pos[did]
+                info = self.dustbins[did]
+                seq.append({
+                    "dustbin_id": did,
+                    "state": stops[did][1],
+                    "lat": info["lat"],
+                    "lng": info["lng"],
+                    "arrival_km": round(km, 2),
+                })
+            out.append({
+                "route_id": f"{wid}-V{n + 1}",
+                "ward_id": wid,
+                "van": n + 1,
+                "depot": {"lat": ward["lat"], "lng": ward["lng"]},
+                "stops": seq,
+                "distance_km": round(km, 2),
+                "load_liters": sum(self.dustbins[d].get("capacity_liters", 0) for d in tour),
+            })
+        return out
@@ -0,0 +1,217 @@
+"""
+InfraWatch Nexus — Snapshot Journal
+=====================================
+Keeps the dashboard's past so "what did it look like at 14:05?" has an
+answer.
+
+  - Segments: journal/snap-<epoch_ms>-<version>.jsonl. Each starts with a
+    keyframe (the full snapshot) followed by compact deltas, one line per
+    written snapshot version. The file name is the index: segments sort
+    by start time and carry their first version.
+  - Deltas list only what changed: replaced top-level keys, removed keys,
+    and for id-keyed lists (dustbins, wards, segments, queue, issues,
+    routes, zones) the items upserted / removed by id instead of the whole
+    list. A list with missing or repeated ids is replaced whole.
+  - A new segment (keyframe) starts every JOURNAL_KEYFRAME_EVERY versions
+    or JOURNAL_KEYFRAME_SEC seconds, so a lookup replays a bounded
+    number of deltas.
+  - Segments whose successor is older than the retention are deleted.
+
+state_at() seeks to the last keyframe at or before the instant and
+applies deltas up to it; it only reads files, so API workers can use it
+while the engine writes.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+
+# Lists diffed item-by-item (id field → item); everything else is replaced whole
+KEYED_LISTS = {
+    "dustbin_states": "dustbin_id",
+    "ward_risks": "ward_id",
+    "road_ward_risks": "ward_id",
+    "segment_risks": "segment_id",
+    "priority_queue": "id",
+    "road_issues": "event_id",
+    "van_routes": "route_id",
+    "zone_risks": "zone",
+}
+
+
+def _keyed(items, id_key: str) -> bool:
+    """A list diffable by id: every item a dict carrying a distinct id."""
+    if not isinstance(items, list):
+        return False
+    ids = [item.get(id_key) if isinstance(item, dict) else None for item in items]
+    return None not in ids and len(set(ids)) == len(ids)
+
+
+def diff_snapshot(old: dict, new: dict) -> dict:
+    """Compact delta that turns old into new (see apply_delta)."""
+    delta = {}
+    for key, value in new.items():
+        if key in old and old[key] == value:
+            continue
+        id_key = KEYED_LISTS.get(key)
+        if id_key and _keyed(old.get(key), id_key) and _keyed(value, id_key):
+            before = {item[id_key]: item for item in old[key]}
+            upserts = [item for item in value if before.get(item[id_key]) != item]
+            ids = [item[id_key] for item in value]
+            present = set(ids)
+            removed = [i for i in before if i not in present]
+            entry = {"up": upserts}
+            if removed:
+                entry["rm"] = removed
+            # apply_delta keeps surviving items in place and appends new ones
+            kept = [i for i in before if i in present]
+            if kept + [i for i in ids if i not in before] != ids:
+                entry["order"] = ids
+            delta.setdefault("lists", {})[key] = entry
+        else:
+            delta.setdefault("set", {})[key] = value
+    dropped = [k for k in old if k not in new]
+    if dropped:
+        delta["del"] = dropped
+    return delta
+
+
+def apply_delta(state: dict, delta: dict) -> dict:
+    """Apply a diff_snapshot() delta in place; returns state."""
+    state.update(delta.get("set", {}))
+    for key in delta.get("del", []):
+        state.pop(key, None)
+    for key, entry in delta.get("lists", {}).items():
+        id_key = KEYED_LISTS[key]
+        items = {item[id_key]: item for item in state.get(key, [])}
+        order = [item[id_key] for item in state.get(key, [])]
+        for rid in entry.get("rm", []):
+            items.pop(rid, None)
+        for item in entry.get("up", []):
+            if item[id_key] not in items:
+                order.append(item[id_key])
+            items[item[id_key]] = item
+        order = entry.get("order") or [i for i in order if i in items]
+        state[key] = [items[i] for i in order]
+    return state
+
+
+class SnapshotJournal:
+    """Keyframe + delta log of dashboard snapshots with time/version lookups."""
+
+    def __init__(self, directory: str, keyframe_every: int = 100, keyframe_sec: float = 600,
+                 retention_sec: float = 72 * 3600):
+        self.directory = directory
+        self.keyframe_every = keyframe_every
+        self.keyframe_sec = keyframe_sec
+        self.retention_sec = retention_sec
+        self._lock = threading.Lock()
+        self._last = None             # last journaled snapshot (writer side)
+        self._segment = None          # (path, started_at, records)
+        self.stats = {"keyframes": 0, "deltas": 0, "bytes": 0, "pruned": 0}
+
+    # ── writer ──────────────────────────────────────────────────────────
+    def append(self, snapshot: dict, ts: float = None):
+        """Journal one written snapshot (must carry its version)."""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            seg = self._segment
+            delta = diff_snapshot(self._last, snapshot) if self._last is not None else None
+            if (seg is None or delta is None or seg[2] >= self.keyframe_every
+                    or ts - seg[1] >= self.keyframe_sec):
+                os.makedirs(self.directory, exist_ok=True)
+                path = os.path.join(self.directory, f"snap-{int(ts * 1000)}-{snapshot.get('version', 0)}.jsonl")
+                record = {"k": 1, "v": snapshot.get("version"), "ts": ts, "snap": snapshot}
+                self._segment = seg = (path, ts, 0)
+                self.stats["keyframes"] += 1
+                self._prune(ts)
+            else:
+                record = {"v": snapshot.get("version"), "ts": ts, **delta}
+                self.stats["deltas"] += 1
+            line = json.dumps(record, separators=(",", ":")) + "\n"
+            try:
+                with open(seg[0], "a") as f:
+                    f.write(line)
+            except OSError as e:
+                print(f"[Journal] Write error: {e}")
+                self._segment = None   # next append starts a fresh keyframe
+                return
+            self._segment = (seg[0], seg[1], seg[2] + 1)
+            self.stats["bytes"] += len(line)
+            # Each recompute builds fresh lists/items, so a shallow copy is enough
+            self._last = dict(snapshot)
+
+    def _prune(self, now: float):
+        segments = self.segments()
+        cutoff = now - self.retention_sec
+        # A segment is needed until its successor's keyframe is inside retention
+        for (start, _, path), nxt in zip(segments, segments[1:]):
+            if nxt[0] >= cutoff:
+                break
+            try:
+                os.unlink(path)
+                self.stats["pruned"] += 1
+            except OSError:
+                pass
+
+    # ── reader ──────────────────────────────────────────────────────────
+    def segments(self) -> list:
+        """[(start_ts, first_version, path)] sorted by start time."""
+        out = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return out
+        for name in names:
+            if not (name.startswith("snap-") and name.endswith(".jsonl")):
+                continue
+            try:
+                start_ms, version = name[5:-6].split("-", 1)
+                out.append((int(start_ms) / 1000.0, int(version), os.path.join(self.directory, name)))
+            except ValueError:
+                continue
+        out.sort()
+        return out
+
+    def state_at(self, ts: float = None, version: int = None):
+        """
+        Snapshot as it was at instant ts (last version written at or before
+        it), or exactly at version. None if the journal doesn't reach back.
+        """
+        for _ in range(3):
+            segments = self.segments()
+            if version is not None:
+                i = bisect.bisect_right([s[1] for s in segments], version) - 1
+            else:
+                i = bisect.bisect_right([s[0] for s in segments], ts) - 1
+            if i < 0:
+                return None
+            try:
+                state = self._replay(segments[i][2], ts, version)
+                break
+            except FileNotFoundError:
+                continue   # pruned by the engine after listing; list again
+        else:
+            return None
+        if version is not None and (state is None or state.get("version") != version):
+            return None
+        return state
+
+    @staticmethod
+    def _replay(path: str, ts: float, version: int):
+        """Keyframe + deltas of one segment up to ts / version."""
+        state = None
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break   # torn tail while the engine is appending
+                if (ts is not None and record["ts"] > ts) or (version is not None and record["v"] > version):
+                    break
+                if record.get("k"):
+                    state = record["snap"]
+                elif state is not None:
+                    apply_delta(state, record)
+        return state
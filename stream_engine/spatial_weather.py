@@ -0,0 +1,196 @@
+"""
+InfraWatch Nexus — Spatial Rainfall Layer
+===========================================
+One city-wide current.json reading says nothing about rain in a single
+ward. This layer samples rainfall at a set of stations (the ward
+centroids from config/wards.py) and interpolates it to every ward and
+every dustbin.
+
+  - Stations are polled concurrently over one shared aiohttp session.
+  - Per-station cache: a fresh reading is not re-fetched, a due one is
+    re-fetched conditionally (ETag / Last-Modified → 304), and a failed
+    fetch keeps the last good reading until it goes stale.
+  - Inverse-distance weighting: the distance matrix (targets × stations)
+    is static, so it is built once; each poll is a single masked
+    matrix-vector product for all wards and dustbins together.
+"""
+import asyncio
+import time
+
+import numpy as np
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+from stream_engine.geo import haversine_matrix_km
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# STATIONS
+# ═══════════════════════════════════════════════════════════════════════════
+def station_points(wards: dict, precision: int = 2) -> list:
+    """
+    Ward centroids → sampling stations. Centroids that round to the same
+    coordinate (precision decimals ≈ 1.1 km at 2) share one station.
+    """
+    stations, seen = [], set()
+    for wid, w in wards.items():
+        key = (round(w["lat"], precision), round(w["lng"], precision))
+        if key in seen:
+            continue
+        seen.add(key)
+        stations.append({"id": wid, "lat": w["lat"], "lng": w["lng"]})
+    return stations
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# INTERPOLATION
+# ═══════════════════════════════════════════════════════════════════════════
+class RainfallField:
+    """Static IDW weights from stations to every target group (wards, dustbins, …)."""
+
+    # Targets closer than this to a station take the station reading as-is
+    SNAP_KM = 0.05
+
+    def __init__(self, stations: list, groups: dict, power: float = 2.0):
+        """
+        stations : [{"id", "lat", "lng"}]
+        groups   : {"ward": {id: {"lat", "lng", ...}}, "dustbin": {...}}
+        """
+        self.station_ids = [s["id"] for s in stations]
+        self._groups = []              # (name, ids, row slice)
+        lats, lngs, row = [], [], 0
+        for name, items in groups.items():
+            ids = list(items.keys())
+            lats.extend(items[i]["lat"] for i in ids)
+            lngs.extend(items[i]["lng"] for i in ids)
+            self._groups.append((name, ids, slice(row, row + len(ids))))
+            row += len(ids)
+
+        dist = haversine_matrix_km(lats, lngs,
+                                   [s["lat"] for s in stations], [s["lng"] for s in stations])
+        snapped = dist < self.SNAP_KM
+        with np.errstate(divide="ignore"):
+            inv = 1.0 / np.power(np.maximum(dist, self.SNAP_KM), power)
+        # A snapped row is a one-hot on its station
+        snap_rows = snapped.any(axis=1)
+        inv[snap_rows] = np.where(snapped[snap_rows], 1.0, 0.0)
+        self._inv = inv                # targets × stations, unnormalized
+
+    def interpolate(self, readings: dict) -> dict:
+        """
+        {station_id: mm/hr} (missing stations are skipped) →
+        {group: {target_id: mm/hr}}. Empty dict if no station has a reading.
+        """
+        mask = np.array([sid in readings for sid in self.station_ids])
+        if not mask.any():
+            return {}
+        values = np.array([readings[sid] for sid, ok in zip(self.station_ids, mask) if ok],
+                          dtype=np.float64)
+        w = self._inv[:, mask]
+        totals = w.sum(axis=1)
+        # A snapped target whose own station is missing falls back to uniform weights
+        w = np.where(totals[:, None] > 0, w, 1.0)
+        rain = np.round((w @ values) / w.sum(axis=1), 2)
+        return {name: dict(zip(ids, rain[rows].tolist())) for name, ids, rows in self._groups}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONCURRENT POLLING
+# ═══════════════════════════════════════════════════════════════════════════
+class StationCache:
+    """
+    Last good reading per station: skip fresh ones, keep stale-but-usable
+    ones, and remember HTTP validators for conditional re-fetches.
+    """
+
+    def __init__(self, ttl_sec: float, stale_sec: float):
+        self.ttl_sec = ttl_sec
+        self.stale_sec = stale_sec
+        self._entries = {}      # station_id → (mm, fetched_at)
+        self.validators = {}    # station_id → {"ETag": …, "Last-Modified": …}
+
+    def is_fresh(self, station_id: str, now: float) -> bool:
+        entry = self._entries.get(station_id)
+        return entry is not None and now - entry[1] < self.ttl_sec
+
+    def put(self, station_id: str, mm: float, now: float):
+        self._entries[station_id] = (mm, now)
+
+    def touch(self, station_id: str, now: float) -> bool:
+        """304 Not Modified: the cached reading is current again."""
+        entry = self._entries.get(station_id)
+        if entry is None:
+            return False
+        self._entries[station_id] = (entry[0], now)
+        return True
+
+    def readings(self, now: float) -> dict:
+        """Every reading younger than stale_sec."""
+        return {sid: mm for sid, (mm, ts) in self._entries.items() if now - ts < self.stale_sec}
+
+
+async def fetch_station(session, url: str, api_key: str, station: dict, timeout: float,
+                        validators: dict = None):
+    """
+    One current.json call for a station → (precip mm/hr or None on 304,
+    response validators). A station may carry "q" (city name) instead of
+    a coordinate.
+    """
+    q = station.get("q") or f"{station['lat']},{station['lng']}"
+    headers = {}
+    if validators:
+        if validators.get("ETag"):
+            headers["If-None-Match"] = validators["ETag"]
+        if validators.get("Last-Modified"):
+            headers["If-Modified-Since"] = validators["Last-Modified"]
+    async with session.get(url, params={"key": api_key, "q": q, "aqi": "no"}, headers=headers,
+                           timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+        if resp.status == 304:
+            return None, validators
+        resp.raise_for_status()
+        data = await resp.json(content_type=None)
+        new_validators = {k: resp.headers[k] for k in ("ETag", "Last-Modified") if k in resp.headers}
+    return float(data.get("current", {}).get("precip_mm", 0.0) or 0.0), new_validators
+
+
+async def poll_stations(session, url: str, api_key: str, stations: list, cache: StationCache,
+                        timeout: float = 10.0, concurrency: int = 8) -> tuple:
+    """
+    Refresh every non-fresh station concurrently (bounded), then return
+    all usable readings. Returns (readings, errors, refreshed) where
+    refreshed counts stations that answered (200 or 304) this round.
+    """
+    now = time.time()
+    due = [s for s in stations if not cache.is_fresh(s["id"], now)]
+    sem = asyncio.Semaphore(concurrency)
+    errors = []
+    refreshed = 0
+
+    async def one(station):
+        nonlocal refreshed
+        sid = station["id"]
+        async with sem:
+            try:
+                mm, validators = await fetch_station(session, url, api_key, station, timeout,
+                                                     cache.validators.get(sid))
+            except Exception as e:
+                errors.append(f"{sid}: {e}")
+                return
+        if mm is None:
+            if not cache.touch(sid, time.time()):
+                # 304 without a cached body — drop validators, refetch next round
+                cache.validators.pop(sid, None)
+                errors.append(f"{sid}: 304 without cached reading")
+                return
+        else:
+            cache.put(sid, mm, time.time())
+            if validators:
+                cache.validators[sid] = validators
+        refreshed += 1
+
+    await asyncio.gather(*(one(s) for s in due))
+    return cache.readings(time.time()), errors, refreshed
@@ -0,0 +1,180 @@
+"""
+InfraWatch Nexus — Risk History Store
+=======================================
+Embedded time-series store for per-ward and city metrics.
+
+  - Columnar ring buffers: per tier, one (series × slots) memory-mapped
+    array each for sum / min / max, plus per-slot sample count and
+    bucket number. Size is fixed by the tier's retention, so memory and
+    disk per series are bounded no matter how long the engine runs.
+  - Tiers (1m / 15m / 1h by default) are all written on every sample —
+    downsampling is just a coarser bucket, nothing to compact later.
+  - A slot is addressed directly as bucket % slots and remembers which
+    bucket it holds, so a range query is one vectorized gather with a
+    validity mask (no scan, no per-point Python work).
+
+The engine opens the store read-write; API workers open the same files
+read-only and see new samples through the shared page cache.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+STATS = ("sum", "min", "max")
+
+
+def tier_slots(resolution_sec: int, retention_sec: int) -> int:
+    return max(1, -(-retention_sec // resolution_sec))
+
+
+class _Tier:
+    def __init__(self, directory: str, name: str, resolution_sec: int, slots: int,
+                 n_series: int, mode: str):
+        self.name = name
+        self.resolution = resolution_sec
+        self.slots = slots
+        path = lambda suffix: os.path.join(directory, f"{name}.{suffix}")
+        self.stats = {s: np.memmap(path(f"{s}.f32"), dtype=np.float32, mode=mode,
+                                   shape=(n_series, slots)) for s in STATS}
+        self.count = np.memmap(path("count.i32"), dtype=np.int32, mode=mode, shape=(slots,))
+        self.bucket = np.memmap(path("bucket.i64"), dtype=np.int64, mode=mode, shape=(slots,))
+        if mode == "w+":
+            self.bucket[:] = -1
+
+    def record(self, ts: float, values: np.ndarray):
+        b = int(ts // self.resolution)
+        slot = b % self.slots
+        if self.bucket[slot] != b:
+            # Slot is reused: invalidate first so readers never mix buckets
+            self.bucket[slot] = -1
+            self.stats["sum"][:, slot] = values
+            self.stats["min"][:, slot] = values
+            self.stats["max"][:, slot] = values
+            self.count[slot] = 1
+            self.bucket[slot] = b
+            return
+        self.stats["sum"][:, slot] += values
+        np.minimum(self.stats["min"][:, slot], values, out=self.stats["min"][:, slot])
+        np.maximum(self.stats["max"][:, slot], values, out=self.stats["max"][:, slot])
+        self.count[slot] += 1
+
+    def buckets_in(self, start: float, end: float) -> np.ndarray:
+        first = int(start // self.resolution)
+        last = int(end // self.resolution)
+        # Older than retention can't be in the ring
+        first = max(first, last - self.slots + 1)
+        return np.arange(first, last + 1, dtype=np.int64)
+
+    def flush(self):
+        for arr in self.stats.values():
+            arr.flush()
+        self.count.flush()
+        self.bucket.flush()
+
+
+class TimeSeriesStore:
+    """Fixed-size multi-tier history for a fixed list of series names."""
+
+    def __init__(self, directory: str, series: list, tiers: dict, readonly: bool = False):
+        """tiers: {name: (resolution_sec, retention_sec)}, finest first."""
+        self.directory = directory
+        self.series = list(series)
+        self.index = {name: i for i, name in enumerate(self.series)}
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        meta = {
+            "series": self.series,
+            "tiers": {n: [res, tier_slots(res, ret)] for n, (res, ret) in tiers.items()},
+        }
+        meta_path = os.path.join(directory, "meta.json")
+        if readonly:
+            mode = "r"
+        else:
+            os.makedirs(directory, exist_ok=True)
+            mode = "r+" if self._read_meta(meta_path) == meta else "w+"
+        self.tiers = [
+            _Tier(directory, n, res, slots, len(self.series), mode)
+            for n, (res, slots) in meta["tiers"].items()
+        ]
+        if mode == "w+":
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+
+    @staticmethod
+    def _read_meta(path: str):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def open_readonly(cls, directory: str):
+        """Open an engine-written store by its meta.json (None if absent)."""
+        meta = cls._read_meta(os.path.join(directory, "meta.json"))
+        if not meta:
+            return None
+        tiers = {n: (res, res * slots) for n, (res, slots) in meta["tiers"].items()}
+        return cls(directory, meta["series"], tiers, readonly=True)
+
+    # ── writes ──────────────────────────────────────────────────────────
+    def record(self, ts: float, values: dict):
+        """One sample for every series (missing series are recorded as 0)."""
+        row = np.zeros(len(self.series), dtype=np.float32)
+        for name, v in values.items():
+            i = self.index.get(name)
+            if i is not None:
+                row[i] = v
+        with self._lock:
+            for tier in self.tiers:
+                tier.record(ts, row)
+
+    def flush(self):
+        for tier in self.tiers:
+            tier.flush()
+
+    # ── reads ───────────────────────────────────────────────────────────
+    def tier(self, name: str = None, start: float = None, end: float = None, max_points: int = 2000):
+        """Named tier, or the finest one covering [start, end] in ≤ max_points buckets."""
+        if name:
+            return next((t for t in self.tiers if t.name == name), None)
+        for t in self.tiers:
+            span = (end - start) / t.resolution
+            if span <= max_points and end - start <= t.resolution * t.slots:
+                return t
+        return self.tiers[-1]
+
+    def query(self, series: list, start: float, end: float, tier: str = None,
+              max_points: int = 2000) -> dict:
+        """
+        Buckets in [start, end] that hold data → {"resolution", "t", "series":
+        {name: {"mean", "min", "max"}}}. t is each bucket's start (epoch s).
+        """
+        t = self.tier(tier, start, end, max_points)
+        if t is None:
+            raise KeyError(f"Unknown tier: {tier}")
+        rows = [self.index[name] for name in series]
+        buckets = t.buckets_in(start, end)
+        slots = buckets % t.slots
+        valid = np.asarray(t.bucket[slots]) == buckets
+        slots, buckets = slots[valid], buckets[valid]
+        count = np.maximum(1, np.asarray(t.count[slots]))
+        grid = np.ix_(rows, slots)
+        sums = np.asarray(t.stats["sum"][grid])
+        mins = np.asarray(t.stats["min"][grid])
+        maxs = np.asarray(t.stats["max"][grid])
+        means = np.round(sums / count, 2)
+        return {
+            "resolution": t.name,
+            "resolution_sec": t.resolution,
+            "t": (buckets * t.resolution).tolist(),
+            "series": {
+                name: {
+                    "mean": means[i].tolist(),
+                    "min": np.round(mins[i], 2).tolist(),
+                    "max": np.round(maxs[i], 2).tolist(),
+                } for i, name in enumerate(series)
+            },
+        }
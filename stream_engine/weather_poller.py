@@ -0,0 +1,161 @@
+"""
+InfraWatch Nexus — Async Weather Poller
+=========================================
+Replaces the blocking requests.get thread loop.
+
+  - One pooled aiohttp session for the life of the poller.
+  - Conditional requests per station (see spatial_weather.StationCache).
+  - Jittered exponential backoff after a failed round.
+  - Circuit breaker: after WEATHER_BREAKER_FAILURES consecutive failed
+    rounds the upstream is left alone for a cool-down (doubling up to a
+    cap), then a single half-open round probes it.
+  - Publish on change only: a weather event is emitted when the rainfall
+    values actually move, so an unchanged reading no longer rewrites the
+    watched weather file and triggers a full Pathway recompute.
+  - Outages age out: once no station has a usable reading (all failed
+    past their stale window, or the breaker is open with nothing left),
+    one "unavailable" event is published with the interpolation of no
+    readings (0 mm/hr), so an old rainfall value can't keep driving risk
+    scores for the length of an outage.
+"""
+import asyncio
+import random
+import time
+
+from stream_engine.spatial_weather import AIOHTTP_AVAILABLE, poll_stations
+
+if AIOHTTP_AVAILABLE:
+    import aiohttp
+
+
+def backoff_delay(attempt: int, base: float, cap: float, rng=random) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base·2^attempt))."""
+    return rng.uniform(0, min(cap, base * (2 ** max(0, attempt))))
+
+
+class CircuitBreaker:
+    """closed → open after N failures → half_open after cool-down → closed on success."""
+
+    def __init__(self, failure_threshold: int, reset_sec: float, max_reset_sec: float):
+        self.failure_threshold = failure_threshold
+        self.base_reset_sec = reset_sec
+        self.max_reset_sec = max_reset_sec
+        self.reset_sec = reset_sec
+        self.state = "closed"
+        self.failures = 0
+        self.opened_until = 0.0
+
+    def allow(self, now: float) -> bool:
+        if self.state == "open":
+            if now < self.opened_until:
+                return False
+            self.state = "half_open"
+        return True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.reset_sec = self.base_reset_sec
+
+    def record_failure(self, now: float):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_until = now + self.reset_sec
+            self.reset_sec = min(self.max_reset_sec, self.reset_sec * 2)
+
+
+class WeatherPoller:
+    """
+    Polls stations on one session and calls publish(event) only when the
+    interpolated rainfall changes. interpolate(readings) → event fields.
+    """
+
+    def __init__(self, url: str, api_key: str, stations: list, cache, interpolate, publish,
+                 poll_sec: float, breaker: CircuitBreaker, retry_base_sec: float,
+                 timeout: float = 10.0, concurrency: int = 8, source: str = "weatherapi.com"):
+        self.url = url
+        self.api_key = api_key
+        self.stations = stations
+        self.cache = cache
+        self.interpolate = interpolate
+        self.publish = publish
+        self.poll_sec = poll_sec
+        self.breaker = breaker
+        self.retry_base_sec = retry_base_sec
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.source = source
+        self._last_values = None
+        self.status = {"rounds": 0, "published": 0, "unchanged": 0, "skipped_open": 0,
+                       "last_poll": None, "last_error": None, "stations_ok": 0, "available": False}
+
+    async def poll_once(self, session) -> float:
+        """One round. Returns seconds to sleep before the next."""
+        now = time.time()
+        if not self.breaker.allow(now):
+            self.status["skipped_open"] += 1
+            if not self.cache.readings(now):
+                self._publish_unavailable("circuit open")
+            return max(1.0, self.breaker.opened_until - now)
+
+        readings, errors, refreshed = await poll_stations(
+            session, self.url, self.api_key, self.stations, self.cache,
+            timeout=self.timeout, concurrency=self.concurrency,
+        )
+        self.status["rounds"] += 1
+        self.status["last_poll"] = time.time()
+        self.status["stations_ok"] = len(readings)
+        self.status["last_error"] = errors[0] if errors else None
+        for err in errors[:3]:
+            print(f"[Weather] Station error {err}")
+
+        round_failed = bool(errors) and refreshed == 0
+        if round_failed:
+            self.breaker.record_failure(time.time())
+        else:
+            self.breaker.record_success()
+
+        if readings:
+            self._maybe_publish(readings)
+        else:
+            self._publish_unavailable(str(errors[0]) if errors else "no station reading")
+
+        if self.breaker.state == "open":
+            print(f"[Weather] Circuit open — upstream left alone for {self.breaker.opened_until - time.time():.0f}s")
+            return max(1.0, self.breaker.opened_until - time.time())
+        if round_failed or errors:
+            return backoff_delay(self.breaker.failures, self.retry_base_sec, self.poll_sec)
+        # Small jitter so many engines don't poll in lock-step
+        return self.poll_sec * random.uniform(0.95, 1.05)
+
+    def _maybe_publish(self, readings: dict):
+        fields = self.interpolate(readings)
+        values = {k: v for k, v in fields.items() if k != "stations_ok"}
+        if values == self._last_values:
+            self.status["unchanged"] += 1
+            return
+        self._last_values = values
+        self.status["published"] += 1
+        self.status["available"] = True
+        self.publish({**fields, "weather_source": self.source})
+
+    def _publish_unavailable(self, reason: str):
+        """No usable reading: replace the last value once (not every round)."""
+        if self._last_values == "unavailable":
+            return
+        self._last_values = "unavailable"
+        self.status["published"] += 1
+        self.status["available"] = False
+        print(f"[Weather] No usable station reading ({reason}) — publishing weather as unavailable")
+        self.publish({**self.interpolate({}), "weather_source": "unavailable"})
+
+    async def run(self):
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.concurrency)) as session:
+            while True:
+                try:
+                    delay = await self.poll_once(session)
+                except Exception as e:
+                    print(f"[Weather] Poller error: {e}")
+                    delay = self.retry_base_sec
+                await asyncio.sleep(delay)
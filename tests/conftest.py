@@ -0,0 +1,31 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pytest
+
+# Engine globals swapped by use_workspace / use_registry / use_event_store / set_clock
+ENGINE_GLOBALS = (
+    "WASTE_DIR", "ROAD_DIR", "VAN_DIR", "WEATHER_DIR", "OUTPUT_DIR",
+    "WARDS", "DUSTBINS", "ROAD_SEGMENTS", "WARD_IDS", "DUSTBIN_IDS", "DUSTBIN_TO_WARD", "ROAD_NETWORK",
+    "ROLLUP", "STATE_MACHINE", "HISTORY", "JOURNAL", "ROUTE_PLANNER",
+    "EVENT_STORE", "ARCHIVE", "_clock", "_latest_weather", "_snapshot_version",
+)
+ENGINE_DICTS = ("_snapshot_last", "_store_feed")   # mutated in place
+
+
+@pytest.fixture
+def engine_state():
+    """Put the engine's workspace, registries, state and clock back after the test."""
+    import pathway_engine as engine
+    saved = {name: getattr(engine, name) for name in ENGINE_GLOBALS}
+    saved_dicts = {name: dict(getattr(engine, name)) for name in ENGINE_DICTS}
+    try:
+        yield engine
+    finally:
+        for name, value in saved.items():
+            setattr(engine, name, value)
+        for name, value in saved_dicts.items():
+            getattr(engine, name).clear()
+            getattr(engine, name).update(value)
@@ -29,3 +29,62 @@ def test_unauthorized_admin_access():
     })
     # Should be 401 Unauthorized without Bearer token
     assert response.status_code == 401
+
+def test_nearest_dustbins():
+    """Nearest lookup returns the closest registry bins first, with distances."""
+    from config.dustbins import DUSTBINS
+    did, info = next(iter(DUSTBINS.items()))
+    response = client.get(f"/api/dustbins/nearest?lat={info['lat']}&lng={info['lng']}&k=3")
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["dustbin_id"] == did and results[0]["distance_m"] == 0
+    assert [r["distance_m"] for r in results] == sorted(r["distance_m"] for r in results)
+    assert client.get("/api/dustbins/nearest?lat=28.6&lng=77.2&k=0").status_code == 400
+
+def test_non_finite_times_are_rejected():
+    """nan / inf parse as floats but are not instants: 400, not a 500 deep in the rollup."""
+    for query in ("/api/history?start=nan", "/api/history?end=inf", "/api/dashboard?at=-inf"):
+        assert client.get(query).status_code == 400, query
+
+def test_metrics_endpoint_prometheus_text():
+    """/metrics counts requests by route template and exposes live gauges."""
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "# TYPE infrawatch_api_request_seconds histogram" in body
+    assert 'route="/health",status="2xx"' in body
+    assert "infrawatch_api_ws_clients 0" in body
+
+def test_metrics_endpoint_merges_other_workers(monkeypatch, tmp_path):
+    """With several workers, /metrics includes sibling exports under one header per family."""
+    import api.server as server
+    from stream_engine.metrics import MetricsRegistry
+    monkeypatch.setattr(server, "API_WORKERS", 2)
+    monkeypatch.setattr(server, "_metrics_worker_dir", str(tmp_path))
+    sibling = MetricsRegistry(const_labels={"worker": "999999"})
+    sibling.histogram("api_request_seconds", "HTTP handler time (until response start)",
+                      ["method", "route", "status"]).labels("GET", "/health", "2xx").observe(0.01)
+    sibling.write(str(tmp_path / "999999.prom"))
+    stale = tmp_path / "999998.prom"
+    stale.write_text('# HELP infrawatch_x X\n# TYPE infrawatch_x gauge\ninfrawatch_x{worker="999998"} 1\n')
+    os.utime(stale, (0, 0))
+
+    body = client.get("/metrics").text
+    assert body.count("# TYPE infrawatch_api_request_seconds histogram") == 1
+    assert 'infrawatch_api_request_seconds_count{worker="999999",method="GET",route="/health",status="2xx"} 1' in body
+    assert "999998" not in body
+
+def test_forecast_without_key_skips_upstream(monkeypatch):
+    """No WX_API_KEY: an empty "no key" forecast, and the cache never calls upstream."""
+    import api.server as server
+    monkeypatch.setattr(server, "WX_KEY", "")
+    calls = server._forecast_cache.upstream_calls
+    for query in ("/api/forecast", "/api/forecast?format=matrix&resolution=hourly"):
+        response = client.get(query)
+        assert response.status_code == 200
+        assert "WX_API_KEY" in response.json()["error"]
+    assert response.json()["matrix"]["steps"] == []
+    assert client.get("/api/forecast").json()["forecast"] == []
+    assert server._forecast_cache.upstream_calls == calls
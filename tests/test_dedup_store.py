@@ -0,0 +1,54 @@
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ingestion.dedup_store import MemoryDedupStore, SQLiteDedupStore
+
+
+def test_memory_store_expires_and_is_bounded():
+    """Entries expire after the window and the store never exceeds max_entries."""
+    store = MemoryDedupStore(window_sec=300, max_entries=3)
+    assert store.check_and_merge("MCD-W01-001", 2, now=1000) is False
+    assert store.check_and_merge("MCD-W01-001", 4, now=1100) is True
+    # Window slides from the merge, so 1100 + 300 is the new expiry
+    assert store.check_and_merge("MCD-W01-001", 1, now=1390) is True
+    assert store.check_and_merge("MCD-W01-001", 1, now=1700) is False
+
+    for i in range(10):
+        store.check_and_merge(f"MCD-W02-{i:03d}", 1, now=2000 + i)
+    assert len(store._entries) == 3
+    assert "MCD-W02-009" in store._entries
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    """Two stores on the same file (two workers) see each other's reports."""
+    path = str(tmp_path / "dedup.sqlite3")
+    worker_a = SQLiteDedupStore(path, window_sec=300, max_entries=100)
+    worker_b = SQLiteDedupStore(path, window_sec=300, max_entries=100)
+
+    assert worker_a.check_and_merge("MCD-W03-001", 2) is False
+    assert worker_b.check_and_merge("MCD-W03-001", 5) is True
+    assert worker_a.pop("MCD-W03-001")[1] == 5
+    assert worker_b.check_and_merge("MCD-W03-001", 1) is False
+
+
+def test_sqlite_store_never_exceeds_max_entries(tmp_path):
+    """The cap is enforced on every insert, not by a periodic sweep."""
+    path = str(tmp_path / "dedup.sqlite3")
+    store = SQLiteDedupStore(path, window_sec=300, max_entries=3)
+    now = time.time()
+    for i in range(10):
+        store.check_and_merge(f"MCD-W04-{i:03d}", 1, now=now + i)
+        assert len(store) <= 3
+    store.seed("MCD-W04-100", now + 20, 2)
+    ids = [r[0] for r in store._conn().execute("SELECT dustbin_id FROM dedup ORDER BY last_ts")]
+    assert ids == ["MCD-W04-008", "MCD-W04-009", "MCD-W04-100"]
+
+    # A second worker opening the same file keeps the shared count in step
+    other = SQLiteDedupStore(path, window_sec=300, max_entries=3)
+    other.pop("MCD-W04-008")
+    store.check_and_merge("MCD-W04-200", 1, now=now + 30)
+    assert store._conn().execute("SELECT n FROM dedup_count").fetchone()[0] == 3
+    assert len(store) == 3
@@ -0,0 +1,156 @@
+import json
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pytest
+from ingestion.event_store import event_epoch
+from stream_engine.event_archive import PYARROW_AVAILABLE, ArchiveQueryError, EventArchive, collection_waits
+
+pytestmark = pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+
+DAY0 = datetime(2026, 9, 1)
+
+
+def _events():
+    waste, vans = [], []
+    for d in range(3):
+        for i in range(4 + d):
+            ward = "W01" if i % 2 else "W02"
+            waste.append({"event_id": f"WR-{d}-{i}", "dustbin_id": f"MCD-{ward}-001", "ward_id": ward,
+                          "overflow_level": 1 + i % 5, "source": "citizen",
+                          "timestamp": (DAY0 + timedelta(days=d, hours=8, minutes=i)).isoformat()})
+        vans.append({"event_id": f"VC-{d}", "dustbin_id": "MCD-W01-001", "ward_id": "W01",
+                     "event_type": "collection_confirmed",
+                     "timestamp": (DAY0 + timedelta(days=d, hours=10, minutes=1)).isoformat()})
+    return {"waste": waste, "vans": vans}
+
+
+def _fetch(events, calls=None):
+    def fetch(stream, start, end):
+        if calls is not None:
+            calls.append((stream, start, end))
+        return [e for e in events.get(stream, []) if start <= event_epoch(e["timestamp"]) < end]
+    return fetch
+
+
+def _earliest(events):
+    return lambda stream: min((event_epoch(e["timestamp"]) for e in events.get(stream, [])), default=None)
+
+
+def test_collection_wait_measures_from_first_report_since_last_collection():
+    events = _events()
+    waits = collection_waits(events["vans"], events["waste"], 48 * 3600)
+    # First W01 report each day is at 08:01, collection at 10:01
+    assert waits == {"VC-0": 7200.0, "VC-1": 7200.0, "VC-2": 7200.0}
+
+
+def test_archive_whole_expired_days_once_and_query(tmp_path):
+    events = _events()
+    archive = EventArchive(str(tmp_path / "archive"))
+    now = (DAY0 + timedelta(days=2, hours=12)).replace(tzinfo=timezone.utc).timestamp()
+    written = archive.archive_expired(_fetch(events), _earliest(events), now, {"waste": 2, "vans": 24},
+                                      {"W01": "North", "W02": "South"})
+    assert written == {"waste": 9, "vans": 1}                  # day 2 still live; vans only day 0
+    assert archive.archive_expired(_fetch(events), _earliest(events), now, {"waste": 2, "vans": 24}) == {}
+    assert len(list((tmp_path / "archive" / "waste").iterdir())) == 2
+
+    per_day = archive.query("waste", "2026-09-01", "2026-10-01", ["ward_id", "day"], ["count", "max:overflow_level"])
+    assert per_day["rows"][:2] == [
+        {"ward_id": "W01", "day": "2026-09-01", "count": 2, "max_overflow_level": 4},
+        {"ward_id": "W01", "day": "2026-09-02", "count": 2, "max_overflow_level": 4},
+    ]
+    assert per_day["matched_rows"] == 9 and per_day["files"] == 2
+
+    one_day = archive.query("waste", "2026-09-02", "2026-09-03", ["zone"], ["count"], {"ward_id": ["W02"]})
+    assert one_day["rows"] == [{"zone": "South", "count": 3}] and one_day["files"] == 1
+
+    monthly = archive.query("vans", "2026-09-01", "2026-10-01", ["month"], ["count", "mean:wait_sec"])
+    assert monthly["rows"] == [{"month": "2026-09", "count": 1, "mean_wait_sec": 7200.0}]
+
+    for bad in (("road_x", "2026-09-01", "2026-10-01"), ("waste", "2026-10-01", "2026-09-01"), ("waste", "Sept", "Oct")):
+        with pytest.raises(ArchiveQueryError):
+            archive.query(*bad)
+    with pytest.raises(ArchiveQueryError):
+        archive.query("waste", "2026-09-01", "2026-10-01", ["severity"])
+
+
+def test_backlog_is_fetched_one_day_at_a_time(tmp_path):
+    """A long backlog never asks for more than a day (plus the collection lookback for vans)."""
+    events = _events()
+    archive = EventArchive(str(tmp_path / "archive"))
+    now = (DAY0 + timedelta(days=30)).replace(tzinfo=timezone.utc).timestamp()
+    calls = []
+    written = archive.archive_expired(_fetch(events, calls), _earliest(events), now,
+                                      {"waste": 2, "vans": 24}, lookback_sec=6 * 3600)
+    assert written == {"waste": 15, "vans": 3}
+    assert all(end - start <= 86400 + 6 * 3600 for _, start, end in calls)
+    assert archive.watermarks()["waste"] == archive.state["waste"] >= event_epoch(events["waste"][-1]["timestamp"])
+    monthly = archive.query("vans", "2026-09-01", "2026-10-01", ["month"], ["count", "mean:wait_sec"])
+    assert monthly["rows"] == [{"month": "2026-09", "count": 3, "mean_wait_sec": 7200.0}]
+
+
+def test_rearchiving_a_day_replaces_it(tmp_path):
+    """Lost watermark (crash before save, corrupt _state.json): the day is rewritten, not added twice."""
+    events = _events()
+    root = tmp_path / "archive"
+    now = (DAY0 + timedelta(days=2, hours=12)).replace(tzinfo=timezone.utc).timestamp()
+    EventArchive(str(root)).archive_expired(_fetch(events), _earliest(events), now, {"waste": 2})
+    (root / "_state.json").write_text("{not json")
+    archive = EventArchive(str(root))
+    assert archive.archive_expired(_fetch(events), _earliest(events), now, {"waste": 2}) == {"waste": 9}
+    assert sorted(p.name for p in (root / "waste" / "date=2026-09-01").iterdir()) == ["part-0.parquet"]
+    assert archive.query("waste", "2026-09-01", "2026-10-01", [], ["count"])["rows"] == [{"count": 9}]
+
+
+def test_non_numeric_aggregates_rejected_and_timestamps_serialized(tmp_path):
+    events = _events()
+    archive = EventArchive(str(tmp_path / "archive"))
+    now = (DAY0 + timedelta(days=2, hours=12)).replace(tzinfo=timezone.utc).timestamp()
+    archive.archive_expired(_fetch(events), _earliest(events), now, {"waste": 2})
+    for metric in ("mean:ward_id", "sum:source", "sum:ts", "mean:ts"):
+        with pytest.raises(ArchiveQueryError):
+            archive.query("waste", "2026-09-01", "2026-10-01", ["ward_id"], [metric])
+
+    first_last = archive.query("waste", "2026-09-01", "2026-09-02", ["ward_id"], ["min:ts", "max:ts"])
+    assert first_last["rows"] == [
+        {"ward_id": "W01", "min_ts": "2026-09-01T08:01:00.000Z", "max_ts": "2026-09-01T08:03:00.000Z"},
+        {"ward_id": "W02", "min_ts": "2026-09-01T08:00:00.000Z", "max_ts": "2026-09-01T08:02:00.000Z"},
+    ]
+    by_ts = archive.query("waste", "2026-09-01", "2026-09-02", ["ts"], ["count"])
+    assert by_ts["rows"][0] == {"ts": "2026-09-01T08:00:00.000Z", "count": 1}
+    json.dumps(by_ts)
+
+
+def test_engine_indexes_named_event_files_without_parsing(tmp_path, engine_state):
+    engine = engine_state
+    assert engine._file_name_days("waste_20260901_081500_123456_0a1b2c3d.json") == {
+        int(datetime(2026, 9, 1, tzinfo=timezone.utc).timestamp())}
+    assert len(engine._file_name_days("road_20260901_235930_000001_deadbeef.json")) == 2   # near midnight
+    assert engine._file_name_days("sim_waste_3_1756713600000.json") is None
+
+    engine.use_workspace(str(tmp_path))
+    waste = tmp_path / "reports" / "waste"
+    for i, e in enumerate(_events()["waste"][:4]):
+        stamp = datetime.fromisoformat(e["timestamp"]).strftime("%Y%m%d_%H%M%S_000000")
+        (waste / f"waste_{stamp}_{i:08x}.json").write_text(json.dumps([e]))
+    (waste / "waste_20260901_120000_000000_ffffffff.json").write_text("not parsed: the name says 2026-09-01")
+    (waste / "sim_waste_0.json").write_text(json.dumps([dict(_events()["waste"][0], event_id="SIM-1")]))
+    engine.set_clock(lambda: (DAY0 + timedelta(days=3)).replace(tzinfo=timezone.utc).timestamp())
+    engine.ARCHIVE = EventArchive(str(tmp_path / "archive"))
+    assert engine._archive_expired()["waste"] == 5
+
+
+def test_analytics_endpoint_requires_admin():
+    from fastapi.testclient import TestClient
+    from api.server import app, ADMIN_TOKEN
+    client = TestClient(app)
+    assert client.get("/api/admin/analytics").status_code == 401
+    auth = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
+    assert client.get("/api/admin/analytics?stream=nope", headers=auth).status_code == 400
+    assert client.get("/api/admin/analytics?metrics=mean:ward_id", headers=auth).status_code == 400
+    response = client.get("/api/admin/analytics?start=2000-01-01&end=2000-01-08&ward=W01", headers=auth)
+    assert response.status_code == 200
+    assert response.json()["filters"] == {"ward_id": ["W01"]} and response.json()["matched_rows"] == 0
@@ -0,0 +1,116 @@
+import sys
+import os
+import json
+from datetime import datetime, timedelta
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ingestion.event_store import EventStore, event_epoch
+
+
+def _plan(store, sql, *args):
+    return " ".join(row[-1] for row in store._conn().execute("EXPLAIN QUERY PLAN " + sql, args))
+
+
+def test_group_commit_since_and_index_ranges(tmp_path):
+    store = EventStore(str(tmp_path / "events.sqlite3"), batch_size=50, batch_ms=50)
+    base = datetime(2026, 10, 19, 12, 0)
+    futures = [store.append("waste", {"dustbin_id": f"B{i % 3}", "ward_id": "W01", "overflow_level": 2,
+                                      "timestamp": (base + timedelta(minutes=i)).isoformat(), "ingested_at": i})
+               for i in range(120)]
+    rowids = [f.result(timeout=5) for f in futures]
+    assert rowids == sorted(rowids) and len(set(rowids)) == 120
+    assert store.batches < 120                     # grouped into few transactions
+    store.add_many("road", [{"event_id": "R1", "from_dustbin": "B1", "ward_id": "W02",
+                             "timestamp": base.isoformat()}])
+
+    assert [r[1] for r in store.since(rowids[-1])] == ["road"]
+    assert len(store.since(0, limit=10)) == 10
+    assert store.latest_ts("waste") == event_epoch((base + timedelta(minutes=119)).isoformat())
+    recent = store.window("waste", event_epoch((base + timedelta(minutes=100)).isoformat()))
+    assert [e["ingested_at"] for e in recent] == list(range(100, 120))
+    assert len(store.for_dustbin("B1", stream="waste")) == 40
+    assert [e["event_id"] for e in store.for_ward("W02")] == ["R1"]
+
+    assert "idx_events_stream_ts" in _plan(store, "SELECT payload FROM events WHERE stream = ? AND epoch_ts >= ?", "waste", 0)
+    assert "idx_events_dustbin_ts" in _plan(store, "SELECT payload FROM events WHERE dustbin_id = ? AND epoch_ts >= ?", "B1", 0)
+    assert "idx_events_ward_ts" in _plan(store, "SELECT payload FROM events WHERE ward_id = ? AND epoch_ts >= ?", "W01", 0)
+
+
+def test_file_backfill_runs_once_even_after_api_writes(tmp_path):
+    reports = tmp_path / "reports"
+    for stream in ("waste", "vans"):
+        (reports / stream).mkdir(parents=True)
+    for i in range(3):
+        (reports / "waste" / f"waste_{i}.json").write_text(json.dumps(
+            [{"event_id": f"WR-{i}", "dustbin_id": "B1", "timestamp": "2026-10-19T10:00:00"}]))
+    store = EventStore(str(tmp_path / "events.sqlite3"))
+    store.append("waste", {"event_id": "WR-api", "dustbin_id": "B1", "timestamp": "2026-10-19T11:00:00"}).result(5)
+
+    dirs = {s: str(reports / s) for s in ("waste", "vans")}
+    assert store.import_once(dirs) == 3              # not skipped because the table wasn't empty
+    assert store.import_once(dirs) is None
+    assert EventStore(str(tmp_path / "events.sqlite3")).import_once(dirs) is None
+    assert store.count("waste") == 4
+
+
+def test_backfill_skips_events_a_pre_marker_import_stored(tmp_path):
+    (tmp_path / "waste").mkdir()
+    (tmp_path / "waste" / "w.json").write_text(json.dumps(
+        [{"event_id": "WR-1", "timestamp": "2026-10-19T10:00:00"}, {"event_id": "WR-2", "timestamp": "2026-10-19T10:01:00"}]))
+    store = EventStore(str(tmp_path / "events.sqlite3"))
+    store.add_many("waste", [{"event_id": "WR-1", "timestamp": "2026-10-19T10:00:00"}])   # earlier import
+    assert store.import_once({"waste": str(tmp_path / "waste")}) == 1
+    assert sorted(e["event_id"] for e in store.window("waste", 0)) == ["WR-1", "WR-2"]
+
+
+def test_importing_engine_opens_no_state_or_store():
+    """Import is side-effect free: state and the SQLite store are built by main() / use_workspace()."""
+    import subprocess
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    code = ("import pathway_engine as e; "
+            "assert e.EVENT_STORE is None and e.HISTORY is None and e.JOURNAL is None and e.STATE_MACHINE is None")
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True,
+                            env={**os.environ, "EVENT_STORE": "sqlite"}, timeout=120)
+    assert result.returncode == 0, result.stderr
+
+
+def test_engine_store_backend_matches_file_backend(tmp_path, engine_state):
+    engine = engine_state
+    now = datetime(2026, 10, 19, 12, 0)
+    bins = engine.DUSTBIN_IDS
+    events = {
+        "waste": [{"event_id": f"WR-{i}", "dustbin_id": bins[i % 4], "ward_id": engine.DUSTBIN_TO_WARD[bins[i % 4]],
+                   "overflow_level": 1 + i % 5, "timestamp": (now - timedelta(minutes=10 * i)).isoformat(),
+                   "ingested_at": 1000.0 + i} for i in range(20)],       # half fall outside the 2 h window
+        "road": [{"event_id": "RI-1", "from_dustbin": bins[0], "to_dustbin": bins[1], "ward_id": "W01",
+                  "issue_type": "pothole", "severity": 4, "timestamp": (now - timedelta(hours=1)).isoformat()},
+                 {"event_id": "RI-2", "from_dustbin": bins[1], "to_dustbin": bins[2], "ward_id": "W01",
+                  "issue_type": "crack", "severity": 2, "timestamp": (now - timedelta(hours=2)).isoformat()},
+                 {"event_id": "RI-2", "event_type": "road_cleared", "timestamp": now.isoformat()}],
+        "vans": [{"event_id": f"VC-{i}", "dustbin_id": bins[i % 2], "event_type": "collection_confirmed",
+                  "timestamp": (now - timedelta(minutes=5 + 30 * i)).isoformat(), "ingested_at": 2000.0 + i}
+                 for i in range(4)],
+    }
+    engine.set_clock(lambda: now.timestamp())
+    engine.use_workspace(str(tmp_path / "files"))
+    for stream, evs in events.items():
+        for i, e in enumerate(evs):
+            with open(tmp_path / "files" / "reports" / stream / f"{stream}_{i:03d}.json", "w") as f:
+                json.dump([e], f)
+    from_files = engine.compute_dashboard_snapshot()
+
+    engine.use_workspace(str(tmp_path / "db"))
+    store = EventStore(str(tmp_path / "db" / "output" / "events.sqlite3"))
+    engine.use_event_store(store)
+    for stream, evs in events.items():
+        store.add_many(stream, evs)
+    from_store = engine.compute_dashboard_snapshot()
+    for key in ("dustbin_states", "ward_risks", "road_issues", "newest_ingest", "city_waste_index"):
+        assert from_store[key] == from_files[key], key
+    assert {r["event_id"] for r in from_store["road_issues"]} == {"RI-1"}
+
+    # Incremental: only rows after the last pulled rowid are read
+    store.add_many("waste", [dict(events["waste"][0], event_id="WR-new", ingested_at=3000.0)])
+    assert engine.compute_dashboard_snapshot()["newest_ingest"]["waste"] == 3000.0
+    assert engine._store_feed["rowid"] == store.last_rowid()
@@ -0,0 +1,53 @@
+import sys
+import os
+import json
+import asyncio
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from api.fanout import SnapshotFanout
+from api.snapshot_bus import LocalSnapshotBus
+
+
+def _snapshot(version):
+    return {
+        "version": version,
+        "ward_risks": [{"ward_id": "W01"}, {"ward_id": "W02"}],
+        "priority_queue": [{"id": "MCD-W02-001", "ward_id": "W02"}],
+        "city_waste_index": 10,
+    }
+
+
+def test_listeners_wake_once_per_version_with_shared_frames():
+    """Every parked listener wakes on publish and receives the same frame object."""
+    async def scenario():
+        bus = LocalSnapshotBus({})
+        fanout = SnapshotFanout(bus)
+
+        async def listener():
+            assert await fanout.wait_for_change(fanout.version, timeout=2) is True
+            return fanout.sse_frame("W02")
+
+        tasks = [asyncio.create_task(listener()) for _ in range(100)]
+        await asyncio.sleep(0)
+        bus.publish(5, json.dumps(_snapshot(5)).encode())
+        assert fanout.tick() is True
+        assert fanout.tick() is False
+        frames = await asyncio.gather(*tasks)
+        assert all(f is frames[0] for f in frames)
+        return frames[0]
+
+    frame = asyncio.run(scenario())
+    assert frame.startswith(b"id: 5\nevent: snapshot\ndata: ")
+    data = json.loads(frame.split(b"data: ", 1)[1])
+    assert [w["ward_id"] for w in data["ward_risks"]] == ["W02"]
+    assert data["city_waste_index"] == 10
+
+
+def test_heartbeat_timeout_when_nothing_published():
+    """No new version within the timeout → caller sends a heartbeat."""
+    async def scenario():
+        fanout = SnapshotFanout(LocalSnapshotBus({}))
+        return await fanout.wait_for_change(fanout.version, timeout=0.01)
+
+    assert asyncio.run(scenario()) is False
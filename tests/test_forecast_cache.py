@@ -0,0 +1,71 @@
+import sys
+import os
+import json
+import asyncio
+import threading
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from api.forecast_cache import ForecastCache, fetch_forecast_days
+from config.settings import FORECAST_NORM, FORECAST_LEVELS
+from config.wards import WARDS
+from stream_engine.forecast_model import LinearRiskModel
+
+FORECAST = {"forecast": {"forecastday": [
+    {"date": "2026-07-01", "day": {"totalprecip_mm": 60, "maxwind_kph": 20, "condition": {"text": "Heavy rain"}}},
+    {"date": "2026-07-02", "day": {"totalprecip_mm": 0, "maxwind_kph": 10, "condition": {"text": "Sunny"}}},
+]}}
+
+
+class _StandInWeather(BaseHTTPRequestHandler):
+    """Local stand-in for WeatherAPI's forecast.json."""
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        body = json.dumps(FORECAST).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Cache-Control", "public, max-age=900")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_one_upstream_call_and_matrix_per_snapshot_version():
+    """Concurrent requests share one fetch; the matrix is rebuilt only on a new version."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInWeather)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v1/forecast.json"
+    counts_calls = []
+
+    def counts():
+        counts_calls.append(1)
+        return {"W01": 10}
+
+    async def scenario():
+        cache = ForecastCache(partial(fetch_forecast_days, url, "k", "Delhi", 3, 5),
+                              LinearRiskModel(FORECAST_NORM), FORECAST_LEVELS,
+                              ttl_sec=60, stale_sec=60, retry_sec=5)
+        results = await asyncio.gather(*[cache.get_forecast(1, counts, WARDS) for _ in range(20)])
+        await cache.get_forecast(1, counts, WARDS)
+        await cache.get_forecast(2, counts, WARDS)
+        return cache, results[0]
+
+    try:
+        cache, forecast = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+
+    assert _StandInWeather.hits == 1
+    assert cache.current_ttl == 900          # upstream cadence honoured
+    assert len(counts_calls) == 2            # versions 1 and 2 only
+    day1 = forecast["forecast"][0]
+    assert day1["wards"][0]["ward_id"] == "W01"
+    assert day1["wards"][0]["risk_level"] == "CRITICAL"
+    assert len(day1["wards"]) == len(WARDS)
@@ -0,0 +1,76 @@
+import sys
+import os
+import json
+
+import numpy as np
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config.settings import FORECAST_NORM, FORECAST_LEVELS
+from stream_engine.forecast_model import (
+    extract_features, load_model, build_risk_tensor, risk_levels, LinearRiskModel,
+)
+
+DAYS = [
+    {"date": "2026-07-01", "day": {"totalprecip_mm": 30, "maxwind_kph": 40, "condition": {"text": "Rain"}},
+     "hour": [{"time": f"2026-07-01 {h:02d}:00", "precip_mm": h % 5, "wind_kph": 10,
+               "condition": {"text": "Rain"}} for h in range(24)]},
+    {"date": "2026-07-02", "day": {"totalprecip_mm": 0, "maxwind_kph": 10, "condition": {"text": "Sunny"}}},
+]
+
+
+def _old_formula(reports, precip, wind):
+    """The pre-vectorization per-ward loop, kept as the reference."""
+    severity = round(min(1.0, precip / 50) * 0.7 + min(1.0, wind / 80) * 0.3, 2)
+    return round(min(1.0, min(1.0, reports / 10) + severity * 0.6), 2)
+
+
+def test_linear_model_matches_original_formula():
+    counts = {"W01": 3, "W02": 12}
+    wards = ["W01", "W02", "W03"]
+    tensor = build_risk_tensor(LinearRiskModel(FORECAST_NORM), extract_features(DAYS), wards, counts)
+    assert tensor["risk"].shape == (3, 2)
+    for w, wid in enumerate(wards):
+        for t, day in enumerate(DAYS):
+            expected = _old_formula(counts.get(wid, 0), day["day"]["totalprecip_mm"], day["day"]["maxwind_kph"])
+            assert abs(tensor["risk"][w, t] - expected) < 1e-9
+    labels = risk_levels(tensor["risk"], FORECAST_LEVELS)
+    assert labels[1, 0] == "CRITICAL"
+
+
+def test_hourly_resolution_and_fitted_model(tmp_path):
+    features = extract_features(DAYS, "hourly")
+    assert len(features["labels"]) == 24     # day 2 has no hourly block
+
+    coef = tmp_path / "coef.json"
+    coef.write_text(json.dumps({"intercept": -3.0, "reports": 4.0, "rain": 2.0, "wind": 0.5}))
+    model = load_model("fitted", FORECAST_NORM, str(coef))
+    assert model.name == "fitted"
+    tensor = build_risk_tensor(model, features, ["W01", "W02"], {"W01": 10}, "hourly")
+    risk = tensor["risk"]
+    assert risk.shape == (2, 24)
+    assert (risk[0] > risk[1]).all()          # more reports → higher risk
+    assert risk[1, 4] > risk[1, 0]            # more rain → higher risk
+
+    # Missing coefficient file falls back to the linear formula
+    assert load_model("fitted", FORECAST_NORM, str(tmp_path / "none.json")).name == "linear"
+
+
+def test_shipped_coefficients_and_validation(tmp_path):
+    """config/forecast_coef.json loads; malformed files fall back with a clear reason."""
+    from config.settings import FORECAST_COEF_FILE
+    from stream_engine.forecast_model import FittedRiskModel
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    model = load_model("fitted", FORECAST_NORM, os.path.join(root, FORECAST_COEF_FILE))
+    assert model.name == "fitted"
+    # Same 0.5 crossing as the linear formula: reports_n + 0.42·rain_n + 0.18·wind_n = 0.5
+    assert abs(model.predict(np.array([0.5]), np.array([0.0]), np.array([0.0]))[0, 0] - 0.5) < 1e-9
+
+    for bad, reason in (([1, 2, 3], "JSON object"), ({"intercept": 1}, "missing"),
+                        ({"intercept": 0, "reports": "x", "rain": 0, "wind": 0}, "'reports'")):
+        with pytest.raises(ValueError, match=reason):
+            FittedRiskModel(FORECAST_NORM, bad)
+        coef = tmp_path / "coef.json"
+        coef.write_text(json.dumps(bad))
+        assert load_model("fitted", FORECAST_NORM, str(coef)).name == "linear"
@@ -0,0 +1,61 @@
+import sys
+import os
+import json
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pathway_engine as engine
+from api.freshness import FreshnessTracker
+from stream_engine.metrics import MetricsRegistry
+
+
+def _tracker():
+    registry = MetricsRegistry()
+    hist = registry.histogram("freshness_seconds", "F", ["stream", "stage"], buckets=(1, 5, 10))
+    breaches = registry.counter("breaches", "B", ["stream"])
+    return registry, FreshnessTracker(hist, breaches, sla_sec=5)
+
+
+def test_stages_measured_from_ingest_after_baseline():
+    registry, tracker = _tracker()
+    old = {"newest_ingest": {"waste": 100.0, "road": None}, "computed_at": 101.0}
+    tracker.on_load(old, 101_500, now=102.0)          # startup: baseline only
+    assert tracker.last == {}
+
+    new = {"newest_ingest": {"waste": 1000.0, "road": 990.0}, "computed_at": 1001.0}
+    tracker.on_load(new, 1_001_200, now=1003.0)
+    assert tracker.last["waste"] == {"ingested_at": 1000.0, "compute": 1.0, "write": 1.2, "cache_load": 3.0}
+    assert tracker.last["road"]["cache_load"] == 13.0
+
+    client = tracker.on_send(None, old, now=1004.0)   # first message to a client: baseline
+    client = tracker.on_send(client, old, now=1005.0) # keepalive re-send: nothing new
+    client = tracker.on_send(client, new, now=1004.0)
+    assert client == {"waste": 1000.0, "road": 990.0}  # per-stream entries only
+    assert tracker.last["waste"]["ws_send"] == 4.0
+    text = registry.render()
+    assert 'infrawatch_freshness_seconds_count{stream="waste",stage="ws_send"} 1' in text
+    assert 'infrawatch_breaches_total{stream="road"} 1' in text    # 14 s > 5 s SLA
+    assert 'stream="waste"' not in text.split("infrawatch_breaches")[1]
+
+
+def test_client_primed_by_first_send_even_without_streams():
+    """An empty first snapshot still counts as the baseline for that client."""
+    registry, tracker = _tracker()
+    client = tracker.on_send(None, {}, now=1000.0)
+    assert client == {}
+    client = tracker.on_send(client, {"newest_ingest": {"waste": 998.0}}, now=1000.0)
+    assert client == {"waste": 998.0}
+    assert tracker.last["waste"]["ws_send"] == 2.0
+
+
+def test_engine_carries_newest_ingest_per_stream(tmp_path, engine_state):
+    engine.use_workspace(str(tmp_path))
+    waste = tmp_path / "reports" / "waste"
+    waste.mkdir(parents=True, exist_ok=True)
+    for i, ingested in enumerate((1700000000.5, 1700000042.25)):
+        with open(waste / f"waste_{i}.json", "w") as f:
+            json.dump([{"dustbin_id": "MCD-W01-001", "overflow_level": 3,
+                        "timestamp": "2026-01-01T10:00:00", "ingested_at": ingested}], f)
+    snapshot = engine.compute_dashboard_snapshot()
+    assert snapshot["newest_ingest"] == {"waste": 1700000042.25, "road": None, "vans": None}
+    assert "computed_at" in engine.SNAPSHOT_VOLATILE_KEYS and "newest_ingest" not in engine.SNAPSHOT_VOLATILE_KEYS
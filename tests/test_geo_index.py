@@ -0,0 +1,34 @@
+import sys
+import os
+import random
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from stream_engine.geo import GridIndex, haversine_km
+
+
+def test_grid_nearest_matches_brute_force():
+    rng = random.Random(7)
+    points = [(i, 28.4 + rng.random() * 0.5, 76.85 + rng.random() * 0.5) for i in range(5000)]
+    index = GridIndex(points)
+    queries = [(28.4 + rng.random() * 0.5, 76.85 + rng.random() * 0.5) for _ in range(30)]
+    queries += [(27.9, 76.0), (29.3, 78.1)]          # outside the indexed area
+    for lat, lng in queries:
+        brute = sorted((haversine_km(lat, lng, p[1], p[2]), p[0]) for p in points)[:5]
+        got = [(d, pid) for d, pid, _, _ in index.nearest(lat, lng, k=5)]
+        assert [pid for _, pid in got] == [pid for _, pid in brute]
+        assert all(abs(a[0] - b[0]) < 1e-9 for a, b in zip(got, brute))
+
+
+def test_grid_nearest_radius_and_empty():
+    index = GridIndex([("a", 28.60, 77.20), ("b", 28.61, 77.20), ("c", 28.70, 77.20)])
+    assert [pid for _, pid, _, _ in index.nearest(28.60, 77.20, k=5, max_km=2.0)] == ["a", "b"]
+    assert GridIndex([]).nearest(28.6, 77.2) == []
+
+
+def test_grid_nearest_query_poleward_of_indexed_points():
+    """Longitude degrees shrink toward the query's latitude too, not only the points'."""
+    index = GridIndex([("a", 1, 6), ("b", 2, 45), ("c", 3, 54)], cell_deg=5)
+    brute = min(index.points, key=lambda p: haversine_km(89.0, -57.0, p[1], p[2]))
+    assert brute[0] == "c"
+    assert index.nearest(89.0, -57.0, k=1)[0][1] == "c"
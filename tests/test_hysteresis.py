@@ -0,0 +1,66 @@
+import sys
+import os
+import json
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config.settings import STATE_BANDS, HYSTERESIS_BUFFER
+from stream_engine.hysteresis import StateMachine
+from api.transition_feed import TransitionFeed
+
+
+def _machine(tmp_path, dwell=300):
+    return StateMachine(STATE_BANDS, HYSTERESIS_BUFFER, dwell,
+                        str(tmp_path / "state.json"), str(tmp_path / "transitions.jsonl"))
+
+
+def test_boundary_score_does_not_flap(tmp_path):
+    """55 ↔ 56 stays in one band; only a move past the buffer changes it."""
+    sm = _machine(tmp_path)
+    states = [sm.score_state("ward_waste", "W01", s, now=i) for i, s in enumerate([55, 56, 55, 56, 60])]
+    assert states == ["Elevated"] * 5
+    assert sm.score_state("ward_waste", "W01", 61, now=6) == "Warning"
+    assert sm.score_state("ward_waste", "W01", 52, now=7) == "Warning"
+    assert sm.score_state("ward_waste", "W01", 50, now=8) == "Elevated"
+    # A large jump crosses several bands at once
+    assert sm.score_state("ward_waste", "W01", 95, now=9) == "Critical"
+    events = sm.commit()
+    assert [(e["from"], e["to"]) for e in events] == [
+        ("Elevated", "Warning"), ("Warning", "Elevated"), ("Elevated", "Critical")]
+    assert [e["seq"] for e in events] == [1, 2, 3]
+
+
+def test_dustbin_escalates_at_once_and_deescalates_after_dwell(tmp_path):
+    sm = _machine(tmp_path, dwell=300)
+    assert sm.dustbin_state("MCD-W01-001", "Reported", now=0) == "Reported"
+    assert sm.dustbin_state("MCD-W01-001", "Critical", now=10) == "Critical"
+    assert sm.dustbin_state("MCD-W01-001", "Escalated", now=20) == "Critical"
+    assert sm.dustbin_state("MCD-W01-001", "Escalated", now=200) == "Critical"
+    assert sm.dustbin_state("MCD-W01-001", "Escalated", now=320) == "Escalated"
+    # A van collection is never delayed
+    assert sm.dustbin_state("MCD-W01-001", "Cleared", now=321) == "Cleared"
+    assert [e["to"] for e in sm.commit()] == ["Critical", "Escalated", "Cleared"]
+
+
+def test_state_persists_and_feed_tails_transitions(tmp_path):
+    sm = _machine(tmp_path)
+    sm.score_state("segment", "SEG-01", 40, now=0, ward_id="W01")
+    sm.score_state("segment", "SEG-01", 90, now=1, ward_id="W01")
+    sm.commit()
+
+    restarted = _machine(tmp_path)
+    assert restarted.seq == 1
+    assert restarted.score_state("segment", "SEG-01", 72, now=2, ward_id="W01") == "Critical"
+
+    feed = TransitionFeed(str(tmp_path / "transitions.jsonl"))
+    assert feed.tick() is True
+    assert feed.tick() is False
+    restarted.score_state("ward_road", "W02", 10, now=3, ward_id="W02")
+    restarted.score_state("ward_road", "W02", 80, now=4, ward_id="W02")
+    restarted.commit()
+    assert feed.tick() is True
+    assert [e["seq"] for e in feed.since(0)] == [1, 2]
+    assert [e["id"] for e in feed.since(1)] == ["W02"]
+    assert feed.since(0, kinds=["segment"])[0]["to"] == "Critical"
+    assert feed.since(0, ward_id="W03") == []
+    assert json.loads(TransitionFeed.sse_frame(feed.since(1)[0]).split(b"data: ", 1)[1])["seq"] == 2
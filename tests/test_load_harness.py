@@ -0,0 +1,78 @@
+import sys
+import os
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from api.forecast_cache import fetch_forecast_days
+from api.loop_monitor import LoopLagMonitor
+from benchmarks import load_test
+from benchmarks.load_test import parse_mix
+from benchmarks.mock_upstreams import FAIL_STATUSES, build_app
+from config.dustbins import DUSTBINS
+
+
+def test_loop_monitor_sees_blocking_call():
+    async def scenario():
+        monitor = LoopLagMonitor(interval=0.02, window=100)
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.1)
+        time.sleep(0.2)              # a sync call inside a handler
+        await asyncio.sleep(0.1)
+        task.cancel()
+        return monitor.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["samples"] >= 5
+    assert stats["max"] >= 150 and stats["p50"] < 50
+
+
+def test_mock_upstreams_speak_the_real_schemas():
+    async def scenario():
+        results = {}
+        for name, config in (("hit", {"gemini_fail": 0, "gemini_hit": 1}), ("fail", {"gemini_fail": 1})):
+            runner = web.AppRunner(build_app({**config, "gemini_latency_ms": 1, "weather_latency_ms": 1, "seed": 3}))
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            base = f"http://127.0.0.1:{runner.addresses[0][1]}"
+            async with aiohttp.ClientSession() as session:
+                async with session.post(f"{base}/v1beta/models/gemini-2.5-flash:generateContent?key=x",
+                                        json={"contents": []}) as resp:
+                    results[name] = (resp.status, await resp.json())
+            if name == "hit":
+                results["forecast"] = await asyncio.to_thread(
+                    fetch_forecast_days, f"{base}/v1/forecast.json", "x", "Delhi", 2, 5)
+            await runner.cleanup()
+        return results
+
+    results = asyncio.run(scenario())
+    status, body = results["hit"]
+    assert status == 200 and body["candidates"][0]["content"]["parts"][0]["text"] in DUSTBINS
+    assert results["fail"][0] in FAIL_STATUSES
+    days, max_age = results["forecast"]
+    assert len(days) == 2 and len(days[0]["hour"]) == 24 and max_age == 300
+
+
+def test_only_the_runs_own_event_files_are_removed(tmp_path, monkeypatch):
+    dirs = {s: tmp_path / s for s in ("waste", "road", "vans")}
+    for d in dirs.values():
+        d.mkdir()
+    monkeypatch.setattr(load_test, "EVENT_DIRS", {s: str(d) for s, d in dirs.items()})
+    ours, theirs = dirs["waste"] / "waste_ours.json", dirs["waste"] / "waste_other_client.json"
+    ours.write_text("[]")
+    theirs.write_text("[]")
+    written = {("waste", "waste_ours.json"), ("road", "events.sqlite3#12"), ("vans", None)}
+    assert load_test._remove_written(written) == 1
+    assert not ours.exists() and theirs.exists()
+
+
+def test_parse_mix_rejects_unknown_scenarios():
+    assert parse_mix("confirm=3,dashboard") == {"confirm": 3.0, "dashboard": 1.0}
+    with pytest.raises(SystemExit, match="nope"):
+        parse_mix("confirm=1,nope=2")
@@ -0,0 +1,64 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from stream_engine.metrics import MetricsRegistry, merge_expositions
+
+
+def test_render_counters_gauges_histograms(tmp_path):
+    registry = MetricsRegistry()
+    events = registry.counter("events", "Events seen", ["stream"])
+    events.labels("waste").inc()
+    events.labels("waste").inc(2)
+    clients = registry.gauge("clients", "Connected clients")
+    clients.set_function(lambda: 7)
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+
+    text = registry.render()
+    assert "# TYPE infrawatch_events counter" in text
+    assert 'infrawatch_events_total{stream="waste"} 3' in text
+    assert "infrawatch_clients 7" in text
+    # Buckets are cumulative and le is inclusive
+    assert 'infrawatch_latency_seconds_bucket{le="0.1"} 2' in text
+    assert 'infrawatch_latency_seconds_bucket{le="1"} 3' in text
+    assert 'infrawatch_latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "infrawatch_latency_seconds_count 4" in text
+
+    assert registry.counter("events", "Events seen", ["stream"]) is events
+    path = tmp_path / "engine.prom"
+    assert registry.write(str(path)) and path.read_text() == text
+
+
+def test_disabled_registry_is_a_no_op():
+    registry = MetricsRegistry(enabled=False)
+    hist = registry.histogram("x_seconds", "X", ["stage"])
+    hist.labels("read").observe(1.0)
+    with hist.time():
+        pass
+    registry.gauge("g", "G").set_function(lambda: 1)
+    assert registry.render() == ""
+    assert not registry.write("/nonexistent/dir/x.prom")
+
+
+def test_worker_exports_merge_into_one_exposition():
+    texts = []
+    for pid, requests in (("101", 2), ("102", 5)):
+        registry = MetricsRegistry(const_labels={"worker": pid})
+        registry.counter("requests", "Requests", ["route"]).labels("/api/x").inc(requests)
+        registry.histogram("latency_seconds", "Latency", buckets=(1.0,)).observe(0.5)
+        texts.append(registry.render())
+    assert 'infrawatch_requests_total{worker="101",route="/api/x"} 2' in texts[0]
+
+    merged = merge_expositions(texts)
+    assert merged.count("# TYPE infrawatch_requests counter") == 1
+    assert merged.count("# HELP infrawatch_latency_seconds Latency") == 1
+    assert 'infrawatch_requests_total{worker="101",route="/api/x"} 2' in merged
+    assert 'infrawatch_requests_total{worker="102",route="/api/x"} 5' in merged
+    assert 'infrawatch_latency_seconds_count{worker="102"} 1' in merged
+    # Every family's samples follow its own header
+    lines = merged.splitlines()
+    assert lines.index('infrawatch_requests_total{worker="102",route="/api/x"} 5') > lines.index(
+        "# TYPE infrawatch_requests counter") > lines.index('infrawatch_latency_seconds_count{worker="102"} 1')
@@ -0,0 +1,66 @@
+import sys
+import os
+import gzip
+import json
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from stream_engine.processing_log import ProcessingLog, RotatingLog
+from stream_engine.metrics import MetricsRegistry
+
+
+class _Clock:
+    def __init__(self, now=1_800_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_rotates_by_size_and_keeps_bounded_archives(tmp_path):
+    clock = _Clock()
+    log = RotatingLog(str(tmp_path / "pw_waste_log.jsonl"), max_bytes=200, max_age_sec=3600, keep=2, clock=clock)
+    for i in range(40):
+        clock.now += 1
+        log.write({"i": i, "pad": "x" * 20})
+    log.close()
+    archives = log.archives()
+    assert len(archives) == 2 and log.rotations > 2
+    assert os.path.getsize(tmp_path / "pw_waste_log.jsonl") <= 200
+    with gzip.open(archives[-1], "rt") as f:
+        lines = [json.loads(line) for line in f]
+    with open(tmp_path / "pw_waste_log.jsonl") as f:
+        active = [json.loads(line) for line in f]
+    assert lines[-1]["i"] + 1 == active[0]["i"] and active[-1]["i"] == 39
+
+
+def test_age_rotation_without_writes(tmp_path):
+    clock = _Clock()
+    log = RotatingLog(str(tmp_path / "pw_road_log.jsonl"), max_age_sec=60, clock=clock)
+    log.write({"a": 1})
+    assert not log.maybe_rotate()
+    clock.now += 61
+    assert log.maybe_rotate() and len(log.archives()) == 1
+    assert not os.path.exists(tmp_path / "pw_road_log.jsonl")
+
+
+def test_summary_mode_counts_per_minute(tmp_path):
+    clock = _Clock(1_800_000_000.0)     # minute-aligned
+    registry = MetricsRegistry()
+    counter = registry.counter("processed", "P", ["stream", "result"])
+    log = RotatingLog(str(tmp_path / "pw_van_log.jsonl"), clock=clock)
+    plog = ProcessingLog("van", log, verbose=False, counter=counter, clock=clock)
+    ok, err = {"result": json.dumps({"status": "ok"})}, {"result": json.dumps({"status": "error"})}
+    for row in (ok, ok, err):
+        plog.on_change(None, row, 0, True)
+    plog.on_change(None, ok, 0, False)           # retraction: not counted
+    plog.flush()
+    assert not os.path.exists(tmp_path / "pw_van_log.jsonl") or not open(tmp_path / "pw_van_log.jsonl").read()
+    clock.now += 60
+    plog.on_change(None, ok, 0, True)            # next minute closes the first
+    plog.close()
+    with open(tmp_path / "pw_van_log.jsonl") as f:
+        lines = [json.loads(line) for line in f]
+    assert [(l["events"], l["ok"], l["errors"]) for l in lines] == [(3, 2, 1), (1, 1, 0)]
+    assert lines[0]["stream"] == "van" and lines[0]["start"] == 1_800_000_000
+    assert 'infrawatch_processed_total{stream="van",result="ok"} 3' in registry.render()
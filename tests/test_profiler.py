@@ -0,0 +1,99 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from stream_engine.profiler import SamplingProfiler
+from api.loop_monitor import LoopLagMonitor, LoopWatchdog
+
+
+def _spin_for_profile(stop: threading.Event):
+    while not stop.is_set():
+        sum(i * i for i in range(500))
+
+
+def test_profiler_collapses_busy_thread_stack():
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin_for_profile, args=(stop,), name="busy worker", daemon=True)
+    worker.start()
+    profiler = SamplingProfiler(max_sec=5)
+    try:
+        info = profiler.start(0.3, 0.005)
+        assert info["status"] == "running"
+        with pytest.raises(RuntimeError):       # a second concurrent run is refused
+            profiler.start(1)
+        deadline = time.time() + 0.4
+        while time.time() < deadline:               # reads race the sampler's inserts
+            profiler.status()
+            profiler.collapsed()
+    finally:
+        stop.set()
+        profiler.stop()
+    result = profiler.result()
+    assert result["status"] == "finished" and result["samples"] > 10
+    busy = [line for line in result["collapsed"].splitlines() if line.startswith("busy_worker;")]
+    assert busy and any("_spin_for_profile (tests/test_profiler.py:" in line for line in busy)
+    stack, count = busy[0].rsplit(" ", 1)
+    assert int(count) > 0 and "sampling_profiler" not in result["threads"]
+
+
+def test_engine_profile_status_answers_rejected_and_superseded_requests(tmp_path, monkeypatch):
+    """A start the engine refused reads "rejected", and stays answered once the other run ends."""
+    import json
+    import api.server as server
+    monkeypatch.setattr(server, "PW_OUTPUT_DIR", str(tmp_path))
+
+    def write(name, data):
+        with open(tmp_path / name, "w") as f:
+            json.dump(data, f)
+
+    write(server.PROFILE_CONTROL_FILE, {"id": "p2", "action": "start", "requested_at": time.time()})
+    write(server.PROFILE_ENGINE_FILE, {"id": "p1", "status": "running", "last_request": "p1"})
+    assert server._engine_profile()["status"] == "pending"
+    write(server.PROFILE_ENGINE_FILE, {"id": "p2", "status": "rejected", "error": "busy", "last_request": "p2"})
+    assert server._engine_profile()["status"] == "rejected"
+    write(server.PROFILE_ENGINE_FILE, {"id": "p1", "status": "finished", "last_request": "p2"})
+    assert server._engine_profile() == {"id": "p1", "status": "finished", "last_request": "p2"}
+
+
+def test_watchdog_reports_blocking_handler():
+    async def main():
+        monitor = LoopLagMonitor(interval=0.01, window=100)
+        episodes = []
+        watchdog = LoopWatchdog(monitor, threshold_ms=50, on_block=episodes.append)
+        watchdog.start()
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.05)
+        time.sleep(0.25)                          # blocks the loop
+        await asyncio.sleep(0.1)
+        task.cancel()
+        return watchdog, episodes
+
+    watchdog, episodes = asyncio.run(main())
+    assert watchdog.blocked == 1 and len(episodes) == 1
+    assert 150 <= episodes[0]["blocked_ms"] <= 400
+    assert "test_profiler.py" in episodes[0]["handler"] and "in main" in episodes[0]["handler"]
+
+
+def test_profile_endpoints_require_admin_and_run_against_api():
+    from fastapi.testclient import TestClient
+    from api.server import app, ADMIN_TOKEN
+    client = TestClient(app)
+    assert client.post("/api/admin/profile", json={"duration_sec": 1}).status_code == 401
+    assert client.get("/api/admin/slow-callbacks").status_code == 401
+
+    auth = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
+    assert client.post("/api/admin/profile", json={"target": "gpu"}, headers=auth).status_code == 400
+    assert client.post("/api/admin/profile", json={"duration_sec": 999}, headers=auth).status_code == 400
+    response = client.post("/api/admin/profile", json={"duration_sec": 5, "interval_ms": 5}, headers=auth)
+    assert response.status_code == 202 and response.json()["target"] == "api"
+    time.sleep(0.1)
+    assert client.post("/api/admin/profile/stop", headers=auth).json()["status"] == "stopped"
+    collapsed = client.get("/api/admin/profile?format=collapsed", headers=auth)
+    assert collapsed.headers["content-type"].startswith("text/plain") and collapsed.text.strip()
+    assert client.get("/api/admin/slow-callbacks", headers=auth).json()["threshold_ms"] > 0
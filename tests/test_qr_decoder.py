@@ -0,0 +1,33 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config.dustbins import validate_dustbin_id
+from ingestion import qr_decoder
+
+
+def test_decode_validates_against_registry(monkeypatch):
+    """Only registry IDs are accepted from decoded payloads; hits are counted locally."""
+    monkeypatch.setattr(qr_decoder, "available_decoder", lambda: "stub")
+    monkeypatch.setattr(qr_decoder, "_decode_payloads",
+                        lambda b: ["MCD-W99-999", "https://mcd.example/bin/MCD-W04-002"])
+    qr_decoder.reset_stats()
+
+    assert qr_decoder.decode_dustbin_id(b"img", validate_dustbin_id) == "MCD-W04-002"
+    stats = qr_decoder.get_stats()
+    assert stats["local"]["attempts"] == 1
+    assert stats["local"]["hits"] == 1
+    assert stats["remote_calls_avoided"] == 1
+
+
+def test_decode_miss_falls_through(monkeypatch):
+    """Unreadable images return None so the caller falls back to the remote model."""
+    monkeypatch.setattr(qr_decoder, "available_decoder", lambda: "stub")
+    def boom(_):
+        raise OSError("not an image")
+    monkeypatch.setattr(qr_decoder, "_decode_payloads", boom)
+    qr_decoder.reset_stats()
+
+    assert qr_decoder.decode_dustbin_id(b"garbage", validate_dustbin_id) is None
+    assert qr_decoder.get_stats()["local"]["hit_rate"] == 0.0
@@ -0,0 +1,43 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config.wards import ROAD_SEGMENTS
+from stream_engine.road_network import RoadNetwork
+
+SEGMENTS = {
+    "S1": {"name": "Long road", "ward_id": "W01", "type": "Arterial", "lat": 28.60, "lng": 77.20, "length_km": 4.0},
+    "S2": {"name": "Short lane", "ward_id": "W01", "type": "Residential", "lat": 28.61, "lng": 77.21, "length_km": 0.4},
+    "S3": {"name": "Far road", "ward_id": "W02", "type": "Highway", "lat": 28.80, "lng": 77.40, "length_km": 2.0},
+}
+
+
+def test_snap_respects_segment_reach_and_memoizes():
+    net = RoadNetwork(SEGMENTS, tolerance_km=0.2)
+    # Near the short lane: both segments reach it, nearest first
+    assert net.snap_issue("a", "b", (28.6101, 77.2101), (28.6099, 77.2099)) == ["S2", "S1"]
+    # 1.5 km from S1's midpoint: within its 2 km reach, outside S2's
+    hits = net.snap_issue("c", "d", (28.5865, 77.2000), (28.5865, 77.2001))
+    assert hits == ["S1"]
+    # Nothing nearby
+    assert net.snap_issue("e", "f", (28.30, 76.90), (28.30, 76.91)) == []
+    assert net.snap_issue("c", "d", (0, 0), (0, 0)) == ["S1"]   # memoized per bin pair
+
+
+def test_long_segment_found_behind_nearer_short_ones():
+    """Short segments with nearer midpoints don't crowd out a long segment that reaches the point."""
+    segments = dict(SEGMENTS)
+    for i, dlng in enumerate((-0.003, 0.0, 0.003)):
+        segments[f"T{i}"] = {"name": "Stub", "ward_id": "W01", "type": "Residential",
+                             "lat": 28.5835, "lng": 77.2000 + dlng, "length_km": 0.1}
+    net = RoadNetwork(segments, tolerance_km=0.2)
+    # ~0.35 km from every stub (beyond their 0.25 km reach), 1.5 km from S1 (within 2.2 km)
+    assert net.snap_issue("g", "h", (28.5865, 77.2000), (28.5865, 77.2001)) == ["S1"]
+
+
+def test_registry_snaps_to_same_ward_segment():
+    net = RoadNetwork(ROAD_SEGMENTS)
+    for sid, seg in ROAD_SEGMENTS.items():
+        pt = (seg["lat"], seg["lng"])
+        assert net.snap_issue(sid, sid, pt, pt)[0] == sid
@@ -0,0 +1,54 @@
+import sys
+import os
+import random
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config.wards import WARDS
+from config.dustbins import DUSTBINS
+from stream_engine.rollup import RollupTree
+
+STATES = ["Clear", "Reported", "Escalated", "Critical", "Cleared"]
+
+
+def _random_leaves(rng):
+    bins = [{"dustbin_id": did, "ward_id": d["ward_id"], "state": rng.choice(STATES),
+             "report_count": rng.randint(0, 6)} for did, d in DUSTBINS.items()]
+    wards = [{"ward_id": wid, "risk_score": rng.randint(0, 100)} for wid in WARDS]
+    roads = [{"ward_id": wid, "risk_score": rng.randint(0, 100)} for wid in WARDS]
+    return bins, wards, roads
+
+
+def test_incremental_rollup_matches_full_recompute():
+    rng = random.Random(11)
+    tree = RollupTree(WARDS, DUSTBINS)
+    bins, wards, roads = _random_leaves(rng)
+    for _ in range(20):
+        # Mutate a few leaves, as one recompute would
+        for ds in rng.sample(bins, 3):
+            ds["state"], ds["report_count"] = rng.choice(STATES), rng.randint(0, 6)
+        rng.choice(wards)["risk_score"] = rng.randint(0, 100)
+        zones, city = tree.refresh(bins, wards, roads)
+
+    assert city["waste_index"] == round(sum(w["risk_score"] for w in wards) / len(wards), 1)
+    assert city["road_index"] == round(sum(r["risk_score"] for r in roads) / len(roads), 1)
+    assert city["reports"] == sum(d["report_count"] for d in bins)
+    for z in zones:
+        members = [w for w in wards if WARDS[w["ward_id"]]["zone"] == z["zone"]]
+        member_ids = {w["ward_id"] for w in members}
+        zone_bins = [d for d in bins if d["ward_id"] in member_ids]
+        assert z["waste_index"] == round(sum(w["risk_score"] for w in members) / len(members), 1)
+        assert z["bins_critical"] == sum(d["state"] == "Critical" for d in zone_bins)
+        assert z["top_offenders"][0]["risk_score"] == max(w["risk_score"] for w in members)
+
+
+def test_unchanged_leaves_do_not_propagate():
+    tree = RollupTree(WARDS, DUSTBINS)
+    bins, wards, roads = _random_leaves(random.Random(3))
+    tree.refresh(bins, wards, roads)
+    before = dict(tree.stats)
+    bins[0]["state"] = "Critical" if bins[0]["state"] != "Critical" else "Clear"
+    tree.refresh(bins, wards, roads)
+    assert tree.stats["leaf_updates"] - before["leaf_updates"] == 1
+    assert tree.stats["node_updates"] - before["node_updates"] == 3      # ward, zone, city
+    assert tree.stats["zone_rebuilds"] - before["zone_rebuilds"] == 1
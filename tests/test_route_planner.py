@@ -0,0 +1,94 @@
+import sys
+import os
+import random
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config.dustbins import DUSTBINS
+from config.wards import WARDS
+from config.settings import ROUTE_STATE_WEIGHTS
+from stream_engine.geo import haversine_matrix_km
+from stream_engine.route_planner import RoutePlanner, local_search, tour_cost
+
+
+def _planner():
+    return RoutePlanner(DUSTBINS, WARDS, ROUTE_STATE_WEIGHTS, 240, 1.3, 0.25, 1.0, 50, 10)
+
+
+def _states(overrides):
+    return [{"dustbin_id": did, "ward_id": info["ward_id"], "state": overrides.get(did, "Clear")}
+            for did, info in DUSTBINS.items()]
+
+
+def test_every_stop_routed_once_within_ward_vans():
+    w01 = [d for d, i in DUSTBINS.items() if i["ward_id"] == "W01"]
+    states = _states({w01[0]: "Critical", w01[1]: "Escalated", w01[2]: "Reported", w01[3]: "Critical"})
+    routes = _planner().update(states, [])
+    visited = [s["dustbin_id"] for r in routes for s in r["stops"]]
+    assert sorted(visited) == sorted(w01[:4])
+    assert all(r["ward_id"] == "W01" for r in routes)
+    assert len(routes) <= WARDS["W01"]["vans"]
+    for r in routes:
+        arrivals = [s["arrival_km"] for s in r["stops"]]
+        assert arrivals == sorted(arrivals) and r["distance_km"] == arrivals[-1]
+
+
+def test_collection_splices_incrementally():
+    w02 = [d for d, i in DUSTBINS.items() if i["ward_id"] == "W02"]
+    planner = _planner()
+    overrides = {d: "Critical" for d in w02}
+    before = planner.update(_states(overrides), [])
+    assert planner.stats["full_solves"] == 1
+
+    planner.update(_states(overrides), [])
+    assert planner.stats["reused"] == 1
+
+    collected = before[0]["stops"][0]["dustbin_id"]
+    overrides[collected] = "Cleared"
+    after = planner.update(_states(overrides), [])
+    assert planner.stats == {**planner.stats, "full_solves": 1, "incremental": 1}
+    visited = {s["dustbin_id"] for r in after for s in r["stops"]}
+    assert collected not in visited and visited == set(w02) - {collected}
+
+
+def test_road_issue_inflates_edge():
+    planner = _planner()
+    w03 = [d for d, i in DUSTBINS.items() if i["ward_id"] == "W03"]
+    ids, pos, base = planner.matrix.block("W03")
+    issue = ((w03[0], w03[1], 5),)
+    _, _, weighted = planner.matrix.weighted("W03", issue)
+    a, b = pos[w03[0]], pos[w03[1]]
+    assert weighted[a, b] == base[a, b] * 2.25 == weighted[b, a]
+    assert weighted[0, a] == base[0, a]
+
+
+def _random_ward(n, seed=7):
+    rng = random.Random(seed)
+    lats = [28.6] + [28.6 + rng.uniform(-0.05, 0.05) for _ in range(n)]
+    lngs = [77.2] + [77.2 + rng.uniform(-0.05, 0.05) for _ in range(n)]
+    dist = haversine_matrix_km(lats, lngs, lats, lngs).tolist()
+    weights = {s: rng.choice((1.0, 2.0, 3.5)) for s in range(1, n + 1)}
+    return dist, weights
+
+
+def test_local_search_only_applies_improving_moves():
+    dist, weights = _random_ward(30)
+    stops = list(weights)
+    tours = [stops[:12], stops[12:]]
+    before = sum(tour_cost(t, dist, weights, 1.0) for t in tours)
+    moves = local_search(tours, dist, weights, 1.0, time.perf_counter() + 5)
+    after = sum(tour_cost(t, dist, weights, 1.0) for t in tours)
+    assert moves > 0 and after < before
+    assert sorted(s for t in tours for s in t) == stops
+    # Converged: a second pass finds nothing
+    assert local_search(tours, dist, weights, 1.0, time.perf_counter() + 5) == 0
+
+
+def test_large_ward_stays_within_time_budget():
+    dist, weights = _random_ward(250)
+    tours = [sorted(weights)]
+    started = time.perf_counter()
+    local_search(tours, dist, weights, 1.0, started + 0.010)
+    assert time.perf_counter() - started < 0.010 + 0.015
+    assert sorted(tours[0]) == sorted(weights)
@@ -0,0 +1,47 @@
+import sys
+import os
+import json
+import uuid
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from api.snapshot_bus import SharedSnapshotBus
+
+
+def test_single_reader_publishes_to_other_workers(tmp_path):
+    """Only one worker wins the reader lock; the others pull the same bytes."""
+    name = f"iw_test_{uuid.uuid4().hex[:8]}"
+    reader = SharedSnapshotBus({}, name=name, lock_dir=str(tmp_path))
+    worker = SharedSnapshotBus({}, name=name, lock_dir=str(tmp_path))
+    try:
+        assert reader.try_become_reader() is True
+        assert worker.try_become_reader() is False
+
+        raw = json.dumps({"city_waste_index": 42, "pad": "x" * (2 << 20)}).encode()
+        reader.publish(7, raw)
+        assert worker.poll() is True
+        assert worker.current().version == 7
+        assert worker.current().raw == raw
+        assert worker.current().state["city_waste_index"] == 42
+        # Same version again → nothing copied
+        assert worker.poll() is False
+    finally:
+        reader.close()
+        worker.close()
+    assert not os.path.exists(reader.path)
+
+
+def test_last_worker_out_removes_the_segment(tmp_path):
+    """The segment survives while any worker still maps it, then is unlinked."""
+    name = f"iw_test_{uuid.uuid4().hex[:8]}"
+    reader = SharedSnapshotBus({}, name=name, lock_dir=str(tmp_path))
+    worker = SharedSnapshotBus({}, name=name, lock_dir=str(tmp_path))
+    reader.try_become_reader()
+    reader.publish(3, b'{"ok": 1}')
+    reader.close()
+    assert os.path.exists(reader.path)
+    assert worker.try_become_reader() is True   # leadership passes on
+    assert worker.poll() is True and worker.current().version == 3
+    worker.close()
+    assert not os.path.exists(worker.path)
+    assert not os.path.exists(worker.lock_path)
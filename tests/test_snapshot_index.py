@@ -0,0 +1,65 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from api.snapshot_index import SnapshotIndex, QueryError, encode_cursor
+from config.dustbins import DUSTBINS
+from config.wards import WARDS
+
+STATE = {
+    "dustbin_states": [
+        {"dustbin_id": "MCD-W01-001", "ward_id": "W01", "state": "Critical", "report_count": 6, "max_overflow": 5},
+        {"dustbin_id": "MCD-W01-002", "ward_id": "W01", "state": "Reported", "report_count": 1, "max_overflow": 2},
+        {"dustbin_id": "MCD-W04-001", "ward_id": "W04", "state": "Escalated", "report_count": 3, "max_overflow": 4},
+    ],
+    "road_issues": [],
+    "priority_queue": [],
+}
+
+
+def test_filters_use_indexes_and_bbox():
+    """Ward/state filters intersect; bbox keeps only bins inside the box."""
+    index = SnapshotIndex(1, STATE, DUSTBINS, WARDS)
+    page, _, total = index.dustbins.query({"ward_id": ["W01"], "state": ["Critical", "Reported"]})
+    assert total == 2
+    assert {d["dustbin_id"] for d in page} == {"MCD-W01-001", "MCD-W01-002"}
+
+    # Tight box around MCD-W01-001 (28.7496, 77.0565)
+    page, _, _ = index.dustbins.query(bbox=(28.74, 77.05, 28.76, 77.06))
+    assert [d["dustbin_id"] for d in page] == ["MCD-W01-001"]
+    assert page[0]["max_overflow"] == 5
+
+
+def test_keyset_pagination_walks_every_record_once():
+    """Descending pages chained by next_cursor cover the registry with no repeats."""
+    index = SnapshotIndex(1, STATE, DUSTBINS, WARDS)
+    seen, cursor = [], None
+    while True:
+        page, cursor, total = index.dustbins.query(sort="-report_count", cursor=cursor, limit=7)
+        seen.extend(d["dustbin_id"] for d in page)
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == total == len(DUSTBINS)
+    assert seen[:3] == ["MCD-W01-001", "MCD-W04-001", "MCD-W01-002"]
+
+
+def test_invalid_sort_is_rejected():
+    index = SnapshotIndex(1, STATE, DUSTBINS, WARDS)
+    try:
+        index.dustbins.query(sort="street")
+    except QueryError:
+        return
+    raise AssertionError("expected QueryError")
+
+
+def test_tampered_cursor_is_rejected():
+    """A cursor whose value type doesn't match its sort kind is a 400, not a bisect TypeError."""
+    index = SnapshotIndex(1, STATE, DUSTBINS, WARDS)
+    for sort, key in (("report_count", [[0, "abc"], "x"]), (None, [[1, 5], "x"]),
+                      (None, [[1, "a"], 7]), (None, [[2, "a"], "x"])):
+        try:
+            index.dustbins.query(sort=sort, cursor=encode_cursor(key))
+        except QueryError:
+            continue
+        raise AssertionError(f"expected QueryError for {key}")
@@ -0,0 +1,103 @@
+import sys
+import os
+import copy
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from stream_engine.snapshot_journal import SnapshotJournal, apply_delta, diff_snapshot
+
+
+def _snapshot(version, scores, extra=None):
+    snap = {
+        "version": version,
+        "ward_risks": [{"ward_id": wid, "risk_score": s} for wid, s in scores.items()],
+        "priority_queue": [{"id": wid} for wid, s in scores.items() if s > 50],
+        "timestamp": f"t{version}",
+    }
+    snap.update(extra or {})
+    return snap
+
+
+def test_delta_roundtrip_lists_only_changed_items():
+    old = _snapshot(1, {"W01": 10, "W02": 20, "W03": 30}, {"weather_status": {"ok": 1}})
+    new = _snapshot(2, {"W03": 60, "W01": 10, "W04": 5})
+    delta = diff_snapshot(old, new)
+    assert delta["lists"]["ward_risks"]["up"] == [{"ward_id": "W03", "risk_score": 60},
+                                                  {"ward_id": "W04", "risk_score": 5}]
+    assert delta["lists"]["ward_risks"]["rm"] == ["W02"]
+    assert delta["del"] == ["weather_status"]
+    assert apply_delta(copy.deepcopy(old), delta) == new
+
+
+def test_queue_issue_route_zone_lists_are_keyed():
+    old = _snapshot(1, {"W01": 60, "W02": 70, "W03": 80}, {
+        "road_issues": [{"event_id": "RI-1", "severity": 2}, {"event_id": "RI-2", "severity": 3}],
+        "van_routes": [{"route_id": "W01-V1", "stops": [1, 2]}],
+        "zone_risks": [{"zone": "North", "risk": 10}, {"zone": "South", "risk": 20}],
+    })
+    new = copy.deepcopy(old)
+    new["priority_queue"] = [{"id": "W03"}, {"id": "W01"}, {"id": "W02"}]     # reordered only
+    new["road_issues"][1]["severity"] = 5
+    new["zone_risks"][0]["risk"] = 11
+    delta = diff_snapshot(old, new)
+    assert set(delta) == {"lists"}
+    assert delta["lists"]["priority_queue"] == {"up": [], "order": ["W03", "W01", "W02"]}
+    assert delta["lists"]["road_issues"] == {"up": [{"event_id": "RI-2", "severity": 5}]}
+    assert delta["lists"]["zone_risks"] == {"up": [{"zone": "North", "risk": 11}]}
+    assert apply_delta(copy.deepcopy(old), delta) == new
+
+    # Repeated ids can't be diffed by id: replaced whole
+    new["road_issues"].append({"event_id": "RI-2", "severity": 1})
+    delta = diff_snapshot(old, new)
+    assert delta["set"]["road_issues"] == new["road_issues"]
+    assert apply_delta(copy.deepcopy(old), delta) == new
+
+
+def test_state_at_replays_deltas_across_keyframes(tmp_path):
+    journal = SnapshotJournal(str(tmp_path), keyframe_every=3, keyframe_sec=3600)
+    snaps = [_snapshot(v, {"W01": v * 10, "W02": 5}) for v in range(1, 9)]
+    for i, snap in enumerate(snaps):
+        journal.append(snap, ts=1000 + i * 10)
+    assert len(journal.segments()) == 3
+    assert journal.stats["keyframes"] == 3 and journal.stats["deltas"] == 5
+
+    assert journal.state_at(ts=1000 + 4 * 10 + 5) == snaps[4]
+    assert journal.state_at(ts=1000 + 7 * 10) == snaps[7]
+    assert journal.state_at(version=2) == snaps[1]
+    assert journal.state_at(ts=999) is None
+    assert journal.state_at(version=99) is None
+
+    reader = SnapshotJournal(str(tmp_path))
+    assert reader.state_at(ts=1000 + 35) == snaps[3]
+
+
+def test_retention_keeps_segment_covering_cutoff(tmp_path):
+    journal = SnapshotJournal(str(tmp_path), keyframe_every=1, retention_sec=100)
+    for i in range(5):
+        journal.append(_snapshot(i + 1, {"W01": i}), ts=1000 + i * 60)
+    # cutoff = 1240 - 100 = 1140 → the segment starting 1120 still covers it
+    assert [s[0] for s in journal.segments()] == [1120.0, 1180.0, 1240.0]
+    assert journal.state_at(ts=1150)["version"] == 3
+
+
+def test_segment_pruned_between_listing_and_open(tmp_path):
+    journal = SnapshotJournal(str(tmp_path), keyframe_every=2, keyframe_sec=3600)
+    snaps = [_snapshot(v, {"W01": v}) for v in range(1, 5)]
+    for i, snap in enumerate(snaps):
+        journal.append(snap, ts=1000 + i * 10)
+    listed = journal.segments()
+    real_segments = journal.segments
+    calls = []
+
+    def racing_segments():
+        # First listing is taken just before the engine prunes the oldest segment
+        calls.append(1)
+        if len(calls) == 1:
+            os.unlink(listed[0][2])
+            return listed
+        return real_segments()
+
+    journal.segments = racing_segments
+    assert journal.state_at(ts=1005) is None           # now older than the journal reaches
+    assert len(calls) == 2
+    assert journal.state_at(ts=1025) == snaps[2]
@@ -0,0 +1,82 @@
+import sys
+import os
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import aiohttp
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config.wards import WARDS
+from config.dustbins import DUSTBINS
+from stream_engine.spatial_weather import RainfallField, StationCache, station_points, poll_stations
+
+STATIONS = station_points(WARDS)
+
+
+class _StandInCurrent(BaseHTTPRequestHandler):
+    """Local stand-in for current.json: rain falls only north of 28.70°."""
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        lat = float(parse_qs(urlparse(self.path).query)["q"][0].split(",")[0])
+        if lat > 28.70 and type(self).hits % 5 == 0:
+            self.send_response(503)
+            self.end_headers()
+            return
+        body = json.dumps({"current": {"precip_mm": 30.0 if lat > 28.70 else 0.0}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_idw_reproduces_stations_and_skips_missing():
+    field = RainfallField(STATIONS, {"ward": WARDS, "dustbin": DUSTBINS})
+    readings = {s["id"]: float(i) for i, s in enumerate(STATIONS)}
+    out = field.interpolate(readings)
+    for s in STATIONS:
+        assert out["ward"][s["id"]] == readings[s["id"]]
+    assert len(out["dustbin"]) == len(DUSTBINS)
+    assert all(0 <= v <= len(STATIONS) for v in out["dustbin"].values())
+
+    # A ward whose station has no reading is interpolated from its neighbours
+    partial = dict(readings)
+    missing = STATIONS[0]["id"]
+    del partial[missing]
+    assert 0 < field.interpolate(partial)["ward"][missing] < len(STATIONS)
+    assert field.interpolate({}) == {}
+
+
+def test_concurrent_poll_caches_and_keeps_last_good_reading():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInCurrent)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v1/current.json"
+    cache = StationCache(ttl_sec=300, stale_sec=1800)
+
+    async def scenario():
+        async with aiohttp.ClientSession() as session:
+            first = await poll_stations(session, url, "k", STATIONS, cache, timeout=5)
+            hits_after_first = _StandInCurrent.hits
+            second = await poll_stations(session, url, "k", STATIONS, cache, timeout=5)
+            return first, second, hits_after_first
+
+    try:
+        (readings, errors, _), (again, _, _), hits = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+
+    assert hits == len(STATIONS)
+    # Stations that failed are retried; fresh ones are served from the cache
+    assert _StandInCurrent.hits == hits + len(errors)
+    assert len(readings) + len(errors) == len(STATIONS)
+    north = [s["id"] for s in STATIONS if s["lat"] > 28.70 and s["id"] in again]
+    assert north and all(again[sid] == 30.0 for sid in north)
@@ -0,0 +1,33 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pathway_engine as engine
+from benchmarks.bench_engine import parse_scale, run_scale
+from benchmarks.synthetic_city import generate_city, generate_events, write_events
+
+
+def test_generator_is_seeded_and_uses_registry_schema(tmp_path):
+    wards, dustbins, segments = generate_city(9, 4, seed=3)
+    assert (wards, dustbins, segments) == generate_city(9, 4, seed=3)
+    assert len(wards) == 9 and len(dustbins) == 36 and len(segments) == 9
+    assert {d["ward_id"] for d in dustbins.values()} == set(wards)
+    assert set(engine.WARDS["W01"]) <= set(wards["W01"])
+
+    events = generate_events(wards, dustbins, 400, hours=1, seed=3, hotspot_frac=0.2, hotspot_share=0.8)
+    assert events == generate_events(wards, dustbins, 400, hours=1, seed=3, hotspot_frac=0.2, hotspot_share=0.8)
+    assert sum(len(events[s]) for s in ("waste", "road", "vans")) == 400
+    hot = sum(dustbins[e["dustbin_id"]]["ward_id"] == "W01" for e in events["waste"])
+    assert hot > len(events["waste"]) * 0.3   # 1 hotspot ward of 9 gets most reports
+
+    assert write_events(str(tmp_path), events, events_per_file=50) == sum(
+        -(-len(events[s]) // 50) for s in ("waste", "road", "vans"))
+
+
+def test_bench_scale_reports_every_stage(engine_state):
+    result = run_scale(parse_scale("4x3:120"), runs=2, seed=1, events_per_file=10, hours=1)
+    assert result["dustbins"] == 12 and result["snapshots_written"] == 2
+    for stage in ("read", "parse", "aggregate", "score", "queue", "serialize", "write"):
+        assert stage in result["stage_ms_median"]
+    assert result["memory"]["max_rss_mb"] > 0
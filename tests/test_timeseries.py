@@ -0,0 +1,58 @@
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from stream_engine.timeseries import TimeSeriesStore
+
+TIERS = {"1m": (60, 30 * 86400), "15m": (900, 90 * 86400), "1h": (3600, 365 * 86400)}
+T0 = 1_700_000_000 - 1_700_000_000 % 3600
+
+
+def test_tiers_downsample_and_reader_sees_writes(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), ["city.waste_index", "W01.waste_score"], TIERS)
+    reader = TimeSeriesStore.open_readonly(str(tmp_path))
+    for i, score in enumerate([10, 20, 30, 40]):
+        store.record(T0 + i * 30, {"city.waste_index": score, "W01.waste_score": score * 2})
+
+    minute = reader.query(["W01.waste_score"], T0, T0 + 119, tier="1m")
+    assert minute["t"] == [T0, T0 + 60]
+    assert minute["series"]["W01.waste_score"] == {"mean": [30.0, 70.0], "min": [20.0, 60.0],
+                                                   "max": [40.0, 80.0]}
+    hour = reader.query(["city.waste_index"], T0, T0 + 3599, tier="1h")
+    assert hour["t"] == [T0]
+    assert hour["series"]["city.waste_index"]["mean"] == [25.0]
+    # auto: a day fits in 1m buckets, a week in 15m, a year only in 1h
+    assert reader.query(["city.waste_index"], T0, T0 + 86400)["resolution"] == "1m"
+    assert reader.query(["city.waste_index"], T0, T0 + 7 * 86400)["resolution"] == "15m"
+    assert reader.query(["city.waste_index"], T0 - 300 * 86400, T0)["resolution"] == "1h"
+
+
+def test_ring_is_bounded_and_overwrites_oldest(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), ["a"], {"1m": (60, 300)})   # 5 slots
+    for i in range(8):
+        store.record(T0 + i * 60, {"a": i})
+    result = store.query(["a"], T0, T0 + 7 * 60, tier="1m")
+    assert result["series"]["a"]["mean"] == [3.0, 4.0, 5.0, 6.0, 7.0]
+    assert os.path.getsize(tmp_path / "1m.sum.f32") == 5 * 4
+    # Same layout → existing files are reused, not reset
+    reopened = TimeSeriesStore(str(tmp_path), ["a"], {"1m": (60, 300)})
+    assert reopened.query(["a"], T0, T0 + 7 * 60, tier="1m")["t"][-1] == T0 + 7 * 60
+
+
+def test_thirty_day_query_is_fast(tmp_path):
+    series = [f"W{i:02d}.waste_score" for i in range(1, 13)]
+    store = TimeSeriesStore(str(tmp_path), series, TIERS)
+    one_minute = store.tiers[0]
+    buckets = (T0 - 30 * 86400) // 60 + 1 + np.arange(one_minute.slots)
+    one_minute.bucket[buckets % one_minute.slots] = buckets
+    one_minute.count[:] = 1
+
+    started = time.perf_counter()
+    result = store.query(series, T0 - 30 * 86400, T0, tier="1m")
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    assert len(result["t"]) == one_minute.slots
+    assert elapsed_ms < 500
@@ -0,0 +1,134 @@
+import sys
+import os
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiohttp
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from stream_engine.spatial_weather import StationCache
+from stream_engine.weather_poller import CircuitBreaker, WeatherPoller, backoff_delay
+
+STATIONS = [{"id": "A", "lat": 28.70, "lng": 77.10}, {"id": "B", "lat": 28.60, "lng": 77.30}]
+
+
+class _StandInCurrent(BaseHTTPRequestHandler):
+    """current.json stand-in with ETag support and a switchable outage."""
+    hits = 0
+    not_modified = 0
+    down = False
+    precip = 2.0
+
+    def do_GET(self):
+        cls = type(self)
+        cls.hits += 1
+        if cls.down:
+            self.send_response(503)
+            self.end_headers()
+            return
+        etag = f'"{cls.precip}"'
+        if self.headers.get("If-None-Match") == etag:
+            cls.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps({"current": {"precip_mm": cls.precip}}).encode()
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_breaker_opens_half_opens_and_backs_off():
+    cb = CircuitBreaker(failure_threshold=2, reset_sec=10, max_reset_sec=30)
+    cb.record_failure(0)
+    assert cb.allow(1) and cb.state == "closed"
+    cb.record_failure(1)
+    assert cb.state == "open" and not cb.allow(5)
+    assert cb.allow(12) and cb.state == "half_open"
+    cb.record_failure(12)                     # failed probe → open again, longer
+    assert cb.state == "open" and cb.opened_until == 32
+    assert cb.allow(33)
+    cb.record_success()
+    assert cb.state == "closed" and cb.reset_sec == 10
+    assert all(0 <= backoff_delay(a, 5, 60) <= min(60, 5 * 2 ** a) for a in range(8))
+
+
+def test_publishes_on_change_only_and_stops_hammering_when_down():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInCurrent)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v1/current.json"
+    published = []
+    poller = WeatherPoller(
+        url, "k", STATIONS,
+        cache=StationCache(ttl_sec=0, stale_sec=3600),     # every round is due
+        interpolate=lambda r: {"rainfall_mm_hr": max(r.values(), default=0.0), "stations_ok": len(r)},
+        publish=published.append,
+        poll_sec=60, breaker=CircuitBreaker(2, 300, 600), retry_base_sec=1,
+    )
+
+    async def scenario():
+        async with aiohttp.ClientSession() as session:
+            await poller.poll_once(session)             # 200 → publish
+            await poller.poll_once(session)             # 304 → unchanged
+            _StandInCurrent.precip = 7.5
+            await poller.poll_once(session)             # 200 → publish
+            _StandInCurrent.down = True
+            await poller.poll_once(session)
+            await poller.poll_once(session)             # second failed round → open
+            hits = _StandInCurrent.hits
+            delay = await poller.poll_once(session)     # open: no upstream call
+            return hits, delay
+
+    try:
+        hits, delay = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+
+    assert [p["rainfall_mm_hr"] for p in published] == [2.0, 7.5]
+    assert _StandInCurrent.not_modified == 2
+    assert poller.status["unchanged"] >= 1
+    assert poller.breaker.state == "open"
+    assert _StandInCurrent.hits == hits and delay > 200
+
+
+def test_outage_past_stale_window_publishes_unavailable_once():
+    """When no station has a usable reading the last rainfall is replaced, not kept."""
+    _StandInCurrent.down, _StandInCurrent.precip = False, 4.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInCurrent)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v1/current.json"
+    published = []
+    poller = WeatherPoller(
+        url, "k", STATIONS,
+        cache=StationCache(ttl_sec=0, stale_sec=0),        # readings never outlive their round
+        interpolate=lambda r: {"rainfall_mm_hr": max(r.values(), default=0.0), "stations_ok": len(r)},
+        publish=published.append,
+        poll_sec=60, breaker=CircuitBreaker(2, 300, 600), retry_base_sec=1,
+    )
+
+    async def scenario():
+        async with aiohttp.ClientSession() as session:
+            poller.cache.stale_sec = 3600
+            await poller.poll_once(session)             # 4.0 mm/hr
+            poller.cache.stale_sec = 0
+            _StandInCurrent.down = True
+            for _ in range(3):                          # fail, fail → open, open
+                await poller.poll_once(session)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        _StandInCurrent.down = False
+        server.shutdown()
+
+    assert [(p["weather_source"], p["rainfall_mm_hr"]) for p in published] == [
+        ("weatherapi.com", 4.0), ("unavailable", 0.0)]
+    assert poller.status["available"] is False and poller.breaker.state == "open"